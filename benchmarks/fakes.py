@@ -0,0 +1,935 @@
+"""
+In-process stand-ins for the pipeline's external services.
+
+Each fake models the latency of the real service with a configurable
+LatencyModel and counts the calls made to it, so benchmarks can report
+round-trips alongside timings:
+
+- FakeRedis: the subset of redis-py used by the app, with pipelines
+- FakeQuickBooksAPI: the QuickBooks REST endpoints, served from a synthetic book
+- FakeGemini: document extraction returning synthetic donations
+- LatencyStorage: local file storage with S3-like latency
+"""
+import fnmatch
+import functools
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import redis
+
+from src.storage import LocalStorage
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph",
+    "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Christopher", "Nancy",
+    "Daniel", "Lisa", "Matthew", "Betty", "Anthony", "Margaret", "Mark", "Sandra",
+    "Donald", "Ashley", "Steven", "Kimberly", "Paul", "Emily", "Andrew", "Donna",
+    "Joshua", "Michelle", "Kenneth", "Dorothy", "Kevin", "Carol", "Brian",
+    "Amanda", "George", "Melissa", "Edward", "Deborah", "Ronald", "Stephanie",
+    "Timothy", "Rebecca", "Jason", "Sharon", "Jeffrey", "Laura", "Ryan", "Cynthia",
+]  # fmt: skip
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
+    "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill",
+    "Flores", "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell",
+    "Mitchell", "Carter", "Roberts", "Gomez", "Phillips", "Evans", "Turner", "Diaz",
+    "Parker", "Cruz", "Edwards", "Collins", "Reyes", "Stewart", "Morris", "Morales",
+    "Murphy", "Cook", "Rogers", "Gutierrez", "Ortiz", "Morgan", "Cooper", "Peterson",
+    "Bailey", "Reed", "Kelly", "Howard", "Ramos", "Kim", "Cox", "Ward", "Richardson",
+]  # fmt: skip
+
+ORGANIZATION_SUFFIXES = ["Foundation", "Family Trust", "Church", "Ministries"]
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Elm St", "Park Blvd"]
+CITIES = [("Springfield", "IL"), ("Madison", "WI"), ("Franklin", "TN"), ("Salem", "OR")]
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a compact spec string.
+
+    Specs are "fixed:MS", "uniform:LOW_MS,HIGH_MS" or
+    "lognormal:MEDIAN_MS,SIGMA".
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        """
+        Parse a latency spec.
+
+        Args:
+            spec: Distribution spec string
+            seed: Optional seed for reproducible samples
+        """
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v] if params else [0.0]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}[kind]
+        if len(values) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s): {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draw one latency in seconds."""
+        with self._lock:
+            if self.kind == "fixed":
+                ms = self.values[0]
+            elif self.kind == "uniform":
+                ms = self._random.uniform(self.values[0], self.values[1])
+            else:
+                median, sigma = self.values
+                ms = median * self._random.lognormvariate(0, sigma)
+        return ms / 1000.0
+
+    def sleep(self) -> None:
+        """Sleep for one sampled latency."""
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _command(method: Callable) -> Callable:
+    """Count a FakeRedis command as a round-trip unless it runs in a pipeline."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not getattr(self._batching, "active", False):
+            with self._lock:
+                self.round_trips += 1
+                self.command_counts[method.__name__] += 1
+            self.latency.sleep()
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class FakePipeline:
+    """Buffers FakeRedis commands and runs them in a single round-trip."""
+
+    def __init__(self, client: "FakeRedis"):
+        """Create a pipeline bound to a FakeRedis client."""
+        self.client = client
+        self.commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        """Queue any FakeRedis command for execute()."""
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        """Run the queued commands as one round-trip."""
+        client = self.client
+        with client._lock:
+            client.round_trips += 1
+            client.command_counts["pipeline"] += 1
+        client.latency.sleep()
+        client._batching.active = True
+        try:
+            return [method(*args, **kwargs) for method, args, kwargs in self.commands]
+        finally:
+            client._batching.active = False
+            self.commands = []
+
+    def __enter__(self):
+        """Support `with client.pipeline() as pipe`."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Discard unexecuted commands."""
+        self.commands = []
+
+
+class FakeRedis:
+    """
+    In-process Redis stand-in with decode_responses=True semantics.
+
+    Implements the commands used by the job queue, checkpoint store, session
+    backend and customer caches. Every command (or pipeline execute) counts
+    as one round-trip and sleeps for one sample of the latency model.
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        """
+        Create an empty fake Redis.
+
+        Args:
+            latency: Per round-trip latency model
+        """
+        self.latency = latency or LatencyModel()
+        self.round_trips = 0
+        self.command_counts: Counter = Counter()
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._batching = threading.local()
+
+    def reset_stats(self) -> None:
+        """Reset round-trip counters."""
+        with self._lock:
+            self.round_trips = 0
+            self.command_counts = Counter()
+
+    def peek(self, name: str) -> Any:
+        """Read a key's raw value without counting a round-trip."""
+        with self._lock:
+            return self._data.get(name) if self._live(name) else None
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        """Store values the way redis-py returns them with decode_responses."""
+        if isinstance(value, bytes):
+            return value.decode()
+        return str(value)
+
+    def _live(self, name: str) -> bool:
+        """Drop the key if expired; return whether it exists."""
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return name in self._data
+
+    def _get_typed(self, name: str, factory: Callable) -> Any:
+        """Fetch a container value, creating it if missing."""
+        if not self._live(name):
+            self._data[name] = factory()
+        return self._data[name]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        """Create a pipeline."""
+        return FakePipeline(self)
+
+    @_command
+    def ping(self) -> bool:
+        """Check the connection."""
+        return True
+
+    @_command
+    def get(self, name: str) -> Optional[str]:
+        """Get a string value."""
+        return self._data.get(name) if self._live(name) else None
+
+    @_command
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get several string values."""
+        names = list(keys)
+        return [self._data.get(n) if self._live(n) else None for n in names]
+
+    @_command
+    def set(
+        self, name: str, value: Any, ex: Optional[int] = None, nx: bool = False
+    ) -> Optional[bool]:
+        """Set a string value."""
+        if nx and self._live(name):
+            return None
+        self._data[name] = self._encode(value)
+        self._expires.pop(name, None)
+        if ex:
+            self._expires[name] = time.time() + ex
+        return True
+
+    @_command
+    def setex(self, name: str, time_seconds: int, value: Any) -> bool:
+        """Set a string value with expiry."""
+        self._data[name] = self._encode(value)
+        self._expires[name] = time.time() + time_seconds
+        return True
+
+    @_command
+    def incr(self, name: str, amount: int = 1) -> int:
+        """Increment an integer string value."""
+        value = int(self._data.get(name, 0) if self._live(name) else 0) + amount
+        self._data[name] = str(value)
+        return value
+
+    @_command
+    def delete(self, *names: str) -> int:
+        """Delete keys."""
+        removed = 0
+        for name in names:
+            if self._live(name):
+                removed += 1
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return removed
+
+    @_command
+    def rename(self, src: str, dst: str) -> bool:
+        """Rename a key, replacing the destination."""
+        if not self._live(src):
+            raise redis.ResponseError("no such key")
+        self._data[dst] = self._data.pop(src)
+        self._expires.pop(dst, None)
+        if src in self._expires:
+            self._expires[dst] = self._expires.pop(src)
+        return True
+
+    @_command
+    def exists(self, *names: str) -> int:
+        """Count existing keys."""
+        return sum(1 for name in names if self._live(name))
+
+    @_command
+    def expire(self, name: str, time_seconds: int) -> bool:
+        """Set a key's expiry."""
+        if not self._live(name):
+            return False
+        self._expires[name] = time.time() + time_seconds
+        return True
+
+    @_command
+    def ttl(self, name: str) -> int:
+        """Seconds until a key expires (-1 if persistent, -2 if missing)."""
+        if not self._live(name):
+            return -2
+        if name not in self._expires:
+            return -1
+        return int(self._expires[name] - time.time())
+
+    @_command
+    def keys(self, pattern: str = "*") -> List[str]:
+        """List keys matching a glob pattern."""
+        return [
+            k for k in list(self._data) if self._live(k) and fnmatch.fnmatch(k, pattern)
+        ]
+
+    def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        """Iterate keys matching a glob pattern."""
+        return iter(self.keys(match))
+
+    @_command
+    def lpush(self, name: str, *values: Any) -> int:
+        """Push values onto the head of a list."""
+        items = self._get_typed(name, list)
+        for value in values:
+            items.insert(0, self._encode(value))
+        return len(items)
+
+    @_command
+    def rpush(self, name: str, *values: Any) -> int:
+        """Push values onto the tail of a list."""
+        items = self._get_typed(name, list)
+        items.extend(self._encode(value) for value in values)
+        return len(items)
+
+    @_command
+    def lrange(self, name: str, start: int, end: int) -> List[str]:
+        """Get a range of list items."""
+        items = self._data.get(name, []) if self._live(name) else []
+        return list(items[start:] if end == -1 else items[start : end + 1])
+
+    @_command
+    def llen(self, name: str) -> int:
+        """Get a list's length."""
+        return len(self._data.get(name, [])) if self._live(name) else 0
+
+    @_command
+    def lrem(self, name: str, count: int, value: Any) -> int:
+        """Remove occurrences of a value from a list."""
+        if not self._live(name):
+            return 0
+        items = self._data[name]
+        value = self._encode(value)
+        indexes = [i for i, item in enumerate(items) if item == value]
+        if count < 0:
+            indexes = indexes[::-1][:-count]
+        elif count > 0:
+            indexes = indexes[:count]
+        for i in sorted(indexes, reverse=True):
+            del items[i]
+        return len(indexes)
+
+    @_command
+    def brpoplpush(self, src: str, dst: str, timeout: int = 0) -> Optional[str]:
+        """Move the tail of one list to the head of another (never blocks)."""
+        if not self._live(src) or not self._data[src]:
+            return None
+        value = self._data[src].pop()
+        self._get_typed(dst, list).insert(0, value)
+        return value
+
+    @_command
+    def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Any = None,
+        mapping: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Set hash fields."""
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        table = self._get_typed(name, dict)
+        added = sum(1 for field in fields if self._encode(field) not in table)
+        for field, field_value in fields.items():
+            table[self._encode(field)] = self._encode(field_value)
+        return added
+
+    @_command
+    def hsetnx(self, name: str, key: str, value: Any) -> int:
+        """Set a hash field unless it exists."""
+        table = self._get_typed(name, dict)
+        if self._encode(key) in table:
+            return 0
+        table[self._encode(key)] = self._encode(value)
+        return 1
+
+    @_command
+    def hget(self, name: str, key: str) -> Optional[str]:
+        """Get a hash field."""
+        return self._data[name].get(self._encode(key)) if self._live(name) else None
+
+    @_command
+    def hmget(self, name: str, keys: List[str]) -> List[Optional[str]]:
+        """Get several hash fields."""
+        fields = list(keys)
+        table = self._data[name] if self._live(name) else {}
+        return [table.get(self._encode(field)) for field in fields]
+
+    @_command
+    def hgetall(self, name: str) -> Dict[str, str]:
+        """Get all hash fields."""
+        return dict(self._data[name]) if self._live(name) else {}
+
+    @_command
+    def hkeys(self, name: str) -> List[str]:
+        """Get hash field names."""
+        return list(self._data[name]) if self._live(name) else []
+
+    @_command
+    def hlen(self, name: str) -> int:
+        """Get the number of hash fields."""
+        return len(self._data[name]) if self._live(name) else 0
+
+    @_command
+    def hdel(self, name: str, *keys: str) -> int:
+        """Delete hash fields."""
+        if not self._live(name):
+            return 0
+        table = self._data[name]
+        return sum(1 for key in keys if table.pop(self._encode(key), None) is not None)
+
+    @_command
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        """Increment an integer hash field."""
+        table = self._get_typed(name, dict)
+        value = int(table.get(self._encode(key), 0)) + amount
+        table[self._encode(key)] = str(value)
+        return value
+
+    @_command
+    def sadd(self, name: str, *values: Any) -> int:
+        """Add members to a set."""
+        members = self._get_typed(name, set)
+        before = len(members)
+        members.update(self._encode(value) for value in values)
+        return len(members) - before
+
+    @_command
+    def srem(self, name: str, *values: Any) -> int:
+        """Remove members from a set."""
+        if not self._live(name):
+            return 0
+        members = self._data[name]
+        before = len(members)
+        members.difference_update(self._encode(value) for value in values)
+        return before - len(members)
+
+    @_command
+    def smembers(self, name: str) -> Set[str]:
+        """Get all members of a set."""
+        return set(self._data[name]) if self._live(name) else set()
+
+    @_command
+    def zadd(self, name: str, mapping: Dict[str, float]) -> int:
+        """Add scored members to a sorted set."""
+        zset = self._get_typed(name, dict)
+        added = sum(1 for member in mapping if self._encode(member) not in zset)
+        for member, score in mapping.items():
+            zset[self._encode(member)] = float(score)
+        return added
+
+    @_command
+    def zrem(self, name: str, *members: Any) -> int:
+        """Remove members from a sorted set."""
+        if not self._live(name):
+            return 0
+        zset = self._data[name]
+        return sum(
+            1 for member in members if zset.pop(self._encode(member), None) is not None
+        )
+
+    def _zsorted(self, name: str) -> List[tuple]:
+        """Sorted set members ordered by score."""
+        zset = self._data[name] if self._live(name) else {}
+        return sorted(zset.items(), key=lambda item: (item[1], item[0]))
+
+    @_command
+    def zrangebyscore(
+        self, name: str, min: Union[float, str], max: Union[float, str], **kwargs: Any
+    ) -> List[str]:
+        """Get sorted set members with scores in a range."""
+        low = float("-inf") if min == "-inf" else float(min)
+        high = float("inf") if max == "+inf" else float(max)
+        return [m for m, score in self._zsorted(name) if low <= score <= high]
+
+    @_command
+    def zrevrange(self, name: str, start: int, end: int, **kwargs: Any) -> List[str]:
+        """Get sorted set members by descending score."""
+        members = [m for m, _ in reversed(self._zsorted(name))]
+        return members[start:] if end == -1 else members[start : end + 1]
+
+    @_command
+    def publish(self, channel: str, message: Any) -> int:
+        """Publish a message (no subscribers)."""
+        return 0
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in."""
+
+    def __init__(self, status_code: int, payload: Dict[str, Any]):
+        """Create a JSON response."""
+        self.status_code = status_code
+        self._payload = payload
+        self.text = json.dumps(payload)
+        self.ok = status_code < 400
+
+    def json(self) -> Dict[str, Any]:
+        """Return the decoded JSON body."""
+        return self._payload
+
+
+class FakeQuickBooksAuth:
+    """QuickBooksAuth stand-in for an authenticated session."""
+
+    realm_id = "bench-realm"
+
+    def get_auth_status(self, session_id: str) -> Dict[str, Any]:
+        """Report every session as authenticated."""
+        return {"authenticated": True, "realm_id": self.realm_id}
+
+    def get_valid_access_token(self, session_id: str) -> str:
+        """Return a fixed access token."""
+        return "bench-access-token"
+
+    def refresh_access_token(self, session_id: str) -> Dict[str, Any]:
+        """Pretend to refresh tokens."""
+        return {"access_token": "bench-access-token"}
+
+
+class FakeQuickBooksAPI:
+    """
+    QuickBooks REST API stand-in serving a synthetic customer book.
+
+    Installed by patching requests' Session.request, so every code path
+    that talks to QuickBooks over HTTP (requests.request or a Session)
+    is served here. Like the real query API, queries return only active
+    customers unless they ask for `Active IN (true, false)`, and results
+    are capped at MAXRESULTS (default 100).
+    """
+
+    DEFAULT_MAX_RESULTS = 100
+    _ALL_STATUSES_RE = re.compile(
+        r"(?:^|\s+AND\s+)Active IN \(true,\s*false\)", re.IGNORECASE
+    )
+    _QUERY_RE = re.compile(
+        r"select \* from (?P<entity>\w+)(?: where (?P<where>.*?))?"
+        r"(?: orderby (?P<orderby>\w+))?"
+        r"(?: startposition (?P<start>\d+))?(?: maxresults (?P<max>\d+))?$",
+        re.IGNORECASE,
+    )
+
+    def __init__(
+        self, customers: List[Dict[str, Any]], latency: Optional[LatencyModel] = None
+    ):
+        """
+        Create the fake API.
+
+        Args:
+            customers: Synthetic QuickBooks customer records
+            latency: Per-request latency model
+        """
+        self.customers = {c["Id"]: c for c in customers}
+        self.latency = latency or LatencyModel()
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._next_id = max((int(c["Id"]) for c in customers), default=0) + 1
+
+    def reset_stats(self) -> None:
+        """Reset call counters."""
+        with self._lock:
+            self.calls = Counter()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> FakeResponse:
+        """Serve one HTTP request."""
+        self.latency.sleep()
+        path = urlparse(url).path
+        endpoint = path.split("/v3/company/", 1)[-1].split("/", 1)[-1]
+
+        if method.upper() == "GET" and endpoint == "query":
+            query = (kwargs.get("params") or {}).get("query", "")
+            return self._query(query)
+        if method.upper() == "GET" and endpoint.startswith("customer/"):
+            self._count("get_customer")
+            customer = self.customers.get(endpoint.split("/", 1)[1])
+            if customer is None:
+                return FakeResponse(400, {"Fault": {"Error": [{"code": "610"}]}})
+            return FakeResponse(200, {"Customer": customer})
+        if method.upper() == "POST" and endpoint == "customer":
+            self._count("create_customer")
+            return FakeResponse(200, {"Customer": self.add_customer(kwargs["json"])})
+
+        self._count("other")
+        return FakeResponse(404, {"Fault": {"Error": [{"Message": endpoint}]}})
+
+    def add_customer(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a customer as POST /customer would."""
+        with self._lock:
+            customer = dict(payload)
+            customer["Id"] = str(self._next_id)
+            customer["Active"] = True
+            customer["MetaData"] = {"LastUpdatedTime": _qb_timestamp(time.time())}
+            self._next_id += 1
+            self.customers[customer["Id"]] = customer
+        return customer
+
+    def _count(self, kind: str) -> None:
+        """Record one API call."""
+        with self._lock:
+            self.calls[kind] += 1
+
+    def _query(self, query: str) -> FakeResponse:
+        """Evaluate the subset of the query language the app uses."""
+        match = self._QUERY_RE.match(query.strip())
+        if not match or match.group("entity").lower() != "customer":
+            self._count("query_other")
+            return FakeResponse(200, {"QueryResponse": {}})
+
+        where = (match.group("where") or "").strip()
+        all_statuses = self._ALL_STATUSES_RE.search(where)
+        if all_statuses:
+            where = where.replace(all_statuses.group(0), "").strip()
+        rows = [
+            c for c in self.customers.values() if all_statuses or c.get("Active", True)
+        ]
+
+        like = re.match(r"DisplayName like '%(.*)%'$", where, re.IGNORECASE)
+        id_in = re.match(r"Id in \((.*)\)$", where, re.IGNORECASE)
+        updated = re.match(r"MetaData\.LastUpdatedTime > '(.*)'$", where, re.IGNORECASE)
+        if like:
+            self._count("search_customer")
+            term = like.group(1).replace("\\'", "'").lower()
+            rows = [c for c in rows if term in c.get("DisplayName", "").lower()]
+        elif id_in:
+            self._count("get_customers_by_id")
+            ids = {i.strip().strip("'") for i in id_in.group(1).split(",")}
+            rows = [c for c in rows if c["Id"] in ids]
+        elif updated:
+            self._count("changed_customers")
+            since = updated.group(1)
+            rows = [
+                c
+                for c in rows
+                if c.get("MetaData", {}).get("LastUpdatedTime", "") > since
+            ]
+        else:
+            self._count("list_customers")
+
+        rows.sort(key=lambda c: int(c["Id"]))
+        start = int(match.group("start") or 1)
+        max_results = int(match.group("max") or self.DEFAULT_MAX_RESULTS)
+        page = rows[start - 1 : start - 1 + max_results]
+        response: Dict[str, Any] = {"startPosition": start, "maxResults": len(page)}
+        if page:
+            response["Customer"] = page
+        return FakeResponse(200, {"QueryResponse": response})
+
+    def install(self):
+        """Patch HTTP calls to QuickBooks to be served by this fake."""
+        api = self
+
+        def fake_request(session, method, url, **kwargs):
+            return api.request(method, url, **kwargs)
+
+        return patch("requests.sessions.Session.request", fake_request)
+
+
+class FakeGemini:
+    """
+    Gemini extraction stand-in returning synthetic donations per file.
+
+    Donations are generated deterministically from the file name so
+    re-extracting a file yields the same records.
+    """
+
+    def __init__(
+        self,
+        customers: List[Dict[str, Any]],
+        donations_per_file: int = 3,
+        match_ratio: float = 0.8,
+        latency: Optional[LatencyModel] = None,
+        seed: int = 0,
+    ):
+        """
+        Create the fake extractor.
+
+        Args:
+            customers: Customer book that donors are drawn from
+            donations_per_file: Donations returned per document
+            match_ratio: Fraction of donors that exist in the book
+            latency: Per-call latency model
+            seed: Seed for donor selection
+        """
+        self.customers = customers
+        self.donations_per_file = donations_per_file
+        self.match_ratio = match_ratio
+        self.latency = latency or LatencyModel()
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, file_paths: List[Any], *args: Any, **kwargs: Any):
+        """Extract donations from documents."""
+        with self._lock:
+            self.calls += 1
+        self.latency.sleep()
+        donations = []
+        for file_path in file_paths:
+            name = str(file_path).replace("\\", "/").rsplit("/", 1)[-1]
+            rng = random.Random(f"{self.seed}:{name}")
+            for i in range(self.donations_per_file):
+                donations.append(
+                    make_donation(rng, self.customers, self.match_ratio, f"{name}:{i}")
+                )
+        return donations
+
+
+class LatencyStorage(LocalStorage):
+    """Local file storage that sleeps like an object store on each call."""
+
+    def __init__(self, base_path: str, latency: Optional[LatencyModel] = None):
+        """
+        Create the storage.
+
+        Args:
+            base_path: Directory for stored files
+            latency: Per-operation latency model
+        """
+        super().__init__(base_path)
+        self.latency = latency or LatencyModel()
+        self.calls: Counter = Counter()
+
+    def upload(self, file, upload_id, filename):
+        """Upload with latency."""
+        self.calls["upload"] += 1
+        self.latency.sleep()
+        return super().upload(file, upload_id, filename)
+
+    def list_files(self, upload_id):
+        """List with latency."""
+        self.calls["list_files"] += 1
+        self.latency.sleep()
+        return super().list_files(upload_id)
+
+    def get_file_paths(self, upload_id):
+        """Resolve paths with latency (stands in for S3 downloads)."""
+        self.calls["get_file_paths"] += 1
+        self.latency.sleep()
+        return super().get_file_paths(upload_id)
+
+
+def _qb_timestamp(epoch: float) -> str:
+    """Format a time the way QuickBooks MetaData timestamps are formatted."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S-00:00", time.gmtime(epoch))
+
+
+def generate_customers(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a synthetic QuickBooks customer book.
+
+    Names are unique: plain "First Last" combinations come first, then
+    middle initials are added, and about one in twenty records is an
+    organization.
+
+    Args:
+        count: Number of customers
+        seed: Seed for addresses and contact details
+
+    Returns:
+        QuickBooks-shaped customer records with sequential string IDs
+    """
+    rng = random.Random(seed)
+    people: List[Tuple[str, Optional[str], str]] = [
+        (f, None, last) for last in LAST_NAMES for f in FIRST_NAMES
+    ]
+    middles = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+    people += [
+        (f, m, last) for m in middles for last in LAST_NAMES for f in FIRST_NAMES
+    ]
+    if count > len(people):
+        raise ValueError(f"At most {len(people)} synthetic customers are supported")
+
+    customers = []
+    base_time = time.time() - 86400 * 365
+    for i in range(count):
+        first, middle, last = people[i]
+        city, state = rng.choice(CITIES)
+        customer: Dict[str, Any] = {
+            "Id": str(i + 1),
+            "Active": True,
+            "BillAddr": {
+                "Line1": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+                "City": city,
+                "CountrySubDivisionCode": state,
+                "PostalCode": f"{rng.randint(10000, 99999)}",
+            },
+            "PrimaryEmailAddr": {
+                "Address": f"{first.lower()}.{last.lower()}{i}@example.com"
+            },
+            "PrimaryPhone": {
+                "FreeFormNumber": f"({rng.randint(200, 999)}) 555-{i % 10000:04d}"
+            },
+            "MetaData": {"LastUpdatedTime": _qb_timestamp(base_time + i)},
+        }
+        if i % 20 == 19:
+            org = f"{last} {rng.choice(ORGANIZATION_SUFFIXES)} {i}"
+            customer.update({"DisplayName": org, "CompanyName": org})
+        else:
+            display = f"{first} {middle}. {last}" if middle else f"{first} {last}"
+            customer.update(
+                {
+                    "DisplayName": display,
+                    "GivenName": first,
+                    "MiddleName": middle,
+                    "FamilyName": last,
+                }
+            )
+            customer = {k: v for k, v in customer.items() if v is not None}
+        customers.append(customer)
+    return customers
+
+
+def make_donation(
+    rng: random.Random,
+    customers: List[Dict[str, Any]],
+    match_ratio: float,
+    ref: str,
+) -> Dict[str, Any]:
+    """
+    Build one extracted donation, usually from a donor in the book.
+
+    Args:
+        rng: Random source
+        customers: Customer book
+        match_ratio: Probability the donor is an existing customer
+        ref: Unique seed for the check number
+
+    Returns:
+        Donation in Gemini extraction format
+    """
+    check_number = str(zlib.crc32(ref.encode()) % 900000 + 100000)
+    payment = {
+        "Payment_Ref": check_number,
+        "Payment_Method": "handwritten check",
+        "Amount": f"{rng.randint(10, 500)}.00",
+        "Payment_Date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+    if customers and rng.random() < match_ratio:
+        customer = rng.choice(customers)
+        address = customer.get("BillAddr", {})
+        contact = {
+            "Address_Line_1": address.get("Line1", ""),
+            "City": address.get("City", ""),
+            "State": address.get("CountrySubDivisionCode", ""),
+            "ZIP": address.get("PostalCode", ""),
+        }
+        if customer.get("CompanyName"):
+            payer: Dict[str, Any] = {"Organization_Name": customer["CompanyName"]}
+        else:
+            payer = {"Aliases": [f"{customer['GivenName']} {customer['FamilyName']}"]}
+    else:
+        contact = {
+            "Address_Line_1": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "City": "Nowhere",
+            "State": "KS",
+            "ZIP": f"{rng.randint(10000, 99999)}",
+        }
+        payer = {"Aliases": [f"Newdonor{rng.randint(1, 10**6)} Zzyzx"]}
+    return {"PaymentInfo": payment, "PayerInfo": payer, "ContactInfo": contact}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class StageTimer:
+    """Collects wall-clock samples per named stage."""
+
+    def __init__(self):
+        """Create an empty timer."""
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one sample."""
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """Wrap a callable so each call is recorded under a stage."""
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles in milliseconds per stage."""
+        return {
+            stage: {
+                "count": len(values),
+                "mean_ms": round(sum(values) * 1000 / len(values), 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3),
+            }
+            for stage, values in sorted(self.samples.items())
+            if values
+        }
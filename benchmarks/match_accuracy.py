@@ -0,0 +1,478 @@
+"""
+Matching accuracy harness.
+
+Builds synthetic customer books with couples and organizations, exports
+each as a QuickBooks customer CSV, and matches a batch of synthetic
+donations with known payers against it through CustomerMatcher. Payer
+names are spelled the ways checks show them: in full, with an initial,
+surname first, as a couple or one spouse, and with OCR misreadings; some
+donors are not customers yet. Every data source is given the same
+donations in jobs of --batch-size, and precision, recall, searches per
+donation and matching latency are reported for each, with accuracy per
+spelling:
+
+    python -m benchmarks.match_accuracy
+    python -m benchmarks.match_accuracy --books 1000,10000,100000 --donations 500
+    python -m benchmarks.match_accuracy --accept-score 60 --sources csv,sqlite
+
+Data sources are the CSV export (csv), the CSV export with batch candidate
+selection (batch), its SQLite import (sqlite) and a source searched like
+QuickBooks, by display name substring with no local lookups (quickbooks).
+"""
+import argparse
+import copy
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from benchmarks.fakes import FIRST_NAMES, STREETS, generate_customers, percentile
+from benchmarks.search_planning import CountingSearchSource
+from src import customer_matcher
+from src.customer_data_source import CSVDataSource, CustomerDataSource, SQLiteDataSource
+from src.customer_matcher import CustomerMatcher
+from src.search_planner import SearchPlanner
+
+SOURCES = ("csv", "batch", "sqlite", "quickbooks")
+
+# Surnames of donors who are not customers; none is in the synthetic books
+NEW_DONOR_SURNAMES = [
+    "Fischer", "Novak", "Okafor", "Lindqvist", "Haddad", "Kowalski", "Brennan",
+    "Yamamoto", "Delacroix", "Abernathy", "Szabo", "Mwangi", "Castellano",
+]  # fmt: skip
+
+# Characters OCR commonly reads as others on scanned checks
+OCR_CONFUSIONS = [
+    ("rn", "m"), ("m", "rn"), ("l", "1"), ("I", "l"), ("O", "0"), ("o", "0"),
+    ("e", "c"), ("c", "e"), ("h", "b"), ("u", "v"), ("a", "o"), ("S", "5"),
+    ("i", "l"), ("n", "h"),
+]  # fmt: skip
+
+# How payers who are people are spelled, with relative frequencies
+PERSON_SPELLINGS = {"exact": 4, "initial": 1, "reversed": 1, "ocr": 3, "ocr2": 1}
+
+CSV_COLUMNS = [
+    "Customer", "First Name", "Last Name", "Company Name", "Email", "Phone",
+    "Billing Street", "Billing City", "Billing State", "Billing ZIP",
+]  # fmt: skip
+
+
+def generate_book(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a customer book in which about one person in fifteen is a couple.
+
+    Couples keep the first spouse's given name, as QuickBooks users enter
+    them, and show both in the display name ("John & Mary Smith").
+
+    Args:
+        count: Number of customers
+        seed: Random seed
+
+    Returns:
+        QuickBooks-shaped customer records
+    """
+    rng = random.Random(seed)
+    customers = generate_customers(count, seed=seed)
+    for i, customer in enumerate(customers):
+        if i % 15 == 7 and not customer.get("CompanyName"):
+            first = customer["GivenName"]
+            spouse = rng.choice([name for name in FIRST_NAMES if name != first])
+            customer["DisplayName"] = f"{first} & {spouse} {customer['FamilyName']}"
+    return customers
+
+
+def write_book_csv(customers: List[Dict[str, Any]], path: Path) -> None:
+    """Write customers as a QuickBooks customer CSV export."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for customer in customers:
+            address = customer.get("BillAddr", {})
+            writer.writerow(
+                {
+                    "Customer": customer["DisplayName"],
+                    "First Name": customer.get("GivenName", ""),
+                    "Last Name": customer.get("FamilyName", ""),
+                    "Company Name": customer.get("CompanyName", ""),
+                    "Email": customer.get("PrimaryEmailAddr", {}).get("Address", ""),
+                    "Phone": customer.get("PrimaryPhone", {}).get("FreeFormNumber", ""),
+                    "Billing Street": address.get("Line1", ""),
+                    "Billing City": address.get("City", ""),
+                    "Billing State": address.get("CountrySubDivisionCode", ""),
+                    "Billing ZIP": address.get("PostalCode", ""),
+                }
+            )
+
+
+def ocr_corrupt(text: str, rng: random.Random) -> str:
+    """
+    Misread one character of a name the way OCR does.
+
+    A commonly confused character is swapped when the name has one;
+    otherwise, or one time in four, a letter is dropped or two adjacent
+    letters are transposed.
+
+    Args:
+        text: Name as written
+        rng: Random source
+
+    Returns:
+        The name with one misreading
+    """
+    confusions = [(a, b) for a, b in OCR_CONFUSIONS if a in text]
+    if confusions and rng.random() < 0.75:
+        wrong, right = rng.choice(confusions)
+        positions = [i for i in range(len(text)) if text.startswith(wrong, i)]
+        i = rng.choice(positions)
+        return text[:i] + right + text[i + len(wrong) :]
+
+    letters = [
+        i
+        for i in range(1, len(text) - 1)
+        if text[i].isalpha() and text[i + 1].isalpha()
+    ]
+    if not letters:
+        return text
+    i = rng.choice(letters)
+    if rng.random() < 0.5:
+        return text[:i] + text[i + 1 :]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+
+
+def _payer(customer: Dict[str, Any], rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """Spell a customer's name as a payer, returning the spelling used."""
+    if customer.get("CompanyName"):
+        spelling = rng.choice(["exact", "ocr"])
+        name = customer["CompanyName"]
+        if spelling == "ocr":
+            name = ocr_corrupt(name, rng)
+        return spelling, {"Organization_Name": name}
+
+    first, last = customer["GivenName"], customer["FamilyName"]
+    display = customer["DisplayName"]
+    if " & " in display:
+        spouse = display.split(" & ")[1].split()[0]
+        spelling = rng.choice(["couple", "spouse", "ocr"])
+        if spelling == "couple":
+            aliases = [f"{first} {last}", f"{spouse} {last}"]
+        elif spelling == "spouse":
+            aliases = [f"{spouse} {last}"]
+        else:
+            aliases = [ocr_corrupt(f"{first} {last}", rng)]
+        return spelling, {"Aliases": aliases}
+
+    # Checks print middle initials as customers were entered ("John A. Smith")
+    given = display[: -len(last)].strip()
+    spellings = list(PERSON_SPELLINGS)
+    spelling = rng.choices(spellings, weights=list(PERSON_SPELLINGS.values()))[0]
+    alias = {
+        "exact": display,
+        "initial": f"{first[0]}. {last}",
+        "reversed": f"{last}, {given}",
+        "ocr": ocr_corrupt(display, rng),
+        "ocr2": ocr_corrupt(ocr_corrupt(display, rng), rng),
+    }[spelling]
+    return spelling, {"Aliases": [alias]}
+
+
+def generate_cases(
+    customers: List[Dict[str, Any]],
+    count: int,
+    seed: int = 0,
+    new_ratio: float = 0.15,
+    address_ratio: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Generate donations with known payers.
+
+    Args:
+        customers: Customer book, as loaded by the data sources
+        count: Number of donations
+        seed: Random seed
+        new_ratio: Share of donors who are not customers
+        address_ratio: Share of customers' checks showing their billing
+            address (other checks show no address)
+
+    Returns:
+        Cases with the donation, the payer's customer ID (None for new
+        donors) and how the payer's name was spelled
+    """
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        payment = {
+            "Payment_Ref": str(100000 + i),
+            "Amount": f"{rng.randint(10, 500)}.00",
+            "Payment_Date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+        if rng.random() < new_ratio:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(NEW_DONOR_SURNAMES)}"
+            contact = {
+                "Address_Line_1": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+                "City": "Nowhere",
+                "State": "KS",
+                "ZIP": f"{rng.randint(10000, 99999)}",
+            }
+            payer: Dict[str, Any] = {"Aliases": [name]}
+            customer_id, spelling = None, "new"
+        else:
+            customer = rng.choice(customers)
+            spelling, payer = _payer(customer, rng)
+            customer_id = customer["Id"]
+            contact = {}
+            address = customer.get("BillAddr")
+            if address and rng.random() < address_ratio:
+                contact = {
+                    "Address_Line_1": address.get("Line1", ""),
+                    "City": address.get("City", ""),
+                    "State": address.get("CountrySubDivisionCode", ""),
+                    "ZIP": address.get("PostalCode", ""),
+                }
+        cases.append(
+            {
+                "donation": {
+                    "PaymentInfo": payment,
+                    "PayerInfo": payer,
+                    "ContactInfo": contact,
+                },
+                "customer_id": customer_id,
+                "spelling": spelling,
+            }
+        )
+    return cases
+
+
+def open_source(name: str, csv_path: Path, workdir: Path) -> CustomerDataSource:
+    """
+    Open a data source over a customer CSV export.
+
+    Args:
+        name: One of SOURCES
+        csv_path: Customer CSV export
+        workdir: Directory for the SQLite database
+
+    Returns:
+        The data source
+    """
+    if name in ("csv", "batch"):
+        return CSVDataSource(csv_path)
+    if name == "sqlite":
+        return SQLiteDataSource(workdir / f"{csv_path.stem}.db", csv_path)
+    if name == "quickbooks":
+        return CountingSearchSource(list(CSVDataSource(csv_path).customers.values()))
+    raise ValueError(f"Unknown data source: {name}")
+
+
+def match_cases(
+    data_source: CustomerDataSource,
+    cases: List[Dict[str, Any]],
+    batch_size: int,
+    prepare: bool,
+) -> Dict[str, Any]:
+    """
+    Match every case's donation, one matcher per job as processing does.
+
+    Args:
+        data_source: Customer data source
+        cases: Cases from generate_cases
+        batch_size: Donations per job
+        prepare: Select candidates for each job with prepare_batch
+
+    Returns:
+        Matched customer IDs, matching latencies in milliseconds and the
+        searches run
+    """
+    planner = SearchPlanner()
+    matched: List[Optional[str]] = []
+    latencies: List[float] = []
+    searches = 0
+    for start in range(0, len(cases), batch_size):
+        job = cases[start : start + batch_size]
+        with patch(
+            "src.customer_matcher.create_customer_data_source",
+            return_value=data_source,
+        ):
+            matcher = CustomerMatcher(csv_path=None)
+        # Hit rates are learned from this run only
+        matcher.planner = planner
+        if prepare:
+            matcher.prepare_batch([case["donation"] for case in job])
+        for case in job:
+            donation = copy.deepcopy(case["donation"])
+            began = time.perf_counter()
+            result = matcher.match_donation_to_customer(donation)
+            latencies.append((time.perf_counter() - began) * 1000)
+            matched.append((result.get("customer_ref") or {}).get("id"))
+        searches += matcher.lookup_stats()["searches_run"]
+    return {"matched": matched, "latencies": latencies, "searches": searches}
+
+
+def score_matches(
+    cases: List[Dict[str, Any]], matched: List[Optional[str]]
+) -> Dict[str, Any]:
+    """
+    Score matched customers against the known payers.
+
+    Args:
+        cases: Cases from generate_cases
+        matched: Matched customer ID (or None) for each case
+
+    Returns:
+        precision: share of matches made that are the payer
+        recall: share of customers' donations matched to the payer
+        accuracy: share of each spelling's donations matched correctly,
+            with new donors correct when no customer was matched
+    """
+    made = [(c, m) for c, m in zip(cases, matched) if m is not None]
+    correct = sum(1 for case, match in made if match == case["customer_id"])
+    existing = sum(1 for case in cases if case["customer_id"] is not None)
+
+    totals: Dict[str, int] = {}
+    right: Dict[str, int] = {}
+    for case, match in zip(cases, matched):
+        spelling = case["spelling"]
+        totals[spelling] = totals.get(spelling, 0) + 1
+        right[spelling] = right.get(spelling, 0) + (match == case["customer_id"])
+    return {
+        "precision": correct / len(made) if made else 1.0,
+        "recall": correct / existing if existing else 1.0,
+        "accuracy": {s: right[s] / totals[s] for s in sorted(totals)},
+    }
+
+
+def run(
+    customers: int,
+    donations: int,
+    seed: int,
+    sources: Optional[List[str]] = None,
+    batch_size: int = 50,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Match one batch of donations against one customer book per data source.
+
+    Args:
+        customers: Number of customers in the book
+        donations: Number of donations matched
+        seed: Random seed
+        sources: Data sources to run (defaults to all of SOURCES)
+        batch_size: Donations per job
+
+    Returns:
+        Per data source: precision, recall, accuracy per spelling, searches
+        per donation, matching latency percentiles and the time to open the
+        source, in milliseconds
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        csv_path = workdir / f"customers-{customers}.csv"
+        write_book_csv(generate_book(customers, seed), csv_path)
+        book = list(CSVDataSource(csv_path).customers.values())
+        cases = generate_cases(book, donations, seed)
+
+        for name in sources or SOURCES:
+            began = time.perf_counter()
+            data_source = open_source(name, csv_path, workdir)
+            load_ms = (time.perf_counter() - began) * 1000
+
+            counts = match_cases(data_source, cases, batch_size, name == "batch")
+            latencies = counts["latencies"]
+            results[name] = {
+                **score_matches(cases, counts["matched"]),
+                "searches": counts["searches"] / max(len(cases), 1),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "load_ms": load_ms,
+            }
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.match_accuracy",
+        description="Measure matching accuracy and latency on synthetic books.",
+    )
+    parser.add_argument(
+        "--books",
+        default="1000,10000,100000",
+        help="Comma-separated customer book sizes",
+    )
+    parser.add_argument("--donations", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument(
+        "--sources",
+        default=",".join(SOURCES),
+        help=f"Comma-separated data sources ({', '.join(SOURCES)})",
+    )
+    parser.add_argument(
+        "--accept-score",
+        type=float,
+        default=customer_matcher.MATCH_ACCEPT_SCORE,
+        help="Lowest score accepted as a match",
+    )
+    parser.add_argument(
+        "--stop-score",
+        type=float,
+        default=customer_matcher.MATCH_STOP_SCORE,
+        help="Score at which searching stops",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def print_results(size: int, results: Dict[str, Dict[str, Any]]) -> None:
+    """Print one book's results as a table per source and per spelling."""
+    print(f"\n{size} customers")
+    print(
+        f"{'':>11} {'precision':>9} {'recall':>7} {'searches':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'load ms':>8}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:>11} {r['precision']:>9.1%} {r['recall']:>7.1%} "
+            f"{r['searches']:>9.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['load_ms']:>8.0f}"
+        )
+    spellings = sorted({s for r in results.values() for s in r["accuracy"]})
+    print(f"{'accuracy':>11} " + " ".join(f"{s:>8}" for s in spellings))
+    for name, r in results.items():
+        print(
+            f"{name:>11} "
+            + " ".join(f"{r['accuracy'].get(s, 0):>8.0%}" for s in spellings)
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the harness and print accuracy and latency per book and source."""
+    args = build_parser().parse_args(argv)
+    sources = [s for s in args.sources.split(",") if s]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        print(f"Unknown data sources: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    print(
+        f"Accepting matches from {args.accept_score:g}, "
+        f"stopping at {args.stop_score:g}"
+    )
+    with patch.object(customer_matcher, "MATCH_ACCEPT_SCORE", args.accept_score):
+        with patch.object(customer_matcher, "MATCH_STOP_SCORE", args.stop_score):
+            for size in [int(s) for s in args.books.split(",") if s]:
+                print(
+                    f"\n{args.donations} donations × {size} customers",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                results = run(size, args.donations, args.seed, sources, args.batch_size)
+                print_results(size, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,467 @@
+"""
+End-to-end pipeline benchmark.
+
+Drives the Flask upload, process and results endpoints and drains the job
+queue with Worker instances, with every external service (Gemini,
+QuickBooks, S3, Redis) replaced by the in-process fakes in
+benchmarks.fakes. For each combination of customer-book size and batch
+size it reports throughput, per-stage latency percentiles, peak traced
+memory, Redis round-trips and QuickBooks API calls, and saves the results
+as JSON so runs can be compared:
+
+    python -m benchmarks.run_pipeline
+    python -m benchmarks.run_pipeline --batch-sizes 1,30 --customers 100,100000
+    python -m benchmarks.run_pipeline --gemini-latency lognormal:3000,0.4
+    python -m benchmarks.run_pipeline --compare benchmarks/results/previous.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+from benchmarks.fakes import (
+    FakeGemini,
+    FakeQuickBooksAPI,
+    FakeQuickBooksAuth,
+    FakeRedis,
+    LatencyModel,
+    LatencyStorage,
+    StageTimer,
+    generate_customers,
+)
+from src.job_queue import JOB_QUEUE
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BATCH_SIZES = "1,5,10,20,30"
+DEFAULT_CUSTOMER_COUNTS = "100,1000,10000,100000"
+SESSION_ID = "bench-session"
+
+
+class PipelineEnvironment:
+    """The app, workers and fakes wired together for one customer book."""
+
+    def __init__(
+        self,
+        client: Any,
+        workers: List[Any],
+        session_backend: Any,
+        redis: FakeRedis,
+        quickbooks: FakeQuickBooksAPI,
+        gemini: FakeGemini,
+        storage: LatencyStorage,
+        timer: StageTimer,
+    ):
+        """Bundle the environment's parts."""
+        self.client = client
+        self.workers = workers
+        self.session_backend = session_backend
+        self.redis = redis
+        self.quickbooks = quickbooks
+        self.gemini = gemini
+        self.storage = storage
+        self.timer = timer
+
+
+@contextlib.contextmanager
+def pipeline_environment(
+    customers: List[Dict[str, Any]], args: argparse.Namespace, timer: StageTimer
+) -> Iterator[PipelineEnvironment]:
+    """
+    Patch the app and worker to run against in-process fakes.
+
+    Args:
+        customers: Synthetic QuickBooks customer book
+        args: Parsed command-line arguments (latencies, worker count)
+        timer: Timer that receives per-stage samples
+
+    Yields:
+        The wired-up PipelineEnvironment
+    """
+    from src import app as app_module
+    from src import donation_processor
+    from src import worker as worker_module
+    from src.customer_matcher import CustomerMatcher
+    from src.customer_mirror import RedisCustomerMirror
+    from src.job_queue import JobQueue
+    from src.session import RedisSession
+    from src.validation import DonationValidator
+
+    redis = FakeRedis(LatencyModel(args.redis_latency, seed=args.seed))
+    quickbooks = FakeQuickBooksAPI(
+        customers, LatencyModel(args.qbo_latency, seed=args.seed)
+    )
+    gemini = FakeGemini(
+        customers,
+        donations_per_file=args.donations_per_file,
+        match_ratio=args.match_ratio,
+        latency=LatencyModel(args.gemini_latency, seed=args.seed),
+        seed=args.seed,
+    )
+    extract = timer.wrap("extraction", gemini)
+
+    with contextlib.ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        storage = LatencyStorage(
+            os.path.join(tmp, "uploads"), LatencyModel(args.s3_latency, seed=args.seed)
+        )
+
+        def create_redis_client(*_args: Any, **_kwargs: Any) -> FakeRedis:
+            return redis
+
+        for target in (
+            "src.redis_connection.create_redis_client",
+            "src.worker.create_redis_client",
+        ):
+            stack.enter_context(patch(target, create_redis_client))
+        session_backend = RedisSession()
+
+        for module in (app_module, worker_module):
+            stack.enter_context(
+                patch.object(module, "session_backend", session_backend)
+            )
+            stack.enter_context(patch.object(module, "storage_backend", storage))
+        mirror = RedisCustomerMirror(redis)  # type: ignore[arg-type]
+        for target in (
+            "src.customer_data_source.customer_mirror",
+            "src.quickbooks_service.customer_mirror",
+        ):
+            stack.enter_context(patch(target, mirror))
+        job_queue = JobQueue(redis)  # type: ignore[arg-type]
+        stack.enter_context(patch.object(app_module, "job_queue", job_queue))
+        stack.enter_context(
+            patch("src.quickbooks_service.QuickBooksAuth", FakeQuickBooksAuth)
+        )
+        stack.enter_context(quickbooks.install())
+        stack.enter_context(
+            patch.object(worker_module, "extract_donations_from_documents", extract)
+        )
+        stack.enter_context(
+            patch.object(
+                donation_processor, "extract_donations_from_documents", extract
+            )
+        )
+        for owner, name, stage in (
+            (DonationValidator, "process_donations", "validation"),
+            (CustomerMatcher, "match_donation_to_customer", "matching"),
+            (worker_module.Worker, "process_job", "worker_job"),
+        ):
+            stack.enter_context(
+                patch.object(owner, name, timer.wrap(stage, getattr(owner, name)))
+            )
+        stack.enter_context(patch.dict(os.environ, {"LOCAL_DEV_MODE": "false"}))
+        stack.enter_context(patch.object(app_module.limiter, "enabled", False))
+
+        workers = [worker_module.Worker() for _ in range(max(1, args.workers))]
+        client = app_module.app.test_client()
+        with client.session_transaction() as flask_session:
+            flask_session["app_session_id"] = SESSION_ID
+
+        yield PipelineEnvironment(
+            client,
+            workers,
+            session_backend,
+            redis,
+            quickbooks,
+            gemini,
+            storage,
+            timer,
+        )
+
+
+def _drain(env: PipelineEnvironment, upload_id: str) -> None:
+    """
+    Run the workers until the upload finishes processing.
+
+    Idle workers poll the fake directly so waiting for other workers' jobs
+    does not inflate the Redis round-trip count.
+    """
+    metadata_key = env.session_backend._get_redis_key(upload_id)
+
+    def work(worker: Any) -> None:
+        while True:
+            if env.redis.peek(JOB_QUEUE):
+                job = worker.job_queue.pop_job(timeout=0)
+                if job:
+                    worker.handle_job(job)
+                continue
+            metadata = json.loads(env.redis.peek(metadata_key) or "{}")
+            if metadata.get("status") in ("completed", "failed"):
+                return
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in env.workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_once(env: PipelineEnvironment, batch_size: int) -> int:
+    """
+    Upload, process and fetch results for one batch.
+
+    Args:
+        env: Pipeline environment
+        batch_size: Number of files to upload
+
+    Returns:
+        int: Number of donations in the results
+    """
+    timer = env.timer
+    started = time.perf_counter()
+
+    files = [(io.BytesIO(b"\xff\xd8scan"), f"scan_{i}.jpg") for i in range(batch_size)]
+    t0 = time.perf_counter()
+    response = env.client.post(
+        "/api/upload", data={"files": files}, content_type="multipart/form-data"
+    )
+    timer.record("upload_request", time.perf_counter() - t0)
+    if response.status_code != 200:
+        raise RuntimeError(f"Upload failed: {response.get_json()}")
+    upload_id = response.get_json()["data"]["upload_id"]
+
+    t0 = time.perf_counter()
+    response = env.client.post("/api/process", json={"upload_id": upload_id})
+    timer.record("process_request", time.perf_counter() - t0)
+    if response.status_code != 200:
+        raise RuntimeError(f"Process failed: {response.get_json()}")
+
+    t0 = time.perf_counter()
+    _drain(env, upload_id)
+    timer.record("queue_drain", time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    response = env.client.get(f"/api/uploads/{upload_id}/results")
+    timer.record("results_request", time.perf_counter() - t0)
+    if response.status_code != 200:
+        raise RuntimeError(f"Results failed: {response.get_json()}")
+
+    timer.record("end_to_end", time.perf_counter() - started)
+    return len(response.get_json()["data"]["donations"])
+
+
+def run_scenario(
+    customers: List[Dict[str, Any]], batch_size: int, args: argparse.Namespace
+) -> Dict[str, Any]:
+    """
+    Benchmark one (customer book, batch size) combination.
+
+    Args:
+        customers: Synthetic customer book
+        batch_size: Files per upload
+        args: Parsed command-line arguments
+
+    Returns:
+        Scenario results
+    """
+    timer = StageTimer()
+    with pipeline_environment(customers, args, timer) as env:
+        run_once(env, batch_size)  # warm up imports and caches
+        timer.samples.clear()
+        env.redis.reset_stats()
+        env.quickbooks.reset_stats()
+
+        donations = 0
+        elapsed = 0.0
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            donations += run_once(env, batch_size)
+            elapsed += time.perf_counter() - started
+
+        redis_round_trips = env.redis.round_trips
+        redis_commands = dict(env.redis.command_counts)
+        quickbooks_calls = dict(env.quickbooks.calls)
+        stages = timer.summary()
+
+        peak_bytes = None
+        if not args.skip_memory:
+            timer.samples.clear()
+            tracemalloc.start()
+            try:
+                run_once(env, batch_size)
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    return {
+        "customers": len(customers),
+        "batch_size": batch_size,
+        "runs": args.repeat,
+        "throughput": {
+            "files_per_sec": round(batch_size * args.repeat / elapsed, 3),
+            "donations_per_sec": round(donations / elapsed, 3),
+        },
+        "stages": stages,
+        "peak_memory_mb": (
+            round(peak_bytes / (1024 * 1024), 3) if peak_bytes is not None else None
+        ),
+        "redis_round_trips_per_run": round(redis_round_trips / args.repeat, 1),
+        "redis_commands": redis_commands,
+        "quickbooks_calls_per_run": {
+            kind: round(count / args.repeat, 1)
+            for kind, count in sorted(quickbooks_calls.items())
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """Return the current commit of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run_pipeline",
+        description="Benchmark the upload → process → results pipeline.",
+    )
+    parser.add_argument("--batch-sizes", type=_int_list, default=DEFAULT_BATCH_SIZES)
+    parser.add_argument(
+        "--customers",
+        type=_int_list,
+        default=DEFAULT_CUSTOMER_COUNTS,
+        help="Customer book sizes",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent workers")
+    parser.add_argument("--donations-per-file", type=int, default=3)
+    parser.add_argument(
+        "--match-ratio",
+        type=float,
+        default=0.8,
+        help="Fraction of donors that exist in the customer book",
+    )
+    parser.add_argument("--gemini-latency", default="lognormal:50,0.3")
+    parser.add_argument("--qbo-latency", default="lognormal:5,0.3")
+    parser.add_argument("--s3-latency", default="fixed:2")
+    parser.add_argument("--redis-latency", default="fixed:0.2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-memory", action="store_true", help="Skip the tracemalloc run"
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Results file (default: benchmarks/results/)"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Earlier results file to compare against"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    return parser
+
+
+def _print_summary(
+    scenarios: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]]
+) -> None:
+    """Print a table of the headline numbers."""
+    previous = {
+        (s["customers"], s["batch_size"]): s
+        for s in (baseline or {}).get("scenarios", [])
+    }
+    header = (
+        f"{'customers':>9} {'files':>5} {'files/s':>8} {'e2e p50':>9} "
+        f"{'e2e p95':>9} {'match p95':>9} {'peak MB':>8} {'redis':>7} {'qbo':>6}"
+    )
+    print(header)
+    for s in scenarios:
+        e2e = s["stages"].get("end_to_end", {})
+        matching = s["stages"].get("matching", {})
+        qbo_calls = sum(s["quickbooks_calls_per_run"].values())
+        line = (
+            f"{s['customers']:>9} {s['batch_size']:>5} "
+            f"{s['throughput']['files_per_sec']:>8.2f} "
+            f"{e2e.get('p50_ms', 0):>9.1f} {e2e.get('p95_ms', 0):>9.1f} "
+            f"{matching.get('p95_ms', 0):>9.1f} "
+            f"{s['peak_memory_mb'] or 0:>8.1f} "
+            f"{s['redis_round_trips_per_run']:>7.0f} {qbo_calls:>6.0f}"
+        )
+        before = previous.get((s["customers"], s["batch_size"]))
+        if before:
+            ratio = s["throughput"]["files_per_sec"] / max(
+                before["throughput"]["files_per_sec"], 1e-9
+            )
+            line += f"  ({ratio:.2f}x throughput vs baseline)"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite."""
+    args = build_parser().parse_args(argv)
+    if isinstance(args.batch_sizes, str):
+        args.batch_sizes = _int_list(args.batch_sizes)
+    if isinstance(args.customers, str):
+        args.customers = _int_list(args.customers)
+
+    # Import the app first: its import sets INFO levels on its own loggers
+    import src.app  # noqa: F401
+    import src.worker  # noqa: F401
+
+    logging.getLogger().setLevel(args.log_level)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("src") or name == "security_audit":
+            logging.getLogger(name).setLevel(args.log_level)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    scenarios = []
+    for customer_count in args.customers:
+        customers = generate_customers(customer_count, seed=args.seed)
+        for batch_size in args.batch_sizes:
+            print(
+                f"Running {customer_count} customers × {batch_size} files...",
+                file=sys.stderr,
+                flush=True,
+            )
+            scenarios.append(run_scenario(customers, batch_size, args))
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                key: (str(value) if isinstance(value, Path) else value)
+                for key, value in vars(args).items()
+            },
+        },
+        "scenarios": scenarios,
+    }
+
+    output = args.output or RESULTS_DIR / (
+        f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    _print_summary(scenarios, baseline)
+    print(f"Results written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Search planning benchmark.
+
+Matches synthetic donations against a synthetic customer book through a
+data source with QuickBooks search semantics (display name substring,
+100 results at most) and no local indexes, as the live QuickBooks source
+behaves. Each donation is matched three times: running every search
+variation in generated order and with cost-based planning, without and
+with trigram index statistics, and the searches and transferred results per
+donation are reported for each. Matched customers are checked to be the
+same:
+
+    python -m benchmarks.search_planning
+    python -m benchmarks.search_planning --customers 50000 --donations 200
+"""
+import argparse
+import random
+import sys
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.fakes import generate_customers
+from benchmarks.match_scoring import build_donations
+from src.customer_data_source import CustomerDataSource
+from src.customer_index import TrigramIndex
+from src.customer_matcher import CustomerMatcher
+from src.customer_mirror import CustomerSnapshot
+from src.search_planner import SearchPlanner
+
+
+class CountingSearchSource(CustomerDataSource):
+    """Customer source answering searches like QuickBooks and counting them."""
+
+    def __init__(self, customers: List[Dict[str, Any]], statistics: bool = False):
+        """
+        Initialize over a customer list.
+
+        Args:
+            customers: Customer records
+            statistics: Estimate result counts from a trigram index, as the
+                CSV source does
+        """
+        self.snapshot = CustomerSnapshot({c["Id"]: c for c in customers}, {})
+        self.index: Optional[TrigramIndex] = None
+        if statistics:
+            self.index = TrigramIndex()
+            for customer in customers:
+                self.index.add(customer["Id"], [customer.get("DisplayName")])
+        self.searches = 0
+        self.results = 0
+
+    def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
+        """Search display names and count the results transferred."""
+        results = self.snapshot.search(search_term)
+        self.searches += 1
+        self.results += len(results)
+        return results
+
+    def estimate_results(self, search_term: str) -> Optional[int]:
+        """Count the trigram index candidates of a search, if indexed."""
+        if self.index is None:
+            return None
+        candidate_ids = self.index.candidates(search_term.lower())
+        return (
+            len(self.snapshot.customers)
+            if candidate_ids is None
+            else len(candidate_ids)
+        )
+
+    def get_customer(self, customer_id: str) -> Dict[str, Any]:
+        """Get a customer by ID."""
+        return self.snapshot.customers[customer_id]
+
+    def format_customer_data(self, customer: Dict[str, Any]) -> Dict[str, Any]:
+        """Format only what the benchmark compares."""
+        return {
+            "customer_ref": {"id": customer["Id"]},
+            "qb_address": {},
+            "qb_email": [],
+            "qb_phone": [],
+        }
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a customer in the book, as POST /customer would."""
+        customers = dict(self.snapshot.customers)
+        customer = dict(customer_data)
+        customer["Id"] = str(max((int(i) for i in customers), default=0) + 1)
+        customer["Active"] = True
+        customers[customer["Id"]] = customer
+        self.snapshot = CustomerSnapshot(customers, {})
+        if self.index is not None:
+            self.index.add(customer["Id"], [customer.get("DisplayName")])
+        return customer
+
+
+def build_misses(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Build donations from payers who are not customers yet."""
+    rng = random.Random(seed)
+    return [
+        {"PayerInfo": {"Aliases": [f"Newdonor{rng.randint(0, 10**6)} Zyx{i}"]}}
+        for i in range(count)
+    ]
+
+
+def match_all(
+    customers: List[Dict[str, Any]],
+    donations: List[Dict[str, Any]],
+    planned: bool,
+    statistics: bool = False,
+) -> Dict[str, Any]:
+    """Match every donation and count the searches run."""
+    source = CountingSearchSource(customers, statistics)
+    with patch("src.customer_matcher.create_customer_data_source", return_value=source):
+        matcher = CustomerMatcher(csv_path=None, plan_searches=planned)
+        # Hit rates are learned from this run only
+        matcher.planner = SearchPlanner() if planned else None
+    matched = [
+        (matcher.match_donation_to_customer(d).get("customer_ref") or {}).get("id")
+        for d in donations
+    ]
+    return {"matched": matched, "searches": source.searches, "results": source.results}
+
+
+def run(customers: int, donations: int, seed: int) -> Dict[str, float]:
+    """
+    Compare unplanned and planned searches over one customer book.
+
+    Args:
+        customers: Number of customers in the book
+        donations: Number of donations matched (a tenth are new payers)
+        seed: Random seed
+
+    Returns:
+        Searches and results per donation unplanned (before), planned
+        without result statistics as for QuickBooks (after) and planned
+        with trigram index estimates (indexed)
+    """
+    book = generate_customers(customers, seed=seed)
+    misses = donations // 10
+    batch = build_donations(book, donations - misses, seed) + build_misses(misses, seed)
+
+    runs = {
+        "before": match_all(book, batch, planned=False),
+        "after": match_all(book, batch, planned=True),
+        "indexed": match_all(book, batch, planned=True, statistics=True),
+    }
+    result = {}
+    for label, counts in runs.items():
+        if counts["matched"] != runs["before"]["matched"]:
+            raise AssertionError(f"Planned searches ({label}) matched differently")
+        result[f"searches_{label}"] = counts["searches"] / len(batch)
+        result[f"results_{label}"] = counts["results"] / len(batch)
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.search_planning",
+        description="Benchmark per-donation searches with and without planning.",
+    )
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--donations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark and print searches per donation."""
+    args = build_parser().parse_args(argv)
+    result = run(args.customers, args.donations, args.seed)
+    print(f"{'':>10} {'searches':>9} {'results':>9}  (per donation)")
+    for label in ("before", "after", "indexed"):
+        print(
+            f"{label:>10} {result['searches_' + label]:>9.2f} "
+            f"{result['results_' + label]:>9.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Typeahead benchmark.
+
+Times customer name completion over a synthetic customer book, the way
+the manual match dropdown queries it while a name is typed: every prefix
+of a customer's name, one keystroke at a time. The prefix index is
+compared with the substring scan the mirror uses for QuickBooks-style
+searches, after checking that every prefix index result contains the
+typed words:
+
+    python -m benchmarks.typeahead
+    python -m benchmarks.typeahead --customers 100000 --names 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.fakes import generate_customers
+from src.customer_index import TYPEAHEAD_LIMIT, prefix_tokens
+from src.customer_mirror import CustomerSnapshot
+
+
+def typed_queries(names: List[str]) -> List[str]:
+    """Get every query typed on the way to each name."""
+    return [name[:end] for name in names for end in range(1, len(name) + 1)]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Get a percentile of sorted samples."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def time_queries(lookup, queries: List[str]) -> List[float]:
+    """Time each lookup in milliseconds, sorted."""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        lookup(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def run(customers: int, names: int, seed: int) -> Dict[str, float]:
+    """
+    Time prefix index and substring scan lookups over one customer book.
+
+    Args:
+        customers: Number of customers in the book
+        names: Number of customer names typed out
+        seed: Random seed
+
+    Returns:
+        Index build time and lookup latency percentiles in milliseconds
+    """
+    book = generate_customers(customers, seed=seed)
+    snapshot = CustomerSnapshot({c["Id"]: c for c in book}, {})
+    rng = random.Random(seed)
+    queries = typed_queries([c["DisplayName"] for c in rng.sample(book, names)])
+
+    start = time.perf_counter()
+    snapshot.prefix_search("", TYPEAHEAD_LIMIT)  # Builds the index
+    build_ms = (time.perf_counter() - start) * 1000
+
+    for query in queries:
+        words = prefix_tokens(query)
+        for customer in snapshot.prefix_search(query, TYPEAHEAD_LIMIT):
+            names_words = prefix_tokens(customer["DisplayName"])
+            if not all(any(n.startswith(w) for n in names_words) for w in words):
+                raise AssertionError(f"{customer['DisplayName']!r} for {query!r}")
+
+    prefix = time_queries(lambda q: snapshot.prefix_search(q, TYPEAHEAD_LIMIT), queries)
+    scan = time_queries(lambda q: snapshot.search(q, TYPEAHEAD_LIMIT), queries)
+    return {
+        "queries": len(queries),
+        "build_ms": build_ms,
+        "prefix_p50_ms": statistics.median(prefix),
+        "prefix_p99_ms": percentile(prefix, 0.99),
+        "prefix_max_ms": prefix[-1],
+        "scan_p50_ms": statistics.median(scan),
+        "scan_p99_ms": percentile(scan, 0.99),
+        "scan_max_ms": scan[-1],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.typeahead",
+        description="Benchmark typeahead lookups over a customer book.",
+    )
+    parser.add_argument("--customers", type=int, default=50000)
+    parser.add_argument("--names", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark and print lookup latencies."""
+    args = build_parser().parse_args(argv)
+    result = run(args.customers, args.names, args.seed)
+    print(
+        f"{result['queries']:.0f} typed queries over {args.customers} customers; "
+        f"prefix index built in {result['build_ms']:.0f} ms"
+    )
+    print(f"{'':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label in ("prefix", "scan"):
+        print(
+            f"{label:>8} {result[label + '_p50_ms']:>9.3f} "
+            f"{result[label + '_p99_ms']:>9.3f} {result[label + '_max_ms']:>9.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -119,7 +119,7 @@ describe('ManualMatchModal', () => {
     await waitFor(() => {
       expect(fetch).toHaveBeenCalledTimes(1);
       expect(fetch).toHaveBeenCalledWith(
-        '/api/search_customers?search_term=Cust',
+        '/api/customers/typeahead?q=Cust&limit=20',
         expect.objectContaining({ headers: { 'X-Session-ID': 'test-session-id' } })
       );
     });
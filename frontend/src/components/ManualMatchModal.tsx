@@ -12,6 +12,12 @@ interface Customer {
   };
 }
 
+interface Suggestion {
+  customer: Customer;
+  score: number;
+  reasons: string[];
+}
+
 interface ManualMatchModalProps {
   isOpen: boolean;
   onClose: () => void;
@@ -33,6 +39,7 @@ const ManualMatchModal: React.FC<ManualMatchModalProps> = ({
   const [error, setError] = useState<string | null>(null);
   const [debounceTimeout, setDebounceTimeout] = useState<NodeJS.Timeout | null>(null);
   const [showDropdown, setShowDropdown] = useState(false);
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
 
   const fetchCustomers = useCallback(async (term: string) => {
     if (!term || !term.trim()) {
@@ -48,9 +55,9 @@ const ManualMatchModal: React.FC<ManualMatchModalProps> = ({
     try {
       console.log('Fetching customers with term:', term);
 
-      // Use the configured API service
-      const response = await apiService.get('/api/search_customers', {
-        params: { search_term: term }
+      // Completed from the server's customer index, without a QuickBooks search
+      const response = await apiService.get('/api/customers/typeahead', {
+        params: { q: term, limit: 20 }
       });
 
       console.log('Search response:', response.data);
@@ -125,12 +132,34 @@ const ManualMatchModal: React.FC<ManualMatchModalProps> = ({
       setError(null);
       setIsLoading(false);
       setShowDropdown(false);
+      setSuggestions([]);
       if (debounceTimeout) {
         clearTimeout(debounceTimeout);
       }
     }
   }, [isOpen]);
 
+  // Suggest ranked customers for the donation as soon as the modal opens
+  useEffect(() => {
+    if (!isOpen || !donation) {
+      return;
+    }
+    let cancelled = false;
+    apiService.post('/api/match_candidates', { donation, k: 5 })
+      .then((response) => {
+        if (!cancelled && response.data.success) {
+          setSuggestions(response.data.data || []);
+        }
+      })
+      .catch((err) => {
+        // Searching still works without suggestions
+        console.error('Error fetching suggestions:', err);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [isOpen, donation]);
+
   // Pre-populate search when modal opens with donation
   useEffect(() => {
     if (isOpen && donation) {
@@ -198,6 +227,27 @@ const ManualMatchModal: React.FC<ManualMatchModalProps> = ({
 
           {error && <div className="error-message">{error}</div>}
 
+          {!showDropdown && suggestions.length > 0 && (
+            <div className="suggestions">
+              <div className="suggestions-title">Suggested matches</div>
+              <ul className="results-list">
+                {suggestions.map(({ customer, score, reasons }) => (
+                  <li
+                    key={customer.Id}
+                    onClick={() => handleSelectCustomer(customer)}
+                    className="result-item"
+                  >
+                    <div className="customer-name">
+                      {customer.DisplayName}
+                      <span className="match-score">{Math.round(score)}</span>
+                    </div>
+                    <div className="match-reasons">{reasons.join(' · ')}</div>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
           {showDropdown && (
             <div className="dropdown-results">
               {onNewCustomer && (
@@ -22,12 +22,22 @@ from werkzeug.utils import secure_filename
 
 from flask_session import Session  # type: ignore
 
-from .config import Config, session_backend, storage_backend
+from .candidate_ranking import DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS, payer_from_display
+from .config import (
+    Config,
+    customer_mirror,
+    customer_search_cache,
+    resolution_memory,
+    session_backend,
+    storage_backend,
+)
+from .customer_index import MAX_TYPEAHEAD_LIMIT, TYPEAHEAD_LIMIT
 from .customer_matcher import CustomerMatcher
 from .job_queue import JobQueue
 from .job_tracker import JobTracker
 from .limiter_config import configure_limiter, configure_limiter_emergency_disable
 from .quickbooks_auth import qbo_auth
+from .quickbooks_http import quickbooks_http
 from .quickbooks_utils import QuickBooksError
 from .redis_retry import warm_connection_pool, warm_session_backend
 from .secure_logging import audit_logger, setup_secure_logging
@@ -272,6 +282,7 @@ def health_check():
         "session": type(session_backend).__name__,
         "local_dev_mode": os.getenv("LOCAL_DEV_MODE") == "true",
         "qbo_environment": Config.QBO_ENVIRONMENT,
+        "quickbooks_http": quickbooks_http.stats(),
     }
 
     # Test CSV loading in local dev mode
@@ -533,6 +544,14 @@ def qbo_status():
 
         # Get auth status
         status = qbo_auth.get_auth_status(session_id)
+        if status.get("authenticated") and status.get("realm_id"):
+            staleness = customer_mirror.get_staleness(status["realm_id"])
+            status["customer_mirror"] = {
+                "synced": staleness is not None,
+                "staleness_seconds": (
+                    round(staleness, 1) if staleness is not None else None
+                ),
+            }
 
         return jsonify({"success": True, "data": status})
 
@@ -1013,6 +1032,19 @@ def search_customers():
                     jsonify({"success": False, "error": "No active session found"}),
                     400,
                 )
+            auth_status = qbo_auth.get_auth_status(session_id)
+            realm_id = auth_status.get("realm_id")
+            if auth_status.get("authenticated") and realm_id:
+                # Cached searches skip building the QuickBooks client entirely
+                customers = customer_search_cache.search(
+                    realm_id,
+                    search_term,
+                    lambda term: CustomerMatcher(
+                        session_id=session_id
+                    ).data_source.search_customer(term),
+                )
+                logger.info(f"Found {len(customers)} customers")
+                return jsonify({"success": True, "data": customers})
             customer_matcher = CustomerMatcher(session_id=session_id)
 
         try:
@@ -1035,6 +1067,151 @@ def search_customers():
         return jsonify({"success": False, "error": f"Server error: {str(e)}"}), 500
 
 
+@app.route("/api/match_candidates", methods=["POST"])
+def match_candidates():
+    """Suggest ranked customers for a donation.
+
+    Accepts the donation as shown in the UI or as extracted, and returns the
+    top candidates with their match scores and reasons.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not data.get("donation"):
+            return jsonify({"success": False, "error": "Missing 'donation'"}), 400
+
+        donation = data["donation"]
+        if "PayerInfo" not in donation:
+            donation = payer_from_display(donation)
+
+        try:
+            k = int(data.get("k", DEFAULT_SUGGESTIONS))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "Invalid 'k'"}), 400
+        if not 1 <= k <= MAX_SUGGESTIONS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": f"'k' must be between 1 and {MAX_SUGGESTIONS}",
+                    }
+                ),
+                400,
+            )
+
+        # Check for local dev mode
+        if os.getenv("LOCAL_DEV_MODE") == "true":
+            csv_path = (
+                Path(__file__).parent.parent
+                / "src/tests/test_files/customer_contact_list.csv"
+            )
+            customer_matcher = CustomerMatcher(csv_path=csv_path)
+        else:
+            session_id = request.headers.get("X-Session-ID")
+            if not session_id:
+                return (
+                    jsonify({"success": False, "error": "Missing X-Session-ID header"}),
+                    400,
+                )
+            customer_matcher = CustomerMatcher(session_id=session_id)
+
+        candidates = customer_matcher.rank_candidates(donation, k)
+        logger.info(f"Suggested {len(candidates)} customers")
+        return jsonify({"success": True, "data": candidates})
+
+    except QuickBooksError as e:
+        logger.error(f"QuickBooks API error in match_candidates: {e}")
+        return (
+            jsonify({"success": False, "error": str(e), "details": e.detail}),
+            e.status_code,
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in match_candidates: {e}", exc_info=True)
+        return jsonify({"success": False, "error": f"Server error: {str(e)}"}), 500
+
+
+@app.route("/api/customers/typeahead", methods=["GET"])
+def customer_typeahead():
+    """Complete a typed customer name.
+
+    Answered from the realm's mirrored customers by name word prefix without
+    contacting QuickBooks; realms without a mirror fall back to a cached
+    QuickBooks search.
+    """
+    try:
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"success": False, "error": "Missing q"}), 400
+        try:
+            limit = int(request.args.get("limit", TYPEAHEAD_LIMIT))
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid limit"}), 400
+        limit = max(1, min(limit, MAX_TYPEAHEAD_LIMIT))
+
+        from .customer_data_source import create_customer_data_source
+
+        if os.getenv("LOCAL_DEV_MODE") == "true":
+            csv_path = (
+                Path(__file__).parent.parent
+                / "src/tests/test_files/customer_contact_list.csv"
+            )
+            data_source = create_customer_data_source(csv_path=csv_path)
+            customers = data_source.prefix_search(query, limit)
+            if customers is None:
+                customers = data_source.search_customer(query)[:limit]
+        else:
+            from flask import session as flask_session
+
+            session_id = flask_session.get("app_session_id")
+            if not session_id:
+                return (
+                    jsonify({"success": False, "error": "No active session found"}),
+                    400,
+                )
+            auth_status = qbo_auth.get_auth_status(session_id)
+            realm_id = auth_status.get("realm_id")
+            if not auth_status.get("authenticated") or not realm_id:
+                return (
+                    jsonify({"success": False, "error": "Not authenticated"}),
+                    401,
+                )
+
+            snapshot = (
+                customer_mirror.get_snapshot(realm_id)
+                if Config.CUSTOMER_MIRROR_ENABLED
+                else None
+            )
+            if snapshot is not None:
+                customers = snapshot.prefix_search(query, limit)
+            else:
+                customers = customer_search_cache.search(
+                    realm_id,
+                    query,
+                    lambda term: create_customer_data_source(
+                        session_id=session_id
+                    ).search_customer(term),
+                )[:limit]
+
+        return jsonify(
+            {
+                "success": True,
+                "data": [
+                    {"Id": c["Id"], "DisplayName": c.get("DisplayName", "")}
+                    for c in customers
+                ],
+            }
+        )
+
+    except QuickBooksError as e:
+        logger.error(f"QuickBooks API error in customer_typeahead: {e}")
+        return (
+            jsonify({"success": False, "error": str(e), "details": e.detail}),
+            e.status_code,
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in customer_typeahead: {e}", exc_info=True)
+        return jsonify({"success": False, "error": f"Server error: {str(e)}"}), 500
+
+
 @app.route("/api/manual_match", methods=["POST"])
 def manual_match():
     """Manually match a donation to a QuickBooks customer.
@@ -1156,6 +1333,11 @@ def manual_match():
             "qbo_customer_id"
         ] = qb_customer_id  # Store the customer ID
 
+        # Resolve this payer to the confirmed customer in later uploads
+        customer_matcher.remember_match(
+            original_donation.get("_payer_fingerprints", []), qb_customer_id
+        )
+
         # Determine if address was updated by comparing old and new, if necessary
         # For now, if updates_needed is true, we can assume some edit/update happened.
         # The 'updates_needed' from merge_customer_data can
@@ -1255,10 +1437,10 @@ def get_accounts():
                 400,
             )
 
-        # Create QuickBooks client and fetch accounts
-        from .quickbooks_service import QuickBooksClient
+        # Reuse the session's QuickBooks client and fetch accounts
+        from .quickbooks_service import quickbooks_clients
 
-        qb_client = QuickBooksClient(session_id)
+        qb_client = quickbooks_clients.get(session_id)
         accounts = qb_client.list_accounts(search_term=search_term)
 
         return jsonify({"success": True, "data": {"accounts": accounts}})
@@ -1328,10 +1510,10 @@ def get_items():
                 400,
             )
 
-        # Create QuickBooks client and fetch items
-        from .quickbooks_service import QuickBooksClient
+        # Reuse the session's QuickBooks client and fetch items
+        from .quickbooks_service import quickbooks_clients
 
-        qb_client = QuickBooksClient(session_id)
+        qb_client = quickbooks_clients.get(session_id)
         items = qb_client.list_items()
 
         return jsonify({"success": True, "data": {"items": items}})
@@ -1424,10 +1606,10 @@ def create_sales_receipt():
                 400,
             )
 
-        # Create QuickBooks client
-        from .quickbooks_service import QuickBooksClient
+        # Reuse the session's QuickBooks client
+        from .quickbooks_service import quickbooks_clients
 
-        qb_client = QuickBooksClient(session_id)
+        qb_client = quickbooks_clients.get(session_id)
 
         # Extract needed fields
         payment_ref = donation["payment_info"]["payment_ref"]
@@ -1578,6 +1760,11 @@ def create_sales_receipt():
         # Create the sales receipt
         sales_receipt = qb_client.create_sales_receipt(sales_receipt_data)
 
+        # A receipt confirms the match; later uploads resolve this payer to it
+        resolution_memory.remember(
+            qb_client.realm_id, donation.get("_payer_fingerprints", []), customer_id
+        )
+
         return jsonify({"success": True, "data": {"sales_receipt": sales_receipt}})
 
     except QuickBooksError as qbe:
@@ -1612,7 +1799,10 @@ def create_customer_endpoint():
             )
 
         # Import the customer data source factory
-        from .customer_data_source import create_customer_data_source
+        from .customer_data_source import (
+            QuickBooksDataSource,
+            create_customer_data_source,
+        )
 
         # Check if we're in local dev mode
         if os.getenv("LOCAL_DEV_MODE") == "true":
@@ -1648,6 +1838,10 @@ def create_customer_endpoint():
         # Create the customer using the appropriate data source
         new_customer = data_source.create_customer(customer_data=data)
 
+        # Cached searches of the realm no longer include every match
+        if isinstance(data_source, QuickBooksDataSource):
+            customer_search_cache.invalidate(data_source.qb_client.realm_id)
+
         return jsonify({"success": True, "data": new_customer})
 
     except QuickBooksError as qbe:
@@ -0,0 +1,328 @@
+"""
+Command-line batch processing for directories of scanned donations.
+
+Backfills that exceed the web upload's file limit can be run offline:
+
+    python -m src.batch_cli scans/2024-*/ -o results.jsonl --customers-csv c.csv
+
+Each file is extracted independently (in parallel) and checkpointed, the
+extractions are merged in file order, and the merged set goes through
+process_donation_documents for validation, deduplication and matching.
+Checkpoints are keyed by the set of input files, so re-running the same
+command after a crash resumes instead of starting over.
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .checkpoint import LocalCheckpointStore
+from .config import Config
+from .donation_processor import process_donation_documents
+from .geminiservice import extract_donations_from_documents
+from .job_tracker import JobStage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = ".batch_checkpoints"
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+
+def collect_scan_files(inputs: List[str]) -> List[Path]:
+    """
+    Expand directories and glob patterns into a sorted list of scan files.
+
+    Args:
+        inputs: Directories, glob patterns or file paths
+
+    Returns:
+        Unique supported files in sorted order
+    """
+    files = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = [p for p in path.rglob("*") if p.is_file()]
+        else:
+            candidates = [Path(p) for p in glob.glob(item, recursive=True)]
+        for candidate in candidates:
+            if candidate.is_file() and Config.is_allowed_file(candidate.name):
+                files.add(candidate.resolve())
+    return sorted(files)
+
+
+def make_run_id(files: List[Path]) -> str:
+    """Derive a stable run ID from the set of input files."""
+    digest = hashlib.sha1("\n".join(str(f) for f in files).encode()).hexdigest()
+    return f"cli_{digest[:16]}"
+
+
+def _file_checkpoint_id(run_id: str, file_path: Path) -> str:
+    """Checkpoint ID for a single file's extraction within a run."""
+    return f"{run_id}_{hashlib.sha1(str(file_path).encode()).hexdigest()[:12]}"
+
+
+def _progress(message: str) -> None:
+    """Stream a progress line to stderr."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def extract_files(
+    files: List[Path],
+    run_id: str,
+    store: LocalCheckpointStore,
+    workers: int = 1,
+) -> Dict[Path, Optional[List[Dict[str, Any]]]]:
+    """
+    Extract donations from each file, reusing per-file checkpoints.
+
+    Args:
+        files: Scan files to extract
+        run_id: Run the files belong to
+        store: Checkpoint store for per-file extractions
+        workers: Number of files to extract concurrently
+
+    Returns:
+        Mapping of file to its extracted donations, or None if extraction failed
+    """
+    results: Dict[Path, Optional[List[Dict[str, Any]]]] = {}
+    pending = []
+    for file_path in files:
+        saved = store.load_stage(
+            _file_checkpoint_id(run_id, file_path), JobStage.EXTRACTING
+        )
+        if saved is not None:
+            results[file_path] = saved
+        else:
+            pending.append(file_path)
+
+    done = len(results)
+    if done:
+        _progress(f"Resuming: {done}/{len(files)} files already extracted")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(extract_donations_from_documents, [file_path]): file_path
+            for file_path in pending
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            done += 1
+            try:
+                donations = future.result()
+            except Exception as e:
+                logger.error(f"Extraction failed for {file_path}: {e}")
+                results[file_path] = None
+                _progress(f"[{done}/{len(files)}] {file_path.name}: failed ({e})")
+                continue
+
+            store.save_stage(
+                _file_checkpoint_id(run_id, file_path), JobStage.EXTRACTING, donations
+            )
+            results[file_path] = donations
+            _progress(
+                f"[{done}/{len(files)}] {file_path.name}: "
+                f"{len(donations)} donations extracted"
+            )
+
+    return results
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested display data into dotted column names."""
+    row: Dict[str, Any] = {}
+    for key, value in data.items():
+        column = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(_flatten(value, f"{column}."))
+        elif isinstance(value, list):
+            row[column] = "; ".join(str(v) for v in value)
+        else:
+            row[column] = "" if value is None else value
+    return row
+
+
+def write_results(
+    display_donations: List[Dict[str, Any]], output_path: Path, output_format: str
+) -> None:
+    """
+    Write display-ready donations as JSON Lines or CSV.
+
+    Args:
+        display_donations: Donations from merge_all_donations_for_display
+        output_path: File to write
+        output_format: Either "jsonl" or "csv"
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_format == "jsonl":
+        with open(output_path, "w", encoding="utf-8") as f:
+            for donation in display_donations:
+                f.write(json.dumps(donation) + "\n")
+        return
+
+    rows = [_flatten(donation) for donation in display_donations]
+    fieldnames: List[str] = []
+    for row in rows:
+        fieldnames.extend(column for column in row if column not in fieldnames)
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_batch(
+    files: List[Path],
+    output_path: Path,
+    output_format: str = "jsonl",
+    workers: int = 1,
+    customers_csv: Optional[Path] = None,
+    session_id: Optional[str] = None,
+    checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    run_id: Optional[str] = None,
+) -> int:
+    """
+    Process scan files end-to-end and write the merged results.
+
+    Args:
+        files: Scan files to process
+        output_path: File to write the results to
+        output_format: Either "jsonl" or "csv"
+        workers: Files extracted and donations matched concurrently
+        customers_csv: CSV customer list used for dry-run matching
+        session_id: Session whose QuickBooks connection is used for matching
+        checkpoint_dir: Directory holding resume checkpoints
+        run_id: Optional explicit run ID (defaults to a hash of the files)
+
+    Returns:
+        int: Process exit code (0 on success)
+    """
+    run_id = run_id or make_run_id(files)
+    store = LocalCheckpointStore(base_path=checkpoint_dir)
+    _progress(f"Run {run_id}: {len(files)} files")
+
+    if store.load_stage(run_id, JobStage.VALIDATING) is None:
+        extracted = extract_files(files, run_id, store, workers=workers)
+        failed = [f for f in files if extracted.get(f) is None]
+        if failed:
+            _progress(
+                f"{len(failed)} files failed extraction; re-run the same command "
+                "to retry them"
+            )
+            return 1
+
+        merged = [donation for f in files for donation in extracted[f] or []]
+        store.save_stage(run_id, JobStage.EXTRACTING, merged)
+
+    def report_matching(stage: JobStage, progress: int, message: str) -> None:
+        _progress(f"{stage.value}: {message}")
+
+    _, metadata, display_donations = process_donation_documents(
+        [str(f) for f in files],
+        session_id=session_id,
+        csv_path=customers_csv,
+        progress_callback=report_matching,
+        upload_id=run_id,
+        checkpoint_store=store,
+        match_workers=workers,
+    )
+
+    write_results(display_donations, output_path, output_format)
+
+    for file_path in files:
+        store.clear(_file_checkpoint_id(run_id, file_path))
+    store.clear(run_id)
+
+    _progress(
+        f"Wrote {len(display_donations)} donations to {output_path} "
+        f"(raw: {metadata['raw_count']}, duplicates: {metadata['duplicate_count']}, "
+        f"matched: {metadata['matched_count']})"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch_cli",
+        description="Extract, validate and match a directory of donation scans.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Directories, glob patterns or files to process"
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, type=Path, help="Output file path"
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        help="Output format (default: inferred from the output file extension)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Files to extract and donations to match concurrently (default: 4)",
+    )
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument(
+        "--customers-csv",
+        type=Path,
+        help="Match against a CSV customer list instead of QuickBooks (dry run)",
+    )
+    backend.add_argument(
+        "--session-id", help="Session whose QuickBooks connection is used to match"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=DEFAULT_CHECKPOINT_DIR,
+        help=f"Resume checkpoint directory (default: {DEFAULT_CHECKPOINT_DIR})",
+    )
+    parser.add_argument(
+        "--run-id", help="Explicit run ID (default: derived from the input files)"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Debug logging")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the batch CLI."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    if args.customers_csv and not args.customers_csv.exists():
+        parser.error(f"customer CSV not found: {args.customers_csv}")
+
+    files = collect_scan_files(args.inputs)
+    if not files:
+        parser.error("no supported scan files found")
+
+    output_format = args.format or (
+        "csv" if args.output.suffix.lower() == ".csv" else "jsonl"
+    )
+
+    return run_batch(
+        files,
+        args.output,
+        output_format=output_format,
+        workers=args.workers,
+        customers_csv=args.customers_csv,
+        session_id=args.session_id,
+        checkpoint_dir=args.checkpoint_dir,
+        run_id=args.run_id,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Batch candidate selection for matching a job's donations at once.
+
+When the whole customer list is held locally, every donation of a job
+can be compared with every customer in one pass instead of running
+searches per donation. Customers are ranked by the number of normalized
+name words they share with the donor, looked up in a word index, and the
+top-k customers of each donation are kept; the matcher's scoring rules
+then only run on those candidates.
+"""
+import heapq
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .match_features import DonorFeatures, normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Candidates kept per donation
+TOP_K_CANDIDATES = 10
+
+
+def donor_names(donation: Dict[str, Any]) -> List[str]:
+    """
+    Get the normalized names a donation's payer may be listed under.
+
+    Args:
+        donation: Extracted donation data
+
+    Returns:
+        Normalized aliases and organization name, without duplicates
+    """
+    donor = DonorFeatures(donation)
+    names = [normalized for _, normalized, _, _ in donor.aliases]
+    if donor.normalized_org:
+        names.append(donor.normalized_org)
+    return [name for name in dict.fromkeys(names) if name]
+
+
+class BatchScorer:
+    """Top-k candidate selection over a preprocessed customer table."""
+
+    def __init__(self, customers: List[Dict[str, Any]]):
+        """
+        Preprocess a customer table.
+
+        Args:
+            customers: Every customer a donation may match
+        """
+        self.customers = customers
+        self.names = [
+            normalize_name(
+                customer.get("CompanyName") or customer.get("DisplayName") or ""
+            ).lower()
+            for customer in customers
+        ]
+        self._word_index: Optional[Dict[str, List[int]]] = None
+
+    def top_candidates(
+        self, donations: List[Dict[str, Any]], k: int = TOP_K_CANDIDATES
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Select the most similar customers for each donation.
+
+        Args:
+            donations: Extracted donations
+            k: Candidates to keep per donation
+
+        Returns:
+            Candidates for each donation, most similar first
+        """
+        queries: List[Tuple[int, str]] = [
+            (i, name)
+            for i, donation in enumerate(donations)
+            for name in donor_names(donation)
+        ]
+        if not queries or not self.customers:
+            return [[] for _ in donations]
+
+        ranked = self._rank_by_shared_words(queries, len(donations), k)
+        return [[self.customers[j] for j in indexes] for indexes in ranked]
+
+    def _rank_by_shared_words(
+        self, queries: List[Tuple[int, str]], donation_count: int, k: int
+    ) -> List[List[int]]:
+        """Rank customers by the number of name words shared with the donor."""
+        if self._word_index is None:
+            index: Dict[str, List[int]] = defaultdict(list)
+            for j, name in enumerate(self.names):
+                for word in set(name.split()):
+                    index[word].append(j)
+            self._word_index = index
+
+        words: List[set] = [set() for _ in range(donation_count)]
+        for i, name in queries:
+            words[i].update(name.split())
+
+        ranked = []
+        for donor_words in words:
+            shared: Dict[int, int] = defaultdict(int)
+            for word in donor_words:
+                for j in self._word_index.get(word, ()):
+                    shared[j] += 1
+            top = heapq.nsmallest(
+                k, shared.items(), key=lambda item: (-item[1], item[0])
+            )
+            ranked.append([j for j, _ in top])
+        return ranked
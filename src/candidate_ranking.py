@@ -0,0 +1,149 @@
+"""
+Ranked customer suggestions for manually matching a donation.
+
+Manual matching used to show raw search results for whatever the user
+typed. A ranker instead takes the donation itself and returns its best
+candidate customers with their match scores and the reasons behind them,
+in one call. Candidates are the customers sharing an email, phone or
+address with the donor plus the top-k by name similarity; each is scored
+with the matcher's own rules so suggestions agree with automatic matching.
+
+A ranker is built once per in-memory customer list (a CSV export or a
+realm's mirror snapshot) and reused for every request against it.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from .batch_scoring import TOP_K_CANDIDATES, BatchScorer
+from .customer_index import ContactIndex, donation_contact_keys
+from .match_features import DonorFeatures, FeatureCache, score_features
+
+# Suggestions returned when the caller does not ask for a number
+DEFAULT_SUGGESTIONS = 5
+
+# Most suggestions one request may ask for
+MAX_SUGGESTIONS = 25
+
+# Reason given for each kind of shared contact key
+CONTACT_REASONS = {
+    "email": "same email",
+    "phone": "same phone",
+    "address": "same address",
+}
+
+
+def payer_from_display(display_donation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild the extracted payer fields of a donation shown in the UI.
+
+    Args:
+        display_donation: Donation from merge_donation_for_display
+
+    Returns:
+        Donation with PayerInfo and ContactInfo as extracted
+    """
+    payer_info = display_donation.get("payer_info") or {}
+    customer_ref = payer_info.get("customer_ref") or {}
+    address = payer_info.get("qb_address") or {}
+    aliases = [
+        name
+        for name in dict.fromkeys(
+            [customer_ref.get("full_name"), customer_ref.get("display_name")]
+        )
+        if name
+    ]
+    return {
+        "PayerInfo": {
+            "Aliases": aliases,
+            "Organization_Name": payer_info.get("qb_organization_name") or "",
+        },
+        "ContactInfo": {
+            "Address_Line_1": address.get("line1", ""),
+            "City": address.get("city", ""),
+            "State": address.get("state", ""),
+            "ZIP": address.get("zip", ""),
+            "Email": payer_info.get("qb_email", ""),
+            "Phone": payer_info.get("qb_phone", ""),
+        },
+    }
+
+
+class CandidateRanker:
+    """Top-k scored candidates for a donation over a customer list."""
+
+    def __init__(
+        self,
+        customers: List[Dict[str, Any]],
+        contact_search: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+    ):
+        """
+        Preprocess a customer list.
+
+        Args:
+            customers: Every customer a donation may match
+            contact_search: Lookup of customers by contact key, for sources
+                that already index contact details; otherwise one is built
+        """
+        self.scorer = BatchScorer(customers)
+        self._features = FeatureCache()
+        self.contact_search = contact_search or self._index_contacts(customers)
+
+    @staticmethod
+    def _index_contacts(
+        customers: List[Dict[str, Any]]
+    ) -> Callable[[str], List[Dict[str, Any]]]:
+        """Build a contact key lookup over a customer list."""
+        index = ContactIndex()
+        by_id = {}
+        for customer in customers:
+            index.add(customer["Id"], customer)
+            by_id[customer["Id"]] = customer
+
+        def contact_search(key: str) -> List[Dict[str, Any]]:
+            return [by_id[i] for i in index.lookup(key)]
+
+        return contact_search
+
+    def rank(
+        self, donation: Dict[str, Any], k: int = DEFAULT_SUGGESTIONS
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the customers most likely to be a donation's payer.
+
+        Args:
+            donation: Extracted donation data
+            k: Number of suggestions
+
+        Returns:
+            Up to k dicts of customer, score (0-100, as in automatic
+            matching) and reasons, best first; customers sharing contact
+            details rank first among equal scores
+        """
+        reasons: Dict[str, List[str]] = {}
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for key in donation_contact_keys(donation):
+            reason = CONTACT_REASONS[key.split(":", 1)[0]]
+            for customer in self.contact_search(key):
+                candidates.setdefault(customer["Id"], customer)
+                reasons.setdefault(customer["Id"], []).append(reason)
+
+        for customer in self.scorer.top_candidates(
+            [donation], k=max(k, TOP_K_CANDIDATES)
+        )[0]:
+            candidates.setdefault(customer["Id"], customer)
+
+        donor = DonorFeatures(donation)
+        ranked: List[Dict[str, Any]] = []
+        for customer_id, customer in candidates.items():
+            score = score_features(donor, self._features.get(customer))
+            contact_reasons = reasons.get(customer_id, [])
+            if not score and not contact_reasons:
+                continue
+            ranked.append(
+                {
+                    "customer": customer,
+                    "score": score,
+                    "reasons": [f"name score {score:.0f}"] + contact_reasons,
+                }
+            )
+        ranked.sort(key=lambda c: (-c["score"], -len(c["reasons"])))
+        return ranked[:k]
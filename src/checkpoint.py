@@ -0,0 +1,304 @@
+"""
+Checkpoint storage for resumable donation processing jobs.
+
+Each stage of process_donation_documents persists its output keyed by
+upload_id so a restarted worker resumes from the last completed stage
+(raw extraction, validated set) or donation (per-donation match results)
+instead of repeating Gemini extraction and QuickBooks searches.
+
+Supports local JSON files (development) and Redis (production).
+"""
+import json
+import logging
+import shutil
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import redis
+
+from .job_tracker import JobStage
+from .redis_retry import redis_retry
+
+logger = logging.getLogger(__name__)
+
+# Checkpoints outlive a job's retry window but not the upload metadata (7 days)
+CHECKPOINT_TTL_SECONDS = 86400
+
+
+class CheckpointStore(ABC):
+    """Abstract base class for job checkpoint storage backends."""
+
+    @abstractmethod
+    def save_stage(self, upload_id: str, stage: JobStage, data: Any) -> bool:
+        """
+        Persist the output of a completed stage.
+
+        Args:
+            upload_id: Upload batch the job is processing
+            stage: Stage whose output is being saved
+            data: JSON-serializable stage output
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def load_stage(self, upload_id: str, stage: JobStage) -> Optional[Any]:
+        """
+        Load the output of a previously completed stage.
+
+        Args:
+            upload_id: Upload batch the job is processing
+            stage: Stage to load
+
+        Returns:
+            Stage output, or None if no unexpired checkpoint exists
+        """
+        pass
+
+    @abstractmethod
+    def save_match(
+        self, upload_id: str, index: int, match_data: Dict[str, Any]
+    ) -> bool:
+        """
+        Persist the match result for one donation of the validated set.
+
+        Args:
+            upload_id: Upload batch the job is processing
+            index: Position of the donation in the validated set
+            match_data: Result of CustomerMatcher.match_donation_to_customer
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def load_matches(self, upload_id: str) -> Dict[int, Dict[str, Any]]:
+        """
+        Load all saved per-donation match results.
+
+        Args:
+            upload_id: Upload batch the job is processing
+
+        Returns:
+            Mapping of validated-set index to match result
+        """
+        pass
+
+    @abstractmethod
+    def clear(self, upload_id: str) -> bool:
+        """
+        Delete every checkpoint for an upload once its job has finished.
+
+        Args:
+            upload_id: Upload batch the job processed
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        pass
+
+
+class LocalCheckpointStore(CheckpointStore):
+    """JSON file-based checkpoint storage for development."""
+
+    def __init__(
+        self, base_path: str = "checkpoints", ttl_seconds: int = CHECKPOINT_TTL_SECONDS
+    ):
+        """
+        Initialize local checkpoint storage.
+
+        Args:
+            base_path: Base directory for checkpoint files
+            ttl_seconds: Age after which checkpoints are ignored
+        """
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _get_upload_path(self, upload_id: str) -> Path:
+        """Get the checkpoint directory for an upload."""
+        return self.base_path / upload_id
+
+    def _write(self, path: Path, data: Any) -> bool:
+        """Atomically write a checkpoint file with its save time."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"saved_at": time.time(), "data": data}, f)
+            tmp_path.replace(path)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write checkpoint {path}: {e}")
+            return False
+
+    def _read(self, path: Path) -> Optional[Any]:
+        """Read a checkpoint file, ignoring it if missing or expired."""
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read checkpoint {path}: {e}")
+            return None
+
+        if time.time() - payload.get("saved_at", 0) > self.ttl_seconds:
+            return None
+        return payload.get("data")
+
+    def save_stage(self, upload_id: str, stage: JobStage, data: Any) -> bool:
+        """Store stage output as a JSON file."""
+        path = self._get_upload_path(upload_id) / f"{stage.value}.json"
+        return self._write(path, data)
+
+    def load_stage(self, upload_id: str, stage: JobStage) -> Optional[Any]:
+        """Load stage output from its JSON file."""
+        path = self._get_upload_path(upload_id) / f"{stage.value}.json"
+        return self._read(path)
+
+    def save_match(
+        self, upload_id: str, index: int, match_data: Dict[str, Any]
+    ) -> bool:
+        """Store one match result as its own JSON file."""
+        path = self._get_upload_path(upload_id) / "matches" / f"{index}.json"
+        return self._write(path, match_data)
+
+    def load_matches(self, upload_id: str) -> Dict[int, Dict[str, Any]]:
+        """Load all match result files for an upload."""
+        matches_path = self._get_upload_path(upload_id) / "matches"
+        if not matches_path.exists():
+            return {}
+
+        matches = {}
+        for match_file in matches_path.glob("*.json"):
+            data = self._read(match_file)
+            if data is not None:
+                matches[int(match_file.stem)] = data
+        return matches
+
+    def clear(self, upload_id: str) -> bool:
+        """Delete the upload's checkpoint directory."""
+        upload_path = self._get_upload_path(upload_id)
+        if upload_path.exists():
+            shutil.rmtree(upload_path, ignore_errors=True)
+        return True
+
+
+class RedisCheckpointStore(CheckpointStore):
+    """Redis-based checkpoint storage shared by all worker dynos."""
+
+    def __init__(
+        self, redis_client: redis.Redis, ttl_seconds: int = CHECKPOINT_TTL_SECONDS
+    ):
+        """
+        Initialize Redis checkpoint storage.
+
+        Args:
+            redis_client: Redis client instance (reuses existing connection)
+            ttl_seconds: Expiry applied to every checkpoint key
+        """
+        self.redis = redis_client
+        self.key_prefix = "checkpoint:"
+        self.ttl_seconds = ttl_seconds
+        self.enabled = redis_client is not None
+
+    def _get_stage_key(self, upload_id: str, stage: JobStage) -> str:
+        """Generate Redis key for a stage checkpoint."""
+        return f"{self.key_prefix}{upload_id}:{stage.value}"
+
+    def _get_matches_key(self, upload_id: str) -> str:
+        """Generate Redis hash key for per-donation match results."""
+        return f"{self.key_prefix}{upload_id}:matches"
+
+    @redis_retry()
+    def save_stage(self, upload_id: str, stage: JobStage, data: Any) -> bool:
+        """Store stage output in Redis with TTL."""
+        if not self.enabled:
+            return False
+
+        try:
+            self.redis.setex(
+                self._get_stage_key(upload_id, stage),
+                self.ttl_seconds,
+                json.dumps(data),
+            )
+            return True
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save {stage.value} checkpoint: {e}")
+            return False
+
+    @redis_retry()
+    def load_stage(self, upload_id: str, stage: JobStage) -> Optional[Any]:
+        """Load stage output from Redis."""
+        if not self.enabled:
+            return None
+
+        try:
+            data = self.redis.get(self._get_stage_key(upload_id, stage))
+            return json.loads(data) if data else None
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load {stage.value} checkpoint: {e}")
+            return None
+
+    @redis_retry()
+    def save_match(
+        self, upload_id: str, index: int, match_data: Dict[str, Any]
+    ) -> bool:
+        """Store one match result in the upload's match hash."""
+        if not self.enabled:
+            return False
+
+        try:
+            key = self._get_matches_key(upload_id)
+            pipe = self.redis.pipeline()
+            pipe.hset(key, str(index), json.dumps(match_data))
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+            return True
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save match checkpoint {index}: {e}")
+            return False
+
+    @redis_retry()
+    def load_matches(self, upload_id: str) -> Dict[int, Dict[str, Any]]:
+        """Load all match results from the upload's match hash."""
+        if not self.enabled:
+            return {}
+
+        try:
+            raw = self.redis.hgetall(self._get_matches_key(upload_id))
+            return {int(index): json.loads(data) for index, data in raw.items()}
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load match checkpoints: {e}")
+            return {}
+
+    def clear(self, upload_id: str) -> bool:
+        """Delete every checkpoint key for the upload."""
+        if not self.enabled:
+            return False
+
+        try:
+            self.redis.delete(
+                self._get_stage_key(upload_id, JobStage.EXTRACTING),
+                self._get_stage_key(upload_id, JobStage.VALIDATING),
+                self._get_matches_key(upload_id),
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to clear checkpoints for {upload_id}: {e}")
+            return False
@@ -11,6 +11,17 @@ from typing import Tuple
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 
+from .customer_mirror import CustomerMirror, LocalCustomerMirror, RedisCustomerMirror
+from .customer_search_cache import (
+    CustomerSearchCache,
+    LocalCustomerSearchCache,
+    RedisCustomerSearchCache,
+)
+from .resolution_memory import (
+    LocalResolutionMemory,
+    RedisResolutionMemory,
+    ResolutionMemory,
+)
 from .session import LocalSession, RedisSession, SessionBackend
 from .storage import LocalStorage, S3Storage, StorageBackend
 
@@ -64,8 +75,68 @@ def get_backends() -> Tuple[StorageBackend, SessionBackend]:
     return storage, session
 
 
+def get_customer_mirror(session: SessionBackend) -> CustomerMirror:
+    """
+    Get the customer mirror backend matching the session backend.
+
+    The Redis mirror reuses the session backend's connection pool rather
+    than opening another one.
+
+    Args:
+        session: Active session backend
+
+    Returns:
+        CustomerMirror instance
+    """
+    if isinstance(session, RedisSession) and session.enabled:
+        logger.info("Using Redis customer mirror")
+        return RedisCustomerMirror(session.redis_client)
+
+    logger.info("Using local JSON customer mirror")
+    return LocalCustomerMirror()
+
+
+def get_customer_search_cache(session: SessionBackend) -> CustomerSearchCache:
+    """
+    Get the customer search cache matching the session backend.
+
+    Args:
+        session: Active session backend
+
+    Returns:
+        CustomerSearchCache instance
+    """
+    if isinstance(session, RedisSession) and session.enabled:
+        logger.info("Using Redis customer search cache")
+        return RedisCustomerSearchCache(session.redis_client)
+
+    logger.info("Using in-process customer search cache")
+    return LocalCustomerSearchCache()
+
+
+def get_resolution_memory(session: SessionBackend) -> ResolutionMemory:
+    """
+    Get the resolution memory backend matching the session backend.
+
+    Args:
+        session: Active session backend
+
+    Returns:
+        ResolutionMemory instance
+    """
+    if isinstance(session, RedisSession) and session.enabled:
+        logger.info("Using Redis resolution memory")
+        return RedisResolutionMemory(session.redis_client)
+
+    logger.info("Using local JSON resolution memory")
+    return LocalResolutionMemory()
+
+
 # Global instances
 storage_backend, session_backend = get_backends()
+customer_mirror = get_customer_mirror(session_backend)
+customer_search_cache = get_customer_search_cache(session_backend)
+resolution_memory = get_resolution_memory(session_backend)
 
 
 # Configuration settings
@@ -101,6 +172,27 @@ class Config:
 
     QBO_REDIRECT_URI = os.getenv("QBO_REDIRECT_URI", "")
 
+    # Answer customer searches from the local customer mirror
+    CUSTOMER_MIRROR_ENABLED = os.getenv("CUSTOMER_MIRROR_ENABLED", "true") == "true"
+
+    # Serve CSV customer lists from this SQLite database (imported on first use)
+    CUSTOMER_DB_PATH = os.getenv("CUSTOMER_DB_PATH", "")
+
+    # Live QuickBooks clients kept per session, and seconds each is reused
+    QBO_CLIENT_CACHE_SIZE = int(os.getenv("QBO_CLIENT_CACHE_SIZE", "256"))
+    QBO_CLIENT_CACHE_TTL = int(os.getenv("QBO_CLIENT_CACHE_TTL", "300"))
+
+    # Pooled QuickBooks API connections per host, retries of failed calls, and
+    # connect and read timeouts in seconds
+    QBO_HTTP_POOL_SIZE = int(os.getenv("QBO_HTTP_POOL_SIZE", "20"))
+    QBO_HTTP_RETRIES = int(os.getenv("QBO_HTTP_RETRIES", "3"))
+    QBO_HTTP_CONNECT_TIMEOUT = float(os.getenv("QBO_HTTP_CONNECT_TIMEOUT", "5"))
+    QBO_HTTP_READ_TIMEOUT = float(os.getenv("QBO_HTTP_READ_TIMEOUT", "30"))
+
+    # QuickBooks API calls one process keeps in flight per company with the
+    # async client; QuickBooks rejects more than 10 concurrent calls per company
+    QBO_REALM_CONCURRENCY = int(os.getenv("QBO_REALM_CONCURRENCY", "10"))
+
     # Encryption key for token storage
     ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "")
 
@@ -1,11 +1,38 @@
 """Abstract customer data source for testing and production."""
 import csv
+import json
 import logging
+import os
+import sqlite3
+import threading
+import uuid
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from .quickbooks_service import QuickBooksClient, QuickBooksError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .candidate_ranking import CandidateRanker
+from .config import Config, customer_mirror
+from .customer_index import (
+    TRIGRAM_SIZE,
+    ContactIndex,
+    PhoneticIndex,
+    PrefixIndex,
+    TrigramIndex,
+    customer_contact_keys,
+    phonetic_keys,
+)
+from .customer_mirror import (
+    MIRROR_REFRESH_SECONDS,
+    CustomerMirror,
+    CustomerSnapshot,
+    needs_full_sync,
+    refresh_customer_mirror,
+    start_background_sync,
+)
+from .match_features import CustomerFeatures, FeatureCache
+from .quickbooks_service import QuickBooksError, quickbooks_clients
 
 logger = logging.getLogger(__name__)
 
@@ -33,13 +60,150 @@ class CustomerDataSource(ABC):
         """Create a new customer."""
         pass
 
+    def get_realm_id(self) -> Optional[str]:
+        """
+        Get the QuickBooks company the customers belong to.
+
+        Returns:
+            Realm ID, or None for customer lists outside QuickBooks
+        """
+        return None
+
+    def customer_table(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get every customer, if the source holds its customer list in memory.
+
+        Matching compares all of a job's donations with this table at once.
+
+        Returns:
+            All customers, or None if the list is not held locally
+        """
+        return None
+
+    def prefix_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find customers for typeahead by the prefixes of their name words.
+
+        Only sources that hold the customer list locally can answer this; the
+        default gives no answer.
+
+        Args:
+            query: Typed text ("jo smi" finds "John Smith")
+            limit: Most customers to return
+
+        Returns:
+            Matching customers, or None without a local list
+        """
+        return None
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rank the customers most likely to be a donation's payer.
+
+        Only sources that hold the customer list locally can rank it; the
+        default gives no ranking.
+
+        Args:
+            donation: Extracted donation data
+            k: Number of suggestions
+
+        Returns:
+            Suggestions from CandidateRanker.rank, or None without a local list
+        """
+        return None
+
+    def estimate_results(self, search_term: str) -> Optional[int]:
+        """
+        Estimate how many customers a search would return.
+
+        Args:
+            search_term: Search text
+
+        Returns:
+            Upper bound on the result count, or None if the source keeps no
+            statistics to estimate it from
+        """
+        return None
+
+    def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get full details of several customers.
+
+        Sources with a batched lookup override this; the default fetches
+        each customer in turn.
+
+        Args:
+            customer_ids: Customer IDs
+
+        Returns:
+            Customers found; unknown IDs are left out
+        """
+        customers = []
+        for customer_id in customer_ids:
+            try:
+                customers.append(self.get_customer(customer_id))
+            except QuickBooksError:
+                continue
+        return customers
+
+    def is_complete(self, customer: Dict[str, Any]) -> bool:
+        """
+        Check whether a search result is the customer's full record.
+
+        Sources whose searches may return partial records override this;
+        by default search results are full records.
+
+        Args:
+            customer: Customer from a search
+
+        Returns:
+            True if get_customer would return the same fields
+        """
+        return True
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Find customers whose names sound like every word of a name.
+
+        Only sources that hold the customer list locally can answer this; the
+        default finds nothing.
+
+        Args:
+            name: Person or organization name
+
+        Returns:
+            Matching customers
+        """
+        return []
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Find customers with an exact email, phone or address key.
+
+        Only sources that hold the customer list locally can answer this; the
+        default finds nothing.
+
+        Args:
+            key: Contact key from donation_contact_keys
+
+        Returns:
+            Matching customers
+        """
+        return []
+
 
 class QuickBooksDataSource(CustomerDataSource):
     """Production data source that uses real QuickBooks API."""
 
     def __init__(self, session_id: str):
         """Initialize with QuickBooks client."""
-        self.qb_client = QuickBooksClient(session_id)
+        self.qb_client = quickbooks_clients.get(session_id)
+
+    def get_realm_id(self) -> Optional[str]:
+        """Get the realm of the session's QuickBooks connection."""
+        return self.qb_client.realm_id
 
     def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
         """Search using QuickBooks API."""
@@ -49,6 +213,14 @@ class QuickBooksDataSource(CustomerDataSource):
         """Get customer from QuickBooks API."""
         return self.qb_client.get_customer(customer_id)
 
+    def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several customers from QuickBooks API in batched queries."""
+        return self.qb_client.get_customers(customer_ids)
+
+    def is_complete(self, customer: Dict[str, Any]) -> bool:
+        """Check for MetaData, which `select *` results always include."""
+        return "MetaData" in customer
+
     def format_customer_data(self, customer: Dict[str, Any]) -> Dict[str, Any]:
         """Format using QuickBooks format."""
         return self.qb_client.format_customer_data(customer)
@@ -58,21 +230,175 @@ class QuickBooksDataSource(CustomerDataSource):
         return self.qb_client.create_customer(customer_data)
 
 
+class MirroredQuickBooksDataSource(QuickBooksDataSource):
+    """QuickBooks data source that answers searches from the customer mirror."""
+
+    def __init__(
+        self,
+        session_id: str,
+        mirror: CustomerMirror,
+        max_staleness: float = MIRROR_REFRESH_SECONDS,
+    ):
+        """
+        Initialize with QuickBooks client and load the realm's mirror.
+
+        The mirror is refreshed incrementally first if it was last synced more
+        than max_staleness seconds ago. A realm that needs a full sync is not
+        synced inline: the sync is started in the background and the mirror
+        is reported unavailable, so callers use the QuickBooks API meanwhile.
+
+        Args:
+            session_id: Session ID for QuickBooks auth
+            mirror: Customer mirror backend
+            max_staleness: Maximum acceptable seconds since the last sync
+
+        Raises:
+            QuickBooksError: If the realm's mirror is not ready yet
+        """
+        super().__init__(session_id)
+        self.mirror = mirror
+        self.realm_id = self.qb_client.realm_id
+
+        if needs_full_sync(mirror, self.realm_id):
+            start_background_sync(self.qb_client, mirror, session_id)
+            raise QuickBooksError(f"Customer mirror for {self.realm_id} is syncing")
+        refresh_customer_mirror(self.qb_client, mirror, max_staleness, session_id)
+        snapshot = mirror.get_snapshot(self.realm_id)
+        if snapshot is None:
+            raise QuickBooksError(f"Customer mirror unavailable for {self.realm_id}")
+        self.snapshot: CustomerSnapshot = snapshot
+        logger.info(
+            f"Using customer mirror for realm {self.realm_id} "
+            f"({snapshot.staleness_seconds:.0f}s old)"
+        )
+
+    def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
+        """Search the mirrored customers."""
+        return self.snapshot.search(search_term)
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """Find mirrored customers whose names sound like a name."""
+        return self.snapshot.phonetic_search(name)
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """Find mirrored customers with a contact key."""
+        return self.snapshot.contact_search(key)
+
+    def get_customer(self, customer_id: str) -> Dict[str, Any]:
+        """Get a mirrored customer, falling back to QuickBooks if missing."""
+        customer = self.snapshot.get(customer_id)
+        if customer is not None:
+            return customer
+        return super().get_customer(customer_id)
+
+    def customer_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Get every mirrored customer."""
+        return list(self.snapshot.customers.values())
+
+    def prefix_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Find mirrored customers by name word prefixes."""
+        return self.snapshot.prefix_search(query, limit)
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Rank mirrored customers for a donation."""
+        return self.snapshot.rank_candidates(donation, k)
+
+    def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get mirrored customers, fetching any missing ones in one batch."""
+        customers = []
+        missing = []
+        for customer_id in customer_ids:
+            customer = self.snapshot.get(customer_id)
+            if customer is not None:
+                customers.append(customer)
+            else:
+                missing.append(customer_id)
+        if missing:
+            customers.extend(super().get_customers(missing))
+        return customers
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create customer and pick it up from the mirror for later searches."""
+        customer = super().create_customer(customer_data)
+        self.snapshot = self.mirror.get_snapshot(self.realm_id) or self.snapshot
+        return customer
+
+
 class CSVDataSource(CustomerDataSource):
     """Test data source that uses CSV file."""
 
+    # Set when the CSV file is parsed; sources built without parsing it (the
+    # SQLite source) read the header and never compare versions
+    _fieldnames: Optional[List[str]] = None
+    _version: Optional[Tuple[int, int]] = None
+
     def __init__(self, csv_path: Path):
         """Initialize with CSV file path."""
         self.csv_path = csv_path
+        # Guards the customers and indexes: registry sources are shared by
+        # request threads, and created customers are added in place
+        self._lock = threading.Lock()
+        # Taken before parsing, so a write during the parse reads as a change
+        self._version = self.file_version(csv_path)
         self.customers = self._load_customers()
+        self.index = TrigramIndex()
+        self.phonetic_index = PhoneticIndex()
+        self.contact_index = ContactIndex()
+        for customer in self.customers.values():
+            self._index_customer(customer)
+        self._ranker: Optional[CandidateRanker] = None
+        self._prefix_index: Optional[PrefixIndex] = None
         logger.info(f"Loaded {len(self.customers)} customers from CSV")
 
+    def _index_customer(self, customer: Dict[str, Any]) -> None:
+        """Add a customer's searchable name fields to the indexes."""
+        names = [
+            customer.get("DisplayName"),
+            customer.get("CompanyName"),
+            customer.get("GivenName"),
+            customer.get("FamilyName"),
+        ]
+        self.index.add(customer["Id"], names)
+        self.phonetic_index.add(customer["Id"], names)
+        self.contact_index.add(customer["Id"], customer)
+
+    @staticmethod
+    def file_version(csv_path: Path) -> Tuple[int, int]:
+        """Get a CSV file's modification time (in nanoseconds) and size."""
+        stat = csv_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_current(self) -> bool:
+        """Check whether the CSV file is unchanged since it was last read."""
+        try:
+            return self._version == self.file_version(self.csv_path)
+        except OSError:
+            return False
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """Find customers whose names sound like a name."""
+        with self._lock:
+            return [self.customers[i] for i in self.phonetic_index.lookup(name)]
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """Find customers with a contact key."""
+        with self._lock:
+            return [self.customers[i] for i in self.contact_index.lookup(key)]
+
+    def customer_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Get every customer loaded from the CSV export."""
+        with self._lock:
+            return list(self.customers.values())
+
     def _load_customers(self) -> Dict[str, Dict[str, Any]]:
         """Load customers from CSV file."""
         customers = {}
 
         with open(self.csv_path, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
+            self._fieldnames = list(reader.fieldnames or [])
 
             for i, row in enumerate(reader):
                 # Generate a fake QB ID
@@ -124,43 +450,92 @@ class CSVDataSource(CustomerDataSource):
 
     def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
         """Search customers in CSV data."""
-        results = []
         search_lower = search_term.lower()
 
-        for customer in self.customers.values():
-            # Search in display name
-            if search_lower in customer.get("DisplayName", "").lower():
-                results.append(customer)
-                continue
-
-            # Search in company name
-            if (
-                customer.get("CompanyName")
-                and search_lower in customer["CompanyName"].lower()
-            ):
-                results.append(customer)
-                continue
-
-            # Search in individual name components
-            given_name = (customer.get("GivenName") or "").lower()
-            family_name = (customer.get("FamilyName") or "").lower()
-
-            if search_lower in given_name or search_lower in family_name:
-                results.append(customer)
-                continue
-
-            # Check if all words in search term appear in display name
-            search_words = search_lower.split()
-            display_words = customer.get("DisplayName", "").lower().split()
-            if all(
-                any(word in display_word for display_word in display_words)
-                for word in search_words
-            ):
-                results.append(customer)
+        with self._lock:
+            # Only customers containing every trigram of the search can match
+            candidate_ids = self.index.candidates(search_lower)
+            candidates = (
+                self.customers.values()
+                if candidate_ids is None
+                else (self.customers[customer_id] for customer_id in candidate_ids)
+            )
+            results = [c for c in candidates if self._matches(c, search_lower)]
 
         logger.debug(f"CSV search for '{search_term}' found {len(results)} results")
         return results
 
+    def prefix_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Find CSV customers by name word prefixes, building the index once."""
+        with self._lock:
+            index = self._prefix_index
+            if index is None:
+                index = PrefixIndex()
+                for customer in self.customers.values():
+                    self._index_prefixes(index, customer)
+                self._prefix_index = index
+            return [self.customers[i] for i in index.lookup(query, limit)]
+
+    @staticmethod
+    def _index_prefixes(index: PrefixIndex, customer: Dict[str, Any]) -> None:
+        """Add a customer's name fields to a prefix index."""
+        index.add(
+            customer["Id"],
+            customer.get("DisplayName") or "",
+            [
+                customer.get("DisplayName"),
+                customer.get("CompanyName"),
+                customer.get("GivenName"),
+                customer.get("FamilyName"),
+            ],
+        )
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Rank the CSV customers for a donation, building the ranker once."""
+        # A ranker holds its own customer list; creating a customer replaces it
+        ranker = self._ranker
+        if ranker is None:
+            ranker = CandidateRanker(self.customer_table() or [], self.contact_search)
+            self._ranker = ranker
+        return ranker.rank(donation, k)
+
+    def estimate_results(self, search_term: str) -> Optional[int]:
+        """Count the trigram index candidates of a search."""
+        with self._lock:
+            candidate_ids = self.index.candidates(search_term.lower())
+            return len(self.customers) if candidate_ids is None else len(candidate_ids)
+
+    @staticmethod
+    def _matches(customer: Dict[str, Any], search_lower: str) -> bool:
+        """Check whether a customer matches a lowercased search term."""
+        # Search in display name
+        if search_lower in (customer.get("DisplayName") or "").lower():
+            return True
+
+        # Search in company name
+        if (
+            customer.get("CompanyName")
+            and search_lower in customer["CompanyName"].lower()
+        ):
+            return True
+
+        # Search in individual name components
+        given_name = (customer.get("GivenName") or "").lower()
+        family_name = (customer.get("FamilyName") or "").lower()
+
+        if search_lower in given_name or search_lower in family_name:
+            return True
+
+        # Check if all words in search term appear in display name
+        search_words = search_lower.split()
+        display_words = (customer.get("DisplayName") or "").lower().split()
+        return all(
+            any(word in display_word for display_word in display_words)
+            for word in search_words
+        )
+
     def get_customer(self, customer_id: str) -> Dict[str, Any]:
         """Get customer by ID from CSV data."""
         if customer_id not in self.customers:
@@ -320,9 +695,35 @@ class CSVDataSource(CustomerDataSource):
 
     def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new customer in the CSV file."""
+        with self._lock:
+            new_customer = self._build_new_customer(
+                customer_data, self.customers.keys()
+            )
+
+            # Add to in-memory storage
+            self.customers[new_customer["Id"]] = new_customer
+            self._index_customer(new_customer)
+            self._ranker = None
+            if self._prefix_index is not None:
+                self._index_prefixes(self._prefix_index, new_customer)
+
+            # Append to CSV file
+            self._append_to_csv(new_customer)
+
+        logger.info(
+            f"Created new customer in CSV: {new_customer['DisplayName']} "
+            f"(ID: {new_customer['Id']})"
+        )
+        return new_customer
+
+    @staticmethod
+    def _build_new_customer(
+        customer_data: Dict[str, Any], existing_ids: Iterable[str]
+    ) -> Dict[str, Any]:
+        """Build a customer record with the next free CSV ID."""
         # Generate a new ID
         max_id = 0
-        for customer_id in self.customers.keys():
+        for customer_id in existing_ids:
             if customer_id.startswith("CSV-"):
                 try:
                     num = int(customer_id.split("-")[1])
@@ -357,23 +758,23 @@ class CSVDataSource(CustomerDataSource):
         if customer_data.get("BillAddr"):
             new_customer["BillAddr"] = customer_data["BillAddr"]
 
-        # Add to in-memory storage
-        self.customers[new_id] = new_customer
-
-        # Append to CSV file
-        self._append_to_csv(new_customer)
-
-        logger.info(
-            f"Created new customer in CSV: {new_customer['DisplayName']} (ID: {new_id})"
-        )
         return new_customer
 
     def _append_to_csv(self, customer: Dict[str, Any]) -> None:
-        """Append a new customer to the CSV file."""
-        # Get existing headers from the CSV file
-        with open(self.csv_path, "r", encoding="utf-8") as rf:
-            reader = csv.DictReader(rf)
-            fieldnames = reader.fieldnames
+        """
+        Append a new customer to the CSV file.
+
+        When the file is unchanged since it was parsed, its header is known
+        and the appended row is already in memory, so the new version of
+        the file is recorded as read.
+        """
+        current = self._version is not None and self.is_current()
+        fieldnames = self._fieldnames if current else None
+        if not fieldnames:
+            # Get existing headers from the CSV file
+            with open(self.csv_path, "r", encoding="utf-8") as rf:
+                reader = csv.DictReader(rf)
+                fieldnames = list(reader.fieldnames or [])
 
         if not fieldnames:
             raise ValueError("Could not read CSV headers")
@@ -407,6 +808,511 @@ class CSVDataSource(CustomerDataSource):
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writerow(row)
 
+        if current:
+            self._version = self.file_version(self.csv_path)
+
+
+class SQLiteDataSource(CSVDataSource):
+    """CSV export data source served from an indexed on-disk SQLite database.
+
+    The CSV export is imported once into a database with an FTS5 trigram
+    index over the customer names. Processes then query the database instead
+    of each holding the whole customer list in memory.
+    """
+
+    # Memory-map up to this many bytes of the database file
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    # Databases imported with another schema version are imported again
+    SCHEMA_VERSION = 3
+
+    def __init__(self, db_path: Path, csv_path: Optional[Path] = None):
+        """
+        Open the customer database, importing the CSV export if needed.
+
+        The CSV export is (re)imported only when the database is missing or
+        was imported from a different version of the file.
+
+        Args:
+            db_path: Path to the SQLite database
+            csv_path: QuickBooks customer CSV export the database mirrors;
+                created customers are appended to it as well
+        """
+        self.db_path = db_path
+        self.csv_path = csv_path  # type: ignore[assignment]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        if csv_path and not self._is_current(csv_path):
+            self.import_csv(csv_path, db_path)
+        if not db_path.exists():
+            raise FileNotFoundError(f"Customer database not found: {db_path}")
+
+        count = self._connection().execute("SELECT count(*) FROM customers").fetchone()
+        logger.info(f"Opened customer database {db_path} with {count[0]} customers")
+
+    @classmethod
+    def import_csv(cls, csv_path: Path, db_path: Path) -> int:
+        """
+        Import a QuickBooks customer CSV export into a new database.
+
+        The database is built beside db_path and moved into place, so open
+        connections keep reading the previous import until they reconnect.
+
+        Args:
+            csv_path: QuickBooks customer CSV export
+            db_path: Path to the SQLite database to replace
+
+        Returns:
+            int: Number of customers imported
+        """
+        parser = CSVDataSource.__new__(CSVDataSource)
+        parser.csv_path = csv_path
+        customers = parser._load_customers()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = db_path.with_name(f"{db_path.name}.{uuid.uuid4().hex}.tmp")
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE customers (
+                    position INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    display_name TEXT NOT NULL,
+                    given_name TEXT NOT NULL,
+                    family_name TEXT NOT NULL,
+                    company_name TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE customer_names USING fts5(
+                    display_name, given_name, family_name, company_name,
+                    content='', tokenize='trigram'
+                );
+                CREATE TABLE customer_sounds (
+                    sound TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (sound, position)
+                ) WITHOUT ROWID;
+                CREATE TABLE customer_contacts (
+                    contact TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (contact, position)
+                ) WITHOUT ROWID;
+                CREATE TABLE import_info (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            for customer in customers.values():
+                cls._insert(conn, customer)
+            stat = csv_path.stat()
+            conn.executemany(
+                "INSERT INTO import_info VALUES (?, ?)",
+                [
+                    ("schema_version", str(cls.SCHEMA_VERSION)),
+                    ("csv_mtime", str(stat.st_mtime)),
+                    ("csv_size", str(stat.st_size)),
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+
+        logger.info(f"Imported {len(customers)} customers from {csv_path} to {db_path}")
+        return len(customers)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, customer: Dict[str, Any]) -> None:
+        """Insert a customer and index its names and contact details."""
+        names = (
+            customer.get("DisplayName") or "",
+            customer.get("GivenName") or "",
+            customer.get("FamilyName") or "",
+            customer.get("CompanyName") or "",
+        )
+        cursor = conn.execute(
+            "INSERT INTO customers (id, display_name, given_name, family_name, "
+            "company_name, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (customer["Id"], *names, json.dumps(customer)),
+        )
+        conn.execute(
+            "INSERT INTO customer_names (rowid, display_name, given_name, "
+            "family_name, company_name) VALUES (?, ?, ?, ?, ?)",
+            (cursor.lastrowid, *names),
+        )
+        sounds = {sound for name in names for sound in phonetic_keys(name)}
+        conn.executemany(
+            "INSERT INTO customer_sounds VALUES (?, ?)",
+            [(sound, cursor.lastrowid) for sound in sounds],
+        )
+        conn.executemany(
+            "INSERT INTO customer_contacts VALUES (?, ?)",
+            [(key, cursor.lastrowid) for key in customer_contact_keys(customer)],
+        )
+
+    def _is_current(self, csv_path: Path) -> bool:
+        """Check whether the database was imported from this CSV file."""
+        if not self.db_path.exists():
+            return False
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                info = dict(conn.execute("SELECT key, value FROM import_info"))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Customer database {self.db_path} is unreadable: {e}")
+            return False
+        stat = csv_path.stat()
+        return (
+            info.get("schema_version") == str(self.SCHEMA_VERSION)
+            and info.get("csv_mtime") == str(stat.st_mtime)
+            and info.get("csv_size") == str(stat.st_size)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's database connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
+        """Search customers with the FTS5 trigram index."""
+        search_lower = search_term.lower()
+
+        # Only customers containing every search word can match; words
+        # shorter than a trigram cannot be looked up
+        words = [w for w in search_lower.split() if len(w) >= TRIGRAM_SIZE]
+        columns = "c.display_name, c.given_name, c.family_name, c.company_name, c.data"
+        if words:
+            rows = self._connection().execute(
+                f"SELECT {columns} FROM customer_names JOIN customers c "
+                "ON c.position = customer_names.rowid "
+                "WHERE customer_names MATCH ? ORDER BY c.position",
+                (" AND ".join('"' + w.replace('"', '""') + '"' for w in words),),
+            )
+        else:
+            rows = self._connection().execute(
+                f"SELECT {columns} FROM customers c ORDER BY c.position"
+            )
+
+        # Match on the name columns and only decode the full record of matches
+        results = []
+        for display_name, given_name, family_name, company_name, data in rows:
+            names = {
+                "DisplayName": display_name,
+                "GivenName": given_name,
+                "FamilyName": family_name,
+                "CompanyName": company_name,
+            }
+            if self._matches(names, search_lower):
+                results.append(json.loads(data))
+
+        logger.debug(f"SQLite search for '{search_term}' found {len(results)} results")
+        return results
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """Find customers whose names sound like a name."""
+        sounds = phonetic_keys(name)
+        if not sounds:
+            return []
+        placeholders = ", ".join("?" * len(sounds))
+        rows = self._connection().execute(
+            "SELECT c.data FROM customers c WHERE c.position IN ("
+            f"SELECT position FROM customer_sounds WHERE sound IN ({placeholders}) "
+            "GROUP BY position HAVING count(*) = ?) ORDER BY c.position",
+            (*sounds, len(sounds)),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """Find customers with a contact key."""
+        rows = self._connection().execute(
+            "SELECT c.data FROM customer_contacts k JOIN customers c "
+            "ON c.position = k.position WHERE k.contact = ? ORDER BY c.position",
+            (key,),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def customer_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Get no table; the database exists to avoid loading every customer."""
+        return None
+
+    def estimate_results(self, search_term: str) -> Optional[int]:
+        """Get no estimate; the database keeps no in-memory statistics."""
+        return None
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Give no ranking; the database exists to avoid loading every customer."""
+        return None
+
+    def prefix_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Give no answer; the database exists to avoid loading every customer."""
+        return None
+
+    def get_customer(self, customer_id: str) -> Dict[str, Any]:
+        """Get customer by ID from the database."""
+        row = (
+            self._connection()
+            .execute("SELECT data FROM customers WHERE id = ?", (customer_id,))
+            .fetchone()
+        )
+        if row is None:
+            raise QuickBooksError(f"Customer {customer_id} not found in database")
+        return json.loads(row[0])
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new customer in the database and the CSV file."""
+        with self._lock:
+            conn = self._connection()
+            existing_ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM customers WHERE id LIKE 'CSV-%'"
+                )
+            ]
+            new_customer = self._build_new_customer(customer_data, existing_ids)
+            with conn:
+                self._insert(conn, new_customer)
+                if self.csv_path:
+                    self._append_to_csv(new_customer)
+                    stat = self.csv_path.stat()
+                    conn.executemany(
+                        "UPDATE import_info SET value = ? WHERE key = ?",
+                        [
+                            (str(stat.st_mtime), "csv_mtime"),
+                            (str(stat.st_size), "csv_size"),
+                        ],
+                    )
+
+        logger.info(
+            f"Created new customer in database: {new_customer['DisplayName']} "
+            f"(ID: {new_customer['Id']})"
+        )
+        return new_customer
+
+
+class MemoizedDataSource(CustomerDataSource):
+    """Data source wrapper that memoizes lookups for the life of a job.
+
+    Donations in a batch often repeat search terms (spouses on one check,
+    repeat donors, last-name fallbacks), so each distinct search, phonetic
+    lookup, contact lookup and customer fetch is sent to the wrapped source
+    once. Concurrent
+    identical lookups wait for the one already in flight instead of issuing
+    their own. Failed lookups are not cached. Callers must not modify the
+    returned records, which are shared. Each customer's match scoring
+    features are likewise computed once per job.
+    """
+
+    def __init__(self, data_source: CustomerDataSource):
+        """
+        Wrap a data source.
+
+        Args:
+            data_source: Data source to memoize
+        """
+        self.data_source = data_source
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[str, str], Future] = {}
+        self._stats: Dict[str, int] = defaultdict(int)
+        self._features = FeatureCache()
+
+    def _lookup(self, kind: str, key: str, load: Callable[[str], Any]) -> Any:
+        """Return a memoized lookup, loading it once per key."""
+        with self._lock:
+            future = self._results.get((kind, key))
+            if future is None:
+                future = Future()
+                self._results[(kind, key)] = future
+                self._stats[f"{kind}_misses"] += 1
+                owner = True
+            else:
+                stat = "hits" if future.done() else "coalesced"
+                self._stats[f"{kind}_{stat}"] += 1
+                owner = False
+
+        if owner:
+            try:
+                future.set_result(load(key))
+            except Exception as e:
+                with self._lock:
+                    del self._results[(kind, key)]
+                future.set_exception(e)
+        return future.result()
+
+    def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
+        """Search for customers, once per distinct term."""
+        return self._lookup("search", search_term, self.data_source.search_customer)
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """Find customers that sound like a name, once per distinct name."""
+        return self._lookup("phonetic", name, self.data_source.phonetic_search)
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """Find customers with a contact key, once per distinct key."""
+        return self._lookup("contact", key, self.data_source.contact_search)
+
+    def get_customer(self, customer_id: str) -> Dict[str, Any]:
+        """Get a customer, fetching each ID once."""
+        return self._lookup("get", customer_id, self.data_source.get_customer)
+
+    def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several customers, fetching the ones not yet seen in one batch."""
+        futures = []
+        owned: Dict[str, Future] = {}
+        with self._lock:
+            for customer_id in dict.fromkeys(customer_ids):
+                future = self._results.get(("get", customer_id))
+                if future is None:
+                    future = Future()
+                    self._results[("get", customer_id)] = future
+                    owned[customer_id] = future
+                    self._stats["get_misses"] += 1
+                else:
+                    stat = "hits" if future.done() else "coalesced"
+                    self._stats[f"get_{stat}"] += 1
+                futures.append(future)
+
+        if owned:
+            try:
+                fetched = self.data_source.get_customers(list(owned))
+            except Exception as e:
+                with self._lock:
+                    for customer_id in owned:
+                        del self._results[("get", customer_id)]
+                for future in owned.values():
+                    future.set_exception(e)
+                raise
+            found = {customer["Id"]: customer for customer in fetched}
+            with self._lock:
+                for customer_id in owned:
+                    if customer_id not in found:
+                        # Unknown IDs are not cached, like failed lookups
+                        del self._results[("get", customer_id)]
+            for customer_id, future in owned.items():
+                if customer_id in found:
+                    future.set_result(found[customer_id])
+                else:
+                    future.set_exception(
+                        QuickBooksError(f"Customer {customer_id} not found")
+                    )
+
+        # Customers whose lookup failed are left out, like unknown IDs
+        return [future.result() for future in futures if future.exception() is None]
+
+    def get_realm_id(self) -> Optional[str]:
+        """Get the wrapped source's realm."""
+        return self.data_source.get_realm_id()
+
+    def estimate_results(self, search_term: str) -> Optional[int]:
+        """Estimate a search's result count with the wrapped source."""
+        return self.data_source.estimate_results(search_term)
+
+    def customer_table(self) -> Optional[List[Dict[str, Any]]]:
+        """Get the wrapped source's customer table."""
+        return self.data_source.customer_table()
+
+    def prefix_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Find customers by name word prefixes with the wrapped source."""
+        return self.data_source.prefix_search(query, limit)
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Rank candidates with the wrapped source."""
+        return self.data_source.rank_candidates(donation, k)
+
+    def is_complete(self, customer: Dict[str, Any]) -> bool:
+        """Check completeness with the wrapped source."""
+        return self.data_source.is_complete(customer)
+
+    def customer_features(self, customer: Dict[str, Any]) -> CustomerFeatures:
+        """Get a customer's match scoring features, computed once per job."""
+        return self._features.get(customer)
+
+    def format_customer_data(self, customer: Dict[str, Any]) -> Dict[str, Any]:
+        """Format customer data with the wrapped source."""
+        return self.data_source.format_customer_data(customer)
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a customer and forget searches it could now appear in."""
+        customer = self.data_source.create_customer(customer_data)
+        with self._lock:
+            self._results = {
+                key: future for key, future in self._results.items() if key[0] == "get"
+            }
+        return customer
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get lookup statistics.
+
+        Returns:
+            Counts of hits (answered from memory), misses (sent to the
+            wrapped source) and coalesced lookups (waited on an identical
+            lookup in flight) for each lookup kind
+        """
+        with self._lock:
+            stats = {
+                f"{kind}_{stat}": 0
+                for kind in ("search", "phonetic", "contact", "get")
+                for stat in ("hits", "misses", "coalesced")
+            }
+            stats.update(self._stats)
+        return stats
+
+
+class CSVSourceRegistry:
+    """CSV data sources shared by a process, parsed once per file version.
+
+    Every request and job matching against a CSV customer list uses the
+    same parsed customers and indexes. A file is parsed again only when its
+    modification time or size changes; customers created through a shared
+    source are appended to it in memory and on disk without a re-parse.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._sources: Dict[Path, CSVDataSource] = {}
+        self._lock = threading.Lock()
+
+    def get(self, csv_path: Path) -> CSVDataSource:
+        """
+        Get the data source for a CSV file, parsing it if new or changed.
+
+        Args:
+            csv_path: Path to the CSV customer list
+
+        Returns:
+            CSVDataSource with the file's current customers
+        """
+        key = csv_path.resolve()
+        # Held while parsing, so concurrent requests parse a file once
+        with self._lock:
+            source = self._sources.get(key)
+            if source is not None and source.is_current():
+                return source
+            if source is not None:
+                logger.info(f"CSV customer list {csv_path} changed; reloading")
+            source = CSVDataSource(csv_path)
+            self._sources[key] = source
+            return source
+
+    def clear(self) -> None:
+        """Forget every loaded data source."""
+        with self._lock:
+            self._sources.clear()
+
+
+# Process-wide registry used by create_customer_data_source
+csv_data_sources = CSVSourceRegistry()
+
 
 def create_customer_data_source(
     session_id: Optional[str] = None, csv_path: Optional[Path] = None
@@ -421,9 +1327,21 @@ def create_customer_data_source(
         CustomerDataSource instance
     """
     if csv_path and csv_path.exists():
+        if Config.CUSTOMER_DB_PATH:
+            logger.info(f"Using SQLite data source: {Config.CUSTOMER_DB_PATH}")
+            return SQLiteDataSource(Path(Config.CUSTOMER_DB_PATH), csv_path)
         logger.info(f"Using CSV data source: {csv_path}")
-        return CSVDataSource(csv_path)
+        return csv_data_sources.get(csv_path)
     elif session_id:
+        if Config.CUSTOMER_MIRROR_ENABLED:
+            try:
+                data_source = MirroredQuickBooksDataSource(session_id, customer_mirror)
+                logger.info("Using mirrored QuickBooks data source")
+                return data_source
+            except Exception as e:
+                logger.warning(
+                    f"Customer mirror unavailable, using QuickBooks API: {e}"
+                )
         logger.info("Using QuickBooks API data source")
         return QuickBooksDataSource(session_id)
     else:
@@ -0,0 +1,533 @@
+"""
+In-memory search indexes over customer name fields.
+
+Customer searches are substring matches ("smith" finds "Smithson"), so a
+plain token map cannot answer them. The trigram index instead narrows a
+search to the customers that contain every trigram of the query; the
+caller then applies its exact matching rules to that small candidate set.
+
+The phonetic index finds customers whose names sound like a misread name
+("Jonhson"), which no substring search would return.
+
+The contact index maps normalized email, phone and street-plus-ZIP keys to
+customers, so a donation printed with the same contact details as a known
+customer is found with exact lookups instead of name searches.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Shortest query word that can be looked up in the index
+TRIGRAM_SIZE = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Get the distinct trigrams of a lowercased string.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Every three-character substring of the text
+    """
+    return {text[i : i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+def _intersect(
+    postings: Dict[str, Set[str]], keys: Iterable[str], positions: Dict[str, int]
+) -> List[str]:
+    """Get the IDs posted under every key, in the order they were indexed."""
+    # Intersect the rarest postings first so the set shrinks fastest
+    lists = sorted((postings.get(key, set()) for key in keys), key=len)
+    matched = set(lists[0])
+    for posting in lists[1:]:
+        if not matched:
+            break
+        matched &= posting
+    return sorted(matched, key=positions.__getitem__)
+
+
+class TrigramIndex:
+    """Map of trigram to the customer IDs whose indexed fields contain it."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Get the number of indexed customers."""
+        return len(self._positions)
+
+    def add(self, customer_id: str, texts: Iterable[Optional[str]]) -> None:
+        """
+        Index a customer's text fields.
+
+        Trigrams are taken from each field separately, so no trigram spans
+        two fields.
+
+        Args:
+            customer_id: Customer ID
+            texts: Field values to index (None and empty values are skipped)
+        """
+        self._positions.setdefault(customer_id, len(self._positions))
+        for text in texts:
+            if text:
+                for gram in trigrams(text.lower()):
+                    self._postings[gram].add(customer_id)
+
+    def candidates(self, query: str) -> Optional[List[str]]:
+        """
+        Get customers that may contain every word of a query.
+
+        Every customer with a field containing the whole query, or with each
+        query word somewhere in its fields, is returned; some returned
+        customers may match neither, so callers must still check them.
+
+        Args:
+            query: Search text
+
+        Returns:
+            Candidate IDs in the order they were indexed, or None if the query
+            has no word long enough to look up and every customer is a candidate
+        """
+        grams: Set[str] = set()
+        for word in query.lower().split():
+            grams |= trigrams(word)
+        if not grams:
+            return None
+
+        return _intersect(self._postings, grams, self._positions)
+
+
+_VOWELS = frozenset("AEIOU")
+_FRONT_VOWELS = frozenset("EIY")
+_INITIAL_SILENT = ("AE", "GN", "KN", "PN", "WR")
+
+
+def metaphone(word: str) -> str:
+    """
+    Get the Metaphone key of a word.
+
+    Words that sound alike share a key, so common misspellings and
+    transpositions still meet ("Jonhson" and "Johnson" are both JNSN).
+
+    Args:
+        word: Word to encode
+
+    Returns:
+        Phonetic key (empty if the word has no letters)
+    """
+    w = "".join(ch for ch in word.upper() if "A" <= ch <= "Z")
+    if not w:
+        return ""
+    if w[:2] in _INITIAL_SILENT:
+        w = w[1:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+    elif w.startswith("WH"):
+        w = "W" + w[2:]
+
+    key = []
+    length = len(w)
+    for i, ch in enumerate(w):
+        prev = w[i - 1] if i > 0 else ""
+        nxt = w[i + 1] if i + 1 < length else ""
+        after = w[i + 2] if i + 2 < length else ""
+
+        # Doubled letters sound once, except C ("McCall" is MKKL)
+        if ch == prev and ch != "C":
+            continue
+
+        if ch in _VOWELS:
+            if i == 0:
+                key.append(ch)
+        elif ch == "B":
+            if not (prev == "M" and i == length - 1):
+                key.append("B")
+        elif ch == "C":
+            if nxt == "I" and after == "A":
+                key.append("X")
+            elif nxt == "H":
+                key.append("K" if prev == "S" else "X")
+            elif nxt in _FRONT_VOWELS:
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif ch == "D":
+            key.append("J" if nxt == "G" and after in _FRONT_VOWELS else "T")
+        elif ch == "G":
+            if nxt == "H" and after and after not in _VOWELS:
+                continue
+            if nxt == "N" and (i + 2 == length or w[i + 2 :] == "NED"):
+                continue
+            if prev == "D" and nxt in _FRONT_VOWELS:
+                continue
+            key.append("J" if nxt in _FRONT_VOWELS and prev != "G" else "K")
+        elif ch == "H":
+            if nxt in _VOWELS and prev not in "CGPST":
+                key.append("H")
+        elif ch == "K":
+            if prev != "C":
+                key.append("K")
+        elif ch == "P":
+            key.append("F" if nxt == "H" else "P")
+        elif ch == "Q":
+            key.append("K")
+        elif ch == "S":
+            if nxt == "H" or (nxt == "I" and after in ("O", "A")):
+                key.append("X")
+            else:
+                key.append("S")
+        elif ch == "T":
+            if nxt == "I" and after in ("O", "A"):
+                key.append("X")
+            elif nxt == "H":
+                key.append("0")
+            elif not (nxt == "C" and after == "H"):
+                key.append("T")
+        elif ch == "V":
+            key.append("F")
+        elif ch in "WY":
+            if nxt in _VOWELS:
+                key.append(ch)
+        elif ch == "X":
+            key.append("KS")
+        elif ch == "Z":
+            key.append("S")
+        else:
+            key.append(ch)
+    return "".join(key)
+
+
+def phonetic_keys(text: str) -> List[str]:
+    """
+    Get the phonetic keys of the words in a name.
+
+    Single letters (initials) are skipped since they sound like nothing.
+
+    Args:
+        text: Name to encode
+
+    Returns:
+        Distinct keys in word order
+    """
+    keys: List[str] = []
+    for word in text.replace(",", " ").split():
+        key = metaphone(word) if len(word.strip(".")) > 1 else ""
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class PhoneticIndex:
+    """Map of phonetic key to the customer IDs with a name word of that sound."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Get the number of indexed customers."""
+        return len(self._positions)
+
+    def add(self, customer_id: str, texts: Iterable[Optional[str]]) -> None:
+        """
+        Index a customer's name fields.
+
+        Args:
+            customer_id: Customer ID
+            texts: Name field values (None and empty values are skipped)
+        """
+        self._positions.setdefault(customer_id, len(self._positions))
+        for text in texts:
+            if text:
+                for key in phonetic_keys(text):
+                    self._postings[key].add(customer_id)
+
+    def lookup(self, name: str) -> List[str]:
+        """
+        Get customers whose names sound like every word of a name.
+
+        Args:
+            name: Name to look up
+
+        Returns:
+            Matching IDs in the order they were indexed
+        """
+        keys = phonetic_keys(name)
+        if not keys:
+            return []
+        return _intersect(self._postings, keys, self._positions)
+
+
+# Street words abbreviated the way USPS addresses spell them
+_STREET_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "road": "rd",
+    "drive": "dr",
+    "lane": "ln",
+    "boulevard": "blvd",
+    "court": "ct",
+    "place": "pl",
+    "circle": "cir",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "terrace": "ter",
+    "apartment": "apt",
+    "suite": "ste",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+# Phone numbers with fewer digits cannot identify a customer
+_MIN_PHONE_DIGITS = 10
+
+# Name words typeahead queries are matched on
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Sorts after every word character, so (prefix + _PREFIX_END,) bounds the
+# entries of words starting with prefix
+_PREFIX_END = "{"
+
+# Typeahead suggestions returned by default, and at most
+TYPEAHEAD_LIMIT = 10
+MAX_TYPEAHEAD_LIMIT = 50
+
+
+def email_key(email: Optional[str]) -> Optional[str]:
+    """
+    Get the contact index key of an email address.
+
+    Args:
+        email: Email address
+
+    Returns:
+        Key, or None if the value is not an email address
+    """
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    return f"email:{email}"
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """
+    Get the contact index key of a phone number.
+
+    Formatting and a leading US country code are ignored, so
+    "(555) 123-4567" and "+1 555.123.4567" share a key.
+
+    Args:
+        phone: Phone number as written
+
+    Returns:
+        Key, or None if the number is too short to identify anyone
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    if len(digits) < _MIN_PHONE_DIGITS:
+        return None
+    return f"phone:{digits}"
+
+
+def address_key(line1: Optional[str], zip_code: Optional[str]) -> Optional[str]:
+    """
+    Get the contact index key of a street address.
+
+    Args:
+        line1: Street address line
+        zip_code: ZIP code (ZIP+4 is reduced to five digits)
+
+    Returns:
+        Key, or None unless both a street and a ZIP code are given
+    """
+    words = re.sub(r"[^\w\s]", " ", (line1 or "").lower()).split()
+    street = " ".join(_STREET_ABBREVIATIONS.get(word, word) for word in words)
+    zip5 = re.sub(r"\D", "", zip_code or "")[:5]
+    if not street or len(zip5) < 5:
+        return None
+    return f"address:{street}|{zip5}"
+
+
+def customer_contact_keys(customer: Dict[str, Any]) -> List[str]:
+    """
+    Get the contact index keys of a QuickBooks customer record.
+
+    Args:
+        customer: QuickBooks customer data
+
+    Returns:
+        Distinct keys of the customer's email, phones and billing address
+    """
+    bill_addr = customer.get("BillAddr") or {}
+    keys = [
+        email_key((customer.get("PrimaryEmailAddr") or {}).get("Address")),
+        phone_key((customer.get("PrimaryPhone") or {}).get("FreeFormNumber")),
+        phone_key((customer.get("Mobile") or {}).get("FreeFormNumber")),
+        address_key(bill_addr.get("Line1"), bill_addr.get("PostalCode")),
+    ]
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def donation_contact_keys(donation: Dict[str, Any]) -> List[str]:
+    """
+    Get the contact index keys of a donation's extracted contact details.
+
+    Args:
+        donation: Extracted donation data
+
+    Returns:
+        Distinct keys of the donation's email, phone and address
+    """
+    contact_info = donation.get("ContactInfo") or {}
+    keys = [
+        email_key(contact_info.get("Email")),
+        phone_key(contact_info.get("Phone")),
+        address_key(contact_info.get("Address_Line_1"), contact_info.get("ZIP")),
+    ]
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+class ContactIndex:
+    """Map of contact key to the customer IDs with that email, phone or address."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Get the number of indexed customers."""
+        return len(self._positions)
+
+    def add(self, customer_id: str, customer: Dict[str, Any]) -> None:
+        """
+        Index a customer's contact details.
+
+        Args:
+            customer_id: Customer ID
+            customer: QuickBooks customer data
+        """
+        self._positions.setdefault(customer_id, len(self._positions))
+        for key in customer_contact_keys(customer):
+            self._postings[key].add(customer_id)
+
+    def lookup(self, key: str) -> List[str]:
+        """
+        Get customers with a contact key.
+
+        Args:
+            key: Key from customer_contact_keys or donation_contact_keys
+
+        Returns:
+            Matching IDs in the order they were indexed
+        """
+        return sorted(self._postings.get(key, ()), key=self._positions.__getitem__)
+
+
+def prefix_tokens(text: str) -> List[str]:
+    """
+    Split a name into the lowercased words typeahead queries are matched on.
+
+    Args:
+        text: Name or typed query
+
+    Returns:
+        Distinct words in order
+    """
+    return list(dict.fromkeys(_WORD_PATTERN.findall(text.lower())))
+
+
+class PrefixIndex:
+    """Sorted name words, bisected to find customers by typed word prefixes."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # (word, lowercased display name, customer ID), sorted on first lookup
+        self._entries: List[Tuple[str, str, str]] = []
+        # Each customer's words as " word word", so a prefix check on every
+        # word is one substring test for " prefix"
+        self._words: Dict[str, str] = defaultdict(str)
+        self._sorted = True
+        self._sort_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of indexed customers."""
+        return len(self._words)
+
+    def add(
+        self, customer_id: str, display_name: str, texts: Iterable[Optional[str]]
+    ) -> None:
+        """
+        Index a customer's name fields.
+
+        Args:
+            customer_id: Customer ID
+            display_name: Name results are ordered by within a word
+            texts: Name field values (None and empty values are skipped)
+        """
+        name = display_name.lower()
+        words = self._words[customer_id]
+        for text in texts:
+            for word in prefix_tokens(text or ""):
+                if f" {word} " not in f"{words} ":
+                    words += f" {word}"
+                    self._entries.append((word, name, customer_id))
+                    self._sorted = False
+        self._words[customer_id] = words
+
+    def lookup(self, query: str, limit: int) -> List[str]:
+        """
+        Get customers with a name word starting with each word of a query.
+
+        Args:
+            query: Typed text ("jo smi" finds "John Smith")
+            limit: Most IDs to return
+
+        Returns:
+            Matching IDs ordered by the word matching the query's most
+            selective word, then by display name
+        """
+        query_words = prefix_tokens(query)
+        if not query_words or limit <= 0:
+            return []
+        if not self._sorted:
+            with self._sort_lock:
+                if not self._sorted:
+                    self._entries.sort()
+                    self._sorted = True
+
+        # Scan the narrowest word range, checking the other words
+        entries = self._entries
+        ranges = {
+            word: (
+                bisect_left(entries, (word,)),
+                bisect_left(entries, (word + _PREFIX_END,)),
+            )
+            for word in query_words
+        }
+        lead = min(query_words, key=lambda word: ranges[word][1] - ranges[word][0])
+        others = [f" {word}" for word in query_words if word != lead]
+        matched: List[str] = []
+        seen: Set[str] = set()
+        for i in range(*ranges[lead]):
+            customer_id = entries[i][2]
+            if customer_id in seen:
+                continue
+            seen.add(customer_id)
+            words = self._words[customer_id]
+            if all(other in words for other in others):
+                matched.append(customer_id)
+                if len(matched) >= limit:
+                    break
+        return matched
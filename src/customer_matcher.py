@@ -1,35 +1,43 @@
 """Customer matching logic for QuickBooks integration."""
 import logging
-import re
+import threading
+from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from .customer_data_source import create_customer_data_source
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .batch_scoring import BatchScorer, donor_names
+from .candidate_ranking import DEFAULT_SUGGESTIONS, CandidateRanker
+from .config import resolution_memory
+from .customer_data_source import MemoizedDataSource, create_customer_data_source
+from .customer_index import customer_contact_keys, donation_contact_keys
+from .customer_mirror import DEFAULT_SEARCH_LIMIT
+from .match_features import CustomerFeatures, DonorFeatures, score_features
 from .quickbooks_service import QuickBooksError
+from .resolution_memory import ResolutionMemory, payer_fingerprints
+from .search_planner import is_redundant, search_planner, variation_kind
 
 logger = logging.getLogger(__name__)
 
+# Most customers scored from a phonetic lookup (a lone common surname can
+# sound like hundreds of customers)
+PHONETIC_CANDIDATE_LIMIT = 50
 
-def normalize_name(name: str) -> str:
-    """
-    Normalize a name by removing punctuation and extra spaces.
+# Lowest name score at which a lone customer sharing the donor's email, phone
+# or address is accepted without searching by name
+CONTACT_MIN_NAME_SCORE = 50
 
-    Args:
-        name: Name to normalize
-
-    Returns:
-        Normalized name
-    """
-    # Remove periods after single letters (initials)
-    name = re.sub(r"\b(\w)\.", r"\1", name)
+# Candidate batch of customers found by exact contact lookups
+CONTACT_SOURCE = "contact details"
 
-    # Remove other punctuation except spaces and hyphens
-    name = re.sub(r"[^\w\s\-]", " ", name)
+# Score at which a candidate is taken as the match and searching stops
+MATCH_STOP_SCORE = 85
 
-    # Normalize multiple spaces to single space
-    name = " ".join(name.split())
+# Lowest score of a best candidate accepted as the match; below it the donor
+# is treated as a new customer
+MATCH_ACCEPT_SCORE = 50
 
-    return name.strip()
+# Most customers scored from one search; every source is capped like QuickBooks
+SEARCH_RESULT_LIMIT = DEFAULT_SEARCH_LIMIT
 
 
 def generate_search_variations(aliases: List[str], org_name: str = "") -> List[str]:
@@ -149,6 +157,9 @@ def calculate_match_score(donation: Dict[str, Any], customer: Dict[str, Any]) ->
     """
     Calculate match score between donation and customer.
 
+    Matching scores many pairs through precomputed features instead; this
+    computes both sides for a single pair.
+
     Args:
         donation: Extracted donation data
         customer: QuickBooks customer data
@@ -156,201 +167,18 @@ def calculate_match_score(donation: Dict[str, Any], customer: Dict[str, Any]) ->
     Returns:
         Match score (0-100)
     """
-    # Get payer info
-    payer_info = donation.get("PayerInfo", {})
-
-    # Get customer info in lowercase for comparison
-    display_name = customer.get("DisplayName", "").lower()
-    given_name = (customer.get("GivenName") or "").lower()
-    family_name = (customer.get("FamilyName") or "").lower()
-    company_name = (customer.get("CompanyName") or "").lower()
-
-    # Normalize display name for better matching
-    normalized_display = normalize_name(display_name).lower()
-
-    # For individuals - check aliases
-    aliases = payer_info.get("Aliases", [])
-    best_score = 0.0
-
-    for alias in aliases:
-        alias_lower = alias.lower()
-        normalized_alias = normalize_name(alias).lower()
-
-        # Exact match (after normalization)
-        if normalized_alias == normalized_display:
-            best_score = max(best_score, 100.0)
-            continue
-
-        # Original exact match
-        if alias_lower == display_name:
-            best_score = max(best_score, 98.0)
-            continue
-
-        # Split both alias and display name into parts for flexible matching
-        alias_parts = normalized_alias.split()
-        display_parts = normalized_display.split()
-
-        # Handle "Last, First" format in display name
-        if "," in display_name:
-            # QuickBooks often uses "Last, First" format
-            comma_parts = display_name.split(",")
-            if len(comma_parts) == 2:
-                qb_last = normalize_name(comma_parts[0]).lower()
-                qb_first = normalize_name(comma_parts[1]).lower()
-
-                # Check if alias matches this format
-                if len(alias_parts) >= 2:
-                    # First Last format in alias vs Last, First in QB
-                    if alias_parts[0] == qb_first and alias_parts[-1] == qb_last:
-                        best_score = max(best_score, 95.0)
-                        continue
-
-                    # Handle middle initials/names
-                    if (alias_parts[0] == qb_first or alias_parts[-1] == qb_last) and (
-                        qb_first.startswith(alias_parts[0])
-                        or alias_parts[0].startswith(qb_first)
-                    ):
-                        best_score = max(best_score, 90.0)
-                        continue
-
-        # Check component names if we have them
-        if len(alias_parts) >= 2 and given_name and family_name:
-            # Exact first and last name match
-            if alias_parts[0] == given_name and alias_parts[-1] == family_name:
-                best_score = max(best_score, 95.0)
-                continue
-
-            # Last name exact match with partial first name
-            if alias_parts[-1] == family_name and given_name.startswith(alias_parts[0]):
-                best_score = max(best_score, 90.0)
-                continue
-
-            # Both names present anywhere
-            if given_name in normalized_alias and family_name in normalized_alias:
-                best_score = max(best_score, 85.0)
-                continue
-
-        # Check if all parts of alias are in display name (any order)
-        if len(alias_parts) >= 2 and len(display_parts) >= 2:
-            alias_set = set(alias_parts)
-            display_set = set(display_parts)
-
-            # All alias parts found in display
-            if alias_set.issubset(display_set):
-                best_score = max(best_score, 90.0)
-                continue
-
-            # Most alias parts found (allow for middle names/initials)
-            common_parts = alias_set.intersection(display_set)
-            if len(common_parts) >= min(2, len(alias_parts)):
-                best_score = max(best_score, 85.0)
-                continue
-
-        # Check if customer name contains the search term
-        if normalized_alias in normalized_display:
-            best_score = max(best_score, 80.0)
-            continue
-
-        # Check last name only match
-        if len(alias_parts) >= 2:
-            # Check against family name
-            if family_name and alias_parts[-1] == family_name:
-                best_score = max(best_score, 75.0)
-                continue
-
-            # Check against last part of display name
-            if len(display_parts) >= 2 and alias_parts[-1] == display_parts[-1]:
-                best_score = max(best_score, 75.0)
-                continue
-
-        # Partial match - any significant word matches
-        if len(alias_parts) >= 2:
-            for part in alias_parts:
-                if len(part) > 2:
-                    # Check in display name parts
-                    for display_part in display_parts:
-                        if (
-                            part == display_part
-                            or display_part.startswith(part)
-                            or part.startswith(display_part)
-                        ):
-                            best_score = max(best_score, 70.0)
-                            break
-
-    # For organizations
-    org_name = payer_info.get("Organization_Name", "")
-
-    if org_name and (company_name or (not aliases and display_name)):
-        org_lower = org_name.lower()
-        normalized_org = normalize_name(org_name).lower()
-
-        # Use company name if available, otherwise display name
-        compare_name = company_name if company_name else display_name
-        normalized_compare = normalize_name(compare_name).lower()
-
-        # Exact match after normalization
-        if normalized_org == normalized_compare:
-            best_score = max(best_score, 100.0)
-
-        # Original exact match
-        elif org_lower == compare_name:
-            best_score = max(best_score, 98.0)
-
-        # One contains the other
-        elif (
-            normalized_org in normalized_compare or normalized_compare in normalized_org
-        ):
-            best_score = max(best_score, 85.0)
-
-        # Significant word matching
-        else:
-            # Extract significant words
-            skip_words = {
-                "the",
-                "and",
-                "inc",
-                "llc",
-                "corp",
-                "corporation",
-                "company",
-                "of",
-                "a",
-            }
-
-            org_words = {
-                word
-                for word in normalized_org.split()
-                if len(word) > 2 and word not in skip_words
-            }
-            compare_words = {
-                word
-                for word in normalized_compare.split()
-                if len(word) > 2 and word not in skip_words
-            }
-
-            if org_words and compare_words:
-                common_words = org_words.intersection(compare_words)
-
-                # Multiple significant words match
-                if len(common_words) >= 2:
-                    best_score = max(best_score, 80.0)
-
-                # Single important word matches (longer words weighted higher)
-                elif len(common_words) == 1:
-                    word = list(common_words)[0]
-                    if len(word) >= 5:  # Longer word = more significant
-                        best_score = max(best_score, 70.0)
-                    else:
-                        best_score = max(best_score, 60.0)
-
-    return best_score
+    return score_features(DonorFeatures(donation), CustomerFeatures(customer))
 
 
 class CustomerMatcher:
     """Handles matching donations to QuickBooks customers."""
 
     def __init__(
-        self, session_id: Optional[str] = None, csv_path: Optional[Path] = None
+        self,
+        session_id: Optional[str] = None,
+        csv_path: Optional[Path] = None,
+        memory: Optional[ResolutionMemory] = None,
+        plan_searches: bool = True,
     ):
         """
         Initialize customer matcher.
@@ -358,10 +186,83 @@ class CustomerMatcher:
         Args:
             session_id: Session ID for QuickBooks auth (production)
             csv_path: Path to CSV file for testing
+            memory: Confirmed match storage (defaults to the configured one)
+            plan_searches: Order and prune search variations by estimated
+                cost; otherwise every variation runs in generated order
         """
-        self.data_source = create_customer_data_source(
-            session_id=session_id, csv_path=csv_path
+        # Lookups are memoized for the life of the matcher, which is one job
+        self.data_source = MemoizedDataSource(
+            create_customer_data_source(session_id=session_id, csv_path=csv_path)
         )
+        self.memory = memory if memory is not None else resolution_memory
+        self.planner = search_planner if plan_searches else None
+        self._lock = threading.Lock()
+        self._get_avoided = 0
+        self._remembered = 0
+        self._search_counts: Dict[str, int] = defaultdict(int)
+        # Top-k candidates from prepare_batch, by the donor's normalized names
+        self._prepared: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+
+    def prepare_batch(self, donations: List[Dict[str, Any]]) -> int:
+        """
+        Select candidates for a job's donations in one pass.
+
+        When the data source holds its whole customer table, every donation
+        is compared with every customer at once and its top candidates are
+        kept; matching scores those candidates before running any search.
+
+        Args:
+            donations: Extracted donations about to be matched
+
+        Returns:
+            Number of donations given candidates (0 without a customer table)
+        """
+        table = self.data_source.customer_table()
+        if not table or not donations:
+            return 0
+
+        ranked = BatchScorer(table).top_candidates(donations)
+        with self._lock:
+            for donation, candidates in zip(donations, ranked):
+                self._prepared[tuple(donor_names(donation))] = candidates
+        logger.info(
+            f"Prepared candidates for {len(donations)} donations "
+            f"from {len(table)} customers"
+        )
+        return len(donations)
+
+    def rank_candidates(
+        self, donation: Dict[str, Any], k: int = DEFAULT_SUGGESTIONS
+    ) -> List[Dict[str, Any]]:
+        """
+        Suggest the customers most likely to be a donation's payer.
+
+        Sources holding the customer list locally rank it in memory. Others
+        are searched with the donor's name variations, stopping once enough
+        customers are found, and the results are ranked the same way.
+
+        Args:
+            donation: Extracted donation data
+            k: Number of suggestions
+
+        Returns:
+            Up to k dicts of customer, score and reasons, best first
+        """
+        ranked = self.data_source.rank_candidates(donation, k)
+        if ranked is not None:
+            return ranked
+
+        payer_info = donation.get("PayerInfo", {})
+        found: Dict[str, Dict[str, Any]] = {}
+        for search_term in generate_search_variations(
+            payer_info.get("Aliases", []), payer_info.get("Organization_Name", "")
+        ):
+            for customer in self.data_source.search_customer(search_term):
+                found.setdefault(customer["Id"], customer)
+            if len(found) >= k:
+                break
+        ranker = CandidateRanker(list(found.values()), self.data_source.contact_search)
+        return ranker.rank(donation, k)
 
     def match_donation_to_customer(self, donation: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -373,6 +274,13 @@ class CustomerMatcher:
         Returns:
             Matched customer data with update flags
         """
+        # Repeat donors resolve to the customer confirmed last time
+        remembered = self._recall_customer(donation)
+        if remembered:
+            return self.merge_customer_data(
+                donation, self.data_source.format_customer_data(remembered)
+            )
+
         # Get payer info
         payer_info = donation.get("PayerInfo", {})
         aliases = payer_info.get("Aliases", [])
@@ -385,54 +293,75 @@ class CustomerMatcher:
             f"aliases {aliases}: {search_variations}"
         )
 
+        # Payer names are normalized once for every candidate
+        donor = DonorFeatures(donation)
+
         # Search for customer using variations
         searched_ids = set()  # Track customer IDs to avoid duplicates
         best_match = None
         best_score = 0.0
+        searches: List[Tuple[str, List[Dict[str, Any]]]] = []
+        with self._lock:
+            self._search_counts["donations"] += 1
 
-        for search_term in search_variations:
-            try:
-                logger.info(f"Searching for: '{search_term}'")
-                results = self.data_source.search_customer(search_term)
-                logger.info(f"Found {len(results)} results for '{search_term}'")
-
-                # Score results immediately to potentially stop early
-                for customer in results:
-                    customer_id = customer.get("Id")
-                    if customer_id and customer_id not in searched_ids:
-                        searched_ids.add(customer_id)
-
-                        # Score this customer
-                        score = calculate_match_score(donation, customer)
+        for source, results in self._candidate_batches(
+            donation, aliases, org_name, search_variations, searches
+        ):
+            # Score results immediately to potentially stop early
+            for customer in results:
+                customer_id = customer.get("Id")
+                if customer_id and customer_id not in searched_ids:
+                    searched_ids.add(customer_id)
+
+                    # Score this customer
+                    score = score_features(
+                        donor, self.data_source.customer_features(customer)
+                    )
+                    logger.info(
+                        f"Customer '{customer.get('DisplayName')}' "
+                        f"(ID: {customer_id}) scored {score} "
+                        f"for {source}"
+                    )
+
+                    if score > best_score:
+                        best_score = score
+                        best_match = customer
+
+                    # If we found a good match, stop searching
+                    if score >= MATCH_STOP_SCORE:
                         logger.info(
-                            f"Customer '{customer.get('DisplayName')}' "
-                            f"(ID: {customer_id}) scored {score} "
-                            f"for search term '{search_term}'"
+                            f"Found good match: "
+                            f"'{customer.get('DisplayName')}' "
+                            f"with score {score}. Stopping search."
                         )
-
-                        if score > best_score:
-                            best_score = score
-                            best_match = customer
-
-                        # If we found a good match, stop searching
-                        if score >= 85:
-                            logger.info(
-                                f"Found good match: "
-                                f"'{customer.get('DisplayName')}' "
-                                f"with score {score}. Stopping search."
-                            )
-                            break
-
-                # Stop outer loop if we found a good match
-                if best_score >= 85:
-                    break
-
-            except QuickBooksError as e:
-                logger.error(f"QuickBooks search failed for '{search_term}': {e}")
-                raise
+                        break
+
+            # Stop outer loop if we found a good match
+            if best_score >= MATCH_STOP_SCORE:
+                break
+
+            # A lone customer with the donor's email, phone or address is the
+            # match unless the names disagree; no name search is needed
+            if (
+                source == CONTACT_SOURCE
+                and len(results) == 1
+                and best_score >= CONTACT_MIN_NAME_SCORE
+            ):
+                break
+
+        if self.planner:
+            matched_id = (
+                best_match.get("Id")
+                if best_match and best_score >= MATCH_ACCEPT_SCORE
+                else None
+            )
+            for kind, results in searches:
+                self.planner.record(
+                    kind, any(c.get("Id") == matched_id for c in results)
+                )
 
         # If no match found, return new customer
-        if not best_match or best_score < 50:
+        if not best_match or best_score < MATCH_ACCEPT_SCORE:
             logger.info(
                 f"No good match found (best score: {best_score}) for "
                 f"search variations: {search_variations}"
@@ -456,7 +385,7 @@ class CustomerMatcher:
             f"(ID: {best_match['Id']}) with score {best_score}"
         )
         try:
-            full_customer = self.data_source.get_customer(best_match["Id"])
+            full_customer = self.resolve_customers([best_match])[best_match["Id"]]
             formatted_customer = self.data_source.format_customer_data(full_customer)
         except QuickBooksError as e:
             logger.error(
@@ -467,6 +396,238 @@ class CustomerMatcher:
         # Merge with extracted data
         return self.merge_customer_data(donation, formatted_customer)
 
+    def resolve_customers(
+        self, customers: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the full records of matched customers.
+
+        Search results that are already full records are used as they are.
+        The rest are fetched together with one batched lookup rather than a
+        get_customer call each.
+
+        Args:
+            customers: Customers from searches
+
+        Returns:
+            Mapping of customer ID to full customer record
+
+        Raises:
+            QuickBooksError: If a customer cannot be fetched
+        """
+        resolved = {}
+        incomplete = []
+        for customer in customers:
+            if self.data_source.is_complete(customer):
+                resolved[customer["Id"]] = customer
+            else:
+                incomplete.append(customer["Id"])
+        avoided = len(resolved)
+
+        if incomplete:
+            fetched = self.data_source.get_customers(incomplete)
+            resolved.update((customer["Id"], customer) for customer in fetched)
+            avoided += max(len(fetched) - 1, 0)
+            for customer_id in incomplete:
+                if customer_id not in resolved:
+                    # Raises the data source's error for this customer
+                    resolved[customer_id] = self.data_source.get_customer(customer_id)
+
+        with self._lock:
+            self._get_avoided += avoided
+        return resolved
+
+    def remember_match(self, fingerprints: List[str], customer_id: str) -> bool:
+        """
+        Record a confirmed match so the payer resolves directly next time.
+
+        Args:
+            fingerprints: Payer fingerprints from payer_fingerprints
+            customer_id: Confirmed customer ID
+
+        Returns:
+            True if the match was recorded
+        """
+        realm_id = self.data_source.get_realm_id()
+        if not realm_id:
+            return False
+        return self.memory.remember(realm_id, fingerprints, customer_id)
+
+    def lookup_stats(self) -> Dict[str, int]:
+        """
+        Get customer lookup statistics for the job.
+
+        Returns:
+            The data source's lookup counts, plus get_avoided: customer
+            fetches saved by reusing search results or batching,
+            remembered: donations resolved from confirmed matches, and the
+            donations searched for with the searches run and skipped
+        """
+        stats = self.data_source.stats()
+        with self._lock:
+            stats["get_avoided"] = self._get_avoided
+            stats["remembered"] = self._remembered
+            for key in ("donations", "searches_run", "searches_skipped"):
+                stats[key] = self._search_counts[key]
+        return stats
+
+    def _recall_customer(self, donation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the customer confirmed for the donation's payer, if still valid.
+
+        Remembered customers that no longer exist or were made inactive are
+        forgotten. A remembered customer is only used if it would still be
+        accepted as a match: its name scores at least MATCH_ACCEPT_SCORE and
+        its contact details do not contradict the donation's.
+
+        Args:
+            donation: Extracted donation data
+
+        Returns:
+            Full customer record, or None to match by searching
+        """
+        realm_id = self.data_source.get_realm_id()
+        fingerprints = payer_fingerprints(donation)
+        if not realm_id or not fingerprints:
+            return None
+        customer_id = self.memory.recall(realm_id, fingerprints)
+        if not customer_id:
+            return None
+
+        try:
+            found = self.data_source.get_customers([customer_id])
+        except QuickBooksError as e:
+            logger.warning(f"Could not fetch remembered customer {customer_id}: {e}")
+            return None
+        if not found or found[0].get("Active") is False:
+            logger.info(f"Forgetting match to removed customer {customer_id}")
+            self.memory.forget(realm_id, fingerprints)
+            return None
+
+        score = score_features(
+            DonorFeatures(donation), self.data_source.customer_features(found[0])
+        )
+        donation_keys = set(donation_contact_keys(donation))
+        customer_keys = set(customer_contact_keys(found[0]))
+        if (
+            score < MATCH_ACCEPT_SCORE
+            or donation_keys
+            and customer_keys
+            and not donation_keys & customer_keys
+        ):
+            logger.info(
+                f"Remembered customer {customer_id} (score {score}) does not "
+                f"match the donation; searching instead"
+            )
+            return None
+
+        logger.info(f"Resolved payer to remembered customer {customer_id}")
+        with self._lock:
+            self._remembered += 1
+        return found[0]
+
+    def _contact_candidates(self, donation: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Find customers sharing the donation's email, phone or street address.
+
+        Args:
+            donation: Extracted donation data
+
+        Returns:
+            Distinct customers found by any of the exact contact lookups
+        """
+        customers = []
+        seen = set()
+        for key in donation_contact_keys(donation):
+            for customer in self.data_source.contact_search(key):
+                if customer.get("Id") not in seen:
+                    seen.add(customer.get("Id"))
+                    customers.append(customer)
+        return customers
+
+    def _candidate_batches(
+        self,
+        donation: Dict[str, Any],
+        aliases: List[str],
+        org_name: str,
+        search_variations: List[str],
+        searches: List[Tuple[str, List[Dict[str, Any]]]],
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield candidate customers to score, cheapest lookups first.
+
+        Customers sharing the donor's contact details come first, then
+        candidates selected by prepare_batch, then customers whose names sound
+        like the donor's: these lookups are local, and the phonetic one
+        catches misread names ("Jonhson") that no search variation finds.
+        Searches only run if the caller keeps iterating, in the order the
+        planner chooses, skipping those that cannot find a new customer.
+
+        Args:
+            donation: Extracted donation data
+            aliases: Donor name aliases
+            org_name: Organization name if applicable
+            search_variations: Search terms to try
+            searches: Receives (variation kind, results) of each search run
+
+        Yields:
+            Tuples of (description of the lookup, customers found)
+        """
+        contact_matches = self._contact_candidates(donation)
+        if contact_matches:
+            yield CONTACT_SOURCE, contact_matches
+
+        with self._lock:
+            prepared = self._prepared.get(tuple(donor_names(donation)))
+        if prepared:
+            yield "batch similarity", prepared
+
+        names = [org_name] if org_name else [alias for alias in aliases if alias]
+        phonetic: List[Dict[str, Any]] = []
+        seen = set()
+        for name in names:
+            for customer in self.data_source.phonetic_search(name):
+                if customer.get("Id") not in seen:
+                    seen.add(customer.get("Id"))
+                    phonetic.append(customer)
+        if phonetic:
+            logger.info(f"Found {len(phonetic)} phonetic matches for {names}")
+            yield "phonetic match", phonetic[:PHONETIC_CANDIDATE_LIMIT]
+
+        if self.planner:
+            planned = self.planner.plan(
+                search_variations, org_name, self.data_source.estimate_results
+            )
+        else:
+            planned = [
+                (term, variation_kind(term, org_name)) for term in search_variations
+            ]
+        with self._lock:
+            self._search_counts["searches_skipped"] += len(search_variations) - len(
+                planned
+            )
+
+        complete_terms: List[str] = []
+        for search_term, kind in planned:
+            if self.planner and is_redundant(search_term, complete_terms):
+                logger.info(f"Skipping '{search_term}': covered by an earlier search")
+                with self._lock:
+                    self._search_counts["searches_skipped"] += 1
+                continue
+            try:
+                logger.info(f"Searching for: '{search_term}'")
+                results = self.data_source.search_customer(search_term)
+                logger.info(f"Found {len(results)} results for '{search_term}'")
+            except QuickBooksError as e:
+                logger.error(f"QuickBooks search failed for '{search_term}': {e}")
+                raise
+            with self._lock:
+                self._search_counts["searches_run"] += 1
+            searches.append((kind, results))
+            if len(results) < SEARCH_RESULT_LIMIT:
+                complete_terms.append(search_term.lower())
+            yield f"search term '{search_term}'", results[:SEARCH_RESULT_LIMIT]
+
     def merge_customer_data(
         self, donation: Dict[str, Any], qb_customer: Dict[str, Any]
     ) -> Dict[str, Any]:
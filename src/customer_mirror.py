@@ -0,0 +1,1074 @@
+"""
+Per-realm mirror of the QuickBooks customer list.
+
+Customer matching searches QuickBooks once per search variation of every
+donation. The mirror holds a copy of the realm's customers, filled by a
+paged bulk sync over the query API (STARTPOSITION/MAXRESULTS), so those
+searches can be answered locally. The mirror is shared by web and worker
+processes through Redis. Each process keeps a decoded snapshot in memory
+and reloads it only when the mirror's version changes.
+
+After the first full sync the mirror is kept current incrementally: only
+customers whose MetaData.LastUpdatedTime is past the sync watermark are
+fetched, and customers created through the app are applied immediately.
+Full syncs run in a background thread, and every refresh holds a per-realm
+sync lock, so concurrent requests and processes never sync a realm twice.
+
+Supports local JSON files (development) and Redis (production).
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import redis
+
+from .candidate_ranking import CandidateRanker
+from .customer_index import ContactIndex, PhoneticIndex, PrefixIndex
+from .redis_retry import redis_retry
+
+if TYPE_CHECKING:
+    from .quickbooks_service import QuickBooksClient
+
+logger = logging.getLogger(__name__)
+
+# QuickBooks query API maximum page size
+CUSTOMER_PAGE_SIZE = 1000
+
+# Number of results a QuickBooks query returns when MAXRESULTS is not given
+DEFAULT_SEARCH_LIMIT = 100
+
+# Mirrors of realms that stop syncing are dropped after a week
+MIRROR_TTL_SECONDS = 86400 * 7
+
+# Mirrors are incrementally refreshed when older than this
+MIRROR_REFRESH_SECONDS = 60
+
+# Mirrors older than this are fully re-synced, which also drops customers
+# deleted or merged in QuickBooks that incremental refreshes cannot see
+MIRROR_MAX_AGE_SECONDS = 86400
+
+# Incremental refreshes re-read changes this far behind the watermark so
+# customers saved in the same second as the last sync are not missed
+WATERMARK_OVERLAP_SECONDS = 60
+
+# A realm's sync lock expires after this, in case its holder died mid-sync
+MIRROR_SYNC_LOCK_SECONDS = 900
+
+
+class CustomerSnapshot:
+    """Immutable in-memory view of a realm's mirrored customers."""
+
+    def __init__(self, customers: Dict[str, Dict[str, Any]], sync_info: Dict[str, Any]):
+        """
+        Build a snapshot.
+
+        Args:
+            customers: Mapping of customer ID to QuickBooks customer record
+            sync_info: Mirror metadata (version, synced_at, count)
+        """
+        self.customers = customers
+        self.version = sync_info.get("version")
+        self.synced_at = float(sync_info.get("synced_at", 0))
+        self.watermark = sync_info.get("watermark")
+        self._phonetic_index: Optional[PhoneticIndex] = None
+        self._contact_index: Optional[ContactIndex] = None
+        self._ranker: Optional[CandidateRanker] = None
+        self._prefix_index: Optional[PrefixIndex] = None
+        # Search in ID order, like QuickBooks returns query results
+        self._search_rows: List[Tuple[str, Dict[str, Any]]] = [
+            (customer.get("DisplayName", "").lower(), customer)
+            for _, customer in sorted(customers.items(), key=_id_sort_key)
+        ]
+
+    def search(
+        self, search_term: str, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> List[Dict[str, Any]]:
+        """
+        Search like `DisplayName like '%term%'` in the QuickBooks query API.
+
+        Args:
+            search_term: Text to find anywhere in the display name
+            limit: Maximum number of results
+
+        Returns:
+            Matching customers in ID order
+        """
+        term = search_term.lower()
+        results = []
+        for display_name, customer in self._search_rows:
+            if term in display_name:
+                results.append(customer)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """Get a customer by ID."""
+        return self.customers.get(customer_id)
+
+    def phonetic_search(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Find customers whose names sound like every word of a name.
+
+        The phonetic index is built on first use.
+
+        Args:
+            name: Person or organization name
+
+        Returns:
+            Matching customers in ID order
+        """
+        if self._phonetic_index is None:
+            index = PhoneticIndex()
+            for _, customer in self._search_rows:
+                index.add(customer["Id"], _name_fields(customer))
+            self._phonetic_index = index
+        return [self.customers[i] for i in self._phonetic_index.lookup(name)]
+
+    def contact_search(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Find customers with an exact email, phone or address key.
+
+        The contact index is built on first use.
+
+        Args:
+            key: Contact key from donation_contact_keys
+
+        Returns:
+            Matching customers in ID order
+        """
+        if self._contact_index is None:
+            index = ContactIndex()
+            for _, customer in self._search_rows:
+                index.add(customer["Id"], customer)
+            self._contact_index = index
+        return [self.customers[i] for i in self._contact_index.lookup(key)]
+
+    def prefix_search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Find customers with a name word starting with each typed word.
+
+        The prefix index is built on first use.
+
+        Args:
+            query: Typed text
+            limit: Most customers to return
+
+        Returns:
+            Matching customers, ordered by matched word then display name
+        """
+        if self._prefix_index is None:
+            index = PrefixIndex()
+            for display_name, customer in self._search_rows:
+                index.add(customer["Id"], display_name, _name_fields(customer))
+            self._prefix_index = index
+        return [self.customers[i] for i in self._prefix_index.lookup(query, limit)]
+
+    def rank_candidates(self, donation: Dict[str, Any], k: int) -> List[Dict[str, Any]]:
+        """
+        Rank the customers most likely to be a donation's payer.
+
+        The ranker is built on first use.
+
+        Args:
+            donation: Extracted donation data
+            k: Number of suggestions
+
+        Returns:
+            Suggestions from CandidateRanker.rank
+        """
+        if self._ranker is None:
+            self._ranker = CandidateRanker(
+                [customer for _, customer in self._search_rows], self.contact_search
+            )
+        return self._ranker.rank(donation, k)
+
+    @property
+    def staleness_seconds(self) -> float:
+        """Seconds since the last successful sync."""
+        return max(0.0, time.time() - self.synced_at)
+
+
+def _name_fields(customer: Dict[str, Any]) -> List[Optional[str]]:
+    """Get the name fields of a customer that indexes cover."""
+    return [
+        customer.get("DisplayName"),
+        customer.get("GivenName"),
+        customer.get("FamilyName"),
+        customer.get("CompanyName"),
+    ]
+
+
+def _id_sort_key(item: Tuple[str, Any]) -> Tuple[int, str]:
+    """Sort numeric QuickBooks IDs numerically."""
+    customer_id = item[0]
+    return (int(customer_id), "") if customer_id.isdigit() else (0, customer_id)
+
+
+class CustomerMirror(ABC):
+    """Abstract base class for customer mirror storage backends."""
+
+    def __init__(self):
+        """Initialize the in-process snapshot cache."""
+        self._snapshots: Dict[str, CustomerSnapshot] = {}
+        self._snapshot_lock = threading.Lock()
+
+    @abstractmethod
+    def replace_customers(
+        self,
+        realm_id: str,
+        customers: Iterable[Dict[str, Any]],
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Atomically replace the realm's mirrored customers after a full sync.
+
+        Args:
+            realm_id: QuickBooks company ID
+            customers: Every customer in the realm
+            sync_info: Extra metadata to store (watermark, session_id)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def apply_changes(
+        self,
+        realm_id: str,
+        changed: List[Dict[str, Any]],
+        removed_ids: Iterable[str] = (),
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Merge changed customers into a realm that has been synced.
+
+        The mirror version only changes if customers were changed or removed,
+        so snapshots survive refreshes that found nothing new.
+
+        Args:
+            realm_id: QuickBooks company ID
+            changed: Customers to add or overwrite
+            removed_ids: IDs of customers to drop
+            sync_info: Metadata to update (synced_at, watermark) if the
+                changes come from a refresh
+
+        Returns:
+            bool: True if applied, False if the realm has no mirror or on error
+        """
+        pass
+
+    @abstractmethod
+    def list_realms(self) -> List[str]:
+        """
+        List realms that have a mirror.
+
+        Returns:
+            QuickBooks company IDs
+        """
+        pass
+
+    @abstractmethod
+    def load_customers(self, realm_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load all mirrored customers for a realm.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            Mapping of customer ID to customer record
+        """
+        pass
+
+    @abstractmethod
+    def get_sync_info(self, realm_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the mirror's sync metadata.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            Dict with version, synced_at and count, or None if never synced
+        """
+        pass
+
+    @abstractmethod
+    def clear(self, realm_id: str) -> bool:
+        """
+        Delete the realm's mirror.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def acquire_sync_lock(
+        self, realm_id: str, ttl_seconds: int = MIRROR_SYNC_LOCK_SECONDS
+    ) -> Optional[str]:
+        """
+        Take the realm's sync lock without waiting.
+
+        Args:
+            realm_id: QuickBooks company ID
+            ttl_seconds: Seconds after which an unreleased lock expires
+
+        Returns:
+            Token to release the lock with, or None if it is held elsewhere
+        """
+        pass
+
+    @abstractmethod
+    def release_sync_lock(self, realm_id: str, token: str) -> None:
+        """
+        Release the realm's sync lock if it is still held with a token.
+
+        Args:
+            realm_id: QuickBooks company ID
+            token: Token returned by acquire_sync_lock
+        """
+        pass
+
+    def get_snapshot(self, realm_id: str) -> Optional[CustomerSnapshot]:
+        """
+        Get an in-memory snapshot, reloading it only if the mirror changed.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            Current snapshot, or None if the realm has never been synced
+        """
+        sync_info = self.get_sync_info(realm_id)
+        if not sync_info:
+            return None
+
+        with self._snapshot_lock:
+            snapshot = self._snapshots.get(realm_id)
+            if snapshot and snapshot.version == sync_info.get("version"):
+                # Refreshes that found no changes only move the sync time
+                snapshot.synced_at = float(sync_info.get("synced_at", 0))
+                snapshot.watermark = sync_info.get("watermark")
+                return snapshot
+
+        snapshot = CustomerSnapshot(self.load_customers(realm_id), sync_info)
+        with self._snapshot_lock:
+            self._snapshots[realm_id] = snapshot
+        logger.info(
+            f"Loaded customer mirror for realm {realm_id}: "
+            f"{len(snapshot.customers)} customers"
+        )
+        return snapshot
+
+    def get_staleness(self, realm_id: str) -> Optional[float]:
+        """
+        Get seconds since the realm's last successful sync.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            Staleness in seconds, or None if the realm has never been synced
+        """
+        sync_info = self.get_sync_info(realm_id)
+        if not sync_info:
+            return None
+        return max(0.0, time.time() - float(sync_info.get("synced_at", 0)))
+
+
+class LocalCustomerMirror(CustomerMirror):
+    """JSON file-based customer mirror for development."""
+
+    def __init__(self, base_path: str = "customer_mirror"):
+        """
+        Initialize local mirror storage.
+
+        Args:
+            base_path: Directory for mirror files
+        """
+        super().__init__()
+        self.base_path = Path(base_path)
+        self._write_lock = threading.Lock()
+
+    def _get_mirror_path(self, realm_id: str) -> Path:
+        """Get the mirror file for a realm."""
+        return self.base_path / f"{realm_id}.json"
+
+    def _read(self, realm_id: str) -> Optional[Dict[str, Any]]:
+        """Read the realm's mirror file."""
+        path = self._get_mirror_path(realm_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read customer mirror {path}: {e}")
+            return None
+
+    def _write(self, realm_id: str, payload: Dict[str, Any]) -> None:
+        """Atomically write the realm's mirror file."""
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        path = self._get_mirror_path(realm_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        tmp_path.replace(path)
+
+    def replace_customers(
+        self,
+        realm_id: str,
+        customers: Iterable[Dict[str, Any]],
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Write all customers and sync metadata to the realm's file."""
+        try:
+            by_id = {customer["Id"]: customer for customer in customers}
+            info = dict(sync_info or {})
+            info.update(
+                version=uuid.uuid4().hex, synced_at=time.time(), count=len(by_id)
+            )
+            self._write(realm_id, {"sync_info": info, "customers": by_id})
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write customer mirror for {realm_id}: {e}")
+            return False
+
+    def apply_changes(
+        self,
+        realm_id: str,
+        changed: List[Dict[str, Any]],
+        removed_ids: Iterable[str] = (),
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Merge changes into the realm's file."""
+        with self._write_lock:
+            data = self._read(realm_id)
+            if not data:
+                return False
+            try:
+                customers = data["customers"]
+                removed = [i for i in removed_ids if customers.pop(i, None)]
+                customers.update({customer["Id"]: customer for customer in changed})
+                info = data["sync_info"]
+                info.update(sync_info or {})
+                if changed or removed:
+                    info.update(version=uuid.uuid4().hex, count=len(customers))
+                self._write(realm_id, data)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to update customer mirror for {realm_id}: {e}")
+                return False
+
+    def list_realms(self) -> List[str]:
+        """List realms with a mirror file."""
+        if not self.base_path.exists():
+            return []
+        return sorted(path.stem for path in self.base_path.glob("*.json"))
+
+    def load_customers(self, realm_id: str) -> Dict[str, Dict[str, Any]]:
+        """Load customers from the realm's file."""
+        return (self._read(realm_id) or {}).get("customers", {})
+
+    def get_sync_info(self, realm_id: str) -> Optional[Dict[str, Any]]:
+        """Load sync metadata from the realm's file."""
+        data = self._read(realm_id)
+        return data.get("sync_info") if data else None
+
+    def clear(self, realm_id: str) -> bool:
+        """Delete the realm's file."""
+        self._get_mirror_path(realm_id).unlink(missing_ok=True)
+        return True
+
+    def _get_lock_path(self, realm_id: str) -> Path:
+        """Get the sync lock file for a realm."""
+        return self.base_path / f"{realm_id}.lock"
+
+    def acquire_sync_lock(
+        self, realm_id: str, ttl_seconds: int = MIRROR_SYNC_LOCK_SECONDS
+    ) -> Optional[str]:
+        """Create the realm's lock file, replacing one that has expired."""
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        path = self._get_lock_path(realm_id)
+        with contextlib.suppress(FileNotFoundError):
+            if time.time() - path.stat().st_mtime > ttl_seconds:
+                path.unlink()
+
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return token
+
+    def release_sync_lock(self, realm_id: str, token: str) -> None:
+        """Delete the realm's lock file if it holds the token."""
+        path = self._get_lock_path(realm_id)
+        with contextlib.suppress(FileNotFoundError):
+            if path.read_text() == token:
+                path.unlink()
+
+
+class RedisCustomerMirror(CustomerMirror):
+    """Redis-based customer mirror shared by web and worker processes."""
+
+    def __init__(
+        self, redis_client: redis.Redis, ttl_seconds: int = MIRROR_TTL_SECONDS
+    ):
+        """
+        Initialize Redis mirror storage.
+
+        Args:
+            redis_client: Redis client instance (reuses existing connection)
+            ttl_seconds: Expiry refreshed on every sync
+        """
+        super().__init__()
+        self.redis = redis_client
+        self.key_prefix = "customer_mirror:"
+        self.ttl_seconds = ttl_seconds
+        self.enabled = redis_client is not None
+
+    def _get_customers_key(self, realm_id: str) -> str:
+        """Generate Redis hash key for the realm's customers."""
+        return f"{self.key_prefix}{realm_id}:customers"
+
+    def _get_meta_key(self, realm_id: str) -> str:
+        """Generate Redis hash key for the realm's sync metadata."""
+        return f"{self.key_prefix}{realm_id}:meta"
+
+    def _get_lock_key(self, realm_id: str) -> str:
+        """Generate Redis key for the realm's sync lock."""
+        return f"{self.key_prefix}{realm_id}:sync_lock"
+
+    @redis_retry()
+    def replace_customers(
+        self,
+        realm_id: str,
+        customers: Iterable[Dict[str, Any]],
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Write customers to a staging hash and swap it in with RENAME."""
+        if not self.enabled:
+            return False
+
+        staging_key = f"{self._get_customers_key(realm_id)}:{uuid.uuid4().hex}"
+        try:
+            count = 0
+            batch: Dict[Union[str, bytes], str] = {}
+            for customer in customers:
+                batch[customer["Id"]] = json.dumps(customer)
+                if len(batch) >= CUSTOMER_PAGE_SIZE:
+                    self._write_batch(staging_key, batch)
+                    count += len(batch)
+                    batch = {}
+            if batch:
+                self._write_batch(staging_key, batch)
+                count += len(batch)
+
+            pipe = self.redis.pipeline()
+            if count:
+                pipe.rename(staging_key, self._get_customers_key(realm_id))
+            else:
+                pipe.delete(self._get_customers_key(realm_id))
+            pipe.delete(self._get_meta_key(realm_id))
+            pipe.hset(
+                self._get_meta_key(realm_id),
+                mapping=_meta_mapping(
+                    sync_info,
+                    version=uuid.uuid4().hex,
+                    synced_at=time.time(),
+                    count=count,
+                ),
+            )
+            pipe.expire(self._get_customers_key(realm_id), self.ttl_seconds)
+            pipe.expire(self._get_meta_key(realm_id), self.ttl_seconds)
+            pipe.execute()
+            return True
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to replace customer mirror for {realm_id}: {e}")
+            self.redis.delete(staging_key)
+            return False
+
+    def _write_batch(self, key: str, batch: Dict[Union[str, bytes], str]) -> None:
+        """Write one batch of customers to a hash."""
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping=batch)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    @redis_retry()
+    def apply_changes(
+        self,
+        realm_id: str,
+        changed: List[Dict[str, Any]],
+        removed_ids: Iterable[str] = (),
+        sync_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Merge changes into the realm's hash in one pipeline."""
+        if not self.enabled:
+            return False
+
+        customers_key = self._get_customers_key(realm_id)
+        meta_key = self._get_meta_key(realm_id)
+        try:
+            if not self.redis.exists(meta_key):
+                return False
+
+            removed = list(removed_ids)
+            updates: Dict[str, Any] = dict(sync_info or {})
+            pipe = self.redis.pipeline()
+            if changed:
+                pipe.hset(
+                    customers_key,
+                    mapping={
+                        customer["Id"]: json.dumps(customer) for customer in changed
+                    },
+                )
+            if removed:
+                pipe.hdel(customers_key, *removed)
+            if changed or removed:
+                updates["version"] = uuid.uuid4().hex
+            if updates:
+                pipe.hset(meta_key, mapping=_meta_mapping(updates))
+            if changed or removed:
+                pipe.hlen(customers_key)
+            results = pipe.execute()
+            if changed or removed:
+                self.redis.hset(meta_key, "count", results[-1])
+            return True
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to update customer mirror for {realm_id}: {e}")
+            return False
+
+    @redis_retry()
+    def list_realms(self) -> List[str]:
+        """List realms with a mirror meta hash."""
+        if not self.enabled:
+            return []
+
+        realms = []
+        for key in self.redis.scan_iter(match=f"{self.key_prefix}*:meta"):
+            key = _decode(key)
+            realms.append(key[len(self.key_prefix) : -len(":meta")])
+        return sorted(realms)
+
+    @redis_retry()
+    def load_customers(self, realm_id: str) -> Dict[str, Dict[str, Any]]:
+        """Load all customers from the realm's hash."""
+        if not self.enabled:
+            return {}
+
+        try:
+            raw = self.redis.hgetall(self._get_customers_key(realm_id))
+            return {
+                _decode(customer_id): json.loads(data)
+                for customer_id, data in raw.items()
+            }
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load customer mirror for {realm_id}: {e}")
+            return {}
+
+    @redis_retry()
+    def get_sync_info(self, realm_id: str) -> Optional[Dict[str, Any]]:
+        """Load sync metadata from the realm's meta hash."""
+        if not self.enabled:
+            return None
+
+        try:
+            raw = self.redis.hgetall(self._get_meta_key(realm_id))
+            if not raw:
+                return None
+            info: Dict[str, Any] = {_decode(k): _decode(v) for k, v in raw.items()}
+            info["synced_at"] = float(info.get("synced_at", 0))
+            info["count"] = int(info.get("count", 0))
+            return info
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load customer mirror info for {realm_id}: {e}")
+            return None
+
+    def clear(self, realm_id: str) -> bool:
+        """Delete the realm's mirror keys."""
+        if not self.enabled:
+            return False
+
+        try:
+            self.redis.delete(
+                self._get_customers_key(realm_id), self._get_meta_key(realm_id)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to clear customer mirror for {realm_id}: {e}")
+            return False
+
+    @redis_retry()
+    def acquire_sync_lock(
+        self, realm_id: str, ttl_seconds: int = MIRROR_SYNC_LOCK_SECONDS
+    ) -> Optional[str]:
+        """Take the realm's lock with SET NX, expiring after ttl_seconds."""
+        if not self.enabled:
+            return None
+
+        token = uuid.uuid4().hex
+        if self.redis.set(self._get_lock_key(realm_id), token, nx=True, ex=ttl_seconds):
+            return token
+        return None
+
+    def release_sync_lock(self, realm_id: str, token: str) -> None:
+        """Delete the realm's lock if it still holds the token."""
+        if not self.enabled:
+            return
+
+        try:
+            key = self._get_lock_key(realm_id)
+            if _decode(self.redis.get(key)) == token:
+                self.redis.delete(key)
+        except Exception as e:
+            # The lock expires on its own
+            logger.warning(f"Failed to release mirror sync lock for {realm_id}: {e}")
+
+
+def _decode(value: Any) -> str:
+    """Decode Redis bytes responses from clients without decode_responses."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _meta_mapping(
+    sync_info: Optional[Dict[str, Any]], **fields: Any
+) -> Dict[Union[str, bytes], Any]:
+    """Build a Redis hash mapping from sync metadata, skipping empty values."""
+    merged = dict(sync_info or {}, **fields)
+    return {k: v for k, v in merged.items() if v is not None}
+
+
+def _latest_update(
+    customers: Iterable[Dict[str, Any]], watermark: Optional[str] = None
+) -> Optional[str]:
+    """Get the latest MetaData.LastUpdatedTime, starting from a watermark."""
+    for customer in customers:
+        updated = customer.get("MetaData", {}).get("LastUpdatedTime")
+        if updated and (watermark is None or updated > watermark):
+            watermark = updated
+    return watermark
+
+
+def _rewind(watermark: str, seconds: int) -> str:
+    """Move a QuickBooks timestamp back by some seconds."""
+    try:
+        moment = datetime.fromisoformat(watermark)
+    except ValueError:
+        return watermark
+    return (moment - timedelta(seconds=seconds)).isoformat(timespec="seconds")
+
+
+def iter_customer_pages(
+    client: "QuickBooksClient", page_size: int = CUSTOMER_PAGE_SIZE
+) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Page through every customer with STARTPOSITION/MAXRESULTS.
+
+    Args:
+        client: Authenticated QuickBooks client
+        page_size: Customers per request
+
+    Yields:
+        Pages of customers
+    """
+    start_position = 1
+    while True:
+        page = client.list_customers(start_position, page_size)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        start_position += page_size
+
+
+def iter_changed_customer_pages(
+    client: "QuickBooksClient", since: str, page_size: int = CUSTOMER_PAGE_SIZE
+) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Page through customers changed after a timestamp.
+
+    Args:
+        client: Authenticated QuickBooks client
+        since: QuickBooks timestamp to compare MetaData.LastUpdatedTime with
+        page_size: Customers per request
+
+    Yields:
+        Pages of changed customers
+    """
+    start_position = 1
+    while True:
+        page = client.get_customers_changed_since(since, start_position, page_size)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        start_position += page_size
+
+
+def sync_customer_mirror(
+    client: "QuickBooksClient",
+    mirror: CustomerMirror,
+    page_size: int = CUSTOMER_PAGE_SIZE,
+    session_id: Optional[str] = None,
+) -> int:
+    """
+    Replace a realm's mirror with a full paged copy of its customers.
+
+    Args:
+        client: Authenticated QuickBooks client for the realm
+        mirror: Mirror to fill
+        page_size: Customers per QuickBooks request
+        session_id: Session that periodic refreshes may use for this realm
+
+    Returns:
+        int: Number of customers mirrored
+
+    Raises:
+        QuickBooksError: If a page request fails (the mirror is left unchanged)
+        RuntimeError: If the mirror could not be written
+    """
+    started = time.time()
+    customers = [c for page in iter_customer_pages(client, page_size) for c in page]
+    sync_info = {"watermark": _latest_update(customers), "session_id": session_id}
+    if not mirror.replace_customers(client.realm_id, customers, sync_info):
+        raise RuntimeError(f"Failed to store customer mirror for {client.realm_id}")
+
+    logger.info(
+        f"Synced {len(customers)} customers for realm {client.realm_id} "
+        f"in {time.time() - started:.1f}s"
+    )
+    return len(customers)
+
+
+def _staleness(sync_info: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Get seconds since a sync, or None if the realm was never synced."""
+    if not sync_info:
+        return None
+    return time.time() - float(sync_info.get("synced_at", 0))
+
+
+def needs_full_sync(mirror: CustomerMirror, realm_id: str) -> bool:
+    """
+    Check whether a realm's mirror can only be brought up to date by a full sync.
+
+    Args:
+        mirror: Customer mirror backend
+        realm_id: QuickBooks company ID
+
+    Returns:
+        True if the realm was never synced, has no watermark, or is older than
+        MIRROR_MAX_AGE_SECONDS
+    """
+    sync_info = mirror.get_sync_info(realm_id)
+    staleness = _staleness(sync_info)
+    return (
+        staleness is None
+        or staleness > MIRROR_MAX_AGE_SECONDS
+        or not (sync_info or {}).get("watermark")
+    )
+
+
+def refresh_customer_mirror(
+    client: "QuickBooksClient",
+    mirror: CustomerMirror,
+    max_staleness: float = MIRROR_REFRESH_SECONDS,
+    session_id: Optional[str] = None,
+    page_size: int = CUSTOMER_PAGE_SIZE,
+) -> int:
+    """
+    Bring a realm's mirror up to date, fetching as little as possible.
+
+    Does nothing if the mirror was synced within max_staleness seconds, or if
+    another thread or process holds the realm's sync lock. A realm that was
+    never synced, has no watermark, or is older than MIRROR_MAX_AGE_SECONDS
+    gets a full sync; otherwise only customers changed since the watermark
+    are fetched and merged.
+
+    Args:
+        client: Authenticated QuickBooks client for the realm
+        mirror: Mirror to refresh
+        max_staleness: Maximum acceptable seconds since the last sync
+        session_id: Session that periodic refreshes may use for this realm
+        page_size: Customers per QuickBooks request
+
+    Returns:
+        int: Number of customers fetched
+
+    Raises:
+        QuickBooksError: If a QuickBooks request fails
+        RuntimeError: If the mirror could not be written
+    """
+    realm_id = client.realm_id
+    staleness = _staleness(mirror.get_sync_info(realm_id))
+    if staleness is not None and staleness <= max_staleness:
+        return 0
+
+    token = mirror.acquire_sync_lock(realm_id)
+    if token is None:
+        logger.info(f"Customer mirror for realm {realm_id} is already syncing")
+        return 0
+    try:
+        # Re-read: the lock's previous holder may have just synced the realm
+        sync_info = mirror.get_sync_info(realm_id)
+        staleness = _staleness(sync_info)
+        if staleness is not None and staleness <= max_staleness:
+            return 0
+        if needs_full_sync(mirror, realm_id):
+            return sync_customer_mirror(client, mirror, page_size, session_id)
+        return _apply_changed_customers(
+            client, mirror, sync_info or {}, session_id, page_size
+        )
+    finally:
+        mirror.release_sync_lock(realm_id, token)
+
+
+def _apply_changed_customers(
+    client: "QuickBooksClient",
+    mirror: CustomerMirror,
+    sync_info: Dict[str, Any],
+    session_id: Optional[str],
+    page_size: int,
+) -> int:
+    """Merge customers changed since the realm's watermark into its mirror."""
+    realm_id = client.realm_id
+    watermark = sync_info["watermark"]
+    started = time.time()
+    since = _rewind(watermark, WATERMARK_OVERLAP_SECONDS)
+    changed = [
+        customer
+        for page in iter_changed_customer_pages(client, since, page_size)
+        for customer in page
+    ]
+    active = [c for c in changed if c.get("Active", True)]
+    inactive = [c["Id"] for c in changed if not c.get("Active", True)]
+    updates: Dict[str, Any] = {
+        "synced_at": started,
+        "watermark": _latest_update(changed, watermark),
+    }
+    if session_id:
+        updates["session_id"] = session_id
+    if not mirror.apply_changes(realm_id, active, inactive, updates):
+        raise RuntimeError(f"Failed to update customer mirror for {realm_id}")
+
+    logger.info(
+        f"Refreshed customer mirror for realm {realm_id}: "
+        f"{len(changed)} changed since {since}"
+    )
+    return len(changed)
+
+
+# Realms this process is syncing in a background thread
+_background_syncs: Set[str] = set()
+_background_syncs_lock = threading.Lock()
+
+
+def start_background_sync(
+    client: "QuickBooksClient",
+    mirror: CustomerMirror,
+    session_id: Optional[str] = None,
+) -> Optional[threading.Thread]:
+    """
+    Refresh a realm's mirror in a daemon thread, e.g. for its first full sync.
+
+    Args:
+        client: Authenticated QuickBooks client for the realm
+        mirror: Mirror to refresh
+        session_id: Session that periodic refreshes may use for this realm
+
+    Returns:
+        The started thread, or None if this process is already syncing the realm
+    """
+    realm_id = client.realm_id
+    with _background_syncs_lock:
+        if realm_id in _background_syncs:
+            return None
+        _background_syncs.add(realm_id)
+
+    def run() -> None:
+        try:
+            refresh_customer_mirror(client, mirror, session_id=session_id)
+        except Exception as e:
+            logger.warning(f"Background sync of customer mirror {realm_id} failed: {e}")
+        finally:
+            with _background_syncs_lock:
+                _background_syncs.discard(realm_id)
+
+    thread = threading.Thread(
+        target=run, name=f"customer-mirror-sync-{realm_id}", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def refresh_stale_mirrors(
+    mirror: CustomerMirror,
+    client_factory: Callable[[str], "QuickBooksClient"],
+    max_staleness: float = MIRROR_REFRESH_SECONDS,
+) -> int:
+    """
+    Refresh every mirrored realm that is older than max_staleness.
+
+    Each realm is refreshed with the session that last synced it. Realms whose
+    session can no longer authenticate are skipped until a user syncs again.
+
+    Args:
+        mirror: Mirror to refresh
+        client_factory: Creates a QuickBooks client from a session ID
+        max_staleness: Maximum acceptable seconds since the last sync
+
+    Returns:
+        int: Number of realms refreshed
+    """
+    refreshed = 0
+    for realm_id in mirror.list_realms():
+        sync_info = mirror.get_sync_info(realm_id) or {}
+        session_id = sync_info.get("session_id")
+        staleness = time.time() - float(sync_info.get("synced_at", 0))
+        if not session_id or staleness <= max_staleness:
+            continue
+        try:
+            client = client_factory(session_id)
+            if client.realm_id != realm_id:
+                continue
+            refresh_customer_mirror(client, mirror, max_staleness, session_id)
+            refreshed += 1
+        except Exception as e:
+            logger.warning(f"Failed to refresh customer mirror for {realm_id}: {e}")
+    return refreshed
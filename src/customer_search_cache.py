@@ -0,0 +1,286 @@
+"""
+Short-lived cache of customer search results, shared per QuickBooks realm.
+
+The manual match modal searches customers on every burst of keystrokes.
+Results are cached per realm and normalized search term for a short TTL,
+so repeated searches from any web process skip QuickBooks entirely. A
+term that extends a cached term ("smi" then "smit") is answered by
+filtering the cached results, provided those were not truncated at the
+QuickBooks result limit. Creating a customer clears the realm's cache.
+
+Supports an in-process dictionary (development) and Redis (production).
+"""
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+from .customer_mirror import DEFAULT_SEARCH_LIMIT
+from .redis_retry import redis_retry
+
+logger = logging.getLogger(__name__)
+
+# Cached results are served for this long after the search that fetched them
+SEARCH_CACHE_TTL_SECONDS = 60
+
+# Upper bound on the number of terms cached per realm
+MAX_CACHED_TERMS = 1000
+
+
+def normalize_term(search_term: str) -> str:
+    """
+    Normalize a search term for use as a cache key.
+
+    QuickBooks `like` queries ignore case, so only case is folded.
+
+    Args:
+        search_term: Search text as entered
+
+    Returns:
+        Lowercased search term
+    """
+    return search_term.lower()
+
+
+class CustomerSearchCache(ABC):
+    """Abstract base class for realm-scoped customer search caches."""
+
+    def __init__(self, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: How long cached results are served
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get_entries(
+        self, realm_id: str, terms: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Load cached entries for several normalized terms.
+
+        Args:
+            realm_id: QuickBooks company ID
+            terms: Normalized search terms
+
+        Returns:
+            Entry (customers, complete, cached_at) or None for each term
+        """
+        pass
+
+    @abstractmethod
+    def set_entry(self, realm_id: str, term: str, entry: Dict[str, Any]) -> bool:
+        """
+        Cache the entry for a normalized term.
+
+        Args:
+            realm_id: QuickBooks company ID
+            term: Normalized search term
+            entry: Entry to cache
+
+        Returns:
+            True if the entry was stored
+        """
+        pass
+
+    @abstractmethod
+    def invalidate(self, realm_id: str) -> bool:
+        """
+        Drop every cached search of a realm.
+
+        Args:
+            realm_id: QuickBooks company ID
+
+        Returns:
+            True if the realm's cache was cleared
+        """
+        pass
+
+    def search(
+        self,
+        realm_id: str,
+        search_term: str,
+        load: Callable[[str], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Search customers through the cache.
+
+        The term and each of its prefixes are looked up at once. An exact
+        hit is returned as is; otherwise the longest complete prefix entry
+        is filtered down to the term. Only when neither exists is `load`
+        called.
+
+        Args:
+            realm_id: QuickBooks company ID
+            search_term: Search text as entered
+            load: Function running the search against the data source
+
+        Returns:
+            Customers whose display name contains the search term
+        """
+        term = normalize_term(search_term)
+        prefixes = [term[:end] for end in range(len(term), 0, -1)]
+        try:
+            entries = self.get_entries(realm_id, prefixes)
+        except Exception as e:
+            logger.warning(f"Customer search cache unavailable: {e}")
+            return load(search_term)
+
+        now = time.time()
+        for prefix, entry in zip(prefixes, entries):
+            if not entry or now - entry["cached_at"] > self.ttl_seconds:
+                continue
+            if prefix == term:
+                logger.debug(f"Customer search cache hit for realm {realm_id}")
+                return entry["customers"]
+            if entry["complete"]:
+                logger.debug(
+                    f"Customer search answered from cached prefix for realm {realm_id}"
+                )
+                customers = [
+                    customer
+                    for customer in entry["customers"]
+                    if term in customer.get("DisplayName", "").lower()
+                ]
+                # Inherit the prefix's age so the filtered entry expires with it
+                self._store(realm_id, term, customers, True, entry["cached_at"])
+                return customers
+
+        customers = load(search_term)
+        self._store(
+            realm_id, term, customers, len(customers) < DEFAULT_SEARCH_LIMIT, now
+        )
+        return customers
+
+    def _store(
+        self,
+        realm_id: str,
+        term: str,
+        customers: List[Dict[str, Any]],
+        complete: bool,
+        cached_at: float,
+    ) -> None:
+        """Cache search results, logging rather than raising on failure."""
+        entry = {"customers": customers, "complete": complete, "cached_at": cached_at}
+        try:
+            self.set_entry(realm_id, term, entry)
+        except Exception as e:
+            logger.warning(f"Failed to cache customer search for {realm_id}: {e}")
+
+
+class LocalCustomerSearchCache(CustomerSearchCache):
+    """In-process customer search cache for development."""
+
+    def __init__(self, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS):
+        """
+        Initialize in-process storage.
+
+        Args:
+            ttl_seconds: How long cached results are served
+        """
+        super().__init__(ttl_seconds)
+        self._realms: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get_entries(
+        self, realm_id: str, terms: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Load entries from the realm's dictionary."""
+        with self._lock:
+            entries = self._realms.get(realm_id, {})
+            return [entries.get(term) for term in terms]
+
+    def set_entry(self, realm_id: str, term: str, entry: Dict[str, Any]) -> bool:
+        """Store the entry, dropping expired entries once the realm is full."""
+        now = time.time()
+        with self._lock:
+            entries = self._realms.setdefault(realm_id, {})
+            if len(entries) >= MAX_CACHED_TERMS:
+                for key in [
+                    k
+                    for k, v in entries.items()
+                    if now - v["cached_at"] > self.ttl_seconds
+                ]:
+                    del entries[key]
+            entries[term] = entry
+        return True
+
+    def invalidate(self, realm_id: str) -> bool:
+        """Drop the realm's dictionary."""
+        with self._lock:
+            self._realms.pop(realm_id, None)
+        return True
+
+
+class RedisCustomerSearchCache(CustomerSearchCache):
+    """Redis-based customer search cache shared by web processes."""
+
+    def __init__(
+        self, redis_client: redis.Redis, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize Redis storage.
+
+        Each realm's entries live in one hash so that the term and its
+        prefixes are read with a single HMGET and invalidation is one DEL.
+
+        Args:
+            redis_client: Redis client instance (reuses existing connection)
+            ttl_seconds: How long cached results are served
+        """
+        super().__init__(ttl_seconds)
+        self.redis = redis_client
+        self.key_prefix = "customer_search:"
+        self.enabled = redis_client is not None
+
+    def _get_key(self, realm_id: str) -> str:
+        """Generate Redis hash key for the realm's cached searches."""
+        return f"{self.key_prefix}{realm_id}"
+
+    @redis_retry()
+    def get_entries(
+        self, realm_id: str, terms: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Load entries from the realm's hash in one round trip."""
+        if not self.enabled or not terms:
+            return [None] * len(terms)
+
+        values = self.redis.hmget(self._get_key(realm_id), terms)
+        return [json.loads(value) if value else None for value in values]
+
+    @redis_retry()
+    def set_entry(self, realm_id: str, term: str, entry: Dict[str, Any]) -> bool:
+        """Store the entry and extend the hash's expiry."""
+        if not self.enabled:
+            return False
+
+        key = self._get_key(realm_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, term, json.dumps(entry))
+        pipe.hlen(key)
+        # Entries are checked for age on read; the hash itself expires once
+        # the realm has been idle for a full TTL
+        pipe.expire(key, self.ttl_seconds)
+        _, size, _ = pipe.execute()
+        if size > MAX_CACHED_TERMS:
+            # Busy realms never go idle, so expired entries are dropped here
+            self.redis.delete(key)
+        return True
+
+    def invalidate(self, realm_id: str) -> bool:
+        """Delete the realm's hash."""
+        if not self.enabled:
+            return False
+
+        try:
+            self.redis.delete(self._get_key(realm_id))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to clear customer search cache for {realm_id}: {e}")
+            return False
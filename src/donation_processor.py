@@ -1,11 +1,14 @@
 """Donation processor that pipes extraction through validation and matching."""
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+from .checkpoint import CheckpointStore
 from .customer_matcher import CustomerMatcher
 from .final_display_merger import merge_all_donations_for_display
 from .geminiservice import extract_donations_from_documents
+from .job_tracker import JobStage
 from .validation import DonationValidator
 
 logger = logging.getLogger(__name__)
@@ -16,27 +19,73 @@ def process_donation_documents(
     session_id: Optional[str] = None,
     csv_path: Optional[Path] = None,
     progress_callback=None,
-) -> Tuple[List[Dict[str, Any]], Dict[str, int], List[Dict[str, Any]]]:
+    upload_id: Optional[str] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    match_workers: int = 1,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], List[Dict[str, Any]]]:
     """
     Process donation documents: extract, validate, deduplicate, and match.
 
+    When both upload_id and checkpoint_store are given, the output of each
+    stage (raw extraction, validated set, per-donation match results) is
+    checkpointed and a re-run resumes from the last completed stage or
+    donation instead of starting over.
+
     Args:
         file_paths: List of paths to document files
         session_id: Optional session ID for QuickBooks matching
         csv_path: Optional path to CSV file for testing
+        progress_callback: Optional callable taking (stage, progress, message),
+            called as each donation finishes matching
+        upload_id: Optional upload ID used to key checkpoints
+        checkpoint_store: Optional store for stage checkpoints
+        match_workers: Number of donations to match concurrently
 
     Returns:
         Tuple of (processed_donations, metadata_dict, display_donations)
-        metadata_dict contains: raw_count, valid_count, duplicate_count, matched_count
+        metadata_dict contains: raw_count, valid_count, duplicate_count,
+        matched_count and customer_lookups (lookup cache statistics)
         display_donations: List of donations formatted for UI display
     """
-    # Extract donations from documents
-    raw_donations = extract_donations_from_documents(file_paths)
-    raw_count = len(raw_donations)
+    checkpoints = checkpoint_store if upload_id else None
+    checkpoint_id = upload_id or ""
+
+    validated_checkpoint = (
+        checkpoints.load_stage(checkpoint_id, JobStage.VALIDATING)
+        if checkpoints
+        else None
+    )
+    if validated_checkpoint is not None:
+        logger.info(f"Resuming upload {upload_id} from validated checkpoint")
+        processed_donations = validated_checkpoint["donations"]
+        raw_count = validated_checkpoint["raw_count"]
+    else:
+        raw_donations = (
+            checkpoints.load_stage(checkpoint_id, JobStage.EXTRACTING)
+            if checkpoints
+            else None
+        )
+        if raw_donations is not None:
+            logger.info(f"Resuming upload {upload_id} from extraction checkpoint")
+        else:
+            # Extract donations from documents
+            raw_donations = extract_donations_from_documents(file_paths)
+            if checkpoints:
+                checkpoints.save_stage(
+                    checkpoint_id, JobStage.EXTRACTING, raw_donations
+                )
+        raw_count = len(raw_donations)
+
+        # Validate and deduplicate
+        validator = DonationValidator()
+        processed_donations = validator.process_donations(raw_donations)
+        if checkpoints:
+            checkpoints.save_stage(
+                checkpoint_id,
+                JobStage.VALIDATING,
+                {"donations": processed_donations, "raw_count": raw_count},
+            )
 
-    # Validate and deduplicate
-    validator = DonationValidator()
-    processed_donations = validator.process_donations(raw_donations)
     valid_count = len(processed_donations)
 
     # Calculate duplicate count
@@ -46,6 +95,7 @@ def process_donation_documents(
     matched_count = 0
     new_customer_count = 0
     matching_errors = []
+    lookup_stats: Dict[str, int] = {}
 
     if session_id or csv_path:
         if csv_path:
@@ -59,15 +109,26 @@ def process_donation_documents(
                 f"{len(processed_donations)} donations"
             )
 
-            for i, donation in enumerate(processed_donations):
+            completed_matches = (
+                checkpoints.load_matches(checkpoint_id) if checkpoints else {}
+            )
+            if completed_matches:
+                logger.info(
+                    f"Resuming matching with {len(completed_matches)} donations "
+                    "already matched"
+                )
+
+            def match_one(i: int) -> Dict[str, Any]:
+                """Match a single donation, recording errors instead of raising."""
+                donation = processed_donations[i]
+                # Extract payer info for logging
+                payer_info = donation.get("PayerInfo", {})
+                payer_name = (
+                    payer_info.get("Aliases", ["Unknown"])[0]
+                    if payer_info.get("Aliases")
+                    else payer_info.get("Organization_Name", "Unknown")
+                )
                 try:
-                    # Extract payer info for logging
-                    payer_info = donation.get("PayerInfo", {})
-                    payer_name = (
-                        payer_info.get("Aliases", ["Unknown"])[0]
-                        if payer_info.get("Aliases")
-                        else payer_info.get("Organization_Name", "Unknown")
-                    )
                     payment_ref = donation.get("PaymentInfo", {}).get(
                         "Payment_Ref", "Unknown"
                     )
@@ -79,20 +140,20 @@ def process_donation_documents(
                     )
 
                     match_result = matcher.match_donation_to_customer(donation)
-                    donation["match_data"] = match_result
+                    if checkpoints:
+                        checkpoints.save_match(checkpoint_id, i, match_result)
 
                     if match_result["match_status"] == "matched":
-                        matched_count += 1
                         logger.info(
                             f"✓ Matched {payer_name} to QuickBooks customer ID: "
                             f"{match_result['customer_ref']['id']}"
                         )
                     elif match_result["match_status"] == "new_customer":
-                        new_customer_count += 1
                         logger.info(
                             f"✗ No match found for {payer_name} - "
                             "marked as new customer"
                         )
+                    return match_result
 
                 except Exception as e:
                     error_msg = (
@@ -100,8 +161,7 @@ def process_donation_documents(
                     )
                     logger.error(error_msg)
                     matching_errors.append(error_msg)
-                    # Add error info to donation
-                    donation["match_data"] = {
+                    return {
                         "match_status": "error",
                         "error": str(e),
                         "customer_ref": None,
@@ -111,10 +171,51 @@ def process_donation_documents(
                         "updates_needed": {},
                     }
 
+            pending = []
+            for i, donation in enumerate(processed_donations):
+                if i in completed_matches:
+                    donation["match_data"] = completed_matches[i]
+                else:
+                    pending.append(i)
+
+            try:
+                matcher.prepare_batch([processed_donations[i] for i in pending])
+            except Exception as e:
+                # Matching still finds candidates through searches
+                logger.warning(f"Batch candidate selection failed: {e}")
+
+            if match_workers > 1 and len(pending) > 1:
+                executor = ThreadPoolExecutor(max_workers=match_workers)
+                results = executor.map(match_one, pending)
+            else:
+                executor = None
+                results = map(match_one, pending)
+
+            try:
+                for done, (i, match_result) in enumerate(zip(pending, results), 1):
+                    processed_donations[i]["match_data"] = match_result
+                    if progress_callback:
+                        progress_callback(
+                            JobStage.MATCHING,
+                            int(done * 100 / len(pending)),
+                            f"Matched {done}/{len(pending)} donations",
+                        )
+            finally:
+                if executor:
+                    executor.shutdown()
+
+            for donation in processed_donations:
+                status = donation["match_data"].get("match_status")
+                if status == "matched":
+                    matched_count += 1
+                elif status == "new_customer":
+                    new_customer_count += 1
+
+            lookup_stats = matcher.lookup_stats()
             logger.info(
                 f"Matching complete: {matched_count} matched, "
                 f"{new_customer_count} new customers, "
-                f"{len(matching_errors)} errors"
+                f"{len(matching_errors)} errors; customer lookups: {lookup_stats}"
             )
 
         except Exception as e:
@@ -135,11 +236,12 @@ def process_donation_documents(
     else:
         logger.info("No session_id or csv_path provided - skipping customer matching")
 
-    metadata: Dict[str, int] = {
+    metadata: Dict[str, Any] = {
         "raw_count": raw_count,
         "valid_count": valid_count,
         "duplicate_count": duplicate_count,
         "matched_count": matched_count,
+        "customer_lookups": lookup_stats,
     }
 
     # Create display-ready versions of donations
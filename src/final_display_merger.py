@@ -2,6 +2,8 @@
 import logging
 from typing import Any, Dict, List, Optional
 
+from .resolution_memory import payer_fingerprints
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,7 @@ def merge_donation_for_display(
     contact_info = donation.get("ContactInfo", {})
 
     # Initialize the final display structure
-    display_data = {
+    display_data: Dict[str, Any] = {
         "payer_info": {
             "customer_ref": {
                 "salutation": "",
@@ -217,6 +219,9 @@ def merge_donation_for_display(
     if match_data is not None:
         display_data["_match_data"] = match_data
 
+    # Lets a confirmed match be remembered for this payer
+    display_data["_payer_fingerprints"] = payer_fingerprints(donation)
+
     # Log final display data for debugging
     if display_data["status"]["address_updated"]:
         logger.info(
@@ -5,15 +5,22 @@ This module provides a lightweight alternative to Celery that:
 - Uses existing Redis connections
 - Provides atomic job processing with BRPOPLPUSH
 - Includes dead letter queue for failed jobs
+- Records when each job was popped, so stale jobs are told apart from
+  jobs other workers are still running
+- Supports fan-out/fan-in: a large upload is split into file-group
+  sub-jobs that any worker can pick up, and the last sub-job to finish
+  queues a single gather job that merges their extraction results
 """
+import contextlib
 import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import redis
 
 from .redis_retry import redis_retry
+from .session import SessionBackend
 
 logger = logging.getLogger(__name__)
 
@@ -22,24 +29,41 @@ JOB_QUEUE = "donation_jobs:pending"
 PROCESSING_QUEUE = "donation_jobs:processing"
 DEAD_LETTER_QUEUE = "donation_jobs:failed"
 COMPLETED_QUEUE = "donation_jobs:completed"
+GROUP_KEY_PREFIX = "donation_jobs:group:"
+PROCESSING_STARTED_KEY = "donation_jobs:processing_started"  # job_id -> pop time
+
+# Job kinds (jobs without a kind are regular full-upload jobs)
+JOB_KIND_EXTRACT = "extract"  # Sub-job: extract one file group
+JOB_KIND_GATHER = "gather"  # Fan-in: merge sub-job results and finish the upload
+
+# Fan-out settings
+FAN_OUT_FILES_PER_JOB = 5  # Files per extraction sub-job
 
 # Timeouts
 BLOCKING_TIMEOUT = 30  # seconds to wait for new job
 JOB_TIMEOUT = 900  # 15 minutes max per job
 CLEANUP_INTERVAL = 300  # 5 minutes
+GROUP_TTL = JOB_TIMEOUT * 4  # Fan-out bookkeeping outlives every sub-job
 
 
 class JobQueue:
     """Simple Redis-based job queue."""
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        session_backend: Optional[SessionBackend] = None,
+    ):
         """Initialize job queue with Redis client.
 
         Args:
             redis_client: Redis client instance (reuses existing connection)
+            session_backend: Upload metadata store, marked failed when a
+                fan-out group fails
         """
         self.redis = redis_client
         self.enabled = redis_client is not None
+        self.session_backend = session_backend
 
     @redis_retry(exceptions=(redis.ConnectionError, redis.TimeoutError, Exception))
     def push_job(self, job_data: Dict[str, Any]) -> bool:
@@ -74,7 +98,8 @@ class JobQueue:
         """Pop a job from the queue (blocking).
 
         Uses BRPOPLPUSH for atomic move to processing queue.
-        This ensures jobs aren't lost if worker crashes.
+        This ensures jobs aren't lost if worker crashes. The time the job
+        was popped is stored in PROCESSING_STARTED_KEY for stale job cleanup.
 
         Args:
             timeout: Seconds to wait for a job (0 = wait forever)
@@ -92,6 +117,11 @@ class JobQueue:
             if result:
                 job_data = json.loads(result)
                 job_data["processing_started_at"] = time.time()
+                self.redis.hset(
+                    PROCESSING_STARTED_KEY,
+                    str(job_data.get("job_id")),
+                    job_data["processing_started_at"],
+                )
                 logger.info(f"Job {job_data.get('job_id')} dequeued for processing")
                 return job_data
 
@@ -143,6 +173,8 @@ class JobQueue:
                 except json.JSONDecodeError:
                     continue
 
+            self.redis.hdel(PROCESSING_STARTED_KEY, str(job_data.get("job_id")))
+
             # Add completed timestamp and push to completed queue
             job_data["completed_at"] = time.time()
             completed_json = json.dumps(job_data)
@@ -187,6 +219,8 @@ class JobQueue:
                 except json.JSONDecodeError:
                     continue
 
+            self.redis.hdel(PROCESSING_STARTED_KEY, str(job_data.get("job_id")))
+
             # Add failure info and push to dead letter queue
             job_data["failed_at"] = time.time()
             job_data["error"] = error
@@ -204,6 +238,9 @@ class JobQueue:
         """Clean up jobs stuck in processing queue.
 
         Jobs that have been processing for too long are moved to dead letter queue.
+        Processing time is measured from the pop time stored by pop_job; a
+        job without one (popped a moment ago) starts its clock now. A stale
+        fan-out sub-job also fails its parent job.
 
         Args:
             max_age_seconds: Maximum time a job should be processing
@@ -220,18 +257,29 @@ class JobQueue:
 
             # Get all jobs in processing queue
             processing_jobs = self.redis.lrange(PROCESSING_QUEUE, 0, -1)
+            started_times = self.redis.hgetall(PROCESSING_STARTED_KEY)
 
             for job_json in processing_jobs:
                 try:
                     job_data = json.loads(job_json)
-                    processing_started = job_data.get("processing_started_at", 0)
-
-                    if current_time - processing_started > max_age_seconds:
-                        # Move to dead letter queue
-                        self.redis.lrem(PROCESSING_QUEUE, 1, job_json)
+                    job_id = str(job_data.get("job_id"))
+                    processing_started = started_times.get(job_id)
+
+                    if processing_started is None:
+                        # Not stamped by pop_job yet; never guess a start time
+                        self.redis.hsetnx(PROCESSING_STARTED_KEY, job_id, current_time)
+                    elif current_time - float(processing_started) > max_age_seconds:
+                        # Move to dead letter queue, unless the job finished or
+                        # another worker cleaned it up since it was listed
+                        if not self.redis.lrem(PROCESSING_QUEUE, 1, job_json):
+                            continue
+                        self.redis.hdel(PROCESSING_STARTED_KEY, job_id)
                         job_data["error"] = f"Job timed out after {max_age_seconds}s"
                         job_data["failed_at"] = current_time
                         self.redis.lpush(DEAD_LETTER_QUEUE, json.dumps(job_data))
+                        # A dead sub-job never reports, so fail its parent here
+                        if job_data.get("parent_job_id"):
+                            self.fail_group(job_data, job_data["error"])
                         stale_count += 1
                         logger.warning(f"Cleaned up stale job {job_data.get('job_id')}")
 
@@ -347,3 +395,247 @@ class JobQueue:
         except Exception as e:
             logger.error(f"Failed to get job data for {job_id}: {e}")
             return None
+
+    def _get_group_key(self, parent_job_id: str) -> str:
+        """Generate Redis key for a fan-out group's bookkeeping hash."""
+        return f"{GROUP_KEY_PREFIX}{parent_job_id}"
+
+    def _get_group_results_key(self, parent_job_id: str) -> str:
+        """Generate Redis key for a fan-out group's sub-job results."""
+        return f"{GROUP_KEY_PREFIX}{parent_job_id}:results"
+
+    @redis_retry(exceptions=(redis.ConnectionError, redis.TimeoutError, Exception))
+    def fan_out(self, job_data: Dict[str, Any], file_groups: List[List[str]]) -> bool:
+        """Split a job into one extraction sub-job per file group.
+
+        Sub-jobs carry the parent's job_id as parent_job_id. When the last one
+        reports its result, a gather job with the parent's job_id is queued,
+        so the parent is reported completed only once everything is merged.
+
+        Args:
+            job_data: The parent job (job_id, upload_id, session_id)
+            file_groups: Stored filenames for each sub-job
+
+        Returns:
+            True if every sub-job was queued
+        """
+        if not self.enabled or not file_groups:
+            return False
+
+        parent_job_id = job_data["job_id"]
+        group_key = self._get_group_key(parent_job_id)
+
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(group_key, self._get_group_results_key(parent_job_id))
+            pipe.hset(
+                group_key,
+                mapping={
+                    "total": len(file_groups),
+                    "files": sum(len(group) for group in file_groups),
+                    "failed": 0,
+                },
+            )
+            pipe.expire(group_key, GROUP_TTL)
+
+            queued_at = time.time()
+            for index, filenames in enumerate(file_groups):
+                sub_job = {
+                    "job_id": f"{parent_job_id}:part{index}",
+                    "parent_job_id": parent_job_id,
+                    "upload_id": job_data.get("upload_id"),
+                    "session_id": job_data.get("session_id"),
+                    "kind": JOB_KIND_EXTRACT,
+                    "part": index,
+                    "filenames": filenames,
+                    "queued_at": queued_at,
+                }
+                pipe.lpush(JOB_QUEUE, json.dumps(sub_job))
+            pipe.execute()
+
+            logger.info(
+                f"Job {parent_job_id} fanned out into {len(file_groups)} sub-jobs"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to fan out job {parent_job_id}: {e}")
+            return False
+
+    @redis_retry(exceptions=(redis.ConnectionError, redis.TimeoutError, Exception))
+    def record_sub_job_result(
+        self, sub_job: Dict[str, Any], donations: List[Dict[str, Any]]
+    ) -> bool:
+        """Store a sub-job's extraction result and queue the gather when last.
+
+        Results are stored per part, so recording a sub-job twice (after a
+        redelivery or a retried call) changes nothing. Once every part is in,
+        the group's gathered flag is set with HSETNX, so exactly one worker
+        queues the gather job.
+
+        Args:
+            sub_job: The extraction sub-job that finished
+            donations: Raw donations extracted from its file group
+
+        Returns:
+            True if the result was stored
+        """
+        if not self.enabled:
+            return False
+
+        parent_job_id = sub_job["parent_job_id"]
+        group_key = self._get_group_key(parent_job_id)
+        results_key = self._get_group_results_key(parent_job_id)
+
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(results_key, str(sub_job["part"]), json.dumps(donations))
+            pipe.expire(results_key, GROUP_TTL)
+            pipe.hlen(results_key)
+            pipe.hmget(group_key, ["total", "failed"])
+            _, _, recorded, (total, failed) = pipe.execute()
+
+            if (
+                total is not None
+                and recorded >= int(total)
+                and not int(failed or 0)
+                and self.redis.hsetnx(group_key, "gathered", 1)
+            ):
+                self.push_job(
+                    {
+                        "job_id": parent_job_id,
+                        "upload_id": sub_job.get("upload_id"),
+                        "session_id": sub_job.get("session_id"),
+                        "kind": JOB_KIND_GATHER,
+                    }
+                )
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to record result for {sub_job.get('job_id')}: {e}")
+            return False
+
+    def fail_group(self, sub_job: Dict[str, Any], error: str) -> bool:
+        """Fail a fan-out group's parent job after a sub-job failure.
+
+        Only the first failing sub-job records the parent failure and marks
+        the upload failed; the gather job is never queued for a failed group.
+
+        Args:
+            sub_job: The sub-job that failed
+            error: Error message
+
+        Returns:
+            True if this call recorded the parent failure
+        """
+        if not self.enabled:
+            return False
+
+        parent_job_id = sub_job["parent_job_id"]
+
+        try:
+            if self.redis.hincrby(self._get_group_key(parent_job_id), "failed", 1) != 1:
+                return False
+
+            job_data = {
+                "job_id": parent_job_id,
+                "upload_id": sub_job.get("upload_id"),
+                "failed_at": time.time(),
+                "error": f"Sub-job {sub_job.get('job_id')} failed: {error}",
+            }
+            self.redis.lpush(DEAD_LETTER_QUEUE, json.dumps(job_data))
+            logger.error(f"Job {parent_job_id} failed: {job_data['error']}")
+
+            # No gather job will finish the upload, so report it failed here
+            if self.session_backend is not None and job_data["upload_id"]:
+                with contextlib.suppress(Exception):
+                    self.session_backend.update_upload_metadata(
+                        job_data["upload_id"],
+                        {"status": "failed", "error": job_data["error"]},
+                    )
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to mark group {parent_job_id} as failed: {e}")
+            return False
+
+    def get_group_results(self, parent_job_id: str) -> List[Dict[str, Any]]:
+        """Get the merged extraction results of a fan-out group.
+
+        Args:
+            parent_job_id: Job ID of the parent job
+
+        Returns:
+            Raw donations from every sub-job, in file-group order
+        """
+        if not self.enabled:
+            return []
+
+        results = self.redis.hgetall(self._get_group_results_key(parent_job_id))
+        donations: List[Dict[str, Any]] = []
+        for part in sorted(results, key=int):
+            donations.extend(json.loads(results[part]))
+        return donations
+
+    def get_group_file_count(self, parent_job_id: str) -> int:
+        """Get the number of files a fan-out group processed.
+
+        Args:
+            parent_job_id: Job ID of the parent job
+
+        Returns:
+            Total files across all sub-jobs
+        """
+        if not self.enabled:
+            return 0
+
+        files = self.redis.hget(self._get_group_key(parent_job_id), "files")
+        return int(files or 0)
+
+    def clear_group(self, parent_job_id: str) -> None:
+        """Delete a fan-out group's bookkeeping once it has been gathered.
+
+        Args:
+            parent_job_id: Job ID of the parent job
+        """
+        if not self.enabled:
+            return
+
+        try:
+            self.redis.delete(
+                self._get_group_key(parent_job_id),
+                self._get_group_results_key(parent_job_id),
+            )
+        except Exception as e:
+            logger.error(f"Failed to clear group {parent_job_id}: {e}")
+
+    @redis_retry(exceptions=(redis.ConnectionError, redis.TimeoutError, Exception))
+    def release_job(self, job_data: Dict[str, Any]) -> bool:
+        """Remove a job from the processing queue without completing it.
+
+        Used for a parent job whose work was handed off to sub-jobs; the
+        gather job reports its completion later.
+
+        Args:
+            job_data: The job to release
+
+        Returns:
+            True if the job was found and removed
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            for job_json in self.redis.lrange(PROCESSING_QUEUE, 0, -1):
+                try:
+                    existing_job = json.loads(job_json)
+                except json.JSONDecodeError:
+                    continue
+                if existing_job.get("job_id") == job_data.get("job_id"):
+                    self.redis.hdel(PROCESSING_STARTED_KEY, str(job_data.get("job_id")))
+                    return self.redis.lrem(PROCESSING_QUEUE, 1, job_json) > 0
+            return False
+
+        except Exception as e:
+            logger.error(f"Failed to release job: {e}")
+            return False
@@ -0,0 +1,279 @@
+"""
+Precomputed name features for donation-to-customer match scoring.
+
+Scoring compares every donor alias with every candidate customer, and the
+customer side (lowercased names, normalized display name, its parts, the
+"Last, First" split, organization keywords) is the same for every alias
+and every donation. CustomerFeatures computes it once per customer and
+DonorFeatures once per donation; score_features then only compares them.
+"""
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Words ignored when comparing organization names
+ORG_SKIP_WORDS = frozenset(
+    {"the", "and", "inc", "llc", "corp", "corporation", "company", "of", "a"}
+)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a name by removing punctuation and extra spaces.
+
+    Args:
+        name: Name to normalize
+
+    Returns:
+        Normalized name
+    """
+    # Remove periods after single letters (initials)
+    name = re.sub(r"\b(\w)\.", r"\1", name)
+
+    # Remove other punctuation except spaces and hyphens
+    name = re.sub(r"[^\w\s\-]", " ", name)
+
+    # Normalize multiple spaces to single space
+    name = " ".join(name.split())
+
+    return name.strip()
+
+
+def _org_words(normalized: str) -> FrozenSet[str]:
+    """Get the significant words of a normalized organization name."""
+    return frozenset(
+        word
+        for word in normalized.split()
+        if len(word) > 2 and word not in ORG_SKIP_WORDS
+    )
+
+
+class CustomerFeatures:
+    """Name features of one customer, computed once and reused for scoring."""
+
+    __slots__ = (
+        "display_name",
+        "given_name",
+        "family_name",
+        "company_name",
+        "normalized_display",
+        "display_parts",
+        "display_set",
+        "comma_name",
+        "compare_name",
+        "normalized_compare",
+        "compare_words",
+    )
+
+    def __init__(self, customer: Dict[str, Any]):
+        """
+        Compute a customer's features.
+
+        Args:
+            customer: QuickBooks customer data
+        """
+        self.display_name = customer.get("DisplayName", "").lower()
+        self.given_name = (customer.get("GivenName") or "").lower()
+        self.family_name = (customer.get("FamilyName") or "").lower()
+        self.company_name = (customer.get("CompanyName") or "").lower()
+
+        self.normalized_display = normalize_name(self.display_name).lower()
+        self.display_parts = self.normalized_display.split()
+        self.display_set = frozenset(self.display_parts)
+
+        # QuickBooks often uses "Last, First" display names
+        self.comma_name: Optional[Tuple[str, str]] = None
+        comma_parts = self.display_name.split(",")
+        if len(comma_parts) == 2:
+            self.comma_name = (
+                normalize_name(comma_parts[1]).lower(),
+                normalize_name(comma_parts[0]).lower(),
+            )
+
+        # Organizations compare the company name, else the display name
+        self.compare_name = self.company_name or self.display_name
+        self.normalized_compare = normalize_name(self.compare_name).lower()
+        self.compare_words = _org_words(self.normalized_compare)
+
+
+class DonorFeatures:
+    """Name features of one donation's payer, computed once per donation."""
+
+    __slots__ = ("aliases", "org_name", "org_lower", "normalized_org", "org_words")
+
+    def __init__(self, donation: Dict[str, Any]):
+        """
+        Compute a donation's payer features.
+
+        Args:
+            donation: Extracted donation data
+        """
+        payer_info = donation.get("PayerInfo", {})
+
+        # (lowercased, normalized, parts, part set) for each alias
+        self.aliases: List[Tuple[str, str, List[str], FrozenSet[str]]] = []
+        for alias in payer_info.get("Aliases", []):
+            normalized = normalize_name(alias).lower()
+            parts = normalized.split()
+            self.aliases.append((alias.lower(), normalized, parts, frozenset(parts)))
+
+        self.org_name = payer_info.get("Organization_Name") or ""
+        self.org_lower = self.org_name.lower()
+        self.normalized_org = normalize_name(self.org_name).lower()
+        self.org_words = _org_words(self.normalized_org)
+
+
+class FeatureCache:
+    """Customer features by customer ID, recomputed when the record changes."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._features: Dict[str, Tuple[Dict[str, Any], CustomerFeatures]] = {}
+
+    def get(self, customer: Dict[str, Any]) -> CustomerFeatures:
+        """
+        Get a customer's features, computing them on first use.
+
+        Args:
+            customer: Customer record
+
+        Returns:
+            Features of the record
+        """
+        customer_id = customer.get("Id")
+        cached = self._features.get(customer_id) if customer_id else None
+        # A different record object under the same ID may have new names
+        if cached is not None and cached[0] is customer:
+            return cached[1]
+        features = CustomerFeatures(customer)
+        if customer_id:
+            self._features[customer_id] = (customer, features)
+        return features
+
+
+def _alias_score(
+    alias: Tuple[str, str, List[str], FrozenSet[str]], customer: CustomerFeatures
+) -> float:
+    """Score one alias against a customer's names (0 if nothing matches)."""
+    alias_lower, normalized_alias, alias_parts, alias_set = alias
+    display_parts = customer.display_parts
+
+    # Exact match (after normalization)
+    if normalized_alias == customer.normalized_display:
+        return 100.0
+
+    # Original exact match
+    if alias_lower == customer.display_name:
+        return 98.0
+
+    # First Last alias against a "Last, First" display name
+    if customer.comma_name and len(alias_parts) >= 2:
+        qb_first, qb_last = customer.comma_name
+        if alias_parts[0] == qb_first and alias_parts[-1] == qb_last:
+            return 95.0
+
+        # Handle middle initials/names
+        if (alias_parts[0] == qb_first or alias_parts[-1] == qb_last) and (
+            qb_first.startswith(alias_parts[0]) or alias_parts[0].startswith(qb_first)
+        ):
+            return 90.0
+
+    # Check component names if we have them
+    given_name = customer.given_name
+    family_name = customer.family_name
+    if len(alias_parts) >= 2 and given_name and family_name:
+        # Exact first and last name match
+        if alias_parts[0] == given_name and alias_parts[-1] == family_name:
+            return 95.0
+
+        # Last name exact match with partial first name
+        if alias_parts[-1] == family_name and given_name.startswith(alias_parts[0]):
+            return 90.0
+
+        # Both names present anywhere
+        if given_name in normalized_alias and family_name in normalized_alias:
+            return 85.0
+
+    # Check if all parts of alias are in display name (any order)
+    if len(alias_parts) >= 2 and len(display_parts) >= 2:
+        # All alias parts found in display
+        if alias_set <= customer.display_set:
+            return 90.0
+
+        # Most alias parts found (allow for middle names/initials)
+        if len(alias_set & customer.display_set) >= min(2, len(alias_parts)):
+            return 85.0
+
+    # Check if customer name contains the search term
+    if normalized_alias in customer.normalized_display:
+        return 80.0
+
+    if len(alias_parts) >= 2:
+        # Last name only match, against family name or last display word
+        if family_name and alias_parts[-1] == family_name:
+            return 75.0
+        if len(display_parts) >= 2 and alias_parts[-1] == display_parts[-1]:
+            return 75.0
+
+        # Partial match - any significant word matches
+        for part in alias_parts:
+            if len(part) > 2:
+                for display_part in display_parts:
+                    if (
+                        part == display_part
+                        or display_part.startswith(part)
+                        or part.startswith(display_part)
+                    ):
+                        return 70.0
+
+    return 0.0
+
+
+def score_features(donor: DonorFeatures, customer: CustomerFeatures) -> float:
+    """
+    Calculate the match score between a donor and a customer.
+
+    Args:
+        donor: Donation payer features
+        customer: Customer features
+
+    Returns:
+        Match score (0-100)
+    """
+    best_score = 0.0
+    for alias in donor.aliases:
+        best_score = max(best_score, _alias_score(alias, customer))
+
+    if donor.org_name and (
+        customer.company_name or (not donor.aliases and customer.display_name)
+    ):
+        normalized_org = donor.normalized_org
+        normalized_compare = customer.normalized_compare
+
+        # Exact match after normalization
+        if normalized_org == normalized_compare:
+            best_score = max(best_score, 100.0)
+
+        # Original exact match
+        elif donor.org_lower == customer.compare_name:
+            best_score = max(best_score, 98.0)
+
+        # One contains the other
+        elif (
+            normalized_org in normalized_compare or normalized_compare in normalized_org
+        ):
+            best_score = max(best_score, 85.0)
+
+        # Significant word matching
+        elif donor.org_words and customer.compare_words:
+            common_words = donor.org_words & customer.compare_words
+
+            # Multiple significant words match
+            if len(common_words) >= 2:
+                best_score = max(best_score, 80.0)
+
+            # Single important word matches (longer words weighted higher)
+            elif len(common_words) == 1:
+                word = next(iter(common_words))
+                best_score = max(best_score, 70.0 if len(word) >= 5 else 60.0)
+
+    return best_score
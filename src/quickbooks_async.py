@@ -0,0 +1,599 @@
+"""Asynchronous QuickBooks API client for many concurrent calls."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .config import Config, customer_mirror
+from .quickbooks_auth import QuickBooksAuth
+from .quickbooks_http import MAX_RETRY_AFTER, RETRY_STATUSES
+from .quickbooks_service import (
+    ACCESS_TOKEN_REUSE_SECONDS,
+    CUSTOMER_ID_BATCH_SIZE,
+    QuickBooksClient,
+)
+from .quickbooks_utils import QuickBooksError
+
+try:
+    import httpx
+except ImportError:  # Optional dependency
+    httpx = None  # type: ignore[assignment]
+
+# Network errors retried and reported as QuickBooksError
+TRANSPORT_ERRORS = (httpx.TransportError,) if httpx is not None else ()
+
+logger = logging.getLogger(__name__)
+
+# Methods that only read, so retrying them after a sent request is safe
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def async_client_available() -> bool:
+    """Check whether httpx is installed."""
+    return httpx is not None
+
+
+class AsyncQuickBooksHTTP:
+    """Asynchronous HTTP transport for the QuickBooks API.
+
+    Holds one httpx connection pool and limits the calls in flight per
+    QuickBooks company, so any number of coroutines can share it without
+    being throttled. Retries follow QuickBooksRetry: idempotent calls are
+    retried on connection errors and RETRY_STATUSES, calls creating records
+    only on connect errors and 429.
+
+    The pool and limiters belong to the event loop they are first used on;
+    use one instance per loop, e.g. `async with AsyncQuickBooksHTTP() as http`.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: Tuple[float, float] = (5, 30),
+        realm_concurrency: int = 10,
+        client: Optional[Any] = None,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_size: Most connections open at once
+            retries: Most retries of one call
+            backoff_factor: Base of the exponential backoff between retries,
+                in seconds
+            timeout: (connect, read) timeouts in seconds
+            realm_concurrency: Most calls in flight per QuickBooks company
+            client: httpx.AsyncClient to send through; one is created on
+                first use by default
+        """
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.realm_concurrency = realm_concurrency
+        self._client = client
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+        self._calls = 0
+        self._requests_sent = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+    @classmethod
+    def from_config(cls) -> "AsyncQuickBooksHTTP":
+        """Create a transport with the configured pool, retries and limits."""
+        return cls(
+            pool_size=Config.QBO_HTTP_POOL_SIZE,
+            retries=Config.QBO_HTTP_RETRIES,
+            timeout=(Config.QBO_HTTP_CONNECT_TIMEOUT, Config.QBO_HTTP_READ_TIMEOUT),
+            realm_concurrency=Config.QBO_REALM_CONCURRENCY,
+        )
+
+    async def __aenter__(self) -> "AsyncQuickBooksHTTP":
+        """Enter an async context closing the pool on exit."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the pool."""
+        await self.aclose()
+
+    @property
+    def client(self) -> Any:
+        """Get the httpx client, creating it on first use."""
+        if self._client is None:
+            if httpx is None:
+                raise QuickBooksError(
+                    "The async QuickBooks client requires the httpx package"
+                )
+            connect_timeout, read_timeout = self.timeout
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        return self._client
+
+    def limiter(self, realm_id: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding calls in flight to a company."""
+        limiter = self._limiters.get(realm_id)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self.realm_concurrency)
+            self._limiters[realm_id] = limiter
+        return limiter
+
+    async def request(self, realm_id: str, method: str, url: str, **kwargs: Any) -> Any:
+        """
+        Send a request to a company, waiting for a free slot and retrying.
+
+        Args:
+            realm_id: QuickBooks company the request is for
+            method: HTTP method
+            url: Request URL
+            **kwargs: httpx request parameters
+
+        Returns:
+            The final httpx response, after any retries
+
+        Raises:
+            httpx.TransportError: If the last attempt failed to connect or read
+        """
+        self._calls += 1
+        async with self.limiter(realm_id):
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            try:
+                return await self._send_with_retries(method, url, **kwargs)
+            finally:
+                self._in_flight -= 1
+
+    async def _send_with_retries(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Send a request, retrying it as QuickBooksRetry would."""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            retries_left = attempt < self.retries
+            self._requests_sent += 1
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except TRANSPORT_ERRORS as e:
+                # A request that never connected cannot have been processed
+                if not retries_left or not (
+                    idempotent or isinstance(e, httpx.ConnectError)
+                ):
+                    raise
+                logger.warning(f"Retrying {method} {url} after {e!r}")
+                wait = self._backoff(attempt)
+            else:
+                status = response.status_code
+                retryable = status == 429 or (idempotent and status in RETRY_STATUSES)
+                if not retries_left or not retryable:
+                    return response
+                logger.warning(f"Retrying {method} {url} after HTTP {status}")
+                wait = self._retry_wait(response, attempt)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Get the exponential backoff before a retry."""
+        return self.backoff_factor * (2**attempt)
+
+    def _retry_wait(self, response: Any, attempt: int) -> float:
+        """Get the wait before a retry, honoring Retry-After up to a cap."""
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():  # QuickBooks sends seconds, not HTTP dates
+            return min(float(retry_after), MAX_RETRY_AFTER)
+        return self._backoff(attempt)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get call statistics.
+
+        Returns:
+            calls: requests made through the transport; requests_sent: HTTP
+            requests sent, retries included; max_in_flight: most calls in
+            flight at once
+        """
+        return {
+            "calls": self._calls,
+            "requests_sent": self._requests_sent,
+            "max_in_flight": self._max_in_flight,
+        }
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class AsyncQuickBooksClient:
+    """Asynchronous client for the QuickBooks API.
+
+    Offers the operations of QuickBooksClient as coroutines, so matching and
+    posting can keep many calls in flight from one thread. Tokens come from
+    QuickBooksAuth like the synchronous client's; its blocking token store
+    calls run in worker threads. Create clients with
+    `await AsyncQuickBooksClient.create(session_id, http)`.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        http: AsyncQuickBooksHTTP,
+        auth: QuickBooksAuth,
+        realm_id: str,
+    ):
+        """
+        Initialize the client for a session known to be connected.
+
+        Args:
+            session_id: Session ID for authentication
+            http: Transport shared by the clients on this event loop
+            auth: Token store of the session
+            realm_id: QuickBooks company the session is connected to
+        """
+        self.session_id = session_id
+        self.http = http
+        self.auth = auth
+        self.realm_id = realm_id
+        self.base_url = QuickBooksClient.company_url(realm_id)
+
+        self._access_token: Optional[str] = None
+        self._token_read_at = 0.0
+        # Held while reading or refreshing the token, so concurrent calls
+        # read it once and a rejected token is refreshed once
+        self._token_lock = asyncio.Lock()
+
+    @classmethod
+    async def create(
+        cls, session_id: str, http: AsyncQuickBooksHTTP
+    ) -> "AsyncQuickBooksClient":
+        """
+        Create a client for a session, reading its auth status off the loop.
+
+        Args:
+            session_id: Session ID for authentication
+            http: Transport shared by the clients on this event loop
+
+        Returns:
+            Client for the session's company
+
+        Raises:
+            QuickBooksError: If the session is not connected to a company
+        """
+        auth = QuickBooksAuth()
+        auth_status = await asyncio.to_thread(auth.get_auth_status, session_id)
+        if not auth_status.get("authenticated"):
+            raise QuickBooksError("Session not authenticated", status_code=401)
+        realm_id = auth_status.get("realm_id")
+        if not realm_id:
+            raise QuickBooksError("No company ID found in session", status_code=400)
+        return cls(session_id, http, auth, realm_id)
+
+    async def _get_access_token(self) -> Optional[str]:
+        """Get the session's access token, reusing one read in the last minutes."""
+        async with self._token_lock:
+            now = time.monotonic()
+            if (
+                self._access_token
+                and now - self._token_read_at < ACCESS_TOKEN_REUSE_SECONDS
+            ):
+                return self._access_token
+            access_token = await asyncio.to_thread(
+                self.auth.get_valid_access_token, self.session_id
+            )
+            self._access_token, self._token_read_at = access_token, now
+            return access_token
+
+    async def _refresh_access_token(self, rejected_token: str) -> None:
+        """Refresh a rejected access token unless another call already did."""
+        async with self._token_lock:
+            if self._access_token != rejected_token:
+                return
+            await asyncio.to_thread(self.auth.refresh_access_token, self.session_id)
+            self._access_token = None
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs: Any) -> Any:
+        """
+        Make authenticated request to QuickBooks API.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            **kwargs: Additional httpx request parameters
+
+        Returns:
+            httpx response
+
+        Raises:
+            QuickBooksError: If API request fails
+        """
+        access_token = await self._get_access_token()
+        if not access_token:
+            raise QuickBooksError("No access token found", status_code=401)
+
+        headers = kwargs.get("headers", {})
+        headers["Authorization"] = f"Bearer {access_token}"
+        headers["Accept"] = "application/json"
+        headers["Content-Type"] = "application/json"
+        kwargs["headers"] = headers
+
+        url = f"{self.base_url}{endpoint}"
+        try:
+            response = await self.http.request(self.realm_id, method, url, **kwargs)
+
+            # Handle 401 - try token refresh
+            if response.status_code == 401:
+                logger.info("Got 401, attempting token refresh")
+                try:
+                    await self._refresh_access_token(access_token)
+                    access_token = await self._get_access_token()
+                except Exception:
+                    raise QuickBooksError("Token refresh failed", status_code=401)
+                headers["Authorization"] = f"Bearer {access_token}"
+                response = await self.http.request(self.realm_id, method, url, **kwargs)
+        except TRANSPORT_ERRORS as e:
+            raise QuickBooksError(f"Network error: {e}")
+
+        if response.status_code >= 400:
+            try:
+                error_detail = response.json()
+            except Exception:
+                error_detail = {"raw_response": response.text}
+
+            raise QuickBooksError(
+                f"API request failed ({response.status_code}): {response.text}",
+                status_code=response.status_code,
+                detail=error_detail,
+            )
+
+        return response
+
+    async def _query(self, query: str, entity: str) -> List[Dict[str, Any]]:
+        """Run a query and get the returned entities."""
+        response = await self._make_request("GET", "/query", params={"query": query})
+        return response.json().get("QueryResponse", {}).get(entity, [])
+
+    async def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
+        """
+        Search for customers by name or organization.
+
+        Args:
+            search_term: Name or organization to search for
+
+        Returns:
+            List of matching customers
+        """
+        escaped_term = search_term.replace("'", "\\'")
+        query = f"select * from Customer where DisplayName like '%{escaped_term}%'"
+        logger.debug(f"QuickBooks query: {query}")
+        return await self._query(query, "Customer")
+
+    async def search_customers(
+        self, search_terms: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run several customer searches concurrently.
+
+        Args:
+            search_terms: Names or organizations to search for
+
+        Returns:
+            Matching customers by search term
+        """
+        terms = list(dict.fromkeys(search_terms))
+        results = await asyncio.gather(*(self.search_customer(t) for t in terms))
+        return dict(zip(terms, results))
+
+    async def list_customers(
+        self, start_position: int = 1, max_results: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        List one page of customers.
+
+        Args:
+            start_position: 1-based position of the first customer to return
+            max_results: Page size (QuickBooks allows at most 1000)
+
+        Returns:
+            Customers in the page; fewer than max_results on the last page
+        """
+        query = (
+            f"select * from Customer STARTPOSITION {start_position} "
+            f"MAXRESULTS {max_results}"
+        )
+        return await self._query(query, "Customer")
+
+    async def get_customers_changed_since(
+        self, since: str, start_position: int = 1, max_results: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        List one page of customers updated after a timestamp.
+
+        Args:
+            since: QuickBooks timestamp, e.g. 2024-01-31T09:00:00-08:00
+            start_position: 1-based position of the first customer to return
+            max_results: Page size (QuickBooks allows at most 1000)
+
+        Returns:
+            Changed customers in the page, including ones made inactive; fewer
+            than max_results on the last page
+        """
+        # Queries only return active customers unless they ask for both
+        query = (
+            f"select * from Customer where MetaData.LastUpdatedTime > '{since}' "
+            "AND Active IN (true, false) "
+            f"STARTPOSITION {start_position} MAXRESULTS {max_results}"
+        )
+        return await self._query(query, "Customer")
+
+    async def get_customer(self, customer_id: str) -> Dict[str, Any]:
+        """
+        Get full customer details by ID.
+
+        Args:
+            customer_id: QuickBooks customer ID
+
+        Returns:
+            Customer data
+        """
+        response = await self._make_request("GET", f"/customer/{customer_id}")
+        return response.json()["Customer"]
+
+    async def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get full details of several customers with concurrent `Id IN` queries.
+
+        Args:
+            customer_ids: QuickBooks customer IDs
+
+        Returns:
+            Customers found; unknown IDs are left out
+        """
+        queries = []
+        for start in range(0, len(customer_ids), CUSTOMER_ID_BATCH_SIZE):
+            batch = customer_ids[start : start + CUSTOMER_ID_BATCH_SIZE]
+            id_list = ", ".join(f"'{customer_id}'" for customer_id in batch)
+            queries.append(
+                f"select * from Customer where Id in ({id_list}) "
+                f"MAXRESULTS {len(batch)}"
+            )
+        pages = await asyncio.gather(*(self._query(q, "Customer") for q in queries))
+        return [customer for page in pages for customer in page]
+
+    async def _add_to_mirror(self, customer: Dict[str, Any]) -> None:
+        """Apply a newly created customer to the realm's customer mirror."""
+        if not Config.CUSTOMER_MIRROR_ENABLED or not customer.get("Id"):
+            return
+        try:
+            await asyncio.to_thread(
+                customer_mirror.apply_changes, self.realm_id, [customer]
+            )
+        except Exception as e:
+            # The next incremental refresh picks the customer up
+            logger.warning(f"Failed to add customer {customer['Id']} to mirror: {e}")
+
+    async def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a new customer in QuickBooks.
+
+        Args:
+            customer_data: Customer information, as taken by
+                QuickBooksClient.create_customer
+
+        Returns:
+            The created customer data from the API response.
+
+        Raises:
+            ValueError: If DisplayName is missing.
+            QuickBooksError: If API request fails.
+        """
+        payload = QuickBooksClient.build_customer_payload(customer_data)
+        try:
+            response = await self._make_request("POST", "/customer", json=payload)
+            data = response.json()
+        except QuickBooksError as e:
+            logger.error(f"Failed to create customer: {e}")
+            raise
+        except ValueError as e:  # Handles JSON decoding errors
+            logger.error(f"Error decoding JSON response from customer creation: {e}")
+            raise QuickBooksError(f"JSON decode error: {e}")
+        customer = data.get("Customer", data)
+        await self._add_to_mirror(customer)
+        return customer
+
+    async def list_accounts(
+        self, search_term: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List active accounts and Undeposited Funds from QuickBooks.
+
+        Args:
+            search_term: Optional search term to filter accounts by name
+
+        Returns:
+            List of account dictionaries
+
+        Raises:
+            QuickBooksError: If API request fails
+        """
+        query = "SELECT * FROM Account ORDER BY Name MAXRESULTS 1000"
+        accounts = await self._query(query, "Account")
+        return QuickBooksClient.filter_accounts(accounts, search_term)
+
+    async def list_items(self) -> List[Dict[str, Any]]:
+        """
+        List all active items (products/services) from QuickBooks.
+
+        Returns:
+            List of item dictionaries
+
+        Raises:
+            QuickBooksError: If API request fails
+        """
+        return await self._query("SELECT * FROM Item WHERE Active = true", "Item")
+
+    async def list_payment_methods(self) -> List[Dict[str, Any]]:
+        """
+        List all active payment methods from QuickBooks.
+
+        Returns:
+            List of payment method dictionaries
+
+        Raises:
+            QuickBooksError: If API request fails
+        """
+        query = "SELECT * FROM PaymentMethod WHERE Active = true"
+        return await self._query(query, "PaymentMethod")
+
+    async def create_sales_receipt(
+        self, sales_receipt_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create a sales receipt in QuickBooks.
+
+        Args:
+            sales_receipt_data: Sales receipt information, as taken by
+                QuickBooksClient.create_sales_receipt
+
+        Returns:
+            The created sales receipt data from the API response.
+
+        Raises:
+            ValueError: If required fields are missing.
+            QuickBooksError: If API request fails.
+        """
+        payload = QuickBooksClient.build_sales_receipt_payload(sales_receipt_data)
+        try:
+            response = await self._make_request("POST", "/salesreceipt", json=payload)
+            data = response.json()
+        except QuickBooksError as e:
+            logger.error(f"Failed to create sales receipt: {e}")
+            raise
+        except ValueError as e:
+            logger.error(f"Error creating sales receipt: {e}")
+            raise QuickBooksError(f"Failed to create sales receipt: {e}")
+        return data.get("SalesReceipt", data)
+
+    async def create_sales_receipts(
+        self, sales_receipts: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Create several sales receipts concurrently.
+
+        A failed receipt does not stop the others; its error takes its place
+        in the results.
+
+        Args:
+            sales_receipts: Sales receipt information, one dict per receipt
+
+        Returns:
+            Created sales receipt or the error raised, in input order
+        """
+        return await asyncio.gather(
+            *(self.create_sales_receipt(data) for data in sales_receipts),
+            return_exceptions=True,
+        )
@@ -3,7 +3,7 @@ import json
 import logging
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from cryptography.fernet import Fernet
 from intuitlib.client import AuthClient
@@ -16,6 +16,31 @@ from .secure_logging import setup_secure_logging
 logger = logging.getLogger(__name__)
 setup_secure_logging(logger)
 
+# Callbacks run with a session ID whenever its stored tokens change
+_token_listeners: List[Callable[[str], None]] = []
+
+
+def on_tokens_changed(listener: Callable[[str], None]) -> None:
+    """
+    Register a callback for token changes in this process.
+
+    The callback is run with the session ID whenever a session's tokens are
+    stored (on connecting or refreshing) or deleted (on revoking).
+
+    Args:
+        listener: Callback taking a session ID
+    """
+    _token_listeners.append(listener)
+
+
+def _notify_tokens_changed(session_id: str) -> None:
+    """Run the token change callbacks for a session."""
+    for listener in list(_token_listeners):
+        try:
+            listener(session_id)
+        except Exception as e:
+            logger.warning(f"Token change callback failed: {e}")
+
 
 class QuickBooksAuth:
     """Handle QuickBooks OAuth2 authentication flow."""
@@ -246,6 +271,7 @@ class QuickBooksAuth:
 
             # Delete stored tokens
             session_backend.delete_tokens(session_id)
+            _notify_tokens_changed(session_id)
 
             logger.info("Successfully revoked tokens")
             return True
@@ -254,6 +280,7 @@ class QuickBooksAuth:
             logger.error("Failed to revoke tokens")
             # Delete tokens locally even if revocation failed
             session_backend.delete_tokens(session_id)
+            _notify_tokens_changed(session_id)
             return False
 
     def get_valid_access_token(self, session_id: str) -> Optional[str]:
@@ -331,6 +358,7 @@ class QuickBooksAuth:
 
         # Store in session backend
         session_backend.store_tokens(session_id, encrypted_data)
+        _notify_tokens_changed(session_id)
 
     def _get_tokens(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve and decrypt tokens from session backend."""
@@ -0,0 +1,148 @@
+"""Pooled HTTP connections to the QuickBooks API."""
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Statuses retried with backoff: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Longest Retry-After wait honored, in seconds; a request thread is held while
+# waiting, so longer waits are shortened to this
+MAX_RETRY_AFTER = 30
+
+
+class QuickBooksRetry(Retry):
+    """Retry policy for QuickBooks API calls.
+
+    Idempotent requests are retried on connection and read errors and on
+    RETRY_STATUSES. Requests that create records (customers and sales
+    receipts) are only retried when they cannot have been processed: on
+    connection errors and on 429, which QuickBooks returns before handling
+    a request. Retry-After is honored up to MAX_RETRY_AFTER seconds.
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        """Check whether a response status is retried for a method."""
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        """Get the response's Retry-After wait, capped at MAX_RETRY_AFTER."""
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+class QuickBooksHTTP:
+    """HTTP client for the QuickBooks API sharing one connection pool.
+
+    Connections are kept alive and reused by every thread in the process,
+    so most calls skip the TCP and TLS handshakes. Each thread sends
+    through its own requests.Session (sessions are not thread-safe), and
+    every session is mounted on one adapter holding the pools.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: Tuple[float, float] = (5, 30),
+    ):
+        """
+        Initialize the connection pool.
+
+        Args:
+            pool_size: Connections kept open per QuickBooks host
+            retries: Most retries of one call
+            backoff_factor: Base of the exponential backoff between retries,
+                in seconds
+            timeout: Default (connect, read) timeouts in seconds
+        """
+        self.timeout = timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=QuickBooksRetry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                raise_on_status=False,
+            ),
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def session(self) -> requests.Session:
+        """Get this thread's session on the shared pool."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request over a pooled connection.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: requests parameters; timeout defaults to the pool's
+
+        Returns:
+            The final response, after any retries
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._calls += 1
+        return self.session().request(method, url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get connection reuse statistics.
+
+        Returns:
+            calls: requests made through the client; requests_sent: HTTP
+            requests sent, retries included; connections_opened: new
+            connections; reuse_rate: share of requests sent over an already
+            open connection
+        """
+        pools = self.adapter.poolmanager.pools
+        opened = sent = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        with self._lock:
+            calls = self._calls
+        return {
+            "calls": calls,
+            "requests_sent": sent,
+            "connections_opened": opened,
+            "reuse_rate": round(1 - opened / sent, 4) if sent else 0.0,
+        }
+
+
+# Process-wide client used for every QuickBooks API call
+quickbooks_http = QuickBooksHTTP(
+    pool_size=Config.QBO_HTTP_POOL_SIZE,
+    retries=Config.QBO_HTTP_RETRIES,
+    timeout=(Config.QBO_HTTP_CONNECT_TIMEOUT, Config.QBO_HTTP_READ_TIMEOUT),
+)
@@ -2,20 +2,36 @@
 import json
 import logging
 import re
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
-from .config import Config
-from .quickbooks_auth import QuickBooksAuth
+from .config import Config, customer_mirror
+from .quickbooks_auth import QuickBooksAuth, on_tokens_changed
+from .quickbooks_http import quickbooks_http
 from .quickbooks_utils import QuickBooksError
 
 logger = logging.getLogger(__name__)
 
+# Most customer IDs looked up by one `Id IN (...)` query
+CUSTOMER_ID_BATCH_SIZE = 100
+
+
+# Seconds an access token is reused without reading it again; tokens are read
+# with at least five minutes of validity left, so a reused one is still valid
+ACCESS_TOKEN_REUSE_SECONDS = 240
+
 
 class QuickBooksClient:
     """Client for interacting with QuickBooks API."""
 
+    # Access token last read for the session and when (time.monotonic())
+    _access_token: Optional[str] = None
+    _token_read_at = 0.0
+
     def __init__(self, session_id: str):
         """
         Initialize QuickBooks client.
@@ -34,14 +50,17 @@ class QuickBooksClient:
         company_id = auth_status.get("realm_id")
         if not company_id:
             raise QuickBooksError("No company ID found in session", status_code=400)
+        self.realm_id = company_id
 
         # Set base URL based on environment
+        self.base_url = self.company_url(company_id)
+
+    @staticmethod
+    def company_url(realm_id: str) -> str:
+        """Get the API base URL of a QuickBooks company."""
         if Config.QBO_ENVIRONMENT == "production":
-            self.base_url = f"https://quickbooks.api.intuit.com/v3/company/{company_id}"
-        else:
-            self.base_url = (
-                f"https://sandbox-quickbooks.api.intuit.com/v3/company/{company_id}"
-            )
+            return f"https://quickbooks.api.intuit.com/v3/company/{realm_id}"
+        return f"https://sandbox-quickbooks.api.intuit.com/v3/company/{realm_id}"
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """
@@ -59,7 +78,7 @@ class QuickBooksClient:
             QuickBooksError: If API request fails
         """
         # Get access token
-        access_token = self.auth.get_valid_access_token(self.session_id)
+        access_token = self._get_access_token()
         if not access_token:
             raise QuickBooksError("No access token found", status_code=401)
 
@@ -70,9 +89,9 @@ class QuickBooksClient:
         headers["Content-Type"] = "application/json"
         kwargs["headers"] = headers
 
-        # Make request
+        # Make request over a pooled connection
         url = f"{self.base_url}{endpoint}"
-        response = requests.request(method, url, **kwargs)
+        response = quickbooks_http.request(method, url, **kwargs)
 
         # Handle 401 - try token refresh
         if response.status_code == 401:
@@ -80,9 +99,10 @@ class QuickBooksClient:
             try:
                 self.auth.refresh_access_token(self.session_id)
                 # Retry with new token
-                access_token = self.auth.get_valid_access_token(self.session_id)
+                self._access_token = None
+                access_token = self._get_access_token()
                 headers["Authorization"] = f"Bearer {access_token}"
-                response = requests.request(method, url, **kwargs)
+                response = quickbooks_http.request(method, url, **kwargs)
             except Exception:
                 raise QuickBooksError("Token refresh failed", status_code=401)
 
@@ -101,6 +121,18 @@ class QuickBooksClient:
 
         return response
 
+    def _get_access_token(self) -> Optional[str]:
+        """Get the session's access token, reusing one read in the last minutes."""
+        now = time.monotonic()
+        if (
+            self._access_token
+            and now - self._token_read_at < ACCESS_TOKEN_REUSE_SECONDS
+        ):
+            return self._access_token
+        access_token = self.auth.get_valid_access_token(self.session_id)
+        self._access_token, self._token_read_at = access_token, now
+        return access_token
+
     def search_customer(self, search_term: str) -> List[Dict[str, Any]]:
         """
         Search for customers by name or organization.
@@ -129,6 +161,60 @@ class QuickBooksClient:
 
         return customers
 
+    def list_customers(
+        self, start_position: int = 1, max_results: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        List one page of customers.
+
+        Args:
+            start_position: 1-based position of the first customer to return
+            max_results: Page size (QuickBooks allows at most 1000)
+
+        Returns:
+            Customers in the page; fewer than max_results on the last page
+        """
+        query = (
+            f"select * from Customer STARTPOSITION {start_position} "
+            f"MAXRESULTS {max_results}"
+        )
+        response = self._make_request("GET", "/query", params={"query": query})
+        return response.json().get("QueryResponse", {}).get("Customer", [])
+
+    def _add_to_mirror(self, customer: Dict[str, Any]) -> None:
+        """Apply a newly created customer to the realm's customer mirror."""
+        if not Config.CUSTOMER_MIRROR_ENABLED or not customer.get("Id"):
+            return
+        try:
+            customer_mirror.apply_changes(self.realm_id, [customer])
+        except Exception as e:
+            # The next incremental refresh picks the customer up
+            logger.warning(f"Failed to add customer {customer['Id']} to mirror: {e}")
+
+    def get_customers_changed_since(
+        self, since: str, start_position: int = 1, max_results: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        List one page of customers updated after a timestamp.
+
+        Args:
+            since: QuickBooks timestamp, e.g. 2024-01-31T09:00:00-08:00
+            start_position: 1-based position of the first customer to return
+            max_results: Page size (QuickBooks allows at most 1000)
+
+        Returns:
+            Changed customers in the page, including ones made inactive; fewer
+            than max_results on the last page
+        """
+        # Queries only return active customers unless they ask for both
+        query = (
+            f"select * from Customer where MetaData.LastUpdatedTime > '{since}' "
+            "AND Active IN (true, false) "
+            f"STARTPOSITION {start_position} MAXRESULTS {max_results}"
+        )
+        response = self._make_request("GET", "/query", params={"query": query})
+        return response.json().get("QueryResponse", {}).get("Customer", [])
+
     def get_customer(self, customer_id: str) -> Dict[str, Any]:
         """
         Get full customer details by ID.
@@ -143,6 +229,31 @@ class QuickBooksClient:
         data = response.json()
         return data["Customer"]
 
+    def get_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get full details of several customers with `Id IN (...)` queries.
+
+        Args:
+            customer_ids: QuickBooks customer IDs
+
+        Returns:
+            Customers found; unknown IDs are left out
+        """
+        customers: List[Dict[str, Any]] = []
+        for start in range(0, len(customer_ids), CUSTOMER_ID_BATCH_SIZE):
+            batch = customer_ids[start : start + CUSTOMER_ID_BATCH_SIZE]
+            # IDs are numeric strings, quoted like every QuickBooks literal
+            id_list = ", ".join(f"'{customer_id}'" for customer_id in batch)
+            query = (
+                f"select * from Customer where Id in ({id_list}) "
+                f"MAXRESULTS {len(batch)}"
+            )
+            response = self._make_request("GET", "/query", params={"query": query})
+            customers.extend(
+                response.json().get("QueryResponse", {}).get("Customer", [])
+            )
+        return customers
+
     def format_customer_data(self, customer: Dict[str, Any]) -> Dict[str, Any]:
         """
         Format QuickBooks customer data to PRD structure.
@@ -319,21 +430,19 @@ class QuickBooksClient:
         # Ensure it's 5 digits with leading zeros preserved
         return zip_code.strip()
 
-    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def build_customer_payload(customer_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Create a new customer in QuickBooks.
+        Build the QuickBooks payload creating a customer.
 
         Args:
-            customer_data: Dictionary containing customer information.
-                           Expected keys: DisplayName, GivenName, FamilyName,
-                           CompanyName, PrimaryEmailAddr, PrimaryPhone, BillAddr.
+            customer_data: Customer information, as taken by create_customer
 
         Returns:
-            The created customer data from the API response.
+            Customer payload without empty fields
 
         Raises:
             ValueError: If DisplayName is missing.
-            QuickBooksError: If API request fails.
         """
         if not customer_data.get("DisplayName"):
             raise ValueError("DisplayName is required to create a customer.")
@@ -361,13 +470,33 @@ class QuickBooksClient:
             }
 
         # Remove keys with None values to keep payload clean
-        payload = {k: v for k, v in payload.items() if v is not None}
+        return {k: v for k, v in payload.items() if v is not None}
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a new customer in QuickBooks.
+
+        Args:
+            customer_data: Dictionary containing customer information.
+                           Expected keys: DisplayName, GivenName, FamilyName,
+                           CompanyName, PrimaryEmailAddr, PrimaryPhone, BillAddr.
+
+        Returns:
+            The created customer data from the API response.
+
+        Raises:
+            ValueError: If DisplayName is missing.
+            QuickBooksError: If API request fails.
+        """
+        payload = self.build_customer_payload(customer_data)
 
         try:
             response = self._make_request("POST", "/customer", json=payload)
             # QuickBooks API typically returns the created object under a key
             # like "Customer" in the JSON response.
-            return response.json().get("Customer", response.json())
+            customer = response.json().get("Customer", response.json())
+            self._add_to_mirror(customer)
+            return customer
         except QuickBooksError as e:
             logger.error(f"Failed to create customer: {e}")
             # Re-raise the error to be handled by the caller
@@ -403,97 +532,110 @@ class QuickBooksClient:
 
             # Extract accounts from QueryResponse
             accounts = data.get("QueryResponse", {}).get("Account", [])
+            return self.filter_accounts(accounts, search_term)
 
-            # Log account types to debug Undeposited Funds issue
-            logger.info(f"Found {len(accounts)} accounts from QuickBooks")
-
-            # Log all Other Current Assets accounts and potential Undeposited Funds
-            for account in accounts:
-                account_type = account.get("AccountType", "")
-                account_subtype = account.get("AccountSubType", "")
-                account_name = account.get("Name", "")
-
-                # Log Other Current Assets accounts
-                if "other current" in account_type.lower():
-                    logger.info(
-                        f"Other Current Asset account: Name={account_name}, "
-                        f"AccountType={account_type}, "
-                        f"AccountSubType={account_subtype}, "
-                        f"Id={account.get('Id')}"
-                    )
+        except QuickBooksError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching accounts: {e}")
+            raise QuickBooksError(f"Failed to fetch accounts: {e}")
 
-                # Look for Undeposited Funds (with or without account numbers)
-                # Matches: "12000 Undeposited Funds", "Undeposited Funds", etc.
-                undeposited_pattern = re.compile(
-                    r"\d*\s*undeposited\s*funds", re.IGNORECASE
-                )
-                if (
-                    undeposited_pattern.search(account_name)
-                    or account_subtype == "UndepositedFunds"
-                    or undeposited_pattern.search(account.get("FullyQualifiedName", ""))
-                ):
-                    logger.info(
-                        f"*** UNDEPOSITED FUNDS FOUND: Name={account_name}, "
-                        f"AccountType={account_type}, "
-                        f"AccountSubType={account_subtype}, "
-                        f"FullyQualifiedName={account.get('FullyQualifiedName')}, "
-                        f"Id={account.get('Id')}"
-                    )
+    @staticmethod
+    def filter_accounts(
+        accounts: List[Dict[str, Any]], search_term: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter queried accounts to the active ones and Undeposited Funds.
 
-            # Also log a summary of account types
-            account_types: Dict[str, int] = {}
-            for account in accounts:
-                acc_type = account.get("AccountType", "Unknown")
-                account_types[acc_type] = account_types.get(acc_type, 0) + 1
-            logger.info(f"Account type summary: {account_types}")
+        Args:
+            accounts: Accounts returned by the QuickBooks account query
+            search_term: Optional search term to filter accounts by name
 
-            # Filter to only return active accounts OR the Undeposited Funds account
-            # (Undeposited Funds might be inactive but we still need it)
-            filtered_accounts = []
-            undeposited_pattern = re.compile(
-                r"\d*\s*undeposited\s*funds", re.IGNORECASE
-            )
+        Returns:
+            List of account dictionaries
+        """
+        # Log account types to debug Undeposited Funds issue
+        logger.info(f"Found {len(accounts)} accounts from QuickBooks")
 
-            for account in accounts:
-                is_active = account.get("Active", True)
-                account_name = account.get("Name", "")
-                fully_qualified_name = account.get("FullyQualifiedName", "")
+        # Log all Other Current Assets accounts and potential Undeposited Funds
+        for account in accounts:
+            account_type = account.get("AccountType", "")
+            account_subtype = account.get("AccountSubType", "")
+            account_name = account.get("Name", "")
 
-                is_undeposited = (
-                    undeposited_pattern.search(account_name)
-                    or account.get("AccountSubType") == "UndepositedFunds"
-                    or undeposited_pattern.search(fully_qualified_name)
+            # Log Other Current Assets accounts
+            if "other current" in account_type.lower():
+                logger.info(
+                    f"Other Current Asset account: Name={account_name}, "
+                    f"AccountType={account_type}, "
+                    f"AccountSubType={account_subtype}, "
+                    f"Id={account.get('Id')}"
                 )
 
-                if is_active or is_undeposited:
-                    filtered_accounts.append(account)
-                    if is_undeposited and not is_active:
-                        logger.warning(
-                            "Undeposited Funds account is inactive: "
-                            f"{account.get('Name')}"
-                        )
-
-            # Apply search filtering if search_term is provided
-            if search_term:
-                search_lower = search_term.lower()
-                filtered_accounts = [
-                    acc
-                    for acc in filtered_accounts
-                    if search_lower in (acc.get("Name", "") or "").lower()
-                    or search_lower in (acc.get("FullyQualifiedName", "") or "").lower()
-                ]
+            # Look for Undeposited Funds (with or without account numbers)
+            # Matches: "12000 Undeposited Funds", "Undeposited Funds", etc.
+            undeposited_pattern = re.compile(
+                r"\d*\s*undeposited\s*funds", re.IGNORECASE
+            )
+            if (
+                undeposited_pattern.search(account_name)
+                or account_subtype == "UndepositedFunds"
+                or undeposited_pattern.search(account.get("FullyQualifiedName", ""))
+            ):
                 logger.info(
-                    f"Filtered to {len(filtered_accounts)} accounts "
-                    f"matching '{search_term}'"
+                    f"*** UNDEPOSITED FUNDS FOUND: Name={account_name}, "
+                    f"AccountType={account_type}, "
+                    f"AccountSubType={account_subtype}, "
+                    f"FullyQualifiedName={account.get('FullyQualifiedName')}, "
+                    f"Id={account.get('Id')}"
                 )
 
-            return filtered_accounts
+        # Also log a summary of account types
+        account_types: Dict[str, int] = {}
+        for account in accounts:
+            acc_type = account.get("AccountType", "Unknown")
+            account_types[acc_type] = account_types.get(acc_type, 0) + 1
+        logger.info(f"Account type summary: {account_types}")
+
+        # Filter to only return active accounts OR the Undeposited Funds account
+        # (Undeposited Funds might be inactive but we still need it)
+        filtered_accounts = []
+        undeposited_pattern = re.compile(r"\d*\s*undeposited\s*funds", re.IGNORECASE)
+
+        for account in accounts:
+            is_active = account.get("Active", True)
+            account_name = account.get("Name", "")
+            fully_qualified_name = account.get("FullyQualifiedName", "")
+
+            is_undeposited = (
+                undeposited_pattern.search(account_name)
+                or account.get("AccountSubType") == "UndepositedFunds"
+                or undeposited_pattern.search(fully_qualified_name)
+            )
 
-        except QuickBooksError:
-            raise
-        except Exception as e:
-            logger.error(f"Error fetching accounts: {e}")
-            raise QuickBooksError(f"Failed to fetch accounts: {e}")
+            if is_active or is_undeposited:
+                filtered_accounts.append(account)
+                if is_undeposited and not is_active:
+                    logger.warning(
+                        "Undeposited Funds account is inactive: "
+                        f"{account.get('Name')}"
+                    )
+
+        # Apply search filtering if search_term is provided
+        if search_term:
+            search_lower = search_term.lower()
+            filtered_accounts = [
+                acc
+                for acc in filtered_accounts
+                if search_lower in (acc.get("Name", "") or "").lower()
+                or search_lower in (acc.get("FullyQualifiedName", "") or "").lower()
+            ]
+            logger.info(
+                f"Filtered to {len(filtered_accounts)} accounts "
+                f"matching '{search_term}'"
+            )
+
+        return filtered_accounts
 
     def list_items(self) -> List[Dict[str, Any]]:
         """
@@ -547,31 +689,22 @@ class QuickBooksClient:
             logger.error(f"Error fetching payment methods: {e}")
             raise QuickBooksError(f"Failed to fetch payment methods: {e}")
 
-    def create_sales_receipt(
-        self, sales_receipt_data: Dict[str, Any]
+    @staticmethod
+    def build_sales_receipt_payload(
+        sales_receipt_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create a sales receipt in QuickBooks.
+        Build the QuickBooks payload creating a sales receipt.
 
         Args:
-            sales_receipt_data: Dictionary containing sales receipt information.
-                Required keys:
-                - CustomerRef: {"value": "customer_id"}
-                - Line: List of line items with ItemRef or AccountRef
-                - DepositToAccountRef: {"value": "account_id"}
-                Optional keys:
-                - TxnDate: Transaction date (defaults to today)
-                - PaymentMethodRef: Payment method reference
-                - DocNumber: Document number (sales receipt number)
-                - PaymentRefNum: Payment reference number (e.g., check number)
-                - PrivateNote: Private note/memo
+            sales_receipt_data: Sales receipt information, as taken by
+                create_sales_receipt
 
         Returns:
-            The created sales receipt data from the API response.
+            Sales receipt payload without empty fields
 
         Raises:
             ValueError: If required fields are missing.
-            QuickBooksError: If API request fails.
         """
         # Validate required fields
         if not sales_receipt_data.get("CustomerRef"):
@@ -605,7 +738,35 @@ class QuickBooksClient:
             payload["PaymentRefNum"] = sales_receipt_data["PaymentRefNum"]
 
         # Remove keys with None values
-        payload = {k: v for k, v in payload.items() if v is not None}
+        return {k: v for k, v in payload.items() if v is not None}
+
+    def create_sales_receipt(
+        self, sales_receipt_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create a sales receipt in QuickBooks.
+
+        Args:
+            sales_receipt_data: Dictionary containing sales receipt information.
+                Required keys:
+                - CustomerRef: {"value": "customer_id"}
+                - Line: List of line items with ItemRef or AccountRef
+                - DepositToAccountRef: {"value": "account_id"}
+                Optional keys:
+                - TxnDate: Transaction date (defaults to today)
+                - PaymentMethodRef: Payment method reference
+                - DocNumber: Document number (sales receipt number)
+                - PaymentRefNum: Payment reference number (e.g., check number)
+                - PrivateNote: Private note/memo
+
+        Returns:
+            The created sales receipt data from the API response.
+
+        Raises:
+            ValueError: If required fields are missing.
+            QuickBooksError: If API request fails.
+        """
+        payload = self.build_sales_receipt_payload(sales_receipt_data)
 
         # Log the final payload being sent to QuickBooks
         logger.info(
@@ -622,3 +783,93 @@ class QuickBooksClient:
         except Exception as e:
             logger.error(f"Error creating sales receipt: {e}")
             raise QuickBooksError(f"Failed to create sales receipt: {e}")
+
+
+class QuickBooksClientCache:
+    """Live QuickBooks clients reused across a session's requests.
+
+    Building a client sets up an OAuth client and reads and decrypts the
+    session's tokens to find its company. Clients are kept per session, each
+    bound to the session's company, for at most ttl seconds, with the least
+    recently used dropped beyond max_size. A session's client is dropped as
+    soon as its tokens are stored or revoked in this process (a refresh,
+    reconnection or disconnection); ttl bounds how long a change made by
+    another process goes unnoticed.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 300):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Most clients kept
+            ttl: Seconds a client is reused after it was built
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clients: "OrderedDict[str, Tuple[QuickBooksClient, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        on_tokens_changed(self.invalidate)
+
+    def get(self, session_id: str) -> QuickBooksClient:
+        """
+        Get a client for a session, building one if none is live.
+
+        Args:
+            session_id: Session ID for authentication
+
+        Returns:
+            QuickBooksClient for the session
+
+        Raises:
+            QuickBooksError: If the session is not connected to QuickBooks
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(session_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._clients.move_to_end(session_id)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._clients.pop(session_id, None)
+            self._stats["misses"] += 1
+
+        # Built outside the lock; unauthenticated sessions raise and are not kept
+        client = QuickBooksClient(session_id)
+        with self._lock:
+            self._clients[session_id] = (client, now)
+            self._clients.move_to_end(session_id)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session's client."""
+        with self._lock:
+            if self._clients.pop(session_id, None) is not None:
+                logger.debug(f"Dropped cached QuickBooks client for {session_id}")
+
+    def clear(self) -> None:
+        """Drop every client."""
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Live clients (size), and lookups answered from the cache (hits)
+            or by building a client (misses)
+        """
+        with self._lock:
+            return {"size": len(self._clients), **self._stats}
+
+
+# Process-wide client cache used by request handlers and data sources
+quickbooks_clients = QuickBooksClientCache(
+    Config.QBO_CLIENT_CACHE_SIZE, Config.QBO_CLIENT_CACHE_TTL
+)
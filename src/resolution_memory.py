@@ -0,0 +1,293 @@
+"""
+Persistent memory of confirmed donor-to-customer matches.
+
+Repeat donors send the same checks every month. When a match is confirmed,
+either by a manual match or by creating a sales receipt, the customer ID is
+remembered under a fingerprint of the payer: the normalized alias set and
+organization name, plus the street address when the donation has one.
+Matching looks the fingerprint up before running any search, so a remembered
+donor resolves without QuickBooks round trips beyond fetching the customer
+itself. Entries whose customer no longer exists (or is inactive) are
+forgotten when they are next looked up.
+
+Memories are kept per QuickBooks realm. Supports local JSON files
+(development) and Redis (production).
+"""
+import hashlib
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from .customer_index import address_key
+from .match_features import DonorFeatures
+from .redis_retry import redis_retry
+
+logger = logging.getLogger(__name__)
+
+
+def payer_fingerprints(donation: Dict[str, Any]) -> List[str]:
+    """
+    Get the fingerprints a donation's payer is remembered under.
+
+    Check numbers change with every check, so only names and the address
+    identify the payer. The names alone are only used when the donation has
+    no address: namesakes at other addresses must not share an entry.
+
+    Args:
+        donation: Extracted donation data
+
+    Returns:
+        Fingerprints (empty if the payer has no name)
+    """
+    donor = DonorFeatures(donation)
+    aliases = sorted(
+        {normalized for _, normalized, _, _ in donor.aliases if normalized}
+    )
+    if not aliases and not donor.normalized_org:
+        return []
+
+    identity = "|".join(aliases) + "#" + donor.normalized_org
+    contact_info = donation.get("ContactInfo") or {}
+    address = address_key(contact_info.get("Address_Line_1"), contact_info.get("ZIP"))
+    fingerprint = f"{identity}#{address}" if address else identity
+    # Names and addresses are not stored in the clear
+    return [hashlib.sha256(fingerprint.encode()).hexdigest()[:32]]
+
+
+class ResolutionMemory(ABC):
+    """Abstract base class for confirmed match storage backends."""
+
+    @abstractmethod
+    def get_entries(
+        self, realm_id: str, fingerprints: List[str]
+    ) -> List[Optional[str]]:
+        """
+        Load the customer IDs remembered under several fingerprints.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints
+
+        Returns:
+            Customer ID or None for each fingerprint
+        """
+        pass
+
+    @abstractmethod
+    def set_entries(
+        self, realm_id: str, fingerprints: List[str], customer_id: str
+    ) -> bool:
+        """
+        Remember a customer ID under several fingerprints.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints
+            customer_id: Confirmed QuickBooks customer ID
+
+        Returns:
+            True if the entries were stored
+        """
+        pass
+
+    @abstractmethod
+    def delete_entries(self, realm_id: str, fingerprints: List[str]) -> bool:
+        """
+        Forget the entries under several fingerprints.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints
+
+        Returns:
+            True if the entries were removed
+        """
+        pass
+
+    def recall(self, realm_id: str, fingerprints: List[str]) -> Optional[str]:
+        """
+        Get the customer confirmed for a payer, if any.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints, most specific first
+
+        Returns:
+            Customer ID under the most specific known fingerprint, or None
+        """
+        if not fingerprints:
+            return None
+        try:
+            entries = self.get_entries(realm_id, fingerprints)
+        except Exception as e:
+            logger.warning(f"Resolution memory unavailable: {e}")
+            return None
+        return next((entry for entry in entries if entry), None)
+
+    def remember(
+        self, realm_id: str, fingerprints: List[str], customer_id: str
+    ) -> bool:
+        """
+        Record a confirmed match, logging rather than raising on failure.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints
+            customer_id: Confirmed QuickBooks customer ID
+
+        Returns:
+            True if the match was recorded
+        """
+        if not fingerprints or not customer_id:
+            return False
+        try:
+            return self.set_entries(realm_id, fingerprints, str(customer_id))
+        except Exception as e:
+            logger.warning(f"Failed to remember match for realm {realm_id}: {e}")
+            return False
+
+    def forget(self, realm_id: str, fingerprints: List[str]) -> bool:
+        """
+        Drop a payer's remembered match, logging rather than raising on failure.
+
+        Args:
+            realm_id: QuickBooks company ID
+            fingerprints: Payer fingerprints
+
+        Returns:
+            True if the entries were removed
+        """
+        if not fingerprints:
+            return False
+        try:
+            return self.delete_entries(realm_id, fingerprints)
+        except Exception as e:
+            logger.warning(f"Failed to forget match for realm {realm_id}: {e}")
+            return False
+
+
+class LocalResolutionMemory(ResolutionMemory):
+    """JSON file-based resolution memory for development."""
+
+    def __init__(self, base_path: str = "resolution_memory"):
+        """
+        Initialize local memory storage.
+
+        Args:
+            base_path: Directory for memory files
+        """
+        self.base_path = Path(base_path)
+        self._write_lock = threading.Lock()
+
+    def _get_memory_path(self, realm_id: str) -> Path:
+        """Get the memory file for a realm."""
+        return self.base_path / f"{realm_id}.json"
+
+    def _read(self, realm_id: str) -> Dict[str, str]:
+        """Read the realm's memory file."""
+        path = self._get_memory_path(realm_id)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read resolution memory {path}: {e}")
+            return {}
+
+    def _write(self, realm_id: str, entries: Dict[str, str]) -> None:
+        """Atomically write the realm's memory file."""
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        path = self._get_memory_path(realm_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        tmp_path.replace(path)
+
+    def get_entries(
+        self, realm_id: str, fingerprints: List[str]
+    ) -> List[Optional[str]]:
+        """Load entries from the realm's file."""
+        entries = self._read(realm_id)
+        return [entries.get(fingerprint) for fingerprint in fingerprints]
+
+    def set_entries(
+        self, realm_id: str, fingerprints: List[str], customer_id: str
+    ) -> bool:
+        """Merge entries into the realm's file."""
+        with self._write_lock:
+            entries = self._read(realm_id)
+            entries.update(dict.fromkeys(fingerprints, customer_id))
+            self._write(realm_id, entries)
+        return True
+
+    def delete_entries(self, realm_id: str, fingerprints: List[str]) -> bool:
+        """Remove entries from the realm's file."""
+        with self._write_lock:
+            entries = self._read(realm_id)
+            for fingerprint in fingerprints:
+                entries.pop(fingerprint, None)
+            self._write(realm_id, entries)
+        return True
+
+
+class RedisResolutionMemory(ResolutionMemory):
+    """Redis-based resolution memory shared by web and worker processes."""
+
+    def __init__(self, redis_client: redis.Redis):
+        """
+        Initialize Redis memory storage.
+
+        Each realm's entries live in one hash without expiry, since donors
+        may give only once a year.
+
+        Args:
+            redis_client: Redis client instance (reuses existing connection)
+        """
+        self.redis = redis_client
+        self.key_prefix = "resolution_memory:"
+        self.enabled = redis_client is not None
+
+    def _get_key(self, realm_id: str) -> str:
+        """Generate Redis hash key for the realm's remembered matches."""
+        return f"{self.key_prefix}{realm_id}"
+
+    @redis_retry()
+    def get_entries(
+        self, realm_id: str, fingerprints: List[str]
+    ) -> List[Optional[str]]:
+        """Load entries from the realm's hash in one round trip."""
+        if not self.enabled or not fingerprints:
+            return [None] * len(fingerprints)
+
+        values = self.redis.hmget(self._get_key(realm_id), fingerprints)
+        return [
+            value.decode() if isinstance(value, bytes) else value for value in values
+        ]
+
+    @redis_retry()
+    def set_entries(
+        self, realm_id: str, fingerprints: List[str], customer_id: str
+    ) -> bool:
+        """Store entries in the realm's hash."""
+        if not self.enabled:
+            return False
+
+        self.redis.hset(
+            self._get_key(realm_id), mapping=dict.fromkeys(fingerprints, customer_id)
+        )
+        return True
+
+    @redis_retry()
+    def delete_entries(self, realm_id: str, fingerprints: List[str]) -> bool:
+        """Remove entries from the realm's hash."""
+        if not self.enabled:
+            return False
+
+        self.redis.hdel(self._get_key(realm_id), *fingerprints)
+        return True
@@ -0,0 +1,150 @@
+"""
+Cost-based ordering and pruning of customer search variations.
+
+Each search variation costs a QuickBooks round trip plus the transfer and
+scoring of its results, and is worth running in proportion to how often it
+finds the customer that is finally matched. The planner estimates both:
+result counts come from the data source's index statistics when it has
+them and from per-kind priors otherwise, and hit rates are learned from
+the outcome of every match in the process, starting from the same priors.
+Variations run in order of hit rate per expected result, so selective
+terms ("John Smith", "Smith, John") run before broad ones ("Smith").
+
+A variation containing an earlier search term whose results were complete
+can only return customers already scored, so it is skipped.
+"""
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Prior (hit rate, expected results) of each kind of search variation
+VARIATION_PRIORS: Dict[str, Tuple[float, float]] = {
+    "organization": (0.6, 2.0),
+    "full_name": (0.5, 1.0),
+    "reversed": (0.4, 1.0),
+    "initial": (0.2, 3.0),
+    "surname": (0.3, 20.0),
+}
+
+# Weight of the prior hit rate, in observed searches
+PRIOR_WEIGHT = 10
+
+
+def variation_kind(search_term: str, org_name: str = "") -> str:
+    """
+    Classify a search variation.
+
+    Args:
+        search_term: Variation from generate_search_variations
+        org_name: Donor organization name
+
+    Returns:
+        One of the VARIATION_PRIORS kinds
+    """
+    if org_name and search_term == org_name:
+        return "organization"
+    words = search_term.replace(",", " ").split()
+    if len(words) <= 1:
+        return "surname"
+    if any(len(word.rstrip(".")) == 1 for word in words):
+        return "initial"
+    if "," in search_term:
+        return "reversed"
+    return "full_name"
+
+
+def is_redundant(search_term: str, complete_terms: List[str]) -> bool:
+    """
+    Check whether a search can only return customers already found.
+
+    Display names containing the term also contain any term it contains,
+    so they were all returned by that search if its results were complete.
+
+    Args:
+        search_term: Search term about to run
+        complete_terms: Lowercased terms already searched whose results
+            were not cut off at the result limit
+
+    Returns:
+        True if the search cannot find a new customer
+    """
+    term = search_term.lower()
+    return any(searched in term for searched in complete_terms)
+
+
+class SearchPlanner:
+    """Orders search variations by estimated hit rate per result."""
+
+    def __init__(self, prior_weight: int = PRIOR_WEIGHT):
+        """
+        Initialize with no observed searches.
+
+        Args:
+            prior_weight: Weight of the prior hit rate, in observed searches
+        """
+        self.prior_weight = prior_weight
+        self._tries: Dict[str, int] = defaultdict(int)
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def hit_rate(self, kind: str) -> float:
+        """
+        Estimate how often a kind of variation finds the matched customer.
+
+        Args:
+            kind: Variation kind
+
+        Returns:
+            Observed hit rate, smoothed towards the prior
+        """
+        prior = VARIATION_PRIORS[kind][0]
+        with self._lock:
+            tries, hits = self._tries[kind], self._hits[kind]
+        return (hits + prior * self.prior_weight) / (tries + self.prior_weight)
+
+    def record(self, kind: str, hit: bool) -> None:
+        """
+        Record the outcome of a search.
+
+        Args:
+            kind: Variation kind
+            hit: Whether the search returned the finally matched customer
+        """
+        with self._lock:
+            self._tries[kind] += 1
+            self._hits[kind] += int(hit)
+
+    def plan(
+        self,
+        search_variations: List[str],
+        org_name: str = "",
+        estimate: Optional[Callable[[str], Optional[int]]] = None,
+    ) -> List[Tuple[str, str]]:
+        """
+        Order search variations, most valuable per expected result first.
+
+        Args:
+            search_variations: Variations from generate_search_variations
+            org_name: Donor organization name
+            estimate: Function giving an upper bound on a term's result
+                count, or None when the data source keeps no statistics
+
+        Returns:
+            (search term, kind) tuples in the order to run them; terms known
+            to match no customer are left out
+        """
+        ranked = []
+        for position, term in enumerate(search_variations):
+            kind = variation_kind(term, org_name)
+            estimated = estimate(term) if estimate else None
+            if estimated == 0:
+                continue
+            expected = VARIATION_PRIORS[kind][1] if estimated is None else estimated
+            value = self.hit_rate(kind) / (1.0 + expected)
+            # Ties keep the generated order
+            ranked.append((-value, position, term, kind))
+        return [(term, kind) for _, _, term, kind in sorted(ranked)]
+
+
+# Hit rates are learned across every matcher in the process
+search_planner = SearchPlanner()
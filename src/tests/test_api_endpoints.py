@@ -292,6 +292,111 @@ class TestAPIEndpoints:
         assert data["success"] is False
         assert "Missing X-Session-ID header" in data["error"]
 
+    # Tests for /api/match_candidates
+    @patch("src.app.CustomerMatcher")
+    def test_match_candidates_success(self, MockCustomerMatcher, client):
+        """Test ranked suggestions for a displayed donation."""
+        mock_matcher_instance = MockCustomerMatcher.return_value
+        suggestions = [
+            {
+                "customer": {"Id": "1", "DisplayName": "John Smith"},
+                "score": 100.0,
+                "reasons": ["name score 100"],
+            }
+        ]
+        mock_matcher_instance.rank_candidates.return_value = suggestions
+        donation = {
+            "payer_info": {
+                "customer_ref": {"full_name": "John Smith"},
+                "qb_email": "john@example.com",
+            }
+        }
+
+        response = client.post(
+            "/api/match_candidates",
+            json={"donation": donation, "k": 3},
+            headers={"X-Session-ID": "test_session_id"},
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["success"] is True
+        assert data["data"] == suggestions
+        payer, k = mock_matcher_instance.rank_candidates.call_args.args
+        assert payer["PayerInfo"]["Aliases"] == ["John Smith"]
+        assert payer["ContactInfo"]["Email"] == "john@example.com"
+        assert k == 3
+
+    def test_match_candidates_missing_donation(self, client):
+        """Test suggestions without a donation."""
+        response = client.post(
+            "/api/match_candidates",
+            json={"k": 3},
+            headers={"X-Session-ID": "test_session_id"},
+        )
+
+        assert response.status_code == 400
+        assert "Missing 'donation'" in json.loads(response.data)["error"]
+
+    def test_match_candidates_invalid_k(self, client):
+        """Test suggestions with an out of range k."""
+        response = client.post(
+            "/api/match_candidates",
+            json={"donation": {"PayerInfo": {"Aliases": ["John"]}}, "k": 1000},
+            headers={"X-Session-ID": "test_session_id"},
+        )
+
+        assert response.status_code == 400
+        assert "'k' must be between" in json.loads(response.data)["error"]
+
+    # Tests for /api/customers/typeahead
+    def test_typeahead_missing_query(self, client):
+        """Test typeahead without a query."""
+        response = client.get("/api/customers/typeahead")
+
+        assert response.status_code == 400
+        assert "Missing q" in json.loads(response.data)["error"]
+
+    @patch("src.app.customer_mirror")
+    @patch("src.app.qbo_auth")
+    def test_typeahead_from_mirror(self, mock_auth, mock_mirror, client):
+        """Test typeahead is answered from the realm's mirrored customers."""
+        mock_auth.get_auth_status.return_value = {
+            "authenticated": True,
+            "realm_id": "realm-1",
+        }
+        snapshot = mock_mirror.get_snapshot.return_value
+        snapshot.prefix_search.return_value = [
+            {"Id": "1", "DisplayName": "John Smith", "Balance": 0}
+        ]
+        with client.session_transaction() as flask_session:
+            flask_session["app_session_id"] = "test_session_id"
+
+        with patch("src.app.CustomerMatcher") as MockCustomerMatcher:
+            response = client.get("/api/customers/typeahead?q=jo%20sm&limit=5")
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["data"] == [{"Id": "1", "DisplayName": "John Smith"}]
+        mock_mirror.get_snapshot.assert_called_once_with("realm-1")
+        snapshot.prefix_search.assert_called_once_with("jo sm", 5)
+        MockCustomerMatcher.assert_not_called()
+
+    @patch.dict("os.environ", {"LOCAL_DEV_MODE": "true"})
+    @patch("src.customer_data_source.create_customer_data_source")
+    def test_typeahead_local_dev_mode(self, mock_create_data_source, client):
+        """Test typeahead over the CSV customer list, capping the limit."""
+        data_source = mock_create_data_source.return_value
+        data_source.prefix_search.return_value = [
+            {"Id": "CSV-001", "DisplayName": "John Smith"}
+        ]
+
+        response = client.get("/api/customers/typeahead?q=jo&limit=1000")
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["data"][0]["Id"] == "CSV-001"
+        data_source.prefix_search.assert_called_once_with("jo", 50)
+
     # Tests for /api/manual_match
     @patch("src.app.CustomerMatcher")
     def test_manual_match_success(self, MockCustomerMatcher, client):
@@ -0,0 +1,162 @@
+"""Tests for the offline batch processing CLI."""
+import csv
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.batch_cli import collect_scan_files, main, run_batch
+
+
+def _donation(ref, name):
+    """Build a minimal extracted donation."""
+    return {
+        "PaymentInfo": {
+            "Payment_Ref": ref,
+            "Amount": "25.00",
+            "Payment_Method": "handwritten check",
+        },
+        "PayerInfo": {"Aliases": [name]},
+    }
+
+
+EXTRACTIONS = {
+    "0_deposit.jpg": [_donation("1001", "John Smith")],
+    "1_deposit.pdf": [_donation("1002", "Jane Doe"), _donation("1001", "John Smith")],
+    "2_deposit.png": [_donation("1003", "Bob Jones")],
+}
+
+
+def _fake_extract(file_paths):
+    """Return canned extractions keyed by file name."""
+    return [dict(d) for d in EXTRACTIONS[file_paths[0].name]]
+
+
+class TestCollectScanFiles:
+    """Test expansion of directories and globs into scan files."""
+
+    def test_directory_and_glob(self, tmp_path):
+        """Test supported files are collected once each in sorted order."""
+        (tmp_path / "b.jpg").write_bytes(b"")
+        (tmp_path / "a.pdf").write_bytes(b"")
+        (tmp_path / "notes.txt").write_text("skip me")
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "c.png").write_bytes(b"")
+
+        files = collect_scan_files([str(tmp_path), str(tmp_path / "*.jpg")])
+
+        assert [f.name for f in files] == ["a.pdf", "b.jpg", "c.png"]
+
+
+class TestRunBatch:
+    """Test end-to-end batch runs with checkpoint-based resume."""
+
+    @pytest.fixture
+    def scans(self, tmp_path):
+        """Create empty scan files matching the canned extractions."""
+        scan_dir = tmp_path / "scans"
+        scan_dir.mkdir()
+        for name in EXTRACTIONS:
+            (scan_dir / name).write_bytes(b"")
+        return collect_scan_files([str(scan_dir)])
+
+    @patch("src.batch_cli.extract_donations_from_documents")
+    def test_writes_deduplicated_jsonl(self, mock_extract, scans, tmp_path):
+        """Test each file is extracted once and results are merged and deduped."""
+        mock_extract.side_effect = _fake_extract
+        output = tmp_path / "out.jsonl"
+
+        exit_code = run_batch(
+            scans, output, workers=2, checkpoint_dir=str(tmp_path / "ckpt")
+        )
+
+        assert exit_code == 0
+        assert mock_extract.call_count == 3
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        refs = [line["payment_info"]["payment_ref"] for line in lines]
+        assert sorted(refs) == ["1001", "1002", "1003"]
+        assert list((tmp_path / "ckpt").iterdir()) == []
+
+    @patch("src.batch_cli.extract_donations_from_documents")
+    def test_resume_retries_only_failed_files(self, mock_extract, scans, tmp_path):
+        """Test a re-run after a failure extracts only the files that failed."""
+
+        def flaky_extract(file_paths):
+            if file_paths[0].name == "1_deposit.pdf":
+                raise RuntimeError("Gemini unavailable")
+            return _fake_extract(file_paths)
+
+        mock_extract.side_effect = flaky_extract
+        output = tmp_path / "out.jsonl"
+        checkpoint_dir = str(tmp_path / "ckpt")
+
+        assert run_batch(scans, output, checkpoint_dir=checkpoint_dir) == 1
+        assert not output.exists()
+
+        mock_extract.reset_mock()
+        mock_extract.side_effect = _fake_extract
+
+        assert run_batch(scans, output, checkpoint_dir=checkpoint_dir) == 0
+        assert [c.args[0][0].name for c in mock_extract.call_args_list] == [
+            "1_deposit.pdf"
+        ]
+
+    @patch("src.donation_processor.CustomerMatcher")
+    @patch("src.batch_cli.extract_donations_from_documents")
+    def test_csv_dry_run_matching(
+        self, mock_extract, mock_matcher_class, scans, tmp_path
+    ):
+        """Test matching against a CSV customer list with parallel workers."""
+        mock_extract.side_effect = _fake_extract
+        customers_csv = tmp_path / "customers.csv"
+        customers_csv.write_text("Customer\n")
+        matcher = MagicMock()
+        matcher.match_donation_to_customer.return_value = {
+            "match_status": "new_customer",
+            "customer_ref": None,
+            "qb_address": None,
+            "qb_email": [],
+            "qb_phone": [],
+            "updates_needed": {},
+        }
+        mock_matcher_class.return_value = matcher
+        output = tmp_path / "out.csv"
+
+        exit_code = run_batch(
+            scans,
+            output,
+            output_format="csv",
+            workers=3,
+            customers_csv=customers_csv,
+            checkpoint_dir=str(tmp_path / "ckpt"),
+        )
+
+        assert exit_code == 0
+        mock_matcher_class.assert_called_once_with(
+            session_id=None, csv_path=customers_csv
+        )
+        assert matcher.match_donation_to_customer.call_count == 3
+        with open(output, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 3
+        assert {row["status.new_customer"] for row in rows} == {"True"}
+
+
+class TestMain:
+    """Test command-line argument handling."""
+
+    def test_no_files_is_an_error(self, tmp_path):
+        """Test the CLI exits with a usage error when nothing matches."""
+        with pytest.raises(SystemExit) as exc_info:
+            main([str(tmp_path / "*.jpg"), "--output", str(tmp_path / "out.jsonl")])
+
+        assert exc_info.value.code == 2
+
+    @patch("src.batch_cli.run_batch", return_value=0)
+    def test_format_inferred_from_output(self, mock_run_batch, tmp_path):
+        """Test a .csv output path selects CSV output."""
+        (tmp_path / "a.jpg").write_bytes(b"")
+
+        assert main([str(tmp_path), "-o", str(tmp_path / "out.csv")]) == 0
+
+        assert mock_run_batch.call_args.kwargs["output_format"] == "csv"
@@ -0,0 +1,90 @@
+"""Tests for batch candidate selection."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.batch_scoring import BatchScorer, donor_names
+from src.customer_matcher import CustomerMatcher
+
+CUSTOMERS = [
+    {"Id": "1", "DisplayName": "Smith, John", "GivenName": "John"},
+    {"Id": "2", "DisplayName": "Jane Doe"},
+    {"Id": "3", "DisplayName": "Grace Church", "CompanyName": "Grace Church Inc."},
+    {"Id": "4", "DisplayName": "John Smithers"},
+]
+
+
+def test_donor_names_are_normalized_and_unique():
+    """Test aliases and the organization name are normalized once each."""
+    donation = {
+        "PayerInfo": {
+            "Aliases": ["J. Smith", "j smith", "John Smith"],
+            "Organization_Name": "Smith & Co.",
+        }
+    }
+
+    assert donor_names(donation) == ["j smith", "john smith", "smith co"]
+
+
+class TestSharedWordRanking:
+    """Test ranking by shared name words."""
+
+    def test_customers_sharing_more_words_rank_first(self):
+        """Test candidates are ordered by shared name words."""
+        scorer = BatchScorer(CUSTOMERS)
+
+        ranked = scorer.top_candidates(
+            [
+                {"PayerInfo": {"Aliases": ["John Smith"]}},
+                {"PayerInfo": {"Organization_Name": "Grace Church"}},
+            ]
+        )
+
+        assert [c["Id"] for c in ranked[0]] == ["1", "4"]
+        assert [c["Id"] for c in ranked[1]] == ["3"]
+
+    def test_top_k_limits_candidates(self):
+        """Test only k candidates are kept per donation."""
+        scorer = BatchScorer(CUSTOMERS)
+
+        ranked = scorer.top_candidates([{"PayerInfo": {"Aliases": ["John"]}}], k=1)
+
+        assert [c["Id"] for c in ranked[0]] == ["1"]
+
+    def test_donation_without_names_has_no_candidates(self):
+        """Test a donation with no payer names gets an empty list."""
+        assert BatchScorer(CUSTOMERS).top_candidates([{}]) == [[]]
+
+
+class TestPreparedMatching:
+    """Test the matcher scores prepared candidates before searching."""
+
+    @pytest.fixture
+    def matcher(self, tmp_path):
+        """Create a matcher over a small CSV customer list."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name\n"
+            "John Johnson,John,Johnson\n"
+            "Jane Smith,Jane,Smith\n"
+        )
+        return CustomerMatcher(csv_path=path)
+
+    def test_prepared_candidate_skips_lookups(self, matcher):
+        """Test a good prepared candidate avoids phonetic and search lookups."""
+        donation = {"PayerInfo": {"Aliases": ["Jane Smith"]}}
+        assert matcher.prepare_batch([donation]) == 1
+        matcher.data_source.phonetic_search = MagicMock(return_value=[])
+        matcher.data_source.search_customer = MagicMock(return_value=[])
+
+        result = matcher.match_donation_to_customer(donation)
+
+        assert result["customer_ref"]["id"] == "CSV-002"
+        matcher.data_source.phonetic_search.assert_not_called()
+        matcher.data_source.search_customer.assert_not_called()
+
+    def test_source_without_table_is_not_prepared(self, matcher):
+        """Test sources that do not hold their customers skip preparation."""
+        matcher.data_source.customer_table = MagicMock(return_value=None)
+
+        assert matcher.prepare_batch([{"PayerInfo": {"Aliases": ["Jane"]}}]) == 0
@@ -0,0 +1,248 @@
+"""Tests for the pipeline benchmark stand-ins."""
+import argparse
+import json
+import random
+
+import pytest
+
+from benchmarks import match_accuracy, match_scoring, search_planning, typeahead
+from benchmarks.fakes import (
+    FakeQuickBooksAPI,
+    FakeRedis,
+    LatencyModel,
+    generate_customers,
+    percentile,
+)
+from benchmarks.run_pipeline import build_parser, run_scenario
+
+
+class TestLatencyModel:
+    """Test latency spec parsing."""
+
+    def test_fixed(self):
+        """Test fixed latencies are returned in seconds."""
+        assert LatencyModel("fixed:25").sample() == pytest.approx(0.025)
+
+    def test_uniform_within_bounds(self):
+        """Test uniform samples stay within the range."""
+        model = LatencyModel("uniform:10,20", seed=1)
+        assert all(0.010 <= model.sample() <= 0.020 for _ in range(100))
+
+    @pytest.mark.parametrize("spec", ["gamma:1", "fixed:1,2", "lognormal:5"])
+    def test_invalid_specs(self, spec):
+        """Test unknown distributions and wrong parameter counts are rejected."""
+        with pytest.raises(ValueError):
+            LatencyModel(spec)
+
+
+class TestFakeRedis:
+    """Test the fake Redis command semantics and round-trip counting."""
+
+    def test_commands_count_round_trips(self):
+        """Test each command is one round-trip."""
+        redis = FakeRedis()
+        redis.setex("a", 60, json.dumps({"x": 1}))
+        redis.lpush("q", "1", "2")
+
+        assert json.loads(redis.get("a")) == {"x": 1}
+        assert redis.brpoplpush("q", "p") == "1"
+        assert redis.lrange("p", 0, -1) == ["1"]
+        assert redis.round_trips == 5
+
+    def test_pipeline_is_one_round_trip(self):
+        """Test a pipeline executes all commands in one round-trip."""
+        redis = FakeRedis()
+        pipe = redis.pipeline()
+        pipe.hset("h", "0", "a")
+        pipe.hincrby("h", "n", 2)
+        pipe.hget("h", "n")
+
+        assert pipe.execute() == [1, 2, "2"]
+        assert redis.round_trips == 1
+        assert redis.command_counts == {"pipeline": 1}
+
+    def test_expired_keys_disappear(self):
+        """Test keys past their TTL are not returned."""
+        redis = FakeRedis()
+        redis.setex("a", -1, "gone")
+
+        assert redis.get("a") is None
+
+
+class TestFakeQuickBooksAPI:
+    """Test the fake QuickBooks query endpoint."""
+
+    @pytest.fixture
+    def api(self):
+        """Create an API over a small synthetic book."""
+        return FakeQuickBooksAPI(generate_customers(250))
+
+    def test_like_search_is_case_insensitive_and_capped(self, api):
+        """Test DisplayName LIKE searches match substrings up to MAXRESULTS."""
+        response = api.request(
+            "GET",
+            "https://qb/v3/company/r/query",
+            params={"query": "select * from Customer where DisplayName like '%SMITH%'"},
+        )
+
+        customers = response.json()["QueryResponse"]["Customer"]
+        assert customers
+        assert all("smith" in c["DisplayName"].lower() for c in customers)
+        assert api.calls["search_customer"] == 1
+
+    def test_paging(self, api):
+        """Test STARTPOSITION/MAXRESULTS page through the book."""
+        response = api.request(
+            "GET",
+            "https://qb/v3/company/r/query",
+            params={"query": "select * from Customer startposition 201 maxresults 100"},
+        )
+
+        customers = response.json()["QueryResponse"]["Customer"]
+        assert [c["Id"] for c in customers] == [str(i) for i in range(201, 251)]
+
+    def test_inactive_customers_need_explicit_filter(self, api):
+        """Test queries skip inactive customers unless asked for both."""
+        api.customers["1"]["Active"] = False
+
+        def query(where):
+            response = api.request(
+                "GET",
+                "https://qb/v3/company/r/query",
+                params={"query": f"select * from Customer where {where}"},
+            )
+            return [c["Id"] for c in response.json()["QueryResponse"]["Customer"]]
+
+        since = "MetaData.LastUpdatedTime > '2000-01-01'"
+        assert "1" not in query(since)
+        assert query(f"{since} AND Active IN (true, false)")[0] == "1"
+
+    def test_generated_names_are_unique(self):
+        """Test synthetic books have unique display names."""
+        names = [c["DisplayName"] for c in generate_customers(6000)]
+        assert len(set(names)) == len(names)
+
+
+def test_percentile_interpolates():
+    """Test percentiles interpolate between samples."""
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == pytest.approx(2.5)
+    assert percentile([], 95) == 0.0
+
+
+def test_run_scenario_smoke():
+    """Test a scenario drives upload, processing and results end to end."""
+    args: argparse.Namespace = build_parser().parse_args(
+        [
+            "--repeat",
+            "1",
+            "--gemini-latency",
+            "fixed:0",
+            "--qbo-latency",
+            "fixed:0",
+            "--s3-latency",
+            "fixed:0",
+            "--redis-latency",
+            "fixed:0",
+            "--skip-memory",
+        ]
+    )
+
+    result = run_scenario(generate_customers(100), 6, args)
+
+    assert result["batch_size"] == 6
+    assert result["throughput"]["donations_per_sec"] > 0
+    for stage in ("upload_request", "extraction", "matching", "end_to_end"):
+        assert result["stages"][stage]["count"] > 0
+    assert result["redis_round_trips_per_run"] > 0
+    # Searches are answered from the customer mirror synced during warm-up
+    assert result["quickbooks_calls_per_run"].get("search_customer", 0) == 0
+
+
+def test_match_scoring_smoke():
+    """Test the scoring benchmark checks its scores and reports timings."""
+    result = match_scoring.run(candidates=200, donations=3, seed=0)
+
+    assert result["pairwise_ms"] > 0
+    assert result["scoring_ms"] > 0
+    assert 0 <= result["batch_recall"] <= 1
+
+
+def test_search_planning_smoke():
+    """Test the planning benchmark matches the same customers with fewer searches."""
+    result = search_planning.run(customers=300, donations=20, seed=0)
+
+    assert result["searches_before"] > 0
+    assert result["searches_after"] <= result["searches_before"]
+    assert result["searches_indexed"] <= result["searches_after"]
+
+
+def test_search_planning_source_creates_customers():
+    """Test the planning benchmark's source finds customers it created."""
+    source = search_planning.CountingSearchSource(generate_customers(3), True)
+
+    created = source.create_customer({"DisplayName": "Brand New Donor"})
+
+    assert created["Id"] == "4"
+    assert source.search_customer("brand new") == [created]
+    assert source.estimate_results("brand new") == 1
+
+
+def test_typeahead_smoke():
+    """Test the typeahead benchmark checks its results and reports latencies."""
+    result = typeahead.run(customers=300, names=5, seed=0)
+
+    assert result["queries"] > 0
+    assert result["prefix_p50_ms"] > 0
+    assert result["scan_p50_ms"] > 0
+
+
+class TestMatchAccuracy:
+    """Test the matching accuracy harness."""
+
+    def test_ocr_corrupt_changes_one_reading(self):
+        """Test misread names differ from the original by a small edit."""
+        rng = random.Random(0)
+        for _ in range(50):
+            misread = match_accuracy.ocr_corrupt("Laura Martinez", rng)
+            assert misread != "Laura Martinez"
+            assert abs(len(misread) - len("Laura Martinez")) <= 1
+
+    def test_cases_have_known_payers(self):
+        """Test customers' donations name their customer and new donors none."""
+        book = match_accuracy.generate_book(300, seed=0)
+        cases = match_accuracy.generate_cases(book, 100, seed=0)
+        ids = {c["Id"] for c in book}
+
+        assert any(" & " in c["DisplayName"] for c in book)
+        assert all(
+            (case["customer_id"] is None) == (case["spelling"] == "new")
+            for case in cases
+        )
+        assert all(case["customer_id"] in ids for case in cases if case["customer_id"])
+
+    def test_score_matches(self):
+        """Test precision counts wrong matches and recall missed customers."""
+        cases = [
+            {"customer_id": "1", "spelling": "exact"},
+            {"customer_id": "2", "spelling": "ocr"},
+            {"customer_id": "3", "spelling": "ocr"},
+            {"customer_id": None, "spelling": "new"},
+        ]
+
+        scores = match_accuracy.score_matches(cases, ["1", "9", None, None])
+
+        assert scores["precision"] == 0.5
+        assert scores["recall"] == pytest.approx(1 / 3)
+        assert scores["accuracy"] == {"exact": 1.0, "new": 1.0, "ocr": 0.0}
+
+    def test_run_smoke(self):
+        """Test every data source is scored over the same donations."""
+        results = match_accuracy.run(customers=300, donations=20, seed=0)
+
+        assert set(results) == set(match_accuracy.SOURCES)
+        for result in results.values():
+            assert 0 <= result["precision"] <= 1
+            assert 0 < result["recall"] <= 1
+            assert result["p50_ms"] > 0
+        # The SQLite source answers the same searches as the CSV it imports
+        assert results["sqlite"]["recall"] == results["csv"]["recall"]
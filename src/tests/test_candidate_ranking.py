@@ -0,0 +1,142 @@
+"""Tests for ranked customer suggestions."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.candidate_ranking import CandidateRanker, payer_from_display
+from src.customer_data_source import CSVDataSource
+from src.customer_matcher import CustomerMatcher
+from src.customer_mirror import CustomerSnapshot
+from src.final_display_merger import merge_donation_for_display
+
+CUSTOMERS = [
+    {
+        "Id": "1",
+        "DisplayName": "John Smith",
+        "GivenName": "John",
+        "FamilyName": "Smith",
+        "PrimaryEmailAddr": {"Address": "john@example.com"},
+    },
+    {
+        "Id": "2",
+        "DisplayName": "Jon Smith",
+        "GivenName": "Jon",
+        "FamilyName": "Smith",
+    },
+    {"Id": "3", "DisplayName": "Mary Jones", "GivenName": "Mary"},
+    {
+        "Id": "4",
+        "DisplayName": "Alice Smith",
+        "GivenName": "Alice",
+        "FamilyName": "Smith",
+        "BillAddr": {"Line1": "123 Main Street", "PostalCode": "94025"},
+    },
+]
+
+DONATION = {
+    "PayerInfo": {"Aliases": ["John Smith"]},
+    "ContactInfo": {
+        "Email": "JOHN@example.com",
+        "Address_Line_1": "123 Main St",
+        "ZIP": "94025",
+    },
+}
+
+
+def test_payer_from_display():
+    """Test a displayed donation gives back the fields matching uses."""
+    payer = payer_from_display(merge_donation_for_display(DONATION))
+
+    assert payer["PayerInfo"]["Aliases"] == ["John Smith"]
+    assert payer["ContactInfo"]["Email"] == "JOHN@example.com"
+    assert payer["ContactInfo"]["ZIP"] == "94025"
+
+
+class TestCandidateRanker:
+    """Test ranking a donation's candidates."""
+
+    def test_best_names_rank_first_with_reasons(self):
+        """Test candidates are scored like automatic matching and explained."""
+        ranked = CandidateRanker(CUSTOMERS).rank(DONATION, k=3)
+
+        assert [c["customer"]["Id"] for c in ranked] == ["1", "4", "2"]
+        assert ranked[0]["score"] == 100
+        assert ranked[0]["reasons"] == ["name score 100", "same email"]
+        assert all("Mary" not in c["customer"]["DisplayName"] for c in ranked)
+
+    def test_shared_contact_details_break_ties(self):
+        """Test a customer at the donor's address outranks an equal name."""
+        ranked = CandidateRanker(CUSTOMERS).rank(DONATION, k=5)
+
+        assert ranked[1]["score"] == ranked[2]["score"]
+        assert ranked[1]["reasons"] == ["name score 75", "same address"]
+
+    def test_k_limits_suggestions(self):
+        """Test at most k suggestions are returned."""
+        assert len(CandidateRanker(CUSTOMERS).rank(DONATION, k=1)) == 1
+
+    def test_unrelated_donor_gets_no_suggestions(self):
+        """Test customers with no similarity are not suggested."""
+        donation = {"PayerInfo": {"Aliases": ["Zed Quux"]}}
+
+        assert CandidateRanker(CUSTOMERS).rank(donation) == []
+
+
+class TestLocalRanking:
+    """Test sources holding their customers rank them in memory."""
+
+    @pytest.fixture
+    def csv_source(self, tmp_path):
+        """Create a small CSV customer list."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name,Email\n"
+            "John Smith,John,Smith,john@example.com\n"
+            "Mary Jones,Mary,Jones,\n"
+        )
+        return CSVDataSource(path)
+
+    def test_csv_ranker_is_built_once(self, csv_source):
+        """Test later requests reuse the ranker until a customer is added."""
+        ranked = csv_source.rank_candidates(DONATION, 5)
+        ranker = csv_source._ranker
+
+        assert ranked[0]["customer"]["DisplayName"] == "John Smith"
+        csv_source.rank_candidates(DONATION, 5)
+        assert csv_source._ranker is ranker
+
+        csv_source._append_to_csv = MagicMock()
+        csv_source.create_customer({"DisplayName": "John Smithson"})
+        assert csv_source._ranker is None
+
+    def test_snapshot_ranking(self):
+        """Test mirror snapshots rank their customers."""
+        snapshot = CustomerSnapshot({c["Id"]: c for c in CUSTOMERS}, {})
+
+        ranked = snapshot.rank_candidates(DONATION, 2)
+
+        assert [c["customer"]["Id"] for c in ranked] == ["1", "4"]
+
+
+def test_matcher_searches_sources_without_local_list():
+    """Test suggestions for QuickBooks sources come from name searches."""
+    data_source = MagicMock()
+    data_source.rank_candidates.return_value = None
+    data_source.contact_search.return_value = []
+    data_source.search_customer.side_effect = lambda term: [
+        c for c in CUSTOMERS if term.lower() in c["DisplayName"].lower()
+    ]
+    with patch(
+        "src.customer_matcher.create_customer_data_source", return_value=data_source
+    ):
+        matcher = CustomerMatcher(session_id="session")
+
+    ranked = matcher.rank_candidates(DONATION, k=2)
+
+    assert [c["customer"]["Id"] for c in ranked] == ["1", "2"]
+    # "Smith" found two customers, so no narrower variation was searched
+    assert [c.args[0] for c in data_source.search_customer.call_args_list] == [
+        "John Smith",
+        "Smith, John",
+        "Smith",
+    ]
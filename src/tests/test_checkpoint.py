@@ -0,0 +1,173 @@
+"""Tests for resumable job checkpoints."""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.checkpoint import LocalCheckpointStore, RedisCheckpointStore
+from src.donation_processor import process_donation_documents
+from src.job_tracker import JobStage
+
+RAW_DONATIONS = [
+    {
+        "PaymentInfo": {"Payment_Ref": "1001", "Amount": "25.00"},
+        "PayerInfo": {"Aliases": ["John Smith"]},
+    },
+    {
+        "PaymentInfo": {"Payment_Ref": "1002", "Amount": "50.00"},
+        "PayerInfo": {"Aliases": ["Jane Doe"]},
+    },
+]
+
+
+def _match_result(customer_id):
+    """Build a minimal matched result."""
+    return {
+        "match_status": "matched",
+        "customer_ref": {"id": customer_id},
+        "qb_address": {},
+        "qb_email": [],
+        "qb_phone": [],
+        "updates_needed": {},
+    }
+
+
+class TestLocalCheckpointStore:
+    """Test JSON file checkpoint storage."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create a checkpoint store in a temp directory."""
+        return LocalCheckpointStore(base_path=str(tmp_path / "checkpoints"))
+
+    def test_stage_round_trip(self, store):
+        """Test saving and loading a stage checkpoint."""
+        assert store.load_stage("batch_1", JobStage.EXTRACTING) is None
+
+        store.save_stage("batch_1", JobStage.EXTRACTING, RAW_DONATIONS)
+
+        assert store.load_stage("batch_1", JobStage.EXTRACTING) == RAW_DONATIONS
+        assert store.load_stage("batch_2", JobStage.EXTRACTING) is None
+
+    def test_match_round_trip(self, store):
+        """Test per-donation match checkpoints are keyed by index."""
+        store.save_match("batch_1", 0, _match_result("1"))
+        store.save_match("batch_1", 3, _match_result("4"))
+
+        matches = store.load_matches("batch_1")
+
+        assert set(matches) == {0, 3}
+        assert matches[3]["customer_ref"]["id"] == "4"
+
+    def test_expired_checkpoints_ignored(self, tmp_path):
+        """Test that checkpoints older than the TTL are not returned."""
+        store = LocalCheckpointStore(base_path=str(tmp_path), ttl_seconds=-1)
+        store.save_stage("batch_1", JobStage.VALIDATING, {"donations": []})
+
+        assert store.load_stage("batch_1", JobStage.VALIDATING) is None
+
+    def test_clear(self, store):
+        """Test clearing removes all checkpoints for an upload."""
+        store.save_stage("batch_1", JobStage.EXTRACTING, RAW_DONATIONS)
+        store.save_match("batch_1", 0, _match_result("1"))
+
+        store.clear("batch_1")
+
+        assert store.load_stage("batch_1", JobStage.EXTRACTING) is None
+        assert store.load_matches("batch_1") == {}
+
+
+class TestRedisCheckpointStore:
+    """Test Redis checkpoint storage key layout."""
+
+    def test_save_and_load_stage(self):
+        """Test stage checkpoints are stored as JSON with a TTL."""
+        redis_client = MagicMock()
+        store = RedisCheckpointStore(redis_client, ttl_seconds=60)
+
+        store.save_stage("batch_1", JobStage.EXTRACTING, RAW_DONATIONS)
+
+        redis_client.setex.assert_called_once_with(
+            "checkpoint:batch_1:extracting", 60, json.dumps(RAW_DONATIONS)
+        )
+
+        redis_client.get.return_value = json.dumps(RAW_DONATIONS)
+        assert store.load_stage("batch_1", JobStage.EXTRACTING) == RAW_DONATIONS
+
+    def test_load_matches_converts_indexes(self):
+        """Test hash fields are converted back to integer indexes."""
+        redis_client = MagicMock()
+        redis_client.hgetall.return_value = {
+            b"2": json.dumps(_match_result("7")).encode()
+        }
+        store = RedisCheckpointStore(redis_client)
+
+        matches = store.load_matches("batch_1")
+
+        redis_client.hgetall.assert_called_once_with("checkpoint:batch_1:matches")
+        assert matches == {2: _match_result("7")}
+
+
+class TestProcessorResume:
+    """Test process_donation_documents resumes from checkpoints."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create a checkpoint store in a temp directory."""
+        return LocalCheckpointStore(base_path=str(tmp_path))
+
+    @patch("src.donation_processor.extract_donations_from_documents")
+    def test_extraction_not_repeated(self, mock_extract, store):
+        """Test a re-run skips Gemini extraction when a checkpoint exists."""
+        mock_extract.return_value = [dict(d) for d in RAW_DONATIONS]
+
+        first, first_meta, _ = process_donation_documents(
+            ["a.jpg"], upload_id="batch_1", checkpoint_store=store
+        )
+        second, second_meta, _ = process_donation_documents(
+            ["a.jpg"], upload_id="batch_1", checkpoint_store=store
+        )
+
+        assert mock_extract.call_count == 1
+        assert second == first
+        assert second_meta == first_meta
+
+    @patch("src.donation_processor.CustomerMatcher")
+    @patch("src.donation_processor.extract_donations_from_documents")
+    def test_matching_resumes_after_last_donation(
+        self, mock_extract, mock_matcher_class, store
+    ):
+        """Test only donations without a saved match result are re-matched."""
+        store.save_stage(
+            "batch_1",
+            JobStage.VALIDATING,
+            {"donations": [dict(d) for d in RAW_DONATIONS], "raw_count": 2},
+        )
+        store.save_match("batch_1", 0, _match_result("1"))
+
+        matcher = MagicMock()
+        matcher.match_donation_to_customer.return_value = _match_result("2")
+        mock_matcher_class.return_value = matcher
+
+        donations, metadata, _ = process_donation_documents(
+            ["a.jpg"],
+            session_id="session",
+            upload_id="batch_1",
+            checkpoint_store=store,
+        )
+
+        mock_extract.assert_not_called()
+        assert matcher.match_donation_to_customer.call_count == 1
+        assert donations[0]["match_data"]["customer_ref"]["id"] == "1"
+        assert donations[1]["match_data"]["customer_ref"]["id"] == "2"
+        assert metadata["matched_count"] == 2
+        assert set(store.load_matches("batch_1")) == {0, 1}
+
+    @patch("src.donation_processor.extract_donations_from_documents")
+    def test_no_checkpoints_without_upload_id(self, mock_extract, store, tmp_path):
+        """Test checkpointing is skipped when no upload_id is given."""
+        mock_extract.return_value = [dict(d) for d in RAW_DONATIONS]
+
+        process_donation_documents(["a.jpg"], checkpoint_store=store)
+
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,560 @@
+"""Tests for the customer search indexes and indexed customer searches."""
+import csv
+import random
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.fakes import generate_customers
+from src.customer_data_source import (
+    CSVDataSource,
+    CSVSourceRegistry,
+    SQLiteDataSource,
+    create_customer_data_source,
+)
+from src.customer_index import (
+    ContactIndex,
+    PhoneticIndex,
+    PrefixIndex,
+    TrigramIndex,
+    address_key,
+    customer_contact_keys,
+    donation_contact_keys,
+    email_key,
+    metaphone,
+    phone_key,
+    phonetic_keys,
+    prefix_tokens,
+    trigrams,
+)
+from src.customer_mirror import CustomerSnapshot
+from src.quickbooks_service import QuickBooksError
+
+
+def linear_search(customers, search_term):
+    """Search the way CSVDataSource did before it was indexed."""
+    results = []
+    search_lower = search_term.lower()
+    for customer in customers.values():
+        if search_lower in customer.get("DisplayName", "").lower():
+            results.append(customer)
+            continue
+        if (
+            customer.get("CompanyName")
+            and search_lower in customer["CompanyName"].lower()
+        ):
+            results.append(customer)
+            continue
+        given_name = (customer.get("GivenName") or "").lower()
+        family_name = (customer.get("FamilyName") or "").lower()
+        if search_lower in given_name or search_lower in family_name:
+            results.append(customer)
+            continue
+        search_words = search_lower.split()
+        display_words = customer.get("DisplayName", "").lower().split()
+        if all(
+            any(word in display_word for display_word in display_words)
+            for word in search_words
+        ):
+            results.append(customer)
+    return results
+
+
+@pytest.fixture(scope="module")
+def data_source(tmp_path_factory):
+    """Create a CSV data source over a synthetic customer export."""
+    path = tmp_path_factory.mktemp("csv") / "customers.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["Customer", "First Name", "Last Name", "Company Name"]
+        )
+        writer.writeheader()
+        for customer in generate_customers(2000):
+            writer.writerow(
+                {
+                    "Customer": customer["DisplayName"],
+                    "First Name": customer.get("GivenName", ""),
+                    "Last Name": customer.get("FamilyName", ""),
+                    "Company Name": customer.get("CompanyName", ""),
+                }
+            )
+    return CSVDataSource(path)
+
+
+def search_terms(customers, count=80, seed=0):
+    """Build a mix of search terms like the matcher's search variations."""
+    rng = random.Random(seed)
+    names = [c["DisplayName"] for c in customers.values()]
+    terms = ["", " ", "a", "jo", "Zzz", "smith jo", "LLC", "o'brien", "  smith  "]
+    for _ in range(count):
+        name = rng.choice(names)
+        words = name.split()
+        start = rng.randrange(len(name))
+        terms.extend(
+            [
+                name,
+                name.upper(),
+                rng.choice(words),
+                name[start : start + rng.randint(1, 6)],
+                " ".join(w[: rng.randint(1, len(w))] for w in words),
+                f"{words[-1]} {words[0]}",
+            ]
+        )
+    return terms
+
+
+class TestTrigramIndex:
+    """Test candidate lookup."""
+
+    def test_trigrams(self):
+        """Test trigrams are every three-character substring."""
+        assert trigrams("smith") == {"smi", "mit", "ith"}
+        assert trigrams("ab") == set()
+
+    def test_candidates_contain_substring_matches(self):
+        """Test customers containing the query are candidates, in index order."""
+        index = TrigramIndex()
+        index.add("2", ["Jane Smithson", None])
+        index.add("1", ["Bob Smith", ""])
+        index.add("3", ["Alice Jones"])
+
+        assert index.candidates("SMITH") == ["2", "1"]
+        assert index.candidates("nomatch") == []
+        assert len(index) == 3
+
+    def test_short_queries_have_no_candidate_filter(self):
+        """Test queries without a three-letter word match every customer."""
+        index = TrigramIndex()
+        index.add("1", ["Bob Smith"])
+
+        assert index.candidates("bo s") is None
+        assert index.candidates("") is None
+
+    def test_trigrams_do_not_span_fields(self):
+        """Test a query is not matched across two separate fields."""
+        index = TrigramIndex()
+        index.add("1", ["ab", "cd"])
+
+        assert index.candidates("bcd") == []
+
+
+class TestIndexedCSVSearch:
+    """Test indexed CSV search returns exactly the linear scan results."""
+
+    def test_same_results_as_linear_scan(self, data_source):
+        """Test results and their order match the unindexed search."""
+        for term in search_terms(data_source.customers):
+            assert data_source.search_customer(term) == linear_search(
+                data_source.customers, term
+            ), term
+
+    def test_created_customers_are_searchable(self, tmp_path):
+        """Test customers created after load are indexed."""
+        path = tmp_path / "customers.csv"
+        path.write_text("Customer,First Name,Last Name\nBob Smith,Bob,Smith\n")
+        data_source = CSVDataSource(path)
+
+        created = data_source.create_customer(
+            {"DisplayName": "Quentin Zebulon", "GivenName": "Quentin"}
+        )
+
+        assert data_source.search_customer("zebul") == [created]
+        assert data_source.search_customer("quentin zeb") == [created]
+
+
+class TestCSVSourceRegistry:
+    """Test CSV customer lists are parsed once per version of the file."""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        """Write a small customer export."""
+        path = tmp_path / "customers.csv"
+        path.write_text("Customer,First Name,Last Name\nBob Smith,Bob,Smith\n")
+        return path
+
+    def test_unchanged_file_is_parsed_once(self, csv_path):
+        """Test every request for an unchanged file shares one source."""
+        with patch.object(
+            CSVDataSource, "_load_customers", autospec=True, return_value={}
+        ) as load:
+            first = create_customer_data_source(csv_path=csv_path)
+            second = create_customer_data_source(csv_path=csv_path)
+
+        assert first is second
+        assert load.call_count == 1
+
+    def test_changed_file_is_reloaded(self, csv_path):
+        """Test a file edited outside the app is parsed again."""
+        registry = CSVSourceRegistry()
+        source = registry.get(csv_path)
+
+        with open(csv_path, "a") as f:
+            f.write("Jane Doe,Jane,Doe\n")
+        reloaded = registry.get(csv_path)
+
+        assert reloaded is not source
+        assert [c["DisplayName"] for c in reloaded.customers.values()] == [
+            "Bob Smith",
+            "Jane Doe",
+        ]
+
+    def test_created_customers_do_not_reload(self, csv_path):
+        """Test appending a created customer keeps the source current."""
+        registry = CSVSourceRegistry()
+        source = registry.get(csv_path)
+
+        created = source.create_customer({"DisplayName": "Quentin Zebulon"})
+
+        assert registry.get(csv_path) is source
+        assert "Quentin Zebulon" in csv_path.read_text()
+        assert CSVDataSource(csv_path).customers == {
+            "CSV-001": source.customers["CSV-001"],
+            created["Id"]: {**created, "Title": "", "Suffix": ""},
+        }
+
+    def test_searches_run_while_customers_are_created(self, csv_path):
+        """Test a shared source can be searched while another thread creates."""
+        source = CSVSourceRegistry().get(csv_path)
+        errors = []
+
+        def create():
+            for i in range(300):
+                source.create_customer({"DisplayName": f"Donor {i} Smith"})
+
+        def search():
+            try:
+                while creator.is_alive():
+                    source.search_customer("sm")
+                    source.prefix_search("do", 10)
+                    source.rank_candidates({"PayerInfo": {"Aliases": ["Smith"]}}, 5)
+                    source.customer_table()
+            except Exception as e:
+                errors.append(e)
+
+        creator = threading.Thread(target=create)
+        searchers = [threading.Thread(target=search) for _ in range(4)]
+        creator.start()
+        for searcher in searchers:
+            searcher.start()
+        for thread in [creator, *searchers]:
+            thread.join()
+
+        assert errors == []
+        assert len(source.search_customer("smith")) == 301
+
+    def test_edits_before_an_append_still_reload(self, csv_path):
+        """Test another writer's rows are not hidden by a later append."""
+        registry = CSVSourceRegistry()
+        source = registry.get(csv_path)
+        with open(csv_path, "a") as f:
+            f.write("Jane Doe,Jane,Doe\n")
+
+        source.create_customer({"DisplayName": "Quentin Zebulon"})
+        reloaded = registry.get(csv_path)
+
+        assert reloaded is not source
+        assert len(reloaded.customers) == 3
+
+
+class TestSQLiteDataSource:
+    """Test the SQLite FTS5 data source."""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        """Write a small customer export."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name,Company Name,Email\n"
+            "Bob Smith,Bob,Smith,,bob@example.com\n"
+            "Jane Smithson,Jane,Smithson,,\n"
+            "Acme Corp,,,Acme Corporation,\n"
+        )
+        return path
+
+    def test_same_results_as_csv_source(self, data_source, tmp_path):
+        """Test searches return what the CSV data source returns."""
+        source = SQLiteDataSource(tmp_path / "customers.db", data_source.csv_path)
+
+        for term in search_terms(data_source.customers, count=30):
+            assert source.search_customer(term) == data_source.search_customer(
+                term
+            ), term
+
+    def test_imports_once(self, csv_path, tmp_path):
+        """Test the CSV is only imported again after it changes."""
+        db_path = tmp_path / "customers.db"
+        with patch.object(
+            SQLiteDataSource, "import_csv", wraps=SQLiteDataSource.import_csv
+        ) as import_csv:
+            SQLiteDataSource(db_path, csv_path)
+            SQLiteDataSource(db_path, csv_path)
+            assert import_csv.call_count == 1
+
+            with open(csv_path, "a") as f:
+                f.write("New Person,New,Person,,\n")
+            source = SQLiteDataSource(db_path, csv_path)
+            assert import_csv.call_count == 2
+
+        assert source.search_customer("new person")[0]["Id"] == "CSV-004"
+
+    def test_get_customer(self, csv_path, tmp_path):
+        """Test customers are fetched by ID."""
+        source = SQLiteDataSource(tmp_path / "customers.db", csv_path)
+
+        customer = source.get_customer("CSV-001")
+
+        assert customer["DisplayName"] == "Bob Smith"
+        assert customer["PrimaryEmailAddr"] == {"Address": "bob@example.com"}
+        with pytest.raises(QuickBooksError):
+            source.get_customer("CSV-999")
+
+    def test_create_customer(self, csv_path, tmp_path):
+        """Test created customers are searchable and written to the CSV."""
+        db_path = tmp_path / "customers.db"
+        source = SQLiteDataSource(db_path, csv_path)
+
+        created = source.create_customer({"DisplayName": "Quentin Zebulon"})
+
+        assert created["Id"] == "CSV-004"
+        assert source.search_customer("zebulon") == [created]
+        assert "Quentin Zebulon" in csv_path.read_text()
+        with patch.object(SQLiteDataSource, "import_csv") as import_csv:
+            SQLiteDataSource(db_path, csv_path)
+        import_csv.assert_not_called()
+
+    def test_missing_database(self, tmp_path):
+        """Test opening a database that does not exist without a CSV fails."""
+        with pytest.raises(FileNotFoundError):
+            SQLiteDataSource(tmp_path / "missing.db")
+
+    def test_factory_uses_database_when_configured(self, csv_path, tmp_path):
+        """Test CUSTOMER_DB_PATH switches CSV customer lists to SQLite."""
+        db_path = tmp_path / "customers.db"
+        with patch("src.customer_data_source.Config.CUSTOMER_DB_PATH", str(db_path)):
+            source = create_customer_data_source(csv_path=csv_path)
+
+        assert isinstance(source, SQLiteDataSource)
+        assert db_path.exists()
+
+
+class TestPhonetic:
+    """Test phonetic keys and lookups."""
+
+    @pytest.mark.parametrize(
+        "first, second",
+        [
+            ("Johnson", "Jonhson"),
+            ("Smith", "Smyth"),
+            ("Catherine", "Kathryn"),
+            ("Knight", "Night"),
+            ("Stephen", "Steven"),
+            ("Phillips", "Filips"),
+        ],
+    )
+    def test_sound_alikes_share_keys(self, first, second):
+        """Test common misspellings get the same key."""
+        assert metaphone(first) == metaphone(second)
+
+    def test_different_names_differ(self):
+        """Test unrelated names get different keys."""
+        assert metaphone("Johnson") != metaphone("Jackson")
+        assert metaphone("") == ""
+
+    def test_keys_skip_initials_and_punctuation(self):
+        """Test initials contribute no key."""
+        assert phonetic_keys("Smith, J.") == [metaphone("Smith")]
+
+    def test_lookup_requires_every_word(self):
+        """Test every word of the name must sound like a customer name."""
+        index = PhoneticIndex()
+        index.add("1", ["John Johnson", "John", "Johnson"])
+        index.add("2", ["Mary Johnson"])
+
+        assert index.lookup("Jon Jonhson") == ["1"]
+        assert index.lookup("Jonhson") == ["1", "2"]
+        assert index.lookup("J.") == []
+
+    def test_sources_agree(self, data_source, tmp_path):
+        """Test CSV, SQLite and mirror sources find the same customers."""
+        sqlite_source = SQLiteDataSource(
+            tmp_path / "customers.db", data_source.csv_path
+        )
+        snapshot = CustomerSnapshot(
+            {c["Id"]: c for c in data_source.customers.values()}, {"version": "v"}
+        )
+
+        for name in ["Jonhson", "Smyth", "Mary Willyams", "Acme", "Zzzz"]:
+            expected = data_source.phonetic_search(name)
+            assert sqlite_source.phonetic_search(name) == expected
+            # The mirror sorts numeric QuickBooks IDs, CSV IDs keep file order
+            assert sorted(c["Id"] for c in snapshot.phonetic_search(name)) == sorted(
+                c["Id"] for c in expected
+            )
+
+
+class TestContactIndex:
+    """Test exact email, phone and address keys and lookups."""
+
+    CUSTOMER = {
+        "Id": "7",
+        "DisplayName": "Smith, John",
+        "PrimaryEmailAddr": {"Address": "John.Smith@Example.com"},
+        "PrimaryPhone": {"FreeFormNumber": "(555) 123-4567"},
+        "BillAddr": {"Line1": "123 Main Street", "PostalCode": "94025-1234"},
+    }
+
+    def test_keys_ignore_formatting(self):
+        """Test equivalent contact details written differently share keys."""
+        assert email_key(" john.smith@example.com ") == email_key(
+            "JOHN.SMITH@EXAMPLE.COM"
+        )
+        assert phone_key("+1 555.123.4567") == phone_key("(555) 123-4567")
+        assert address_key("123 Main St.", "94025") == address_key(
+            "123 MAIN STREET", "94025-1234"
+        )
+
+    def test_incomplete_values_have_no_key(self):
+        """Test values too vague to identify a customer are not indexed."""
+        assert email_key("not an email") is None
+        assert phone_key("555-1234") is None
+        assert address_key("123 Main St", "") is None
+        assert address_key("", "94025") is None
+
+    def test_donation_keys_match_customer_keys(self):
+        """Test a donation's contact details find the customer's keys."""
+        donation = {
+            "ContactInfo": {
+                "Email": "john.smith@example.com",
+                "Phone": "555-123-4567",
+                "Address_Line_1": "123 Main St",
+                "ZIP": "94025",
+            }
+        }
+
+        assert donation_contact_keys(donation) == customer_contact_keys(self.CUSTOMER)
+        assert donation_contact_keys({}) == []
+
+    def test_lookup(self):
+        """Test customers are found by any of their keys, in indexed order."""
+        index = ContactIndex()
+        index.add("7", self.CUSTOMER)
+        index.add("8", {"PrimaryPhone": {"FreeFormNumber": "555 123 4567"}})
+
+        assert index.lookup(phone_key("5551234567")) == ["7", "8"]
+        assert index.lookup(email_key("john.smith@example.com")) == ["7"]
+        assert index.lookup(email_key("nobody@example.com")) == []
+
+    def test_sources_agree(self, tmp_path):
+        """Test CSV, SQLite and mirror sources find the same customers."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,Email,Phone,Billing Street,Billing ZIP\n"
+            "John Smith,john@example.com,555-123-4567,123 Main St,94025\n"
+            "Jane Smith,jane@example.com,555-123-4567,123 Main St,94025\n"
+            "Bob Jones,bob@example.com,,9 Oak Ave,10001\n"
+        )
+        csv_source = CSVDataSource(path)
+        sqlite_source = SQLiteDataSource(tmp_path / "customers.db", path)
+        snapshot = CustomerSnapshot(dict(csv_source.customers), {"version": "v"})
+
+        keys = [
+            email_key("bob@example.com"),
+            phone_key("5551234567"),
+            address_key("123 Main Street", "94025"),
+            email_key("nobody@example.com"),
+        ]
+        for key in keys:
+            expected = csv_source.contact_search(key)
+            assert sqlite_source.contact_search(key) == expected
+            assert snapshot.contact_search(key) == expected
+        assert [c["Id"] for c in csv_source.contact_search(keys[1])] == [
+            "CSV-001",
+            "CSV-002",
+        ]
+
+
+def brute_force_prefix_search(customers, query):
+    """Find customers with a name word starting with every query word."""
+    words = prefix_tokens(query)
+    results = []
+    for customer in customers.values():
+        names = prefix_tokens(
+            " ".join(
+                customer.get(field) or ""
+                for field in ("DisplayName", "CompanyName", "GivenName", "FamilyName")
+            )
+        )
+        if words and all(any(n.startswith(w) for n in names) for w in words):
+            results.append(customer["Id"])
+    return results
+
+
+class TestPrefixIndex:
+    """Test typeahead lookups by name word prefixes."""
+
+    def test_every_word_must_prefix_a_name_word(self):
+        """Test typed words match the start of any name word, in any order."""
+        index = PrefixIndex()
+        index.add("1", "John Smith", ["John Smith", "John", "Smith"])
+        index.add("2", "Smithson & Co.", ["Smithson & Co."])
+        index.add("3", "Jane Blacksmith", ["Jane Blacksmith"])
+
+        assert index.lookup("smi", 10) == ["1", "2"]
+        assert index.lookup("smi jo", 10) == ["1"]
+        assert index.lookup("SMITHSON CO", 10) == ["2"]
+        assert index.lookup("mith", 10) == []
+        assert index.lookup("  ", 10) == []
+
+    def test_results_are_ordered_and_limited(self):
+        """Test matches are ordered by display name within a word."""
+        index = PrefixIndex()
+        for customer_id, name in [("1", "Jon Zed"), ("2", "Jon Abel"), ("3", "Jo")]:
+            index.add(customer_id, name, [name])
+
+        assert index.lookup("jo", 10) == ["3", "2", "1"]
+        assert index.lookup("jon", 1) == ["2"]
+
+    def test_added_customers_are_found(self):
+        """Test customers added after a lookup are found by the next one."""
+        index = PrefixIndex()
+        index.add("1", "Mary Jones", ["Mary Jones"])
+        assert index.lookup("mar", 10) == ["1"]
+
+        index.add("2", "Mark Lee", ["Mark Lee"])
+
+        assert index.lookup("mar", 10) == ["2", "1"]
+        assert len(index) == 2
+
+    def test_same_results_as_brute_force(self, data_source):
+        """Test lookups find exactly the customers a full scan finds."""
+        for term in search_terms(data_source.customers, count=20):
+            found = data_source.prefix_search(term, 10000)
+            assert sorted(c["Id"] for c in found) == sorted(
+                brute_force_prefix_search(data_source.customers, term)
+            ), term
+
+    def test_sources_agree(self, data_source, tmp_path):
+        """Test CSV and mirror sources complete names the same way."""
+        snapshot = CustomerSnapshot(dict(data_source.customers), {"version": "v"})
+
+        for term in ["jo", "smith j", "a", "zzz"]:
+            assert snapshot.prefix_search(term, 10) == data_source.prefix_search(
+                term, 10
+            )
+
+    def test_created_customers_are_completed(self, tmp_path):
+        """Test the CSV source completes customers created after indexing."""
+        path = tmp_path / "customers.csv"
+        path.write_text("Customer\nJohn Smith\n")
+        source = CSVDataSource(path)
+        assert [c["DisplayName"] for c in source.prefix_search("jo", 10)] == [
+            "John Smith"
+        ]
+
+        source.create_customer({"DisplayName": "Joan Smith"})
+
+        assert [c["DisplayName"] for c in source.prefix_search("jo", 10)] == [
+            "Joan Smith",
+            "John Smith",
+        ]
@@ -3,11 +3,211 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from benchmarks.fakes import generate_customers
 from src.customer_matcher import (
     CustomerMatcher,
     calculate_match_score,
     compare_addresses,
 )
+from src.match_features import (
+    CustomerFeatures,
+    DonorFeatures,
+    normalize_name,
+    score_features,
+)
+from src.quickbooks_service import QuickBooksError
+
+
+def legacy_match_score(donation, customer):
+    """Score a pair the way calculate_match_score did before features."""
+    # Get payer info
+    payer_info = donation.get("PayerInfo", {})
+
+    # Get customer info in lowercase for comparison
+    display_name = customer.get("DisplayName", "").lower()
+    given_name = (customer.get("GivenName") or "").lower()
+    family_name = (customer.get("FamilyName") or "").lower()
+    company_name = (customer.get("CompanyName") or "").lower()
+
+    # Normalize display name for better matching
+    normalized_display = normalize_name(display_name).lower()
+
+    # For individuals - check aliases
+    aliases = payer_info.get("Aliases", [])
+    best_score = 0.0
+
+    for alias in aliases:
+        alias_lower = alias.lower()
+        normalized_alias = normalize_name(alias).lower()
+
+        # Exact match (after normalization)
+        if normalized_alias == normalized_display:
+            best_score = max(best_score, 100.0)
+            continue
+
+        # Original exact match
+        if alias_lower == display_name:
+            best_score = max(best_score, 98.0)
+            continue
+
+        # Split both alias and display name into parts for flexible matching
+        alias_parts = normalized_alias.split()
+        display_parts = normalized_display.split()
+
+        # Handle "Last, First" format in display name
+        if "," in display_name:
+            # QuickBooks often uses "Last, First" format
+            comma_parts = display_name.split(",")
+            if len(comma_parts) == 2:
+                qb_last = normalize_name(comma_parts[0]).lower()
+                qb_first = normalize_name(comma_parts[1]).lower()
+
+                # Check if alias matches this format
+                if len(alias_parts) >= 2:
+                    # First Last format in alias vs Last, First in QB
+                    if alias_parts[0] == qb_first and alias_parts[-1] == qb_last:
+                        best_score = max(best_score, 95.0)
+                        continue
+
+                    # Handle middle initials/names
+                    if (alias_parts[0] == qb_first or alias_parts[-1] == qb_last) and (
+                        qb_first.startswith(alias_parts[0])
+                        or alias_parts[0].startswith(qb_first)
+                    ):
+                        best_score = max(best_score, 90.0)
+                        continue
+
+        # Check component names if we have them
+        if len(alias_parts) >= 2 and given_name and family_name:
+            # Exact first and last name match
+            if alias_parts[0] == given_name and alias_parts[-1] == family_name:
+                best_score = max(best_score, 95.0)
+                continue
+
+            # Last name exact match with partial first name
+            if alias_parts[-1] == family_name and given_name.startswith(alias_parts[0]):
+                best_score = max(best_score, 90.0)
+                continue
+
+            # Both names present anywhere
+            if given_name in normalized_alias and family_name in normalized_alias:
+                best_score = max(best_score, 85.0)
+                continue
+
+        # Check if all parts of alias are in display name (any order)
+        if len(alias_parts) >= 2 and len(display_parts) >= 2:
+            alias_set = set(alias_parts)
+            display_set = set(display_parts)
+
+            # All alias parts found in display
+            if alias_set.issubset(display_set):
+                best_score = max(best_score, 90.0)
+                continue
+
+            # Most alias parts found (allow for middle names/initials)
+            common_parts = alias_set.intersection(display_set)
+            if len(common_parts) >= min(2, len(alias_parts)):
+                best_score = max(best_score, 85.0)
+                continue
+
+        # Check if customer name contains the search term
+        if normalized_alias in normalized_display:
+            best_score = max(best_score, 80.0)
+            continue
+
+        # Check last name only match
+        if len(alias_parts) >= 2:
+            # Check against family name
+            if family_name and alias_parts[-1] == family_name:
+                best_score = max(best_score, 75.0)
+                continue
+
+            # Check against last part of display name
+            if len(display_parts) >= 2 and alias_parts[-1] == display_parts[-1]:
+                best_score = max(best_score, 75.0)
+                continue
+
+        # Partial match - any significant word matches
+        if len(alias_parts) >= 2:
+            for part in alias_parts:
+                if len(part) > 2:
+                    # Check in display name parts
+                    for display_part in display_parts:
+                        if (
+                            part == display_part
+                            or display_part.startswith(part)
+                            or part.startswith(display_part)
+                        ):
+                            best_score = max(best_score, 70.0)
+                            break
+
+    # For organizations
+    org_name = payer_info.get("Organization_Name", "")
+
+    if org_name and (company_name or (not aliases and display_name)):
+        org_lower = org_name.lower()
+        normalized_org = normalize_name(org_name).lower()
+
+        # Use company name if available, otherwise display name
+        compare_name = company_name if company_name else display_name
+        normalized_compare = normalize_name(compare_name).lower()
+
+        # Exact match after normalization
+        if normalized_org == normalized_compare:
+            best_score = max(best_score, 100.0)
+
+        # Original exact match
+        elif org_lower == compare_name:
+            best_score = max(best_score, 98.0)
+
+        # One contains the other
+        elif (
+            normalized_org in normalized_compare or normalized_compare in normalized_org
+        ):
+            best_score = max(best_score, 85.0)
+
+        # Significant word matching
+        else:
+            # Extract significant words
+            skip_words = {
+                "the",
+                "and",
+                "inc",
+                "llc",
+                "corp",
+                "corporation",
+                "company",
+                "of",
+                "a",
+            }
+
+            org_words = {
+                word
+                for word in normalized_org.split()
+                if len(word) > 2 and word not in skip_words
+            }
+            compare_words = {
+                word
+                for word in normalized_compare.split()
+                if len(word) > 2 and word not in skip_words
+            }
+
+            if org_words and compare_words:
+                common_words = org_words.intersection(compare_words)
+
+                # Multiple significant words match
+                if len(common_words) >= 2:
+                    best_score = max(best_score, 80.0)
+
+                # Single important word matches (longer words weighted higher)
+                elif len(common_words) == 1:
+                    word = list(common_words)[0]
+                    if len(word) >= 5:  # Longer word = more significant
+                        best_score = max(best_score, 70.0)
+                    else:
+                        best_score = max(best_score, 60.0)
+
+    return best_score
 
 
 class TestAddressComparison:
@@ -142,6 +342,8 @@ class TestCustomerMatcher:
         """Create matcher with mocked data source."""
         with patch("src.customer_matcher.create_customer_data_source") as mock_create:
             mock_data_source = MagicMock()
+            # Like QuickBooks, the source keeps no search statistics
+            mock_data_source.estimate_results.return_value = None
             mock_create.return_value = mock_data_source
             matcher = CustomerMatcher(session_id="test-session")
             return matcher
@@ -399,3 +601,223 @@ class TestCustomerMatcher:
         assert result["updates_needed"]["address"] is False
         assert result["updates_needed"]["email_added"] is False
         assert result["updates_needed"]["phone_added"] is False
+
+
+class TestPhoneticMatching:
+    """Test phonetic candidates are tried before searches."""
+
+    @pytest.fixture
+    def matcher(self, tmp_path):
+        """Create a matcher over a small CSV customer list."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name\n"
+            "John Johnson,John,Johnson\n"
+            "Jane Smith,Jane,Smith\n"
+        )
+        return CustomerMatcher(csv_path=path)
+
+    def test_misspelled_name_matches(self, matcher):
+        """Test a misread surname still matches the customer."""
+        donation = {"PayerInfo": {"Aliases": ["John Jonhson"]}}
+        assert matcher.data_source.search_customer("Jonhson") == []
+
+        result = matcher.match_donation_to_customer(donation)
+
+        assert result["match_status"] == "matched"
+        assert result["customer_ref"]["id"] == "CSV-001"
+
+    def test_good_phonetic_match_skips_searches(self, matcher):
+        """Test no searches run when a phonetic candidate matches well."""
+        matcher.data_source.search_customer = MagicMock(return_value=[])
+
+        result = matcher.match_donation_to_customer(
+            {"PayerInfo": {"Aliases": ["Jane Smith"]}}
+        )
+
+        assert result["customer_ref"]["id"] == "CSV-002"
+        matcher.data_source.search_customer.assert_not_called()
+
+    def test_unrelated_name_is_new_customer(self, matcher):
+        """Test names that sound like no customer fall through to searches."""
+        result = matcher.match_donation_to_customer(
+            {"PayerInfo": {"Aliases": ["Quentin Zebulon"]}}
+        )
+
+        assert result["match_status"] == "new_customer"
+
+
+class TestContactMatching:
+    """Test exact contact lookups are tried before name searches."""
+
+    @pytest.fixture
+    def matcher(self, tmp_path):
+        """Create a matcher over customers with contact details."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name,Email,Phone,Billing Street,Billing ZIP\n"
+            "Smith; John,John,Smith,js@example.com,555-123-4567,1 Elm St,94025\n"
+            "Smith; Jane,Jane,Smith,jane@example.com,555-123-4567,1 Elm St,94025\n"
+            "Bob Jones,Bob,Jones,bob@example.com,,9 Oak Ave,10001\n"
+        )
+        matcher = CustomerMatcher(csv_path=path)
+        matcher.data_source.search_customer = MagicMock(return_value=[])
+        matcher.data_source.phonetic_search = MagicMock(return_value=[])
+        return matcher
+
+    def test_single_contact_hit_skips_name_lookups(self, matcher):
+        """Test a lone customer with the donor's email is matched directly."""
+        donation = {
+            "PayerInfo": {"Aliases": ["Robert Jones"]},
+            "ContactInfo": {"Email": "BOB@example.com"},
+        }
+
+        result = matcher.match_donation_to_customer(donation)
+
+        assert result["customer_ref"]["id"] == "CSV-003"
+        matcher.data_source.search_customer.assert_not_called()
+        matcher.data_source.phonetic_search.assert_not_called()
+
+    def test_contradicting_name_falls_back_to_search(self, matcher):
+        """Test a contact hit for someone else does not decide the match."""
+        donation = {
+            "PayerInfo": {"Aliases": ["Alice Walker"]},
+            "ContactInfo": {"Email": "bob@example.com"},
+        }
+
+        result = matcher.match_donation_to_customer(donation)
+
+        assert result["match_status"] == "new_customer"
+        assert matcher.data_source.phonetic_search.called
+
+    def test_shared_household_contact_is_scored_by_name(self, matcher):
+        """Test several customers at one address are told apart by name."""
+        donation = {
+            "PayerInfo": {"Aliases": ["Jane Smith"]},
+            "ContactInfo": {"Address_Line_1": "1 Elm Street", "ZIP": "94025"},
+        }
+
+        result = matcher.match_donation_to_customer(donation)
+
+        assert result["customer_ref"]["id"] == "CSV-002"
+        matcher.data_source.search_customer.assert_not_called()
+
+
+class TestCustomerResolution:
+    """Test matched customers are resolved without redundant fetches."""
+
+    @pytest.fixture
+    def inner(self):
+        """Create a QuickBooks-like data source."""
+        data_source = MagicMock()
+        data_source.is_complete.side_effect = lambda c: "MetaData" in c
+        data_source.get_customers.side_effect = lambda ids: [
+            {"Id": i, "MetaData": {}} for i in ids
+        ]
+        return data_source
+
+    @pytest.fixture
+    def matcher(self, inner):
+        """Create a matcher over the data source."""
+        with patch(
+            "src.customer_matcher.create_customer_data_source", return_value=inner
+        ):
+            return CustomerMatcher(session_id="test-session")
+
+    def test_complete_search_result_is_reused(self, matcher, inner):
+        """Test a full search record is used without fetching it again."""
+        customer = {"Id": "1", "DisplayName": "John Smith", "MetaData": {}}
+        inner.search_customer.return_value = [customer]
+        inner.phonetic_search.return_value = []
+
+        result = matcher.match_donation_to_customer(
+            {"PayerInfo": {"Aliases": ["John Smith"]}}
+        )
+
+        assert result["match_status"] == "matched"
+        inner.format_customer_data.assert_called_once_with(customer)
+        inner.get_customer.assert_not_called()
+        inner.get_customers.assert_not_called()
+        assert matcher.lookup_stats()["get_avoided"] == 1
+
+    def test_partial_records_are_fetched_in_one_batch(self, matcher, inner):
+        """Test partial records are refreshed together."""
+        customers = [
+            {"Id": "1", "MetaData": {}},
+            {"Id": "2"},
+            {"Id": "3"},
+        ]
+
+        resolved = matcher.resolve_customers(customers)
+
+        assert resolved["1"] is customers[0]
+        assert resolved["2"] == {"Id": "2", "MetaData": {}}
+        inner.get_customers.assert_called_once_with(["2", "3"])
+        inner.get_customer.assert_not_called()
+        assert matcher.lookup_stats()["get_avoided"] == 2
+
+    def test_missing_record_raises(self, matcher, inner):
+        """Test a customer the batch does not return is fetched on its own."""
+        inner.get_customers.side_effect = lambda ids: []
+        inner.get_customer.side_effect = QuickBooksError("Not found", 404)
+
+        with pytest.raises(QuickBooksError):
+            matcher.resolve_customers([{"Id": "9"}])
+
+
+class TestPrecomputedFeatures:
+    """Test feature-based scoring gives the scores of pairwise scoring."""
+
+    CUSTOMERS = generate_customers(400) + [
+        {"DisplayName": "Smith, John"},
+        {"DisplayName": "Smith, J. A.", "GivenName": "J", "FamilyName": "Smith"},
+        {"DisplayName": "Doe, Jane, Jr."},
+        {"DisplayName": "J. Smith"},
+        {"DisplayName": "Smith Foundation", "CompanyName": "Smith Foundation"},
+        {"DisplayName": "The Smith Family Trust", "CompanyName": None},
+        {"DisplayName": "First Baptist Church of Springfield"},
+        {"DisplayName": "Acme Corp", "CompanyName": "ACME Corporation Inc."},
+        {"DisplayName": "O'Brien-Smith, Mary"},
+        {"DisplayName": ""},
+    ]
+
+    DONATIONS = [
+        {"PayerInfo": {"Aliases": ["John Smith", "J. Smith", "Smith, John"]}},
+        {"PayerInfo": {"Aliases": ["John A. Smith"]}},
+        {"PayerInfo": {"Aliases": ["Mary O'Brien-Smith", "Mary Smith"]}},
+        {"PayerInfo": {"Aliases": ["Jane Doe Jr"]}},
+        {"PayerInfo": {"Aliases": ["Smith"]}},
+        {"PayerInfo": {"Aliases": ["Smith"], "Organization_Name": "Smith Fund"}},
+        {"PayerInfo": {"Organization_Name": "Smith Foundation"}},
+        {"PayerInfo": {"Organization_Name": "First Baptist Church"}},
+        {"PayerInfo": {"Organization_Name": "The ACME Corporation"}},
+        {"PayerInfo": {"Organization_Name": None}},
+        {"PayerInfo": {}},
+    ] + [
+        {"PayerInfo": {"Aliases": [customer["DisplayName"], name]}}
+        for customer, name in zip(
+            generate_customers(40, seed=1),
+            ["Wiliam Jonson", "Garcia", "M. Brown", "Lee, Ann", "Anne Lee"] * 8,
+        )
+    ]
+
+    def test_scores_match_pairwise_scoring(self):
+        """Test every donation and customer pair scores as before."""
+        for donation in self.DONATIONS:
+            donor = DonorFeatures(donation)
+            for customer in self.CUSTOMERS:
+                expected = legacy_match_score(donation, customer)
+                assert calculate_match_score(donation, customer) == expected
+                assert score_features(donor, CustomerFeatures(customer)) == expected
+
+    def test_features_are_computed_once_per_job(self, tmp_path):
+        """Test the memoized data source reuses a customer's features."""
+        path = tmp_path / "customers.csv"
+        path.write_text("Customer,First Name,Last Name\nJohn Smith,John,Smith\n")
+        matcher = CustomerMatcher(csv_path=path)
+        customer = matcher.data_source.search_customer("Smith")[0]
+
+        first = matcher.data_source.customer_features(customer)
+
+        assert matcher.data_source.customer_features(customer) is first
+        assert first.display_parts == ["john", "smith"]
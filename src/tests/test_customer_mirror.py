@@ -0,0 +1,487 @@
+"""Tests for the QuickBooks customer mirror."""
+import os
+import time
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+
+from benchmarks.fakes import (
+    FakeQuickBooksAPI,
+    FakeQuickBooksAuth,
+    FakeRedis,
+    generate_customers,
+)
+from src.customer_data_source import (
+    MirroredQuickBooksDataSource,
+    QuickBooksDataSource,
+    create_customer_data_source,
+)
+from src.customer_mirror import (
+    MIRROR_MAX_AGE_SECONDS,
+    MIRROR_SYNC_LOCK_SECONDS,
+    CustomerSnapshot,
+    LocalCustomerMirror,
+    RedisCustomerMirror,
+    iter_customer_pages,
+    refresh_customer_mirror,
+    refresh_stale_mirrors,
+    start_background_sync,
+    sync_customer_mirror,
+)
+from src.quickbooks_service import QuickBooksClient, QuickBooksError
+
+REALM_ID = "realm-1"
+
+
+def make_client(customers, realm_id=REALM_ID):
+    """Create a mock QuickBooks client that pages through customers.
+
+    Like QuickBooks, listing skips inactive customers while changed-since
+    queries include them.
+    """
+    client = MagicMock()
+    client.realm_id = realm_id
+    client.list_customers.side_effect = lambda start, size: [
+        c for c in customers if c.get("Active", True)
+    ][start - 1 : start - 1 + size]
+
+    def changed_since(since, start, size):
+        changed = [c for c in customers if c["MetaData"]["LastUpdatedTime"] > since]
+        return changed[start - 1 : start - 1 + size]
+
+    client.get_customers_changed_since.side_effect = changed_since
+    return client
+
+
+def age_mirror(mirror, seconds):
+    """Move a realm's last sync back in time."""
+    synced_at = mirror.get_sync_info(REALM_ID)["synced_at"]
+    mirror.apply_changes(REALM_ID, [], sync_info={"synced_at": synced_at - seconds})
+
+
+@pytest.fixture(params=["local", "redis"])
+def mirror(request, tmp_path):
+    """Create each mirror backend."""
+    if request.param == "local":
+        return LocalCustomerMirror(str(tmp_path / "mirror"))
+    return RedisCustomerMirror(FakeRedis())  # type: ignore[arg-type]
+
+
+class TestSync:
+    """Test paged bulk sync."""
+
+    def test_pages_until_short_page(self):
+        """Test paging stops after the first page smaller than the page size."""
+        client = make_client(generate_customers(25))
+
+        pages = list(iter_customer_pages(client, page_size=10))
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert client.list_customers.call_count == 3
+
+    def test_exact_multiple_makes_one_empty_request(self):
+        """Test a book that fills its last page ends on an empty page."""
+        client = make_client(generate_customers(20))
+
+        pages = list(iter_customer_pages(client, page_size=10))
+
+        assert [len(page) for page in pages] == [10, 10]
+        assert client.list_customers.call_count == 3
+
+    def test_sync_replaces_mirror(self, mirror):
+        """Test a resync replaces rather than merges the mirrored customers."""
+        sync_customer_mirror(make_client(generate_customers(30)), mirror, 7)
+        count = sync_customer_mirror(make_client(generate_customers(12)), mirror, 7)
+
+        assert count == 12
+        assert set(mirror.load_customers(REALM_ID)) == {str(i) for i in range(1, 13)}
+        assert mirror.get_sync_info(REALM_ID)["count"] == 12
+
+    def test_failed_page_leaves_mirror_unchanged(self, mirror):
+        """Test a QuickBooks error mid-sync keeps the previous mirror."""
+        sync_customer_mirror(make_client(generate_customers(5)), mirror)
+        client = make_client(generate_customers(30))
+        client.list_customers.side_effect = [
+            generate_customers(10),
+            QuickBooksError("boom"),
+        ]
+
+        with pytest.raises(QuickBooksError):
+            sync_customer_mirror(client, mirror, page_size=10)
+
+        assert len(mirror.load_customers(REALM_ID)) == 5
+
+    def test_empty_book(self, mirror):
+        """Test a realm with no customers still records a sync."""
+        assert sync_customer_mirror(make_client([]), mirror) == 0
+        assert mirror.get_snapshot(REALM_ID).customers == {}
+
+
+class TestSnapshot:
+    """Test snapshot search and caching."""
+
+    def test_search_matches_like_query(self):
+        """Test search is a case-insensitive substring match in ID order."""
+        customers = {
+            "10": {"Id": "10", "DisplayName": "Jane Smith"},
+            "2": {"Id": "2", "DisplayName": "Smithson LLC"},
+            "3": {"Id": "3", "DisplayName": "John Doe"},
+        }
+        snapshot = CustomerSnapshot(customers, {"version": "v"})
+
+        assert [c["Id"] for c in snapshot.search("SMITH")] == ["2", "10"]
+        assert [c["Id"] for c in snapshot.search("smith", limit=1)] == ["2"]
+        assert snapshot.get("3")["DisplayName"] == "John Doe"
+        assert snapshot.get("99") is None
+
+    def test_snapshot_reused_until_version_changes(self, mirror):
+        """Test snapshots are only rebuilt after a resync."""
+        sync_customer_mirror(make_client(generate_customers(5)), mirror)
+
+        first = mirror.get_snapshot(REALM_ID)
+        assert mirror.get_snapshot(REALM_ID) is first
+
+        sync_customer_mirror(make_client(generate_customers(6)), mirror)
+        second = mirror.get_snapshot(REALM_ID)
+        assert second is not first
+        assert len(second.customers) == 6
+
+    def test_unsynced_realm_has_no_snapshot(self, mirror):
+        """Test a realm that was never synced has no snapshot."""
+        assert mirror.get_snapshot("unknown") is None
+
+    def test_redis_snapshot_load_round_trips(self):
+        """Test a cached Redis snapshot costs one round-trip to validate."""
+        redis = FakeRedis()
+        mirror = RedisCustomerMirror(redis)  # type: ignore[arg-type]
+        sync_customer_mirror(make_client(generate_customers(2500)), mirror)
+        mirror.get_snapshot(REALM_ID)
+
+        before = redis.round_trips
+        mirror.get_snapshot(REALM_ID)
+
+        assert redis.round_trips - before == 1
+
+
+class TestMirroredDataSource:
+    """Test the mirrored QuickBooks data source."""
+
+    @pytest.fixture
+    def client(self):
+        """Patch the session's QuickBooks client with a mock over a synthetic book."""
+        client = make_client(generate_customers(50))
+        with patch(
+            "src.customer_data_source.quickbooks_clients.get", return_value=client
+        ):
+            yield client
+
+    def test_first_use_syncs_in_background(self, client, mirror):
+        """Test an unsynced realm is synced off the request, then used."""
+        threads = []
+
+        def start(*args):
+            threads.append(start_background_sync(*args))
+            return threads[-1]
+
+        with patch("src.customer_data_source.start_background_sync", side_effect=start):
+            with pytest.raises(QuickBooksError, match="syncing"):
+                MirroredQuickBooksDataSource("session", mirror)
+            threads[0].join(5)
+
+            source = MirroredQuickBooksDataSource("session", mirror)
+
+        assert client.list_customers.call_count == 1
+        assert len(source.customer_table()) == 50
+        assert mirror.get_sync_info(REALM_ID)["session_id"] == "session"
+
+    def test_syncs_once_then_searches_locally(self, client, mirror):
+        """Test searches and lookups make no QuickBooks calls."""
+        sync_customer_mirror(client, mirror)
+        source = MirroredQuickBooksDataSource("session", mirror)
+        name = generate_customers(50)[9]["DisplayName"]
+
+        results = source.search_customer(name.split()[-1])
+
+        assert any(c["DisplayName"] == name for c in results)
+        assert source.get_customer("10")["DisplayName"] == name
+        client.search_customer.assert_not_called()
+        client.get_customer.assert_not_called()
+        assert client.list_customers.call_count == 1
+
+        MirroredQuickBooksDataSource("session", mirror)
+        assert client.list_customers.call_count == 1
+
+    def test_stale_mirror_is_refreshed_incrementally(self, client, mirror):
+        """Test a stale mirror only fetches customers changed since the sync."""
+        sync_customer_mirror(client, mirror)
+        age_mirror(mirror, 120)
+
+        source = MirroredQuickBooksDataSource("session", mirror)
+
+        assert client.list_customers.call_count == 1
+        assert client.get_customers_changed_since.call_count == 1
+        assert source.snapshot.staleness_seconds < 5
+
+    def test_missing_customer_falls_back_to_quickbooks(self, client, mirror):
+        """Test customers created since the sync are fetched from QuickBooks."""
+        client.get_customer.return_value = {"Id": "999"}
+        sync_customer_mirror(client, mirror)
+        source = MirroredQuickBooksDataSource("session", mirror)
+
+        assert source.get_customer("999") == {"Id": "999"}
+
+
+class TestIncrementalRefresh:
+    """Test watermark-based incremental refresh."""
+
+    @pytest.fixture
+    def customers(self):
+        """Create a synthetic book."""
+        return generate_customers(20)
+
+    @pytest.fixture
+    def client(self, customers, mirror):
+        """Create a client and fully sync its realm."""
+        client = make_client(customers)
+        sync_customer_mirror(client, mirror, session_id="session")
+        return client
+
+    def test_fresh_mirror_is_not_refreshed(self, client, mirror):
+        """Test a recently synced mirror makes no QuickBooks calls."""
+        assert refresh_customer_mirror(client, mirror) == 0
+        client.get_customers_changed_since.assert_not_called()
+
+    def test_applies_changed_customers(self, customers, client, mirror):
+        """Test changed and new customers are merged and the watermark moves."""
+        version = mirror.get_snapshot(REALM_ID).version
+        later = "2031-01-01T00:00:00-00:00"
+        customers[3] = dict(
+            customers[3], DisplayName="Renamed", MetaData={"LastUpdatedTime": later}
+        )
+        customers.append(
+            {
+                "Id": "21",
+                "DisplayName": "New Donor",
+                "MetaData": {"LastUpdatedTime": later},
+            }
+        )
+        age_mirror(mirror, 120)
+
+        refresh_customer_mirror(client, mirror)
+
+        snapshot = mirror.get_snapshot(REALM_ID)
+        assert client.get_customers_changed_since.call_count == 1
+        client.list_customers.assert_called_once()
+        assert snapshot.version != version
+        assert snapshot.get("4")["DisplayName"] == "Renamed"
+        assert snapshot.get("21")["DisplayName"] == "New Donor"
+        assert snapshot.watermark == later
+        assert len(snapshot.customers) == 21
+        assert mirror.get_sync_info(REALM_ID)["count"] == 21
+        assert mirror.get_staleness(REALM_ID) < 5
+
+    def test_watermark_query_overlaps(self, customers, client, mirror):
+        """Test changes are re-read from shortly before the watermark."""
+        watermark = mirror.get_sync_info(REALM_ID)["watermark"]
+        age_mirror(mirror, 120)
+
+        refresh_customer_mirror(client, mirror)
+
+        since = client.get_customers_changed_since.call_args[0][0]
+        assert since < watermark
+
+    def test_no_changes_keeps_snapshot(self, client, mirror):
+        """Test a refresh that finds nothing only updates the sync time."""
+        snapshot = mirror.get_snapshot(REALM_ID)
+        client.get_customers_changed_since.side_effect = lambda *args: []
+        age_mirror(mirror, 120)
+
+        refresh_customer_mirror(client, mirror)
+
+        assert mirror.get_snapshot(REALM_ID) is snapshot
+        assert snapshot.staleness_seconds < 5
+
+    def test_inactive_customers_are_removed(self, customers, client, mirror):
+        """Test customers made inactive are dropped from the mirror."""
+        customers[0] = dict(
+            customers[0],
+            Active=False,
+            MetaData={"LastUpdatedTime": "2031-01-01T00:00:00-00:00"},
+        )
+        age_mirror(mirror, 120)
+
+        refresh_customer_mirror(client, mirror)
+
+        assert mirror.get_snapshot(REALM_ID).get("1") is None
+
+    def test_customers_made_inactive_reach_the_mirror(self, tmp_path):
+        """Test the changed-since query asks QuickBooks for inactive customers."""
+        api = FakeQuickBooksAPI(generate_customers(10))
+        mirror = LocalCustomerMirror(str(tmp_path))
+        with api.install(), patch(
+            "src.quickbooks_service.QuickBooksAuth", FakeQuickBooksAuth
+        ):
+            client = QuickBooksClient("session")
+            sync_customer_mirror(client, mirror)
+            api.customers["1"].update(
+                Active=False, MetaData={"LastUpdatedTime": "2031-01-01T00:00:00-00:00"}
+            )
+            synced_at = mirror.get_sync_info(client.realm_id)["synced_at"]
+            mirror.apply_changes(
+                client.realm_id, [], sync_info={"synced_at": synced_at - 120}
+            )
+
+            refresh_customer_mirror(client, mirror)
+
+        snapshot = mirror.get_snapshot(client.realm_id)
+        assert snapshot.get("1") is None
+        assert len(snapshot.customers) == 9
+
+    def test_old_mirror_is_fully_resynced(self, client, mirror):
+        """Test mirrors past the maximum age are rebuilt from scratch."""
+        age_mirror(mirror, MIRROR_MAX_AGE_SECONDS + 1)
+
+        refresh_customer_mirror(client, mirror)
+
+        assert client.list_customers.call_count == 2
+        client.get_customers_changed_since.assert_not_called()
+
+    def test_apply_changes_requires_synced_realm(self, mirror):
+        """Test created customers are not written to a realm never synced."""
+        assert not mirror.apply_changes("unknown", [{"Id": "1"}])
+        assert mirror.get_snapshot("unknown") is None
+
+    def test_refresh_skips_realm_being_synced(self, client, mirror):
+        """Test a refresh does nothing while another holds the sync lock."""
+        age_mirror(mirror, 120)
+        token = mirror.acquire_sync_lock(REALM_ID)
+        assert mirror.acquire_sync_lock(REALM_ID) is None
+
+        assert refresh_customer_mirror(client, mirror) == 0
+        client.get_customers_changed_since.assert_not_called()
+
+        mirror.release_sync_lock(REALM_ID, token)
+        refresh_customer_mirror(client, mirror)
+        client.get_customers_changed_since.assert_called_once()
+
+    def test_expired_local_sync_lock_is_replaced(self, tmp_path):
+        """Test a lock left by a crashed sync does not block syncs forever."""
+        mirror = LocalCustomerMirror(str(tmp_path))
+        assert mirror.acquire_sync_lock(REALM_ID)
+        old = time.time() - MIRROR_SYNC_LOCK_SECONDS - 1
+        os.utime(tmp_path / f"{REALM_ID}.lock", (old, old))
+
+        assert mirror.acquire_sync_lock(REALM_ID)
+
+    def test_refresh_stale_mirrors(self, client, mirror):
+        """Test the periodic task refreshes stale realms with their session."""
+        sessions = []
+
+        def client_factory(session_id):
+            sessions.append(session_id)
+            return client
+
+        assert refresh_stale_mirrors(mirror, client_factory) == 0
+        age_mirror(mirror, 120)
+        assert refresh_stale_mirrors(mirror, client_factory) == 1
+        assert sessions == ["session"]
+        assert mirror.list_realms() == [REALM_ID]
+
+    def test_refresh_stale_mirrors_skips_failures(self, client, mirror):
+        """Test realms whose session no longer authenticates are skipped."""
+        age_mirror(mirror, 120)
+
+        def client_factory(session_id):
+            raise QuickBooksError("Not authenticated", status_code=401)
+
+        assert refresh_stale_mirrors(mirror, client_factory) == 0
+
+
+class TestCreatedCustomers:
+    """Test customers created through the app reach the mirror."""
+
+    def test_create_customer_applies_to_mirror(self, tmp_path):
+        """Test QuickBooksClient.create_customer updates the mirror."""
+        mirror = LocalCustomerMirror(str(tmp_path))
+        sync_customer_mirror(make_client(generate_customers(3)), mirror)
+        qb_client = QuickBooksClient.__new__(QuickBooksClient)
+        qb_client.realm_id = REALM_ID
+        response = MagicMock()
+        response.json.return_value = {
+            "Customer": {"Id": "99", "DisplayName": "Brand New"}
+        }
+
+        with patch.object(qb_client, "_make_request", return_value=response), patch(
+            "src.quickbooks_service.customer_mirror", mirror
+        ):
+            qb_client.create_customer({"DisplayName": "Brand New"})
+
+        assert mirror.get_snapshot(REALM_ID).search("brand new")[0]["Id"] == "99"
+        assert mirror.get_sync_info(REALM_ID)["count"] == 4
+
+    def test_data_source_sees_created_customer(self, tmp_path):
+        """Test the mirrored source finds a customer it just created."""
+        mirror = LocalCustomerMirror(str(tmp_path))
+        client = make_client(generate_customers(3))
+
+        def create(data):
+            customer = {"Id": "99", "DisplayName": data["DisplayName"]}
+            mirror.apply_changes(REALM_ID, [customer])
+            return customer
+
+        client.create_customer.side_effect = create
+        sync_customer_mirror(client, mirror)
+        with patch(
+            "src.customer_data_source.quickbooks_clients.get", return_value=client
+        ):
+            source = MirroredQuickBooksDataSource("session", mirror)
+            source.create_customer({"DisplayName": "Brand New"})
+
+        assert source.search_customer("Brand")[0]["Id"] == "99"
+
+
+class TestFactory:
+    """Test data source selection."""
+
+    def test_uses_mirror_when_enabled(self):
+        """Test sessions get the mirrored source by default."""
+        with patch("src.customer_data_source.MirroredQuickBooksDataSource") as mirrored:
+            source = create_customer_data_source(session_id="session")
+
+        assert source is mirrored.return_value
+
+    def test_falls_back_when_mirror_fails(self):
+        """Test the live API is used if the mirror cannot be loaded."""
+        with patch(
+            "src.customer_data_source.MirroredQuickBooksDataSource",
+            side_effect=RuntimeError("redis down"),
+        ), patch("src.customer_data_source.quickbooks_clients.get"):
+            source = create_customer_data_source(session_id="session")
+
+        assert type(source) is QuickBooksDataSource
+
+    def test_unsynced_mirror_falls_back(self, tmp_path):
+        """Test requests use the live API while a realm's first sync runs."""
+        client = make_client(generate_customers(3))
+        with patch(
+            "src.customer_data_source.customer_mirror",
+            LocalCustomerMirror(str(tmp_path)),
+        ), patch(
+            "src.customer_data_source.quickbooks_clients.get", return_value=client
+        ), patch(
+            "src.customer_data_source.start_background_sync"
+        ) as start:
+            source = create_customer_data_source(session_id="session")
+
+        assert type(source) is QuickBooksDataSource
+        start.assert_called_once_with(client, ANY, "session")
+        client.list_customers.assert_not_called()
+
+    def test_disabled_mirror(self):
+        """Test CUSTOMER_MIRROR_ENABLED=false uses the live API."""
+        with patch(
+            "src.customer_data_source.Config.CUSTOMER_MIRROR_ENABLED", False
+        ), patch("src.customer_data_source.quickbooks_clients.get"):
+            source = create_customer_data_source(session_id="session")
+
+        assert type(source) is QuickBooksDataSource
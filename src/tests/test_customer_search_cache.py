@@ -0,0 +1,109 @@
+"""Tests for the realm-scoped customer search cache."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.fakes import FakeRedis
+from src.customer_mirror import DEFAULT_SEARCH_LIMIT
+from src.customer_search_cache import LocalCustomerSearchCache, RedisCustomerSearchCache
+
+REALM_ID = "realm-1"
+
+CUSTOMERS = [
+    {"Id": "1", "DisplayName": "Bob Smith"},
+    {"Id": "2", "DisplayName": "Jane Smithson"},
+    {"Id": "3", "DisplayName": "Sam Smiley"},
+]
+
+
+def make_loader(customers=CUSTOMERS):
+    """Create a search function with QuickBooks display name semantics."""
+    return MagicMock(
+        side_effect=lambda term: [
+            c for c in customers if term.lower() in c["DisplayName"].lower()
+        ]
+    )
+
+
+@pytest.fixture(params=["local", "redis"])
+def cache(request):
+    """Create each cache backend."""
+    if request.param == "redis":
+        return RedisCustomerSearchCache(FakeRedis())  # type: ignore[arg-type]
+    return LocalCustomerSearchCache()
+
+
+class TestCustomerSearchCache:
+    """Test cached searches on both backends."""
+
+    def test_repeated_search_is_cached(self, cache):
+        """Test a repeated term, in any case, reaches the data source once."""
+        load = make_loader()
+
+        first = cache.search(REALM_ID, "Smith", load)
+        second = cache.search(REALM_ID, "SMITH", load)
+
+        assert first == second == CUSTOMERS[:2]
+        load.assert_called_once_with("Smith")
+
+    def test_prefix_extension_filters_cached_results(self, cache):
+        """Test a longer term is answered from a cached prefix."""
+        load = make_loader()
+        cache.search(REALM_ID, "smi", load)
+
+        assert cache.search(REALM_ID, "smit", load) == CUSTOMERS[:2]
+        assert cache.search(REALM_ID, "smiths", load) == CUSTOMERS[1:2]
+        load.assert_called_once_with("smi")
+
+    def test_truncated_results_are_not_filtered(self, cache):
+        """Test results cut off at the QuickBooks limit are not reused."""
+        customers = [
+            {"Id": str(i), "DisplayName": f"Smith {i}"}
+            for i in range(DEFAULT_SEARCH_LIMIT + 5)
+        ]
+        load = MagicMock(return_value=customers[:DEFAULT_SEARCH_LIMIT])
+
+        cache.search(REALM_ID, "smi", load)
+        cache.search(REALM_ID, "smith 10", load)
+
+        assert load.call_count == 2
+
+    def test_realms_are_separate(self, cache):
+        """Test one realm's results are not served to another."""
+        load = make_loader()
+        cache.search(REALM_ID, "smith", load)
+        cache.search("realm-2", "smith", load)
+
+        assert load.call_count == 2
+
+    def test_invalidate_clears_realm(self, cache):
+        """Test invalidating a realm forces a fresh search."""
+        load = make_loader()
+        cache.search(REALM_ID, "smi", load)
+
+        assert cache.invalidate(REALM_ID)
+        cache.search(REALM_ID, "smit", load)
+
+        assert load.call_count == 2
+
+    def test_entries_expire(self, cache):
+        """Test entries older than the TTL are not served."""
+        load = make_loader()
+        with patch("src.customer_search_cache.time.time", return_value=1000.0):
+            cache.search(REALM_ID, "smi", load)
+        with patch(
+            "src.customer_search_cache.time.time",
+            return_value=1000.0 + cache.ttl_seconds + 1,
+        ):
+            cache.search(REALM_ID, "smit", load)
+
+        assert load.call_count == 2
+
+
+def test_cache_errors_fall_back_to_search():
+    """Test a failing Redis cache still returns search results."""
+    redis = MagicMock()
+    redis.hmget.side_effect = ValueError("bad reply")
+    cache = RedisCustomerSearchCache(redis)
+
+    assert cache.search(REALM_ID, "smith", make_loader()) == CUSTOMERS[:2]
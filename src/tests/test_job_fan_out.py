@@ -0,0 +1,328 @@
+"""Tests for job fan-out/fan-in across workers."""
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.fakes import FakeRedis
+from src.job_queue import (
+    DEAD_LETTER_QUEUE,
+    JOB_KIND_EXTRACT,
+    JOB_KIND_GATHER,
+    JOB_QUEUE,
+    PROCESSING_QUEUE,
+    PROCESSING_STARTED_KEY,
+    JobQueue,
+)
+from src.job_tracker import JobStage
+from src.worker import Worker
+
+
+class TestJobQueueFanOut:
+    """Test fan-out bookkeeping in the job queue."""
+
+    @pytest.fixture
+    def redis_client(self):
+        """Mock Redis client with a mock pipeline."""
+        client = MagicMock()
+        client.pipeline.return_value = MagicMock()
+        return client
+
+    def test_fan_out_queues_one_sub_job_per_group(self, redis_client):
+        """Test each file group becomes an extraction sub-job."""
+        queue = JobQueue(redis_client)
+        pipe = redis_client.pipeline.return_value
+
+        assert queue.fan_out(
+            {"job_id": "job-1", "upload_id": "batch_1", "session_id": "s"},
+            [["0_a.jpg", "1_b.jpg"], ["2_c.jpg"]],
+        )
+
+        pushed = [
+            json.loads(c.args[1])
+            for c in pipe.lpush.call_args_list
+            if c.args[0] == JOB_QUEUE
+        ]
+        assert [job["job_id"] for job in pushed] == ["job-1:part0", "job-1:part1"]
+        assert all(job["kind"] == JOB_KIND_EXTRACT for job in pushed)
+        assert all(job["parent_job_id"] == "job-1" for job in pushed)
+        assert pushed[1]["filenames"] == ["2_c.jpg"]
+        pipe.execute.assert_called_once()
+
+    def test_last_sub_job_queues_gather(self, redis_client):
+        """Test the sub-job that stores the last part queues the gather."""
+        queue = JobQueue(redis_client)
+        redis_client.pipeline.return_value.execute.return_value = [1, 1, 2, ["2", "0"]]
+        redis_client.hsetnx.return_value = 1
+        sub_job = {
+            "job_id": "job-1:part1",
+            "parent_job_id": "job-1",
+            "upload_id": "batch_1",
+            "session_id": "s",
+            "part": 1,
+        }
+
+        assert queue.record_sub_job_result(sub_job, [{"PaymentInfo": {}}])
+
+        gather = json.loads(redis_client.lpush.call_args.args[1])
+        assert redis_client.lpush.call_args.args[0] == JOB_QUEUE
+        assert gather["job_id"] == "job-1"
+        assert gather["kind"] == JOB_KIND_GATHER
+
+    def test_earlier_sub_job_does_not_queue_gather(self, redis_client):
+        """Test sub-jobs finishing before the last one do not gather."""
+        queue = JobQueue(redis_client)
+        redis_client.pipeline.return_value.execute.return_value = [1, 1, 1, ["2", "0"]]
+
+        queue.record_sub_job_result(
+            {"job_id": "job-1:part0", "parent_job_id": "job-1", "part": 0}, []
+        )
+
+        redis_client.lpush.assert_not_called()
+
+    def test_failed_group_does_not_gather(self, redis_client):
+        """Test a group with a failed sub-job never queues the gather."""
+        queue = JobQueue(redis_client)
+        redis_client.pipeline.return_value.execute.return_value = [1, 1, 2, ["2", "1"]]
+        redis_client.hsetnx.return_value = 1
+
+        queue.record_sub_job_result(
+            {"job_id": "job-1:part0", "parent_job_id": "job-1", "part": 0}, []
+        )
+
+        redis_client.lpush.assert_not_called()
+
+    def test_recording_a_part_twice_gathers_once(self, redis_client):
+        """Test a redelivered sub-job neither gathers early nor gathers again."""
+        queue = JobQueue(redis_client)
+        pipe = redis_client.pipeline.return_value
+        sub_job = {"job_id": "job-1:part0", "parent_job_id": "job-1", "part": 0}
+
+        # Part 0 stored twice: the hash still holds one of two parts
+        pipe.execute.return_value = [0, 1, 1, ["2", "0"]]
+        queue.record_sub_job_result(sub_job, [])
+        queue.record_sub_job_result(sub_job, [])
+        redis_client.lpush.assert_not_called()
+
+        # Part 1 completes the group; a redelivery of it finds the flag set
+        pipe.execute.return_value = [1, 1, 2, ["2", "0"]]
+        redis_client.hsetnx.side_effect = [1, 0]
+        queue.record_sub_job_result({**sub_job, "job_id": "job-1:part1", "part": 1}, [])
+        queue.record_sub_job_result({**sub_job, "job_id": "job-1:part1", "part": 1}, [])
+
+        assert redis_client.lpush.call_count == 1
+        redis_client.hsetnx.assert_called_with(
+            "donation_jobs:group:job-1", "gathered", 1
+        )
+
+    def test_fail_group_records_parent_failure_once(self, redis_client):
+        """Test only the first failing sub-job fails the parent job."""
+        queue = JobQueue(redis_client)
+        sub_job = {"job_id": "job-1:part0", "parent_job_id": "job-1"}
+
+        redis_client.hincrby.return_value = 1
+        assert queue.fail_group(sub_job, "boom")
+        failed = json.loads(redis_client.lpush.call_args.args[1])
+        assert redis_client.lpush.call_args.args[0] == DEAD_LETTER_QUEUE
+        assert failed["job_id"] == "job-1"
+
+        redis_client.hincrby.return_value = 2
+        assert not queue.fail_group(sub_job, "boom again")
+
+    def test_fail_group_marks_upload_failed(self, redis_client):
+        """Test a failed group reports its upload failed to polling clients."""
+        session_backend = MagicMock()
+        queue = JobQueue(redis_client, session_backend)
+        sub_job = {
+            "job_id": "job-1:part0",
+            "parent_job_id": "job-1",
+            "upload_id": "batch_1",
+        }
+        redis_client.hincrby.return_value = 1
+
+        assert queue.fail_group(sub_job, "boom")
+
+        upload_id, update = session_backend.update_upload_metadata.call_args.args
+        assert upload_id == "batch_1"
+        assert update["status"] == "failed"
+        assert "job-1:part0 failed: boom" in update["error"]
+
+    def test_stale_sub_job_fails_parent(self, redis_client):
+        """Test a sub-job whose worker died fails its parent job."""
+        queue = JobQueue(redis_client)
+        sub_job = {
+            "job_id": "job-1:part0",
+            "parent_job_id": "job-1",
+            "upload_id": "batch_1",
+        }
+        redis_client.lrange.return_value = [json.dumps(sub_job)]
+        redis_client.hgetall.return_value = {"job-1:part0": "0"}
+        redis_client.lrem.return_value = 1
+        redis_client.hincrby.return_value = 1
+
+        assert queue.cleanup_stale_jobs(max_age_seconds=60) == 1
+
+        failed = [
+            json.loads(c.args[1])
+            for c in redis_client.lpush.call_args_list
+            if c.args[0] == DEAD_LETTER_QUEUE
+        ]
+        assert [job["job_id"] for job in failed] == ["job-1:part0", "job-1"]
+        assert "timed out" in failed[1]["error"]
+        redis_client.hincrby.assert_called_once_with(
+            "donation_jobs:group:job-1", "failed", 1
+        )
+
+    def test_running_sub_job_is_left_alone(self):
+        """Test cleanup skips a job another worker popped and is running."""
+        redis = FakeRedis()
+        queue = JobQueue(redis)  # type: ignore[arg-type]
+        queue.fan_out({"job_id": "job-1", "upload_id": "batch_1"}, [["a.jpg"]])
+        assert JobQueue(redis).pop_job(timeout=0)  # type: ignore[arg-type]
+
+        assert queue.cleanup_stale_jobs(max_age_seconds=60) == 0
+
+        assert redis.llen(PROCESSING_QUEUE) == 1
+        assert redis.llen(DEAD_LETTER_QUEUE) == 0
+        assert redis.hget("donation_jobs:group:job-1", "failed") == "0"
+
+    def test_unstamped_job_starts_its_clock(self):
+        """Test a job with no stored pop time is timed from its first cleanup."""
+        redis = FakeRedis()
+        queue = JobQueue(redis)  # type: ignore[arg-type]
+        redis.lpush(PROCESSING_QUEUE, json.dumps({"job_id": "job-1"}))
+
+        assert queue.cleanup_stale_jobs(max_age_seconds=60) == 0
+        assert redis.hget(PROCESSING_STARTED_KEY, "job-1") is not None
+
+        redis.hset(PROCESSING_STARTED_KEY, "job-1", time.time() - 120)
+        assert queue.cleanup_stale_jobs(max_age_seconds=60) == 1
+        assert redis.llen(PROCESSING_QUEUE) == 0
+        assert redis.hget(PROCESSING_STARTED_KEY, "job-1") is None
+
+    def test_get_group_results_merges_in_part_order(self, redis_client):
+        """Test gathered results keep file-group order."""
+        queue = JobQueue(redis_client)
+        redis_client.hgetall.return_value = {
+            "10": json.dumps([{"id": "c"}]),
+            "2": json.dumps([{"id": "b"}]),
+            "0": json.dumps([{"id": "a"}]),
+        }
+
+        results = queue.get_group_results("job-1")
+
+        assert [r["id"] for r in results] == ["a", "b", "c"]
+
+
+class TestWorkerFanOut:
+    """Test worker dispatch of fan-out, extraction and gather jobs."""
+
+    @pytest.fixture
+    def worker(self):
+        """Create a worker without connecting to Redis."""
+        worker = Worker.__new__(Worker)
+        worker.job_queue = MagicMock()
+        worker.checkpoint_store = MagicMock()
+        worker.checkpoint_store.load_stage.return_value = None
+        worker.running = True
+        worker.current_job = None
+        return worker
+
+    @patch("src.worker.session_backend")
+    @patch("src.worker.storage_backend")
+    def test_large_upload_is_fanned_out(self, mock_storage, mock_session, worker):
+        """Test uploads above the group size are split into sub-jobs."""
+        mock_session.get_upload_metadata.return_value = {"status": "uploaded"}
+        mock_storage.list_files.return_value = [
+            {"filename": f"{i}_scan.jpg"} for i in range(12)
+        ]
+        worker.job_queue.fan_out.return_value = True
+        job = {"job_id": "job-1", "upload_id": "batch_1", "session_id": "s"}
+
+        assert worker.process_job(job)
+
+        groups = worker.job_queue.fan_out.call_args.args[1]
+        assert [len(group) for group in groups] == [5, 5, 2]
+        assert job["fanned_out"] is True
+
+    @patch("src.worker.process_donation_documents")
+    @patch("src.worker.session_backend")
+    @patch("src.worker.storage_backend")
+    def test_checkpointed_upload_resumes_in_place(
+        self, mock_storage, mock_session, mock_process, worker
+    ):
+        """Test uploads with checkpoints are not fanned out again."""
+        mock_session.get_upload_metadata.return_value = {"status": "uploaded"}
+        mock_storage.list_files.return_value = [
+            {"filename": f"{i}_scan.jpg"} for i in range(12)
+        ]
+        mock_storage.get_file_paths.return_value = []
+        worker.checkpoint_store.load_stage.return_value = {"donations": []}
+        mock_process.return_value = (
+            [],
+            {"valid_count": 0, "raw_count": 0, "duplicate_count": 0},
+            [],
+        )
+
+        assert worker.process_job({"job_id": "job-1", "upload_id": "batch_1"})
+
+        worker.job_queue.fan_out.assert_not_called()
+        mock_process.assert_called_once()
+
+    @patch("src.worker.extract_donations_from_documents")
+    @patch("src.worker.session_backend")
+    @patch("src.worker.storage_backend")
+    def test_extract_sub_job_records_result(
+        self, mock_storage, mock_session, mock_extract, worker
+    ):
+        """Test extraction sub-jobs extract only their files."""
+        mock_session.get_upload_metadata.return_value = {"status": "uploaded"}
+        mock_storage.get_file_path.side_effect = lambda u, f: f"/uploads/{u}/{f}"
+        mock_extract.return_value = [{"PaymentInfo": {"Payment_Ref": "1"}}]
+        sub_job = {
+            "job_id": "job-1:part0",
+            "parent_job_id": "job-1",
+            "upload_id": "batch_1",
+            "kind": JOB_KIND_EXTRACT,
+            "part": 0,
+            "filenames": ["0_a.jpg", "1_b.jpg"],
+        }
+
+        assert worker.process_job(sub_job)
+
+        paths = [str(p) for p in mock_extract.call_args.args[0]]
+        assert paths == ["/uploads/batch_1/0_a.jpg", "/uploads/batch_1/1_b.jpg"]
+        worker.job_queue.record_sub_job_result.assert_called_once_with(
+            sub_job, mock_extract.return_value
+        )
+
+    @patch("src.worker.process_donation_documents")
+    @patch("src.worker.session_backend")
+    @patch("src.worker.storage_backend")
+    def test_gather_merges_and_completes_upload(
+        self, mock_storage, mock_session, mock_process, worker
+    ):
+        """Test the gather job runs dedup and matching once on merged results."""
+        mock_session.get_upload_metadata.return_value = {"status": "uploaded"}
+        merged = [{"PaymentInfo": {"Payment_Ref": "1"}}]
+        worker.job_queue.get_group_results.return_value = merged
+        worker.job_queue.get_group_file_count.return_value = 12
+        mock_process.return_value = (
+            merged,
+            {"valid_count": 1, "raw_count": 1, "duplicate_count": 0},
+            [{"display": True}],
+        )
+
+        assert worker.process_job(
+            {"job_id": "job-1", "upload_id": "batch_1", "kind": JOB_KIND_GATHER}
+        )
+
+        worker.checkpoint_store.save_stage.assert_called_once_with(
+            "batch_1", JobStage.EXTRACTING, merged
+        )
+        assert mock_process.call_args.kwargs["upload_id"] == "batch_1"
+        update = mock_session.update_upload_metadata.call_args.args[1]
+        assert update["status"] == "completed"
+        assert update["processing_metadata"]["files_processed"] == 12
+        worker.job_queue.clear_group.assert_called_once_with("job-1")
@@ -0,0 +1,142 @@
+"""Tests for job-scoped memoization of customer lookups."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.customer_data_source import MemoizedDataSource
+from src.donation_processor import process_donation_documents
+
+
+@pytest.fixture
+def inner():
+    """Create a mock data source."""
+    data_source = MagicMock()
+    data_source.search_customer.side_effect = lambda term: [{"Id": term}]
+    data_source.get_customer.side_effect = lambda customer_id: {"Id": customer_id}
+    return data_source
+
+
+class TestMemoizedDataSource:
+    """Test memoization, single-flight and statistics."""
+
+    def test_repeated_lookups_hit(self, inner):
+        """Test each distinct lookup reaches the wrapped source once."""
+        data_source = MemoizedDataSource(inner)
+
+        assert data_source.search_customer("Smith") == [{"Id": "Smith"}]
+        assert data_source.search_customer("Smith") == [{"Id": "Smith"}]
+        data_source.search_customer("Jones")
+        data_source.get_customer("1")
+        data_source.get_customer("1")
+
+        assert inner.search_customer.call_count == 2
+        assert inner.get_customer.call_count == 1
+        stats = data_source.stats()
+        assert stats["search_hits"] == 1
+        assert stats["search_misses"] == 2
+        assert stats["get_hits"] == 1
+        assert stats["phonetic_misses"] == 0
+
+    def test_concurrent_lookups_share_one_call(self, inner):
+        """Test identical lookups in flight are coalesced."""
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_search(term):
+            started.set()
+            release.wait(5)
+            return [{"Id": term}]
+
+        inner.search_customer.side_effect = slow_search
+        data_source = MemoizedDataSource(inner)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(data_source.search_customer, "Smith") for _ in range(8)
+            ]
+            started.wait(5)
+            # Let the waiting threads queue up behind the first call
+            while data_source.stats()["search_coalesced"] < 7:
+                threading.Event().wait(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert inner.search_customer.call_count == 1
+        assert all(r is results[0] for r in results)
+
+    def test_failures_are_not_cached(self, inner):
+        """Test a failed lookup is retried by the next caller."""
+        inner.search_customer.side_effect = [RuntimeError("boom"), [{"Id": "1"}]]
+        data_source = MemoizedDataSource(inner)
+
+        with pytest.raises(RuntimeError):
+            data_source.search_customer("Smith")
+
+        assert data_source.search_customer("Smith") == [{"Id": "1"}]
+        assert inner.search_customer.call_count == 2
+
+    def test_create_forgets_searches(self, inner):
+        """Test creating a customer clears searches but keeps fetched records."""
+        data_source = MemoizedDataSource(inner)
+        data_source.search_customer("Smith")
+        data_source.get_customer("1")
+
+        data_source.create_customer({"DisplayName": "New Smith"})
+        data_source.search_customer("Smith")
+        data_source.get_customer("1")
+
+        assert inner.search_customer.call_count == 2
+        assert inner.get_customer.call_count == 1
+
+    def test_get_customers_fetches_unseen_ids_in_one_batch(self, inner):
+        """Test batched gets reuse fetched customers and skip unknown IDs."""
+        inner.get_customers.side_effect = lambda ids: [
+            {"Id": i} for i in ids if i != "404"
+        ]
+        data_source = MemoizedDataSource(inner)
+        data_source.get_customer("1")
+
+        customers = data_source.get_customers(["1", "2", "3", "404"])
+
+        assert customers == [{"Id": "1"}, {"Id": "2"}, {"Id": "3"}]
+        inner.get_customers.assert_called_once_with(["2", "3", "404"])
+        assert data_source.get_customer("2") == {"Id": "2"}
+        assert inner.get_customer.call_count == 1
+        # Unknown IDs are looked up again next time
+        data_source.get_customers(["404"])
+        assert inner.get_customers.call_count == 2
+
+    def test_get_customers_failure_is_raised(self, inner):
+        """Test a failed batch raises and caches nothing."""
+        inner.get_customers.side_effect = RuntimeError("boom")
+        data_source = MemoizedDataSource(inner)
+
+        with pytest.raises(RuntimeError):
+            data_source.get_customers(["1"])
+
+        assert data_source.get_customer("1") == {"Id": "1"}
+
+
+@patch("src.donation_processor.extract_donations_from_documents")
+@patch("src.donation_processor.DonationValidator")
+def test_lookup_stats_in_processing_metadata(mock_validator_class, mock_extract):
+    """Test repeated donors share lookups and the stats reach the metadata."""
+    donations = [
+        {"PayerInfo": {"Aliases": ["Pat Doe"]}, "PaymentInfo": {"Payment_Ref": str(i)}}
+        for i in range(3)
+    ]
+    mock_extract.return_value = donations
+    mock_validator_class.return_value.process_donations.return_value = donations
+    inner = MagicMock()
+    inner.search_customer.return_value = []
+    inner.phonetic_search.return_value = []
+
+    with patch("src.customer_matcher.create_customer_data_source", return_value=inner):
+        _, metadata, _ = process_donation_documents(["scan.jpg"], session_id="s")
+
+    stats = metadata["customer_lookups"]
+    assert stats["search_misses"] == inner.search_customer.call_count
+    assert stats["search_hits"] == 2 * inner.search_customer.call_count
+    assert stats["phonetic_hits"] == 2
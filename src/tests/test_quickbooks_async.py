@@ -0,0 +1,215 @@
+"""Tests for the asynchronous QuickBooks client."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.quickbooks_async import AsyncQuickBooksClient, AsyncQuickBooksHTTP
+from src.quickbooks_utils import QuickBooksError
+
+
+def response(status_code=200, body=None, headers=None):
+    """Build a fake httpx response."""
+    mock = MagicMock()
+    mock.status_code = status_code
+    mock.json.return_value = body if body is not None else {}
+    mock.text = str(body)
+    mock.headers = headers or {}
+    return mock
+
+
+class FakeAsyncClient:
+    """Stand-in for httpx.AsyncClient answering with queued responses."""
+
+    def __init__(self, responses=None, delay=0.0):
+        """Queue responses; an empty queue answers 200 with no entities."""
+        self.responses = list(responses or [])
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, method, url, **kwargs):
+        """Record the request and answer with the next queued response."""
+        headers = dict(kwargs.get("headers", {}))  # Sent as they are now
+        self.requests.append((method, url, dict(kwargs, headers=headers)))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return self.responses.pop(0) if self.responses else response()
+
+    async def aclose(self):
+        """Close nothing."""
+
+
+@pytest.fixture
+def mock_auth():
+    """Mock QuickBooks auth with tokens."""
+    with patch("src.quickbooks_async.QuickBooksAuth") as mock:
+        auth_instance = MagicMock()
+        auth_instance.get_valid_access_token.return_value = "fake-access-token"
+        auth_instance.get_auth_status.return_value = {
+            "authenticated": True,
+            "realm_id": "123456789",
+        }
+        mock.return_value = auth_instance
+        yield auth_instance
+
+
+def make_client(fake, **kwargs):
+    """Create an async client sending through a fake httpx client."""
+    http = AsyncQuickBooksHTTP(backoff_factor=0, client=fake, **kwargs)
+    return asyncio.run(AsyncQuickBooksClient.create("test-session", http))
+
+
+class TestAsyncQuickBooksHTTP:
+    """Test the async transport limits and retries calls."""
+
+    def test_calls_per_realm_are_limited(self):
+        """Test no more than realm_concurrency calls are in flight per realm."""
+        fake = FakeAsyncClient(delay=0.01)
+        http = AsyncQuickBooksHTTP(realm_concurrency=3, client=fake)
+
+        async def run():
+            await asyncio.gather(
+                *(http.request("1", "GET", "https://qbo/q") for _ in range(10)),
+                *(http.request("2", "GET", "https://qbo/q") for _ in range(10)),
+            )
+
+        asyncio.run(run())
+
+        assert len(fake.requests) == 20
+        assert fake.max_in_flight == 6
+        assert http.stats()["max_in_flight"] == 6
+
+    def test_server_errors_are_retried(self):
+        """Test reads are retried on 5xx, honoring Retry-After."""
+        fake = FakeAsyncClient(
+            [response(503, headers={"Retry-After": "0"}), response(502)]
+        )
+        http = AsyncQuickBooksHTTP(backoff_factor=0, client=fake)
+
+        result = asyncio.run(http.request("1", "GET", "https://qbo/q"))
+
+        assert result.status_code == 200
+        assert http.stats() == {"calls": 1, "requests_sent": 3, "max_in_flight": 1}
+
+    def test_creates_are_only_retried_when_rate_limited(self):
+        """Test POSTs are retried on 429 but never after a 5xx."""
+        fake = FakeAsyncClient([response(429), response(500)])
+        http = AsyncQuickBooksHTTP(backoff_factor=0, client=fake)
+
+        result = asyncio.run(http.request("1", "POST", "https://qbo/c", json={}))
+
+        assert result.status_code == 500
+        assert len(fake.requests) == 2
+
+    def test_retry_after_is_capped(self):
+        """Test long Retry-After waits are shortened."""
+        http = AsyncQuickBooksHTTP(client=FakeAsyncClient())
+
+        wait = http._retry_wait(response(429, headers={"Retry-After": "3600"}), 0)
+
+        assert wait == 30
+
+
+class TestAsyncQuickBooksClient:
+    """Test async QuickBooks API operations."""
+
+    def test_search_customers_runs_concurrently(self, mock_auth):
+        """Test searches share one token read and run side by side."""
+        fake = FakeAsyncClient(delay=0.01)
+        client = make_client(fake)
+
+        results = asyncio.run(client.search_customers(["Smith", "Jones", "Smith"]))
+
+        assert list(results) == ["Smith", "Jones"]
+        assert fake.max_in_flight == 2
+        assert mock_auth.get_valid_access_token.call_count == 1
+        method, url, kwargs = fake.requests[0]
+        assert url == (
+            "https://sandbox-quickbooks.api.intuit.com/v3/company/123456789/query"
+        )
+        assert kwargs["headers"]["Authorization"] == "Bearer fake-access-token"
+        assert "DisplayName like '%Smith%'" in kwargs["params"]["query"]
+
+    def test_get_customers_batches_ids(self, mock_auth):
+        """Test customer IDs are fetched in concurrent batches."""
+        fake = FakeAsyncClient(
+            [
+                response(body={"QueryResponse": {"Customer": [{"Id": "1"}]}}),
+                response(body={"QueryResponse": {"Customer": [{"Id": "101"}]}}),
+            ]
+        )
+        client = make_client(fake)
+
+        customers = asyncio.run(client.get_customers([str(i) for i in range(150)]))
+
+        assert [c["Id"] for c in customers] == ["1", "101"]
+        assert len(fake.requests) == 2
+
+    def test_concurrent_401s_refresh_once(self, mock_auth):
+        """Test calls rejected with the same token trigger one refresh."""
+        mock_auth.get_valid_access_token.side_effect = ["old-token", "new-token"]
+        fake = FakeAsyncClient([response(401), response(401)], delay=0.01)
+        client = make_client(fake)
+
+        async def run():
+            return await asyncio.gather(client.list_items(), client.list_items())
+
+        assert asyncio.run(run()) == [[], []]
+        assert mock_auth.refresh_access_token.call_count == 1
+        tokens = [kwargs["headers"]["Authorization"] for _, _, kwargs in fake.requests]
+        assert tokens == ["Bearer old-token"] * 2 + ["Bearer new-token"] * 2
+
+    def test_create_sales_receipts_reports_each_result(self, mock_auth):
+        """Test a failed receipt does not stop the others."""
+        fake = FakeAsyncClient(
+            [
+                response(body={"SalesReceipt": {"Id": "9"}}),
+                response(400, body={"Fault": "bad"}),
+            ]
+        )
+        client = make_client(fake)
+        receipt = {
+            "CustomerRef": {"value": "1"},
+            "Line": [{"Amount": 10}],
+            "DepositToAccountRef": {"value": "2"},
+        }
+
+        results = asyncio.run(client.create_sales_receipts([receipt, receipt]))
+
+        assert results[0] == {"Id": "9"}
+        assert isinstance(results[1], QuickBooksError)
+        assert results[1].status_code == 400
+
+    def test_unauthenticated_session_is_rejected(self, mock_auth):
+        """Test clients need a session connected to a company."""
+        mock_auth.get_auth_status.return_value = {"authenticated": False}
+
+        with pytest.raises(QuickBooksError):
+            make_client(FakeAsyncClient())
+
+    def test_requests_through_httpx(self, mock_auth):
+        """Test calls go out through a real httpx client."""
+        httpx = pytest.importorskip("httpx")
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200, json={"QueryResponse": {"Item": [{"Id": "1"}]}})
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with AsyncQuickBooksHTTP(
+                client=httpx.AsyncClient(transport=transport)
+            ) as http:
+                client = await AsyncQuickBooksClient.create("test-session", http)
+                return await client.list_items()
+
+        assert asyncio.run(run()) == [{"Id": "1"}]
+        assert sent[0].url.path == "/v3/company/123456789/query"
+        assert sent[0].headers["Authorization"] == "Bearer fake-access-token"
@@ -0,0 +1,125 @@
+"""Tests for pooled QuickBooks API connections."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.quickbooks_http import MAX_RETRY_AFTER, QuickBooksHTTP, QuickBooksRetry
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering with the server's queued statuses."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        """Send the next queued status (200 once the queue is empty)."""
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.requests.append(self.command)
+        status, headers = (
+            self.server.responses.pop(0) if self.server.responses else (200, {})
+        )
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def server():
+    """Serve HTTP on a local port for the duration of a test."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    httpd.responses = []
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def url(server):
+    """URL of the local server."""
+    return f"http://127.0.0.1:{server.server_address[1]}/v3/company/1/query"
+
+
+class TestQuickBooksHTTP:
+    """Test calls share pooled connections and retry transient failures."""
+
+    def test_connections_are_reused(self, url):
+        """Test sequential calls from several threads share connections."""
+        http = QuickBooksHTTP(backoff_factor=0)
+
+        for _ in range(3):
+            assert http.request("GET", url).status_code == 200
+        worker = threading.Thread(target=lambda: http.request("GET", url))
+        worker.start()
+        worker.join()
+
+        stats = http.stats()
+        assert stats["calls"] == 4
+        assert stats["requests_sent"] == 4
+        assert stats["connections_opened"] == 1
+        assert stats["reuse_rate"] == 0.75
+
+    def test_server_errors_are_retried(self, server, url):
+        """Test idempotent calls are retried on 5xx, honoring Retry-After."""
+        server.responses = [(503, {"Retry-After": "0"}), (502, {})]
+        http = QuickBooksHTTP(backoff_factor=0)
+
+        response = http.request("GET", url)
+
+        assert response.status_code == 200
+        assert server.requests == ["GET", "GET", "GET"]
+
+    def test_creates_are_only_retried_when_rate_limited(self, server, url):
+        """Test POSTs are retried on 429 but never after a 5xx."""
+        server.responses = [(429, {"Retry-After": "0"}), (500, {})]
+        http = QuickBooksHTTP(backoff_factor=0)
+
+        response = http.request("POST", url, json={})
+
+        assert response.status_code == 500
+        assert server.requests == ["POST", "POST"]
+
+    def test_exhausted_retries_return_last_response(self, server, url):
+        """Test the final error response is returned for the caller to handle."""
+        server.responses = [(503, {})] * 3
+        http = QuickBooksHTTP(retries=2, backoff_factor=0)
+
+        assert http.request("GET", url).status_code == 503
+        assert len(server.requests) == 3
+
+    def test_default_timeout(self):
+        """Test calls get the pool's timeouts unless given their own."""
+        http = QuickBooksHTTP(timeout=(1, 2))
+        session = MagicMock()
+        http._local.session = session
+
+        http.request("GET", "https://example.com")
+        http.request("GET", "https://example.com", timeout=9)
+
+        timeouts = [c.kwargs["timeout"] for c in session.request.call_args_list]
+        assert timeouts == [(1, 2), 9]
+
+
+def test_retry_after_is_capped():
+    """Test long Retry-After waits are shortened."""
+    response = MagicMock()
+    response.headers = {"Retry-After": "3600"}
+
+    assert QuickBooksRetry(total=3).get_retry_after(response) == MAX_RETRY_AFTER
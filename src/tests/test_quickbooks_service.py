@@ -3,7 +3,12 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.quickbooks_service import QuickBooksClient, QuickBooksError
+from src.quickbooks_auth import QuickBooksAuth
+from src.quickbooks_service import (
+    QuickBooksClient,
+    QuickBooksClientCache,
+    QuickBooksError,
+)
 
 
 class TestQuickBooksClient:
@@ -86,7 +91,7 @@ class TestQuickBooksClient:
                 == "https://quickbooks.api.intuit.com/v3/company/123456789"
             )
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_search_customer_by_name(
         self, mock_request, client, sample_customer_response
     ):
@@ -115,7 +120,7 @@ class TestQuickBooksClient:
         assert len(results) == 1
         assert results[0]["DisplayName"] == "John Smith"
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_search_customer_no_results(self, mock_request, client):
         """Test searching when no customers found."""
         mock_response = MagicMock()
@@ -126,7 +131,7 @@ class TestQuickBooksClient:
         results = client.search_customer("Nonexistent Person")
         assert results == []
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_search_customer_multiple_results(self, mock_request, client):
         """Test searching returns multiple matches."""
         mock_response = MagicMock()
@@ -145,7 +150,7 @@ class TestQuickBooksClient:
         results = client.search_customer("John Smith")
         assert len(results) == 3
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_search_customer_api_error(self, mock_request, client):
         """Test handling API errors during search."""
         mock_response = MagicMock()
@@ -157,7 +162,7 @@ class TestQuickBooksClient:
             client.search_customer("John Smith")
         assert "401" in str(exc_info.value)
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_get_customer(self, mock_request, client, sample_customer_response):
         """Test retrieving full customer details."""
         mock_response = MagicMock()
@@ -175,7 +180,7 @@ class TestQuickBooksClient:
         assert customer["Id"] == "1"
         assert customer["DisplayName"] == "John Smith"
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_get_customer_not_found(self, mock_request, client):
         """Test handling when customer not found."""
         mock_response = MagicMock()
@@ -187,6 +192,25 @@ class TestQuickBooksClient:
             client.get_customer("999")
         assert "404" in str(exc_info.value)
 
+    @patch("requests.Session.request")
+    def test_get_customers_batches_ids(self, mock_request, client):
+        """Test several customers are fetched with batched Id IN queries."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "QueryResponse": {"Customer": [{"Id": "1"}, {"Id": "2"}]}
+        }
+        mock_request.return_value = mock_response
+
+        with patch("src.quickbooks_service.CUSTOMER_ID_BATCH_SIZE", 2):
+            customers = client.get_customers(["1", "2", "3"])
+
+        assert mock_request.call_count == 2
+        first_query = mock_request.call_args_list[0][1]["params"]["query"]
+        assert "where Id in ('1', '2') MAXRESULTS 2" in first_query
+        assert "Id in ('3')" in mock_request.call_args[1]["params"]["query"]
+        assert len(customers) == 4
+
     def test_format_customer_data_individual(self, client, sample_customer_response):
         """Test formatting individual customer data to PRD structure."""
         customer = sample_customer_response["Customer"]
@@ -275,7 +299,7 @@ class TestQuickBooksClient:
         formatted = client.format_customer_data(customer)
         assert formatted["qb_address"]["zip"] == "00501"
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_token_refresh_on_401(self, mock_request, client, mock_auth):
         """Test automatic token refresh on 401 error."""
         # First call returns 401
@@ -300,6 +324,34 @@ class TestQuickBooksClient:
         mock_auth.refresh_access_token.assert_called_once()
         assert mock_request.call_count == 2
 
+    @patch("requests.Session.request")
+    def test_access_token_reused_between_calls(self, mock_request, client, mock_auth):
+        """Test one token read serves a client's calls for a few minutes."""
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {"QueryResponse": {}}
+
+        client.search_customer("Test")
+        client.search_customer("Test")
+        assert mock_auth.get_valid_access_token.call_count == 1
+
+        with patch("src.quickbooks_service.time.monotonic", return_value=1e9):
+            client.search_customer("Test")
+        assert mock_auth.get_valid_access_token.call_count == 2
+
+    @patch("requests.Session.request")
+    def test_refreshed_token_is_read_again(self, mock_request, client, mock_auth):
+        """Test the retry after a 401 uses the refreshed token, not the reused one."""
+        unauthorized = MagicMock(status_code=401)
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"QueryResponse": {}}
+        mock_request.side_effect = [unauthorized, ok]
+        mock_auth.get_valid_access_token.side_effect = ["old-token", "new-token"]
+
+        client.search_customer("Test")
+
+        headers = mock_request.call_args_list[1][1]["headers"]
+        assert headers["Authorization"] == "Bearer new-token"
+
     # Tests for create_customer method
     def test_create_customer_success(self, client, mock_auth):
         """Test successful customer creation via QuickBooksClient."""
@@ -430,3 +482,83 @@ class TestQuickBooksClient:
             mock_make_request.assert_called_with(
                 "POST", "/customer", json=expected_payload_strict
             )
+
+
+class TestQuickBooksClientCache:
+    """Test live clients are reused across a session's requests."""
+
+    @pytest.fixture
+    def mock_auth(self):
+        """Mock QuickBooks auth for a connected session."""
+        with patch("src.quickbooks_service.QuickBooksAuth") as mock:
+            auth_instance = MagicMock()
+            auth_instance.get_auth_status.return_value = {
+                "authenticated": True,
+                "realm_id": "123456789",
+            }
+            mock.return_value = auth_instance
+            yield auth_instance
+
+    def test_session_reuses_client(self, mock_auth):
+        """Test repeated requests skip client setup."""
+        cache = QuickBooksClientCache()
+
+        first = cache.get("session-1")
+        second = cache.get("session-1")
+
+        assert first is second
+        assert mock_auth.get_auth_status.call_count == 1
+        assert cache.get("session-2") is not first
+        assert cache.stats() == {"size": 2, "hits": 1, "misses": 2}
+
+    def test_clients_expire(self, mock_auth):
+        """Test clients are rebuilt after the TTL."""
+        cache = QuickBooksClientCache(ttl=60)
+        first = cache.get("session-1")
+
+        with patch("src.quickbooks_service.time.monotonic", return_value=1e9):
+            assert cache.get("session-1") is not first
+
+    def test_least_recently_used_is_evicted(self, mock_auth):
+        """Test the cache holds at most max_size clients."""
+        cache = QuickBooksClientCache(max_size=2)
+        first = cache.get("session-1")
+        cache.get("session-2")
+        cache.get("session-1")
+        cache.get("session-3")
+
+        assert cache.get("session-1") is first
+        assert cache.stats()["size"] == 2
+        assert mock_auth.get_auth_status.call_count == 3
+
+    def test_unauthenticated_sessions_are_not_kept(self, mock_auth):
+        """Test sessions without tokens raise every time."""
+        mock_auth.get_auth_status.return_value = {"authenticated": False}
+        cache = QuickBooksClientCache()
+
+        for _ in range(2):
+            with pytest.raises(QuickBooksError):
+                cache.get("session-1")
+        assert cache.stats()["size"] == 0
+
+    def test_token_changes_drop_client(self, mock_auth):
+        """Test storing or revoking a session's tokens drops its client."""
+        cache = QuickBooksClientCache()
+        first = cache.get("session-1")
+        other = cache.get("session-2")
+        auth = QuickBooksAuth.__new__(QuickBooksAuth)
+        auth.cipher_suite = MagicMock()
+        auth.cipher_suite.encrypt.return_value = b"encrypted"
+
+        with patch("src.quickbooks_auth.session_backend"):
+            auth._store_tokens("session-1", {"access_token": "new"})
+        second = cache.get("session-1")
+        assert second is not first
+        assert cache.get("session-2") is other
+
+        auth.auth_client = MagicMock()
+        with patch.object(
+            auth, "_get_tokens", return_value={"refresh_token": "r"}
+        ), patch("src.quickbooks_auth.session_backend"):
+            auth.revoke_tokens("session-1")
+        assert cache.get("session-1") is not second
@@ -0,0 +1,179 @@
+"""Tests for the confirmed match resolution memory."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.fakes import FakeRedis
+from src.customer_matcher import CustomerMatcher
+from src.final_display_merger import merge_donation_for_display
+from src.resolution_memory import (
+    LocalResolutionMemory,
+    RedisResolutionMemory,
+    payer_fingerprints,
+)
+
+REALM_ID = "realm-1"
+
+DONATION = {
+    "PayerInfo": {"Aliases": ["John Smith", "J. Smith"]},
+    "ContactInfo": {"Address_Line_1": "123 Main St", "ZIP": "94025"},
+}
+
+
+@pytest.fixture(params=["local", "redis"])
+def memory(request, tmp_path):
+    """Create each memory backend."""
+    if request.param == "redis":
+        return RedisResolutionMemory(FakeRedis())  # type: ignore[arg-type]
+    return LocalResolutionMemory(str(tmp_path / "memory"))
+
+
+class TestPayerFingerprints:
+    """Test payer fingerprints."""
+
+    def test_spelling_variants_share_fingerprints(self):
+        """Test alias order, case and punctuation do not matter."""
+        variant = {
+            "PayerInfo": {"Aliases": ["j smith", "JOHN SMITH"]},
+            "ContactInfo": {"Address_Line_1": "123 Main Street", "ZIP": "94025-1234"},
+        }
+
+        assert payer_fingerprints(variant) == payer_fingerprints(DONATION)
+
+    def test_names_alone_only_without_address(self):
+        """Test payers with an address are not remembered by names alone."""
+        names_only = {"PayerInfo": DONATION["PayerInfo"]}
+
+        with_address = payer_fingerprints(DONATION)
+
+        assert len(with_address) == 1
+        assert len(payer_fingerprints(names_only)) == 1
+        assert with_address != payer_fingerprints(names_only)
+
+    def test_payer_without_names_has_no_fingerprints(self):
+        """Test anonymous payers are never remembered."""
+        assert payer_fingerprints({"ContactInfo": DONATION["ContactInfo"]}) == []
+
+    def test_display_donations_carry_fingerprints(self):
+        """Test confirmations from the UI can be fingerprinted."""
+        display = merge_donation_for_display(DONATION)
+
+        assert display["_payer_fingerprints"] == payer_fingerprints(DONATION)
+
+
+class TestResolutionMemory:
+    """Test remembered matches on both backends."""
+
+    def test_remember_and_recall(self, memory):
+        """Test a remembered match is recalled by any of its fingerprints."""
+        fingerprints = payer_fingerprints(DONATION) + ["other"]
+
+        assert memory.remember(REALM_ID, fingerprints, "42")
+
+        assert memory.recall(REALM_ID, fingerprints) == "42"
+        assert memory.recall(REALM_ID, fingerprints[1:]) == "42"
+        assert memory.recall("realm-2", fingerprints) is None
+
+    def test_most_specific_fingerprint_wins(self, memory):
+        """Test the first fingerprint with an entry wins."""
+        specific, general = "specific", "general"
+        memory.remember(REALM_ID, [general], "1")
+        memory.remember(REALM_ID, [specific], "2")
+
+        assert memory.recall(REALM_ID, [specific, general]) == "2"
+
+    def test_forget(self, memory):
+        """Test forgotten matches are no longer recalled."""
+        fingerprints = payer_fingerprints(DONATION)
+        memory.remember(REALM_ID, fingerprints, "42")
+
+        assert memory.forget(REALM_ID, fingerprints)
+
+        assert memory.recall(REALM_ID, fingerprints) is None
+
+
+def test_memory_errors_are_not_raised():
+    """Test a failing Redis memory recalls nothing instead of raising."""
+    redis = MagicMock()
+    redis.hmget.side_effect = ValueError("bad reply")
+    memory = RedisResolutionMemory(redis)
+
+    assert memory.recall(REALM_ID, payer_fingerprints(DONATION)) is None
+
+
+class TestRememberedMatching:
+    """Test the matcher resolves remembered payers before searching."""
+
+    @pytest.fixture
+    def matcher(self, tmp_path):
+        """Create a matcher over a CSV customer list treated as a realm."""
+        path = tmp_path / "customers.csv"
+        path.write_text(
+            "Customer,First Name,Last Name,Billing Street,Billing ZIP\n"
+            "Johnny Smith,Johnny,Smith,,\n"
+            "Mary Jones,Mary,Jones,,\n"
+            "John Smith,John,Smith,9 Oak Ave,10001\n"
+        )
+        memory = LocalResolutionMemory(str(tmp_path / "memory"))
+        matcher = CustomerMatcher(csv_path=path, memory=memory)
+        matcher.data_source.get_realm_id = MagicMock(return_value=REALM_ID)
+        return matcher
+
+    def test_remembered_payer_skips_searches(self, matcher):
+        """Test a confirmed payer resolves with no name lookups."""
+        assert matcher.remember_match(payer_fingerprints(DONATION), "CSV-001")
+        matcher.data_source.search_customer = MagicMock(return_value=[])
+        matcher.data_source.phonetic_search = MagicMock(return_value=[])
+
+        result = matcher.match_donation_to_customer(DONATION)
+
+        assert result["customer_ref"]["id"] == "CSV-001"
+        matcher.data_source.search_customer.assert_not_called()
+        matcher.data_source.phonetic_search.assert_not_called()
+        assert matcher.lookup_stats()["remembered"] == 1
+
+    def test_namesake_at_another_address_is_searched(self, matcher):
+        """Test a donor sharing a remembered donor's name is not resolved to them."""
+        namesake = {
+            "PayerInfo": DONATION["PayerInfo"],
+            "ContactInfo": {"Address_Line_1": "9 Oak Ave", "ZIP": "10001"},
+        }
+        matcher.remember_match(payer_fingerprints(namesake), "CSV-003")
+
+        remembered = matcher.match_donation_to_customer(namesake)
+        matcher.match_donation_to_customer(DONATION)
+
+        assert remembered["customer_ref"]["id"] == "CSV-003"
+        assert matcher.lookup_stats()["remembered"] == 1
+
+    def test_remembered_customer_must_still_match(self, matcher):
+        """Test a remembered customer at a different address is not used."""
+        matcher.remember_match(payer_fingerprints(DONATION), "CSV-003")
+
+        matcher.match_donation_to_customer(DONATION)
+
+        assert matcher.lookup_stats()["remembered"] == 0
+        assert matcher.memory.recall(REALM_ID, payer_fingerprints(DONATION))
+
+    def test_removed_customer_is_forgotten(self, matcher):
+        """Test a match to a customer that no longer exists is dropped."""
+        fingerprints = payer_fingerprints(DONATION)
+        matcher.remember_match(fingerprints, "CSV-999")
+
+        result = matcher.match_donation_to_customer(DONATION)
+
+        assert result["customer_ref"]["id"] == "CSV-001"
+        assert matcher.memory.recall(REALM_ID, fingerprints) is None
+
+    def test_sources_without_realm_remember_nothing(self, tmp_path):
+        """Test plain CSV customer lists do not use the memory."""
+        path = tmp_path / "customers.csv"
+        path.write_text("Customer,First Name,Last Name\nJohn Smith,John,Smith\n")
+        memory = MagicMock()
+        matcher = CustomerMatcher(csv_path=path, memory=memory)
+
+        assert not matcher.remember_match(payer_fingerprints(DONATION), "CSV-001")
+        matcher.match_donation_to_customer(DONATION)
+
+        memory.remember.assert_not_called()
+        memory.recall.assert_not_called()
@@ -0,0 +1,119 @@
+"""Tests for cost-based search planning."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.customer_matcher import CustomerMatcher
+from src.search_planner import SearchPlanner, is_redundant, variation_kind
+
+VARIATIONS = ["John Smith", "Smith, John", "Smith", "J. Smith", "Smith, J."]
+
+
+def test_variation_kinds():
+    """Test each generated variation is classified."""
+    assert [variation_kind(term) for term in VARIATIONS] == [
+        "full_name",
+        "reversed",
+        "surname",
+        "initial",
+        "initial",
+    ]
+    assert variation_kind("Grace Church", "Grace Church") == "organization"
+
+
+def test_redundant_terms():
+    """Test terms containing a completely searched term are redundant."""
+    assert is_redundant("J. Smith", ["smith"])
+    assert is_redundant("Smith, John", ["smith"])
+    assert not is_redundant("Smith", ["john smith"])
+    assert not is_redundant("Smith", [])
+
+
+class TestSearchPlanner:
+    """Test the order search variations run in."""
+
+    def test_broad_terms_run_last_by_default(self):
+        """Test the prior puts the surname-only search last."""
+        plan = SearchPlanner().plan(VARIATIONS)
+
+        assert [term for term, _ in plan] == [
+            "John Smith",
+            "Smith, John",
+            "J. Smith",
+            "Smith, J.",
+            "Smith",
+        ]
+
+    def test_estimates_reorder_and_drop_terms(self):
+        """Test selective terms move first and terms with no results are dropped."""
+        estimates = {"John Smith": 0, "Smith": 1}
+
+        plan = SearchPlanner().plan(VARIATIONS, estimate=lambda t: estimates.get(t, 5))
+
+        terms = [term for term, _ in plan]
+        assert terms[0] == "Smith"
+        assert "John Smith" not in terms
+
+    def test_learned_hit_rates_reorder_terms(self):
+        """Test kinds that keep finding the match move first."""
+        planner = SearchPlanner()
+        for _ in range(50):
+            planner.record("full_name", False)
+            planner.record("reversed", True)
+
+        plan = planner.plan(VARIATIONS)
+
+        assert plan[0] == ("Smith, John", "reversed")
+        assert planner.hit_rate("reversed") > planner.hit_rate("full_name")
+
+
+class TestPlannedMatching:
+    """Test the matcher runs planned searches."""
+
+    @pytest.fixture
+    def data_source(self):
+        """Create a data source where only the surname is selective."""
+        data_source = MagicMock()
+        data_source.phonetic_search.return_value = []
+        data_source.contact_search.return_value = []
+        data_source.customer_table.return_value = None
+        data_source.get_realm_id.return_value = None
+        data_source.search_customer.return_value = []
+        data_source.estimate_results.side_effect = lambda t: 1 if t == "Smith" else 5
+        return data_source
+
+    def make_matcher(self, data_source, plan_searches=True):
+        """Create a matcher over the data source with a fresh planner."""
+        with patch(
+            "src.customer_matcher.create_customer_data_source",
+            return_value=data_source,
+        ):
+            matcher = CustomerMatcher(plan_searches=plan_searches)
+        if plan_searches:
+            matcher.planner = SearchPlanner()
+        return matcher
+
+    def test_complete_search_skips_narrower_terms(self, data_source):
+        """Test an empty surname search leaves nothing to search for."""
+        matcher = self.make_matcher(data_source)
+
+        matcher.match_donation_to_customer(
+            {"PayerInfo": {"Aliases": ["John Smith", "J. Smith"]}}
+        )
+
+        data_source.search_customer.assert_called_once_with("Smith")
+        stats = matcher.lookup_stats()
+        assert stats["searches_run"] == 1
+        assert stats["searches_skipped"] == 4
+
+    def test_unplanned_searches_run_in_generated_order(self, data_source):
+        """Test disabling planning runs every variation in order."""
+        matcher = self.make_matcher(data_source, plan_searches=False)
+
+        matcher.match_donation_to_customer(
+            {"PayerInfo": {"Aliases": ["John Smith", "J. Smith"]}}
+        )
+
+        searched = [c.args[0] for c in data_source.search_customer.call_args_list]
+        assert searched == VARIATIONS
+        assert matcher.lookup_stats()["searches_skipped"] == 0
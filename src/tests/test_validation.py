@@ -1,4 +1,6 @@
 """Tests for donation validation and deduplication logic."""
+import logging
+
 import pytest
 
 from src.validation import DonationValidator
@@ -283,3 +285,77 @@ class TestDonationValidator:
             entry["ContactInfo"]["City"] == "New York"
         )  # From second entry, proper case
         assert entry["ContactInfo"]["State"] == "NY"  # From second entry
+
+    def test_process_donations_validates_before_keying(self, validator):
+        """Test that dedup keys use the cleaned check number and amount."""
+        raw_entries = [
+            {
+                "PaymentInfo": {
+                    "Payment_Ref": "0001234",
+                    "Payment_Method": "printed check",
+                    "Amount": "50",
+                },
+                "PayerInfo": {"Aliases": ["JANE DOE"]},
+            },
+            {
+                "PaymentInfo": {"Payment_Ref": "1234", "Amount": 50.0},
+                "PayerInfo": {"Aliases": ["Jane Doe"]},
+            },
+            {"PaymentInfo": {"Payment_Ref": "999", "Amount": "not a number"}},
+        ]
+
+        result = validator.process_donations(raw_entries)
+
+        assert len(result) == 1
+        assert result[0]["PaymentInfo"]["Payment_Ref"] == "1234"
+        assert result[0]["PaymentInfo"]["Amount"] == 50.0
+        assert result[0]["PayerInfo"]["Aliases"] == ["Jane Doe"]
+
+    def test_dedup_key(self, validator):
+        """Test dedup key construction and invalid entry detection."""
+        assert validator.dedup_key(
+            {"PaymentInfo": {"Payment_Ref": "00123", "Amount": "10"}}
+        ) == ("123", 10.0)
+        assert validator.dedup_key({"PaymentInfo": {"Payment_Ref": "A1"}}) is None
+        assert validator.dedup_key({"PaymentInfo": "bad"}) is None
+
+    def test_custom_rule_table(self):
+        """Test that a custom rule table only applies its own rules."""
+        validator = DonationValidator(
+            rules=({"section": "ContactInfo", "field": "Phone", "normalizer": "phone"},)
+        )
+        entry = {
+            "PayerInfo": {"Aliases": ["JOHN SMITH"]},
+            "ContactInfo": {"Phone": "(555) 123-4567"},
+        }
+
+        validated = validator.validate_entry(entry)
+
+        assert validated["ContactInfo"]["Phone"] == "5551234567"
+        assert validated["PayerInfo"]["Aliases"] == ["JOHN SMITH"]
+
+    def test_unknown_normalizer_rejected(self):
+        """Test that rules naming an unknown normalizer fail at compile time."""
+        with pytest.raises(ValueError, match="Unknown normalizer"):
+            DonationValidator(
+                rules=({"section": "PayerInfo", "field": "X", "normalizer": "nope"},)
+            )
+
+    def test_rule_timings_collected_in_debug_mode(self, validator, caplog):
+        """Test that per-rule timings are recorded when DEBUG logging is on."""
+        with caplog.at_level(logging.DEBUG, logger="src.validation"):
+            validator.process_donations(
+                [{"PaymentInfo": {"Payment_Ref": "1", "Amount": "5"}}]
+            )
+
+        assert "PaymentInfo.Amount" in validator.rule_timings
+        assert any("rule timings" in record.message for record in caplog.records)
+
+    def test_rule_timings_skipped_without_debug(self, validator, caplog):
+        """Test that timings are not collected at INFO level."""
+        with caplog.at_level(logging.INFO, logger="src.validation"):
+            validator.process_donations(
+                [{"PaymentInfo": {"Payment_Ref": "1", "Amount": "5"}}]
+            )
+
+        assert dict(validator.rule_timings) == {}
@@ -1,40 +1,203 @@
 """Validation and deduplication logic for donation entries."""
+import logging
 import re
+import time
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Payment methods whose Payment_Ref is a check number
+CHECK_PAYMENT_METHODS = frozenset({"handwritten check", "printed check"})
+
+# Words with fixed casing when converting ALL CAPS text
+PROPER_CASE_SPECIAL_CASES = {
+    "PO": "PO",
+    "LLC": "LLC",
+    "INC": "Inc",
+    "JR": "Jr",
+    "SR": "Sr",
+    "II": "II",
+    "III": "III",
+    "IV": "IV",
+}
+
+_ZIP_DISALLOWED_RE = re.compile(r"[^\d-]")
+_NON_DIGIT_RE = re.compile(r"\D")
+
+# Declarative per-field validation rules, applied in order.
+#   section:    top-level entry key holding the field
+#   field:      field name inside the section
+#   normalizer: name of a DonationValidator normalizer (see _NORMALIZERS)
+#   skip_empty: only normalize truthy values
+#   each:       value is a list; normalize each item
+#   when:       predicate on the section dict that must hold for the rule to run
+FIELD_RULES: Tuple[Dict[str, Any], ...] = (
+    {
+        "section": "PaymentInfo",
+        "field": "Payment_Ref",
+        "normalizer": "check_number",
+        "when": lambda section: section.get("Payment_Method") in CHECK_PAYMENT_METHODS,
+    },
+    {"section": "PaymentInfo", "field": "Amount", "normalizer": "amount"},
+    {
+        "section": "PayerInfo",
+        "field": "Salutation",
+        "normalizer": "proper_case",
+        "skip_empty": True,
+    },
+    {
+        "section": "PayerInfo",
+        "field": "Organization_Name",
+        "normalizer": "proper_case",
+        "skip_empty": True,
+    },
+    {
+        "section": "PayerInfo",
+        "field": "Aliases",
+        "normalizer": "proper_case",
+        "each": True,
+    },
+    {
+        "section": "ContactInfo",
+        "field": "Address_Line_1",
+        "normalizer": "proper_case",
+        "skip_empty": True,
+    },
+    {
+        "section": "ContactInfo",
+        "field": "City",
+        "normalizer": "proper_case",
+        "skip_empty": True,
+    },
+    {"section": "ContactInfo", "field": "ZIP", "normalizer": "zip_code"},
+    {
+        "section": "ContactInfo",
+        "field": "Phone",
+        "normalizer": "phone",
+        "skip_empty": True,
+    },
+)
+
+
+class CompiledRule:
+    """A field rule resolved to its normalizer callable."""
+
+    __slots__ = ("name", "field", "normalize", "skip_empty", "each", "when")
+
+    def __init__(
+        self,
+        name: str,
+        field: str,
+        normalize: Callable[[Any], Any],
+        skip_empty: bool = False,
+        each: bool = False,
+        when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ):
+        """Store the resolved rule attributes."""
+        self.name = name
+        self.field = field
+        self.normalize = normalize
+        self.skip_empty = skip_empty
+        self.each = each
+        self.when = when
+
+    def apply(self, section: Dict[str, Any]) -> None:
+        """Normalize this rule's field in place if the rule applies."""
+        if self.field not in section:
+            return
+        value = section[self.field]
+        if self.skip_empty and not value:
+            return
+        if self.when is not None and not self.when(section):
+            return
+        if self.each:
+            if isinstance(value, list):
+                section[self.field] = [self.normalize(item) for item in value]
+            return
+        section[self.field] = self.normalize(value)
+
+
+def _to_amount(value: Any) -> Optional[float]:
+    """Coerce an amount to float, or None if it cannot be parsed."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _digits_only(value: str) -> str:
+    """Strip every non-digit character (basic phone cleanup)."""
+    return _NON_DIGIT_RE.sub("", value)
 
 
 class DonationValidator:
     """Handles validation and deduplication of donation entries."""
 
+    def __init__(self, rules: Tuple[Dict[str, Any], ...] = FIELD_RULES):
+        """
+        Compile the field rule table once for this validator.
+
+        Args:
+            rules: Declarative field rules (defaults to FIELD_RULES)
+        """
+        self.compiled_rules = self.compile_rules(rules)
+        # Cumulative seconds spent per rule; only collected at DEBUG level
+        self.rule_timings: Dict[str, float] = defaultdict(float)
+
+    @classmethod
+    def compile_rules(
+        cls, rules: Tuple[Dict[str, Any], ...]
+    ) -> Dict[str, List[CompiledRule]]:
+        """
+        Resolve rule definitions into normalizer callables grouped by section.
+
+        Args:
+            rules: Declarative field rules
+
+        Returns:
+            Mapping of section name to its ordered compiled rules
+
+        Raises:
+            ValueError: If a rule names an unknown normalizer
+        """
+        normalizers: Dict[str, Callable[[Any], Any]] = {
+            "check_number": cls.clean_check_number,
+            "amount": _to_amount,
+            "proper_case": cls.convert_to_proper_case,
+            "zip_code": cls.normalize_zip_code,
+            "phone": _digits_only,
+        }
+
+        compiled: Dict[str, List[CompiledRule]] = {}
+        for rule in rules:
+            normalizer_name = rule["normalizer"]
+            if normalizer_name not in normalizers:
+                raise ValueError(f"Unknown normalizer: {normalizer_name}")
+
+            compiled.setdefault(rule["section"], []).append(
+                CompiledRule(
+                    name=f"{rule['section']}.{rule['field']}",
+                    field=rule["field"],
+                    normalize=normalizers[normalizer_name],
+                    skip_empty=rule.get("skip_empty", False),
+                    each=rule.get("each", False),
+                    when=rule.get("when"),
+                )
+            )
+        return compiled
+
     @staticmethod
     def convert_to_proper_case(text: str) -> str:
         """Convert ALL CAPS text to proper case, handling special cases."""
         if not text or not text.isupper():
             return text
 
-        # Handle special cases like "PO Box", "LLC", etc.
-        special_cases = {
-            "PO": "PO",
-            "LLC": "LLC",
-            "INC": "Inc",
-            "JR": "Jr",
-            "SR": "Sr",
-            "II": "II",
-            "III": "III",
-            "IV": "IV",
-        }
-
-        words = text.split()
         result = []
-
-        for word in words:
-            upper_word = word.upper()
-            if upper_word in special_cases:
-                result.append(special_cases[upper_word])
-            else:
-                # Title case the word
-                result.append(word.capitalize())
+        for word in text.split():
+            special = PROPER_CASE_SPECIAL_CASES.get(word.upper())
+            # Title case the word unless it has fixed casing (PO Box, LLC, ...)
+            result.append(special if special is not None else word.capitalize())
 
         return " ".join(result)
 
@@ -60,11 +223,10 @@ class DonationValidator:
             return zip_code
 
         # Remove any non-digit characters except dash
-        cleaned = re.sub(r"[^\d-]", "", zip_code)
+        cleaned = _ZIP_DISALLOWED_RE.sub("", zip_code)
 
         # Split on dash to separate main ZIP from extension
-        parts = cleaned.split("-")
-        main_zip = parts[0]
+        main_zip = cleaned.split("-", 1)[0]
 
         # Ensure 5 digits with leading zeros if needed
         if main_zip and len(main_zip) <= 5:
@@ -83,87 +245,67 @@ class DonationValidator:
             Validated and cleaned entry
         """
         validated = entry.copy()
+        timed = logger.isEnabledFor(logging.DEBUG)
 
-        # Validate PaymentInfo
-        if "PaymentInfo" in validated:
-            payment = validated["PaymentInfo"]
-
-            # Clean check number
-            if "Payment_Ref" in payment and payment.get("Payment_Method") in [
-                "handwritten check",
-                "printed check",
-            ]:
-                payment["Payment_Ref"] = self.clean_check_number(payment["Payment_Ref"])
-
-            # Ensure amount is a float
-            if "Amount" in payment:
-                try:
-                    payment["Amount"] = float(payment["Amount"])
-                except (ValueError, TypeError):
-                    payment["Amount"] = None
-
-        # Validate PayerInfo
-        if "PayerInfo" in validated:
-            payer = validated["PayerInfo"]
-
-            # Convert ALL CAPS fields to proper case
-            for field in ["Salutation", "Organization_Name"]:
-                if field in payer and payer[field]:
-                    payer[field] = self.convert_to_proper_case(payer[field])
-
-            # Handle aliases
-            if "Aliases" in payer and isinstance(payer["Aliases"], list):
-                payer["Aliases"] = [
-                    self.convert_to_proper_case(alias) for alias in payer["Aliases"]
-                ]
-
-        # Validate ContactInfo
-        if "ContactInfo" in validated:
-            contact = validated["ContactInfo"]
-
-            # Convert address fields to proper case
-            for field in ["Address_Line_1", "City"]:
-                if field in contact and contact[field]:
-                    contact[field] = self.convert_to_proper_case(contact[field])
-
-            # Normalize ZIP code
-            if "ZIP" in contact:
-                contact["ZIP"] = self.normalize_zip_code(contact["ZIP"])
-
-            # Clean phone number (basic - remove non-digits)
-            if "Phone" in contact and contact["Phone"]:
-                contact["Phone"] = re.sub(r"\D", "", contact["Phone"])
+        for section_name, rules in self.compiled_rules.items():
+            section = validated.get(section_name)
+            if not isinstance(section, dict):
+                continue
+
+            for rule in rules:
+                if timed:
+                    started = time.perf_counter()
+                    rule.apply(section)
+                    self.rule_timings[rule.name] += time.perf_counter() - started
+                else:
+                    rule.apply(section)
 
         return validated
 
-    def is_valid_entry(self, entry: Dict[str, Any]) -> bool:
+    @staticmethod
+    def dedup_key(entry: Dict[str, Any]) -> Optional[Tuple[str, float]]:
         """
-        Check if entry has required fields (Payment_Ref and Amount).
+        Build the Payment_Ref + Amount deduplication key for an entry.
 
         Args:
-            entry: Donation entry to check
+            entry: Donation entry to key
 
         Returns:
-            True if entry has required fields, False otherwise
+            (normalized_ref, amount) tuple, or None if the entry is invalid
+            (missing Payment_Ref or a non-positive/unparseable Amount)
         """
-        if "PaymentInfo" not in entry:
-            return False
-
-        payment = entry["PaymentInfo"]
+        payment = entry.get("PaymentInfo")
+        if not isinstance(payment, dict):
+            return None
 
-        # Check required fields
-        if not payment.get("Payment_Ref") or payment.get("Amount") is None:
-            return False
+        ref = payment.get("Payment_Ref")
+        amount = payment.get("Amount")
+        if not ref or amount is None:
+            return None
 
-        # Amount must be positive
         try:
-            amount = float(payment.get("Amount", 0))
-            if amount <= 0:
-                return False
+            amount = float(amount)
         except (ValueError, TypeError):
-            return False
+            return None
+        if amount <= 0:
+            return None
 
-        return True
+        # Normalize payment ref for comparison (remove leading zeros)
+        if isinstance(ref, str) and ref.isdigit():
+            ref = ref.lstrip("0") or "0"
+        return (ref, amount)
+
+    def is_valid_entry(self, entry: Dict[str, Any]) -> bool:
+        """
+        Check if entry has required fields (Payment_Ref and Amount).
+
+        Args:
+            entry: Donation entry to check
+
+        Returns:
+            True if entry has required fields, False otherwise
+        """
+        return self.dedup_key(entry) is not None
 
     def deduplicate_entries(
         self, entries: List[Dict[str, Any]]
@@ -179,31 +321,38 @@ class DonationValidator:
         Returns:
             Deduplicated list of entries
         """
-        # Group by unique key (Payment_Ref + Amount)
-        grouped = defaultdict(list)
+        return self._group_and_merge(entries, validate=False)
+
+    def _group_and_merge(
+        self, entries: List[Dict[str, Any]], validate: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Group entries by dedup key in one pass, optionally validating first.
+
+        Invalid entries are dropped. Groups keep first-seen order.
+
+        Args:
+            entries: Donation entries
+            validate: Whether to run validate_entry on each entry as it is keyed
+
+        Returns:
+            Deduplicated list of entries
+        """
+        grouped: Dict[Tuple[str, float], List[Dict[str, Any]]] = {}
 
         for entry in entries:
-            if not self.is_valid_entry(entry):
+            if validate:
+                entry = self.validate_entry(entry)
+            key = self.dedup_key(entry)
+            if key is None:
                 continue
-
-            payment = entry["PaymentInfo"]
-            # Normalize payment ref for comparison (remove leading zeros)
-            ref = payment["Payment_Ref"]
-            if ref and ref.isdigit():
-                ref = ref.lstrip("0") or "0"
-            key = (ref, float(payment["Amount"]))
-            grouped[key].append(entry)
+            grouped.setdefault(key, []).append(entry)
 
         # Merge duplicates
-        deduplicated = []
-        for duplicates in grouped.values():
-            if len(duplicates) == 1:
-                deduplicated.append(duplicates[0])
-            else:
-                merged = self._merge_entries(duplicates)
-                deduplicated.append(merged)
-
-        return deduplicated
+        return [
+            duplicates[0] if len(duplicates) == 1 else self._merge_entries(duplicates)
+            for duplicates in grouped.values()
+        ]
 
     def _merge_entries(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -265,16 +414,27 @@ class DonationValidator:
         """
         Process donation entries through validation and deduplication.
 
+        Validation, validity filtering and dedup keying happen in a single pass
+        over the raw entries.
+
         Args:
             raw_entries: List of raw donation entries from Gemini
 
         Returns:
             List of validated and deduplicated entries
         """
-        # First validate and clean each entry
-        validated_entries = [self.validate_entry(entry) for entry in raw_entries]
-
-        # Then deduplicate (this already filters invalid entries)
-        deduplicated = self.deduplicate_entries(validated_entries)
+        deduplicated = self._group_and_merge(raw_entries, validate=True)
+
+        if logger.isEnabledFor(logging.DEBUG) and self.rule_timings:
+            timings = ", ".join(
+                f"{name}={seconds * 1000:.2f}ms"
+                for name, seconds in sorted(
+                    self.rule_timings.items(), key=lambda item: -item[1]
+                )
+            )
+            logger.debug(
+                f"Validated {len(raw_entries)} entries into "
+                f"{len(deduplicated)} unique; rule timings: {timings}"
+            )
 
         return deduplicated
@@ -8,10 +8,22 @@ import os
 import signal
 import sys
 import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
 
-from .config import session_backend, storage_backend
+from .checkpoint import RedisCheckpointStore
+from .config import Config, session_backend, storage_backend
+from .customer_mirror import RedisCustomerMirror, refresh_stale_mirrors
 from .donation_processor import process_donation_documents
-from .job_queue import JobQueue
+from .geminiservice import extract_donations_from_documents
+from .job_queue import (
+    FAN_OUT_FILES_PER_JOB,
+    JOB_KIND_EXTRACT,
+    JOB_KIND_GATHER,
+    JobQueue,
+)
+from .job_tracker import JobStage
+from .quickbooks_service import QuickBooksClient
 from .redis_connection import create_redis_client
 from .storage import S3Storage
 
@@ -37,7 +49,9 @@ class Worker:
             logger.error("Failed to connect to Redis - worker cannot start")
             sys.exit(1)
 
-        self.job_queue = JobQueue(self.redis_client)
+        self.job_queue = JobQueue(self.redis_client, session_backend)
+        self.checkpoint_store = RedisCheckpointStore(self.redis_client)
+        self.customer_mirror = RedisCustomerMirror(self.redis_client)
         self.running = True
         self.current_job = None
 
@@ -62,6 +76,10 @@ class Worker:
     def process_job(self, job_data: dict) -> bool:
         """Process a single job.
 
+        Regular jobs for large uploads are fanned out into file-group
+        extraction sub-jobs (see JobQueue.fan_out); the resulting gather job
+        merges their extractions and finishes the upload.
+
         Args:
             job_data: Job information from queue
 
@@ -71,6 +89,7 @@ class Worker:
         job_id = job_data.get("job_id")
         upload_id = job_data.get("upload_id")
         session_id = job_data.get("session_id")
+        kind = job_data.get("kind")
 
         if not upload_id:
             raise ValueError("Missing upload_id in job data")
@@ -83,75 +102,65 @@ class Worker:
             if not metadata:
                 raise ValueError(f"Upload {upload_id} not found")
 
-            # Get file paths
-            from pathlib import Path as PathType
-            from typing import List, Union
+            if kind == JOB_KIND_EXTRACT:
+                return self._process_extract_job(job_data)
+
+            if kind == JOB_KIND_GATHER:
+                # Hand the merged sub-job extractions to the pipeline as its
+                # extraction checkpoint, so it resumes at validation
+                donations = self.job_queue.get_group_results(job_id)
+                if not self.checkpoint_store.save_stage(
+                    upload_id, JobStage.EXTRACTING, donations
+                ):
+                    raise RuntimeError(f"Failed to store gathered results for {job_id}")
+                logger.info(
+                    f"Gathered {len(donations)} extracted donations for job {job_id}"
+                )
+                self._complete_upload(
+                    job_id,
+                    upload_id,
+                    session_id,
+                    [],
+                    files_processed=self.job_queue.get_group_file_count(job_id),
+                )
+                self.job_queue.clear_group(job_id)
+                return True
+
+            file_groups = self._plan_fan_out(upload_id)
+            if file_groups and self.job_queue.fan_out(job_data, file_groups):
+                # The gather job reports this job's completion later
+                job_data["fanned_out"] = True
+                return True
 
+            # Get file paths
+            temp_paths: List[Path] = []
             if isinstance(storage_backend, S3Storage):
                 # For S3, download files to temp directory
                 temp_paths = storage_backend.download_batch_to_temp(upload_id)
-                file_paths: List[Union[str, PathType]] = [str(p) for p in temp_paths]
+                file_paths: List[Union[str, Path]] = [str(p) for p in temp_paths]
             else:
                 # For local storage, use paths directly
                 raw_file_paths = storage_backend.get_file_paths(upload_id)
                 file_paths = [
-                    PathType(p) if isinstance(p, str) else p for p in raw_file_paths
+                    Path(p) if isinstance(p, str) else p for p in raw_file_paths
                 ]
 
             logger.info(f"Processing {len(file_paths)} files for job {job_id}")
 
-            # Check for CSV path in local dev mode
-            csv_path = None
-            if os.getenv("LOCAL_DEV_MODE") == "true":
-                from pathlib import Path
-
-                csv_path = (
-                    Path(__file__).parent.parent
-                    / "src/tests/test_files/customer_contact_list.csv"
+            try:
+                self._complete_upload(
+                    job_id,
+                    upload_id,
+                    session_id,
+                    file_paths,
+                    files_processed=len(file_paths),
                 )
-                if csv_path.exists():
-                    logger.info(f"Local dev mode: Using CSV at {csv_path}")
-
-            # Process documents
-            (
-                processed_donations,
-                extraction_metadata,
-                display_donations,
-            ) = process_donation_documents(
-                file_paths, session_id=session_id, csv_path=csv_path
-            )
-
-            # Calculate final metadata
-            processing_metadata = {
-                "files_processed": len(file_paths),
-                "valid_count": extraction_metadata["valid_count"],
-                "raw_count": extraction_metadata["raw_count"],
-                "duplicate_count": extraction_metadata["duplicate_count"],
-                "matched_count": extraction_metadata.get("matched_count", 0),
-            }
-
-            # Update session with results
-            session_backend.update_upload_metadata(
-                upload_id,
-                {
-                    "status": "completed",
-                    "donations": display_donations,
-                    "raw_donations": processed_donations,
-                    "processing_metadata": processing_metadata,
-                    "summary": processing_metadata,  # Add summary for frontend
-                },
-            )
-
-            # Clean up temp files if using S3
-            if isinstance(storage_backend, S3Storage) and "temp_paths" in locals():
+            finally:
+                # Clean up temp files if using S3
                 for temp_path in temp_paths:
                     with contextlib.suppress(Exception):
                         temp_path.unlink()
 
-            logger.info(
-                f"Job {job_id} completed successfully. "
-                f"Processed {len(display_donations)} donations"
-            )
             return True
 
         except Exception as e:
@@ -165,6 +174,195 @@ class Worker:
 
             return False
 
+    def _plan_fan_out(self, upload_id: str) -> List[List[str]]:
+        """Split an upload's files into sub-job groups if it is worth fanning out.
+
+        Uploads that already have checkpoints are resumed in place instead.
+
+        Args:
+            upload_id: Upload to plan
+
+        Returns:
+            Stored filenames per sub-job, or an empty list to process in place
+        """
+        filenames = sorted(f["filename"] for f in storage_backend.list_files(upload_id))
+        if len(filenames) <= FAN_OUT_FILES_PER_JOB:
+            return []
+
+        if (
+            self.checkpoint_store.load_stage(upload_id, JobStage.VALIDATING) is not None
+            or self.checkpoint_store.load_stage(upload_id, JobStage.EXTRACTING)
+            is not None
+        ):
+            logger.info(f"Upload {upload_id} has checkpoints - resuming in place")
+            return []
+
+        return [
+            filenames[i : i + FAN_OUT_FILES_PER_JOB]
+            for i in range(0, len(filenames), FAN_OUT_FILES_PER_JOB)
+        ]
+
+    def _process_extract_job(self, job_data: dict) -> bool:
+        """Extract donations from one file group of a fanned-out upload.
+
+        Args:
+            job_data: Extraction sub-job from the queue
+
+        Returns:
+            True if the extraction result was recorded
+        """
+        upload_id = job_data["upload_id"]
+        filenames = job_data.get("filenames", [])
+
+        temp_paths: List[Path] = []
+        if isinstance(storage_backend, S3Storage):
+            for filename in filenames:
+                temp_paths.append(storage_backend.download_to_temp(upload_id, filename))
+            file_paths: List[Union[str, Path]] = [str(p) for p in temp_paths]
+        else:
+            file_paths = [
+                Path(storage_backend.get_file_path(upload_id, filename))
+                for filename in filenames
+            ]
+
+        try:
+            logger.info(
+                f"Extracting {len(file_paths)} files for sub-job {job_data['job_id']}"
+            )
+            donations = extract_donations_from_documents(file_paths)
+        finally:
+            for temp_path in temp_paths:
+                with contextlib.suppress(Exception):
+                    temp_path.unlink()
+
+        if not self.job_queue.record_sub_job_result(job_data, donations):
+            raise RuntimeError(
+                f"Failed to record result for sub-job {job_data['job_id']}"
+            )
+        return True
+
+    def _complete_upload(
+        self,
+        job_id: Optional[str],
+        upload_id: str,
+        session_id: Optional[str],
+        file_paths: List[Union[str, Path]],
+        files_processed: int,
+    ) -> None:
+        """Run the processing pipeline and store the upload's results.
+
+        Args:
+            job_id: Job being processed (for logging)
+            upload_id: Upload to process
+            session_id: Session ID for QuickBooks matching
+            file_paths: Files to extract (may be empty when resuming)
+            files_processed: File count reported in the processing metadata
+        """
+        # Check for CSV path in local dev mode
+        csv_path = None
+        if os.getenv("LOCAL_DEV_MODE") == "true":
+            csv_path = (
+                Path(__file__).parent.parent
+                / "src/tests/test_files/customer_contact_list.csv"
+            )
+            if csv_path.exists():
+                logger.info(f"Local dev mode: Using CSV at {csv_path}")
+
+        # Process documents
+        (
+            processed_donations,
+            extraction_metadata,
+            display_donations,
+        ) = process_donation_documents(
+            file_paths,
+            session_id=session_id,
+            csv_path=csv_path,
+            upload_id=upload_id,
+            checkpoint_store=self.checkpoint_store,
+        )
+
+        # Calculate final metadata
+        processing_metadata: Dict[str, Any] = {
+            "files_processed": files_processed,
+            "valid_count": extraction_metadata["valid_count"],
+            "raw_count": extraction_metadata["raw_count"],
+            "duplicate_count": extraction_metadata["duplicate_count"],
+            "matched_count": extraction_metadata.get("matched_count", 0),
+            "customer_lookups": extraction_metadata.get("customer_lookups", {}),
+        }
+
+        # Update session with results
+        session_backend.update_upload_metadata(
+            upload_id,
+            {
+                "status": "completed",
+                "donations": display_donations,
+                "raw_donations": processed_donations,
+                "processing_metadata": processing_metadata,
+                "summary": processing_metadata,  # Add summary for frontend
+            },
+        )
+
+        # Results are persisted, so a re-run no longer needs the checkpoints
+        self.checkpoint_store.clear(upload_id)
+
+        logger.info(
+            f"Job {job_id} completed successfully. "
+            f"Processed {len(display_donations)} donations"
+        )
+
+    def handle_job(self, job_data: dict) -> bool:
+        """Process a popped job and record its outcome in the queue.
+
+        Args:
+            job_data: Job information from queue
+
+        Returns:
+            True if the job succeeded, False otherwise
+        """
+        self.current_job = job_data
+        success = False
+
+        try:
+            success = self.process_job(job_data)
+        finally:
+            self.current_job = None
+
+        # Mark job as completed or failed
+        if success and job_data.get("fanned_out"):
+            self.job_queue.release_job(job_data)
+        elif success:
+            self.job_queue.complete_job(job_data)
+        else:
+            error_msg = (
+                job_data.get("error", "Job processing failed")
+                if "error" in job_data
+                else "Unknown error"
+            )
+            self.job_queue.fail_job(job_data, error_msg)
+            if job_data.get("parent_job_id"):
+                self.job_queue.fail_group(job_data, error_msg)
+
+        return success
+
+    def refresh_customer_mirrors(self) -> int:
+        """
+        Incrementally refresh stale QuickBooks customer mirrors.
+
+        Returns:
+            int: Number of realms refreshed
+        """
+        if not Config.CUSTOMER_MIRROR_ENABLED:
+            return 0
+        try:
+            refreshed = refresh_stale_mirrors(self.customer_mirror, QuickBooksClient)
+        except Exception as e:
+            logger.error(f"Customer mirror refresh failed: {e}")
+            return 0
+        if refreshed:
+            logger.info(f"Refreshed customer mirrors for {refreshed} realm(s)")
+        return refreshed
+
     def run(self):
         """Run the main worker loop."""
         logger.info("Worker starting main loop...")
@@ -182,6 +380,8 @@ class Worker:
                     stats = self.job_queue.get_queue_stats()
                     logger.info(f"Queue stats: {stats}")
 
+                    self.refresh_customer_mirrors()
+
                 # Wait for next job (blocking with timeout)
                 logger.debug("Waiting for next job...")
                 job_data = self.job_queue.pop_job(timeout=30)
@@ -190,25 +390,7 @@ class Worker:
                     # No job available, continue waiting
                     continue
 
-                # Process the job
-                self.current_job = job_data
-                success = False
-
-                try:
-                    success = self.process_job(job_data)
-                finally:
-                    self.current_job = None
-
-                # Mark job as completed or failed
-                if success:
-                    self.job_queue.complete_job(job_data)
-                else:
-                    error_msg = (
-                        job_data.get("error", "Job processing failed")
-                        if "error" in job_data
-                        else "Unknown error"
-                    )
-                    self.job_queue.fail_job(job_data, error_msg)
+                self.handle_job(job_data)
 
             except Exception as e:
                 logger.error(f"Worker error: {e}", exc_info=True)